@@ -2,19 +2,102 @@
 Palo Alto Firewall API Client
 Handles all communication with Palo Alto firewalls via XML API
 """
+import io
+import logging
+import time
 import requests
 import xml.etree.ElementTree as ET
 import urllib3
+from typing import List, NamedTuple, Optional
 from urllib.parse import quote
 from config import config
+from models.log_record import UrlLogRecord
+from utils.metrics import (API_ERRORS, API_REQUEST_SECONDS, LOG_ENTRIES_PARSED, LOG_JOB_POLLS,
+                           LOG_JOB_SECONDS, LOG_PARSE_SECONDS)
+from utils.timing import span
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+logger = logging.getLogger(__name__)
+
 class PaloAltoAPIError(Exception):
     """Custom exception for Palo Alto API errors"""
     pass
 
+class ParsedLogResponse(NamedTuple):
+    """Outcome of parsing a type=log response"""
+    status: Optional[str]
+    job_id: Optional[str]
+    msg: Optional[str]
+    records: List[UrlLogRecord]
+
+def parse_url_log_response(content) -> ParsedLogResponse:
+    """
+    Parse a type=log XML response into compact UrlLogRecord entries
+    
+    Entries are converted as soon as the parser closes them and then
+    cleared, so the full Element tree with every log column is never
+    held in memory.
+    
+    Args:
+        content: Raw response body (bytes or str)
+        
+    Returns:
+        ParsedLogResponse with status, job id, message and records
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    
+    started = time.perf_counter()
+    url_sources = config.URL_SOURCES
+    wanted = set(url_sources) | {'misc', 'host', 'action', 'receive_time', 'srcuser', 'src'}
+    records = []
+    
+    events = ET.iterparse(io.BytesIO(content), events=('end',))
+    for _, elem in events:
+        if elem.tag != 'entry':
+            continue
+        
+        fields = {}
+        for child in elem:
+            if child.tag in wanted and child.tag not in fields:
+                fields[child.tag] = child.text
+        
+        url_text = None
+        for field_name in url_sources:
+            value = fields.get(field_name)
+            if value:
+                url_text = value
+                break
+        
+        records.append(UrlLogRecord(
+            url=url_text,
+            misc=fields.get('misc'),
+            host=fields.get('host'),
+            action=fields.get('action'),
+            receive_time=fields.get('receive_time'),
+            source=fields.get('srcuser') or fields.get('src')
+        ))
+        elem.clear()
+    
+    root = events.root
+    job_elem = root.find('.//job')
+    msg_elem = root.find('.//msg')
+    
+    LOG_PARSE_SECONDS.inc(time.perf_counter() - started)
+    LOG_ENTRIES_PARSED.inc(len(records))
+    return ParsedLogResponse(
+        status=root.get('status'),
+        job_id=job_elem.text if job_elem is not None else None,
+        msg=msg_elem.text if msg_elem is not None else None,
+        records=records
+    )
+
+def build_member_list_xml(urls) -> str:
+    """<list> element of a custom URL category, members sorted"""
+    return "<list>" + "".join(f"<member>{url}</member>" for url in sorted(urls)) + "</list>"
+
 class PaloAltoAPI:
     """Palo Alto Firewall API Client"""
     
@@ -23,14 +106,48 @@ class PaloAltoAPI:
         self.username = username
         self.password = password
         self.api_key = None
-        self.base_url = f"https://{hostname}/api"
+        port = f":{config.API_PORT}" if config.API_PORT else ''
+        self.base_url = f"{config.API_SCHEME}://{hostname}{port}/api"
+    
+    def _request(self, method, url, api_type, timeout):
+        """
+        Send one XML API request, recording its latency and failures
+        
+        Args:
+            method: 'GET' or 'POST'
+            url: Full request URL
+            api_type: Metrics label naming the kind of call
+            timeout: Request timeout in seconds
+            
+        Returns:
+            requests.Response (raise_for_status already checked)
+        """
+        started = time.perf_counter()
+        with span(f"api.{api_type}"):
+            try:
+                response = requests.request(method, url, verify=False, timeout=timeout)
+                response.raise_for_status()
+                return response
+            except requests.exceptions.Timeout:
+                API_ERRORS.labels(api_type, 'timeout').inc()
+                raise
+            except requests.exceptions.ConnectionError:
+                API_ERRORS.labels(api_type, 'connection').inc()
+                raise
+            except requests.exceptions.HTTPError:
+                API_ERRORS.labels(api_type, 'http_status').inc()
+                raise
+            except requests.exceptions.RequestException:
+                API_ERRORS.labels(api_type, 'request').inc()
+                raise
+            finally:
+                API_REQUEST_SECONDS.labels(api_type).observe(time.perf_counter() - started)
         
     def get_api_key(self):
         """Authenticate and retrieve API key"""
         try:
             auth_url = f"{self.base_url}/?type=keygen&user={self.username}&password={self.password}"
-            response = requests.get(auth_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', auth_url, 'keygen', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -49,8 +166,7 @@ class PaloAltoAPI:
         """Test basic API connectivity and permissions"""
         try:
             test_url = f"{self.base_url}/?type=op&cmd=<show><system><info></info></system></show>&key={self.api_key}"
-            response = requests.get(test_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', test_url, 'op', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -61,8 +177,7 @@ class PaloAltoAPI:
                 
                 # Try version check as fallback
                 simple_test_url = f"{self.base_url}/?type=version&key={self.api_key}"
-                simple_response = requests.get(simple_test_url, verify=False, timeout=config.API_TIMEOUT)
-                simple_response.raise_for_status()
+                simple_response = self._request('GET', simple_test_url, 'version', config.API_TIMEOUT)
                 
                 simple_root = ET.fromstring(simple_response.text)
                 if simple_root.get('status') == 'success':
@@ -78,26 +193,23 @@ class PaloAltoAPI:
         try:
             log_url = f"{self.base_url}/?type=log&log-type=url&key={self.api_key}&query={quote(query)}&nlogs={nlogs}"
             
-            response = requests.get(log_url, verify=False, timeout=timeout)
-            response.raise_for_status()
+            response = self._request('GET', log_url, 'log_query', timeout)
             
-            root = ET.fromstring(response.text)
-            if root.get('status') == 'success':
+            with span('parse_log_xml') as phase:
+                parsed = parse_url_log_response(response.content)
+                phase.set('entries', len(parsed.records))
+            if parsed.status == 'success':
                 # Check for direct results first
-                logs = root.findall('.//entry')
-                if len(logs) > 0:
-                    return {'type': 'direct', 'data': root, 'entries': logs}
+                if parsed.records:
+                    return {'type': 'direct', 'entries': parsed.records}
                 else:
                     # Job required
-                    job_elem = root.find('.//job')
-                    if job_elem is not None:
-                        return {'type': 'job', 'job_id': job_elem.text}
+                    if parsed.job_id is not None:
+                        return {'type': 'job', 'job_id': parsed.job_id}
                     else:
                         return {'type': 'empty', 'data': None}
             else:
-                error_msg = root.find('.//msg')
-                error_text = error_msg.text if error_msg is not None else 'Unknown'
-                raise PaloAltoAPIError(f"Log query failed: {error_text}")
+                raise PaloAltoAPIError(f"Log query failed: {parsed.msg or 'Unknown'}")
                 
         except requests.exceptions.RequestException as e:
             raise PaloAltoAPIError(f"Log query request failed: {str(e)}")
@@ -105,17 +217,21 @@ class PaloAltoAPI:
             raise PaloAltoAPIError(f"Log query XML parsing error: {str(e)}")
     
     def wait_for_job(self, job_id, max_wait, job_name="Job"):
-        """Wait for a job to complete and return results"""
-        import time
-        
-        print(f"[DEBUG] {job_name}: Waiting for job {job_id} (max: {max_wait}s)...")
+        """Wait for a job to complete and return its UrlLogRecord list (None on failure)"""
+        logger.debug("%s: Waiting for job %s (max: %ss)...", job_name, job_id, max_wait)
         wait_time = 0
+        polls = 0
+        started = time.perf_counter()
+        
+        def finished(outcome):
+            LOG_JOB_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+            LOG_JOB_POLLS.labels(outcome).observe(polls)
         
         while wait_time < max_wait:
+            polls += 1
             try:
                 status_url = f"{self.base_url}/?type=op&cmd=<show><jobs><id>{job_id}</id></jobs></show>&key={self.api_key}"
-                status_response = requests.get(status_url, verify=False, timeout=config.STATUS_CHECK_TIMEOUT)
-                status_response.raise_for_status()
+                status_response = self._request('GET', status_url, 'log_job_status', config.STATUS_CHECK_TIMEOUT)
                 
                 status_root = ET.fromstring(status_response.text)
                 if status_root.get('status') == 'success':
@@ -126,58 +242,63 @@ class PaloAltoAPI:
                         status_text = status.text if status is not None else 'Unknown'
                         progress_text = progress.text if progress is not None else '0'
                         
-                        print(f"[DEBUG] {job_name}: Job {job_id} - {status_text}, {progress_text}% (waited {wait_time}s)")
+                        logger.debug("%s: Job %s - %s, %s%% (waited %ss)", job_name, job_id, status_text, progress_text, wait_time)
                         
                         # COMPLETED - Get results
                         if status_text == 'FIN':
-                            print(f"[DEBUG] {job_name}: Job {job_id} COMPLETED!")
+                            logger.debug("%s: Job %s COMPLETED!", job_name, job_id)
+                            finished('fin')
                             return self.get_job_results(job_id)
                         
                         # FAILED - Stop immediately
                         elif status_text == 'FAIL':
-                            print(f"[DEBUG] {job_name}: Job {job_id} FAILED")
+                            logger.debug("%s: Job %s FAILED", job_name, job_id)
+                            finished('fail')
                             return None
                         
                         # Continue waiting for ACT, PEND, etc.
                     else:
-                        print(f"[DEBUG] {job_name}: Job {job_id} - no job info found")
+                        logger.debug("%s: Job %s - no job info found", job_name, job_id)
+                        finished('error')
                         return None
                 else:
-                    print(f"[DEBUG] {job_name}: Job {job_id} - API status error")
+                    logger.debug("%s: Job %s - API status error", job_name, job_id)
+                    finished('error')
                     return None
                 
-                time.sleep(config.JOB_CHECK_INTERVAL)
+                with span('job_check_sleep'):
+                    time.sleep(config.JOB_CHECK_INTERVAL)
                 wait_time += config.JOB_CHECK_INTERVAL
                 
             except Exception as e:
-                print(f"[DEBUG] {job_name}: Job status check error - {e}")
-                time.sleep(config.JOB_CHECK_INTERVAL)
+                logger.debug("%s: Job status check error - %s", job_name, e)
+                with span('job_check_sleep'):
+                    time.sleep(config.JOB_CHECK_INTERVAL)
                 wait_time += config.JOB_CHECK_INTERVAL
                 continue
         
-        print(f"[DEBUG] {job_name}: Job {job_id} timed out after {max_wait} seconds")
+        logger.debug("%s: Job %s timed out after %s seconds", job_name, job_id, max_wait)
+        finished('timeout')
         return None
     
     def get_job_results(self, job_id):
-        """Get job results"""
+        """Get job results as a list of UrlLogRecord (None on failure)"""
         try:
             result_url = f"{self.base_url}/?type=log&action=get&job-id={job_id}&key={self.api_key}"
-            result_response = requests.get(result_url, verify=False, timeout=config.API_TIMEOUT)
-            result_response.raise_for_status()
+            result_response = self._request('GET', result_url, 'log_job_result', config.API_TIMEOUT)
             
-            result_root = ET.fromstring(result_response.text)
-            if result_root.get('status') == 'success':
-                logs = result_root.findall('.//entry')
-                print(f"[DEBUG] Job {job_id} results: {len(logs)} entries retrieved")
-                return result_root
+            with span('parse_log_xml') as phase:
+                parsed = parse_url_log_response(result_response.content)
+                phase.set('entries', len(parsed.records))
+            if parsed.status == 'success':
+                logger.debug("Job %s results: %s entries retrieved", job_id, len(parsed.records))
+                return parsed.records
             else:
-                error_msg = result_root.find('.//msg')
-                error_text = error_msg.text if error_msg is not None else 'Unknown error'
-                print(f"[DEBUG] Job {job_id} result retrieval failed: {error_text}")
+                logger.debug("Job %s result retrieval failed: %s", job_id, parsed.msg or 'Unknown error')
                 return None
                 
         except Exception as e:
-            print(f"[DEBUG] Exception getting job {job_id} results: {e}")
+            logger.warning("Exception getting job %s results: %s", job_id, e)
             return None
     
     def get_custom_url_categories(self):
@@ -187,8 +308,7 @@ class PaloAltoAPI:
             
             # Get shared categories
             shared_url = f"{self.base_url}/?type=config&action=get&xpath=/config/shared/profiles/custom-url-category&key={self.api_key}"
-            response = requests.get(shared_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', shared_url, 'config_get', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -204,8 +324,7 @@ class PaloAltoAPI:
             
             # Get vsys categories
             vsys_list_url = f"{self.base_url}/?type=config&action=get&xpath=/config/devices/entry[@name='localhost.localdomain']/vsys&key={self.api_key}"
-            response = requests.get(vsys_list_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', vsys_list_url, 'config_get', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -214,8 +333,7 @@ class PaloAltoAPI:
                     vsys_name = vsys_entry.get('name', 'vsys1')
                     
                     vsys_url = f"{self.base_url}/?type=config&action=get&xpath=/config/devices/entry[@name='localhost.localdomain']/vsys/entry[@name='{vsys_name}']/profiles/custom-url-category&key={self.api_key}"
-                    response = requests.get(vsys_url, verify=False, timeout=config.API_TIMEOUT)
-                    response.raise_for_status()
+                    response = self._request('GET', vsys_url, 'config_get', config.API_TIMEOUT)
                     
                     vsys_root = ET.fromstring(response.text)
                     if vsys_root.get('status') == 'success':
@@ -241,8 +359,7 @@ class PaloAltoAPI:
             xpath = category_info['xpath'] + "/list"
             get_url = f"{self.base_url}/?type=config&action=get&xpath={xpath}&key={self.api_key}"
             
-            response = requests.get(get_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', get_url, 'config_get', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -254,33 +371,30 @@ class PaloAltoAPI:
         except Exception as e:
             raise PaloAltoAPIError(f"Error getting category URLs: {str(e)}")
     
-    def update_category_urls(self, category_info, new_urls):
+    def update_category_urls(self, category_info, new_urls, existing_urls=None):
         """Update URL category with new URLs (preserving existing ones)"""
         try:
-            # Get existing URLs
-            existing_urls = self.get_category_urls(category_info)
+            # Get existing URLs (unless the caller has just read them)
+            if existing_urls is None:
+                existing_urls = self.get_category_urls(category_info)
             
             # Combine existing and new URLs, removing duplicates
-            all_urls = list(set(existing_urls + new_urls))
+            existing_set = set(existing_urls)
+            all_urls = list(existing_set.union(new_urls))
             
             # Check if any new URLs were actually added
-            newly_added = [url for url in new_urls if url not in existing_urls]
+            newly_added = [url for url in new_urls if url not in existing_set]
             
             if not newly_added:
                 return False, "No new URLs to add - all URLs already exist in the category"
             
-            # Build XML for the list
-            list_xml = "<list>"
-            for url in sorted(all_urls):
-                list_xml += f"<member>{url}</member>"
-            list_xml += "</list>"
+            list_xml = build_member_list_xml(all_urls)
             
             # Update the category
             xpath = category_info['xpath'] + "/list"
             update_url = f"{self.base_url}/?type=config&action=edit&xpath={xpath}&element={quote(list_xml)}&key={self.api_key}"
             
-            response = requests.post(update_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('POST', update_url, 'config_edit', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -297,8 +411,7 @@ class PaloAltoAPI:
         try:
             commit_url = f"{self.base_url}/?type=commit&cmd=<commit></commit>&key={self.api_key}"
             
-            response = requests.post(commit_url, verify=False, timeout=config.COMMIT_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('POST', commit_url, 'commit', config.COMMIT_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -317,8 +430,7 @@ class PaloAltoAPI:
         try:
             status_url = f"{self.base_url}/?type=op&cmd=<show><jobs><id>{job_id}</id></jobs></show>&key={self.api_key}"
             
-            response = requests.get(status_url, verify=False, timeout=config.API_TIMEOUT)
-            response.raise_for_status()
+            response = self._request('GET', status_url, 'commit_status', config.API_TIMEOUT)
             
             root = ET.fromstring(response.text)
             if root.get('status') == 'success':
@@ -351,21 +463,20 @@ class PaloAltoAPI:
             
             for i, test_url in enumerate(approaches):
                 try:
-                    print(f"[DEBUG] Testing URL logs approach {i+1}")
-                    response = requests.get(test_url, verify=False, timeout=config.API_TIMEOUT)
-                    response.raise_for_status()
+                    logger.debug("Testing URL logs approach %s", i+1)
+                    response = self._request('GET', test_url, 'log_probe', config.API_TIMEOUT)
                     
                     root = ET.fromstring(response.text)
                     if root.get('status') == 'success':
                         job_elem = root.find('.//job')
                         if job_elem is not None:
                             job_id = job_elem.text
-                            print(f"[DEBUG] URL logs approach {i+1} got job ID: {job_id}")
+                            logger.debug("URL logs approach %s got job ID: %s", i+1, job_id)
                             available_logs['url'] = f"Job queued: {job_id}"
                             break
                         else:
                             entries = root.findall('.//entry')
-                            print(f"[DEBUG] URL logs approach {i+1} found {len(entries)} entries")
+                            logger.debug("URL logs approach %s found %s entries", i+1, len(entries))
                             if len(entries) > 0:
                                 available_logs['url'] = len(entries)
                                 break
@@ -374,11 +485,11 @@ class PaloAltoAPI:
                     else:
                         error_msg = root.find('.//msg')
                         error_text = error_msg.text if error_msg is not None else 'Unknown error'
-                        print(f"[DEBUG] URL logs approach {i+1} error: {error_text}")
+                        logger.debug("URL logs approach %s error: %s", i+1, error_text)
                         available_logs['url'] = f"Approach {i+1}: Error - {error_text}"
                         
                 except Exception as e:
-                    print(f"[DEBUG] URL logs approach {i+1} exception: {e}")
+                    logger.debug("URL logs approach %s exception: %s", i+1, e)
                     available_logs['url'] = f"Approach {i+1}: Exception - {str(e)}"
                     continue
             
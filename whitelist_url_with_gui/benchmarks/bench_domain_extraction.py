@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch domain extraction
+Times SearchService._extract_exact_domain per entry against
+utils.domain_extractor on growing batches of log-like URLs. That both give
+the same domains is checked by tests/test_domain_extractor.py.
+
+Usage:
+    python benchmarks/bench_domain_extraction.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.search_service import SearchService
+from utils.domain_extractor import DomainExtractor
+
+
+def log_like_urls(size: int, seed: int):
+    """URLs with the heavy repetition real block logs have"""
+    rng = random.Random(seed)
+    distinct = [f"https://s{i}.youtube.com/watch?v={i}&r=cdn{i % 7}.twitch.tv/x" if i % 3 == 0
+                else f"img{i}.example{i % 50}.com/p/{i}?q=youtube" if i % 3 == 1
+                else f"video{i}.twitch.tv:443/live" for i in range(max(size // 20, 10))]
+    weights = [1.0 / (rank + 1) for rank in range(len(distinct))]
+    return rng.choices(distinct, weights=weights, k=size)
+
+
+def bench(sizes):
+    service = SearchService(api_client=None)
+    terms = ['youtube', 'twitch']
+    print(f"\n  {'rows':>8} {'reference ms':>13} {'batch ms':>9} {'speedup':>8}")
+    for size in sizes:
+        urls = log_like_urls(size, seed=size)
+
+        start = time.perf_counter()
+        for u in urls:
+            if service._url_contains_any_term(u, terms):
+                service._extract_exact_domain(u, terms)
+        ref_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        DomainExtractor(terms).extract_many(urls)
+        batch_time = time.perf_counter() - start
+
+        print(f"  {size:8d} {ref_time * 1000:13.1f} {batch_time * 1000:9.1f} {ref_time / batch_time:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Domain extraction benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    bench(args.sizes)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
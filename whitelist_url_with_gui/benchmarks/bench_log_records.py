@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Element-based log entries vs compact UrlLogRecord
+Compares parse time, processing time and peak memory of the old
+ElementTree path with the streaming UrlLogRecord path.
+
+Usage:
+    python benchmarks/bench_log_records.py [--sizes 3000 30000] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from api.palo_alto_client import parse_url_log_response
+from services.search_service import SearchService
+
+SEARCH_TERMS = 'youtube, twitch'
+DOMAINS = ['www.youtube.com', 'i.ytimg.youtube.com', 'twitch.tv', 'static.twitchcdn.net',
+           'example.org', 'cdn.example.net', 'news.site.de', 'api.service.io']
+
+
+def build_log_xml(count: int, seed: int = 42) -> bytes:
+    """Build a type=log action=get response with count URL log entries"""
+    rng = random.Random(seed)
+    parts = ['<response status="success"><result><job><id>1</id><status>FIN</status></job>'
+             f'<log><logs count="{count}" progress="100">']
+    for i in range(count):
+        domain = rng.choice(DOMAINS)
+        action = rng.choice(config.VALID_ACTIONS)
+        parts.append(
+            f'<entry logid="{i}"><domain>1</domain><receive_time>2025/07/01 10:{i % 60:02d}:00</receive_time>'
+            f'<serial>0123456789</serial><seqno>{i}</seqno><type>THREAT</type><subtype>url</subtype>'
+            f'<src>10.0.{i % 255}.{i % 200}</src><dst>203.0.113.{i % 250}</dst><rule>allow-web</rule>'
+            f'<srcuser>corp\\user{i % 300}</srcuser><app>web-browsing</app><from>trust</from><to>untrust</to>'
+            f'<sport>{40000 + i % 20000}</sport><dport>443</dport><action>{action}</action>'
+            f'<misc>{domain}/path/{i}?q=1</misc><category>streaming-media</category>'
+            f'<severity>informational</severity><direction>client-to-server</direction>'
+            f'<src-location>10.0.0.0-10.255.255.255</src-location><dst-location>United States</dst-location>'
+            f'<url_idx>1</url_idx><contenttype>text/html</contenttype></entry>'
+        )
+    parts.append('</logs></log></result></response>')
+    return ''.join(parts).encode('utf-8')
+
+
+def element_parse(content: bytes):
+    """Previous client path - full tree, all columns"""
+    root = ET.fromstring(content.decode('utf-8'))
+    return root, root.findall('.//entry')
+
+
+def element_process(service: SearchService, entries, blocked_urls):
+    """Previous _process_log_entries inner loop on Element entries"""
+    parsed_terms = service._parse_search_terms(SEARCH_TERMS)
+    action_counts = {}
+    matches = 0
+    for log_entry in entries:
+        url_text = None
+        for field_name in config.URL_SOURCES:
+            url_elem = log_entry.find(field_name)
+            if url_elem is not None and url_elem.text:
+                url_text = url_elem.text
+                break
+        action_elem = log_entry.find('action')
+        action_text = action_elem.text if action_elem is not None else 'unknown'
+        action_counts[action_text] = action_counts.get(action_text, 0) + 1
+        if url_text and service._url_contains_any_term(url_text, parsed_terms):
+            found_domain = service._extract_exact_domain(url_text, parsed_terms)
+            if found_domain and len(found_domain) > config.MIN_DOMAIN_LENGTH:
+                blocked_urls.add(found_domain)
+                matches += 1
+    return matches
+
+
+def record_parse(content: bytes):
+    """Streaming parser producing UrlLogRecord tuples"""
+    return parse_url_log_response(content).records
+
+
+def measure(fn, repeat: int):
+    """Best wall time over repeat runs and the last return value"""
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def measure_memory(fn):
+    """Peak traced allocation while fn runs, with its result still alive"""
+    tracemalloc.start()
+    value = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return peak
+
+
+def run(size: int, repeat: int):
+    content = build_log_xml(size)
+    service = SearchService(api_client=None)
+    quiet = io.StringIO()
+
+    el_parse_time, (_, entries) = measure(lambda: element_parse(content), repeat)
+    rec_parse_time, records = measure(lambda: record_parse(content), repeat)
+
+    el_urls, rec_urls = set(), set()
+    el_proc_time, el_matches = measure(lambda: element_process(service, entries, el_urls), repeat)
+    with contextlib.redirect_stdout(quiet):
+        rec_proc_time, rec_matches = measure(
+            lambda: service._process_log_entries(records, SEARCH_TERMS, rec_urls, 'bench'), repeat)
+
+    assert el_urls == rec_urls and el_matches == rec_matches, 'paths disagree on results'
+
+    el_peak = measure_memory(lambda: element_parse(content))
+    rec_peak = measure_memory(lambda: record_parse(content))
+
+    print(f"\n{size} entries ({len(content) / 1024:.0f} KiB XML), {len(rec_urls)} domains")
+    print(f"  {'':12} {'parse ms':>10} {'process ms':>11} {'peak MiB':>9}")
+    print(f"  {'Element':12} {el_parse_time * 1000:10.1f} {el_proc_time * 1000:11.1f} {el_peak / 2**20:9.2f}")
+    print(f"  {'UrlLogRecord':12} {rec_parse_time * 1000:10.1f} {rec_proc_time * 1000:11.1f} {rec_peak / 2**20:9.2f}")
+    print(f"  speedup parse x{el_parse_time / rec_parse_time:.2f}, "
+          f"process x{el_proc_time / rec_proc_time:.2f}, memory x{el_peak / rec_peak:.2f} smaller")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Element vs UrlLogRecord benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3000, 30000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark: print-based debug output vs leveled, queued logging
+Runs a full dual-action search (2 actions x all timeout attempts) against a
+fake firewall that returns the same log entries to every query, and
+reports the CPU each search costs with:
+
+    print      the previous behaviour - every [DEBUG] line formatted and
+               written to unbuffered stdout from the request thread
+    debug      logging at DEBUG through the queue handler (--debug mode)
+    info       logging at INFO through the queue handler (production)
+
+Usage:
+    python benchmarks/bench_logging.py [--entries 3000] [--searches 5]
+"""
+import argparse
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_log_records import SEARCH_TERMS, build_log_xml
+from config import config
+from api.palo_alto_client import parse_url_log_response
+import services.search_service as search_module
+from services.search_service import SearchService
+
+
+class FakeFirewall:
+    """Answers every log query directly with the same entries"""
+
+    hostname = 'bench-fw'
+
+    def __init__(self, records):
+        self.records = records
+
+    def execute_log_query(self, query, nlogs, timeout):
+        return {'type': 'direct', 'entries': self.records}
+
+
+class PrintLogger:
+    """Stands in for the previous print(f"[DEBUG] ...") calls"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def isEnabledFor(self, level):
+        return True
+
+    def _emit(self, tag, msg, args):
+        print(f"[{tag}] {msg % args if args else msg}", file=self.stream)
+
+    def debug(self, msg, *args, **kwargs):
+        self._emit('DEBUG', msg, args)
+
+    def info(self, msg, *args, **kwargs):
+        self._emit('LOG', msg, args)
+
+    def warning(self, msg, *args, **kwargs):
+        self._emit('DEBUG', msg, args)
+
+    error = exception = warning
+
+
+def queued_logger(path: str, level: int):
+    """Module logger wired like setup_server_logging()"""
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(config.LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    logger = logging.getLogger(f'bench.{level}')
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger, listener
+
+
+def run_searches(service: SearchService, searches: int):
+    """Request-thread wall seconds per search and the found URLs"""
+    wall_start = time.perf_counter()
+    urls = None
+    for _ in range(searches):
+        result = service._run_dual_action_search(SEARCH_TERMS, service._parse_search_terms(SEARCH_TERMS))
+        urls = result.urls
+    return (time.perf_counter() - wall_start) / searches, urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='print vs logging benchmark')
+    parser.add_argument('--entries', type=int, default=3000, help='Log entries per query')
+    parser.add_argument('--searches', type=int, default=5)
+    args = parser.parse_args()
+
+    config.ATTEMPT_WAIT_TIME = 0
+    records = parse_url_log_response(build_log_xml(args.entries)).records
+    service = SearchService(FakeFirewall(records))
+    queries = 2 * len(config.SEARCH_TIMEOUT_ATTEMPTS)
+    original_logger = search_module.logger
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('print', 'debug', 'info'):
+            path = os.path.join(tmp, f'{name}.log')
+            listener = None
+            if name == 'print':
+                # PYTHONUNBUFFERED=1 - one write per line
+                stream = open(path, 'w', buffering=1)
+                search_module.logger = PrintLogger(stream)
+            else:
+                stream = None
+                search_module.logger, listener = queued_logger(
+                    path, logging.DEBUG if name == 'debug' else logging.INFO)
+
+            # process_time also counts the listener thread
+            cpu_start = time.process_time()
+            wall, urls = run_searches(service, args.searches)
+            if listener is not None:
+                listener.stop()  # Include the listener's remaining work in the CPU time
+            if stream is not None:
+                stream.close()
+            cpu = (time.process_time() - cpu_start) / args.searches
+            results[name] = (cpu, wall, os.path.getsize(path), urls)
+
+    search_module.logger = original_logger
+    assert results['print'][3] == results['info'][3] == results['debug'][3], 'search results differ'
+
+    print(f"\n{args.entries} entries x {queries} queries per search, {args.searches} searches, "
+          f"{len(results['info'][3])} domains found")
+    print(f"  {'mode':8} {'CPU ms/search':>14} {'request ms':>11} {'log KiB':>8}")
+    for name, (cpu, wall, size, _) in results.items():
+        print(f"  {name:8} {cpu * 1000:14.1f} {wall * 1000:11.1f} {size / 1024:8.1f}")
+    base = results['print'][0]
+    print(f"  production (info) saves {(base - results['info'][0]) * 1000:.1f} ms CPU per search "
+          f"({(1 - results['info'][0] / base) * 100:.0f}%)")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
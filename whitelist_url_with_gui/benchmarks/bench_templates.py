@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: page rendering per request vs cached, precompiled templates
+Renders the login and dashboard pages inside a request context the way
+the routes do and reports the time per page with:
+
+    string     the previous behaviour - render_template_string() parses
+               and compiles the whole template source on every request
+    cached     render_page() - the template compiled once, with the config
+               values already rendered into it
+
+Usage:
+    python benchmarks/bench_templates.py [--renders 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, render_template_string, session
+
+from config import config
+from web.routes import register_routes, render_page
+from web.templates import get_dashboard_template, get_login_template
+
+PAGES = {
+    'login': (get_login_template, {'error': 'Invalid hostname or IP address'}),
+    'dashboard': (get_dashboard_template, {}),
+}
+
+
+def time_renders(render, renders: int) -> float:
+    """Seconds per render"""
+    render()  # The first cached render includes compiling the template
+    start = time.perf_counter()
+    for _ in range(renders):
+        render()
+    return (time.perf_counter() - start) / renders
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Template rendering benchmark')
+    parser.add_argument('--renders', type=int, default=200, help='Renders per page and mode')
+    args = parser.parse_args()
+
+    app = Flask(__name__, static_folder=None)
+    app.secret_key = 'bench'
+    register_routes(app)
+
+    print(f"\n{args.renders} renders per page")
+    print(f"  {'page':10} {'string ms':>10} {'cached ms':>10} {'speedup':>8}")
+    with app.test_request_context('/', method='POST', data={'hostname': 'fw.example.com', 'username': 'admin'}):
+        session.update(hostname='fw.example.com', username='admin', api_key='bench')
+        for name, (get_source, context) in PAGES.items():
+            before = render_template_string(get_source(), config=config, **context)
+            after = render_page(name, **context)
+            assert before == after, f'{name} page differs'
+            string = time_renders(lambda: render_template_string(get_source(), config=config, **context), args.renders)
+            cached = time_renders(lambda: render_page(name, **context), args.renders)
+            print(f"  {name:10} {string * 1000:10.3f} {cached * 1000:10.3f} {string / cached:7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ticket history queries against a large audit store
+Writes --tickets synthetic tickets (2 years, several users, firewalls and
+categories, 1-6 URLs each) as audit segments, builds the index with
+rebuild_index() and times typical auditor queries through
+AuditStore.search().
+
+Usage:
+    python benchmarks/bench_ticket_history.py [--tickets 100000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.ticket import TicketHistoryQuery
+from services.audit_store import AuditStore, SEGMENT_PREFIX, SEGMENT_SUFFIX
+
+USERS = [f"admin{i:02d}" for i in range(40)]
+FIREWALLS = [f"fw{i}.corp.example" for i in range(6)]
+CATEGORIES = [f"Whitelist-{name}" for name in ('Web', 'Vendors', 'Research', 'Sales', 'HR', 'Dev', 'Ops', 'Finance')]
+WORDS = ['cloud', 'cdn', 'data', 'shop', 'news', 'mail', 'api', 'portal', 'media', 'static',
+         'secure', 'login', 'video', 'files', 'docs', 'app', 'stream', 'support', 'blog', 'maps']
+TLDS = ['com', 'net', 'org', 'de', 'io', 'co.uk', 'ch', 'at']
+
+
+def make_domains(count: int, rng: random.Random):
+    domains = set()
+    while len(domains) < count:
+        domains.add(f"{rng.choice(WORDS)}{rng.choice(WORDS)}{rng.randint(1, 999)}.{rng.choice(TLDS)}")
+    return sorted(domains)
+
+
+def write_segments(directory: str, tickets: int, seed: int = 7):
+    """Synthetic ticket lines, grouped into daily segments"""
+    rng = random.Random(seed)
+    domains = make_domains(20000, rng)
+    start = datetime(2024, 1, 1)
+    span = 2 * 365 * 86400
+    stamps = sorted(start + timedelta(seconds=rng.randrange(span)) for _ in range(tickets))
+    handles = {}
+    try:
+        for number, stamp in enumerate(stamps):
+            # Popular domains are whitelisted far more often (Zipf-like)
+            urls = []
+            for _ in range(rng.randint(1, 6)):
+                domain = domains[min(int(rng.paretovariate(1.1)) - 1, len(domains) - 1)] if rng.random() < 0.5 \
+                    else rng.choice(domains)
+                urls.append(rng.choice((domain + '/', '*.' + domain + '/')))
+            line = {
+                'type': 'ticket', 'record_id': f"{number:032x}",
+                'ticket_id': f"CHG-{stamp:%Y}-{number:06d}", 'username': rng.choice(USERS),
+                'hostname': rng.choice(FIREWALLS), 'category': rng.choice(CATEGORIES), 'context': 'shared',
+                'urls_added': urls, 'success': True, 'timestamp': stamp.isoformat(),
+                'commit_job_id': str(1000 + number), 'commit_status': 'FIN', 'commit_progress': '100%',
+                'search_strategy': 'automatic_dual_action_search', 'action_type': 'both'
+            }
+            name = f"{SEGMENT_PREFIX}{stamp:%Y-%m-%d}{SEGMENT_SUFFIX}"
+            if name not in handles:
+                for handle in handles.values():
+                    handle.close()
+                handles = {name: open(os.path.join(directory, name), 'w', encoding='utf-8')}
+            handles[name].write(json.dumps(line, separators=(',', ':')) + '\n')
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return domains
+
+
+QUERIES = [
+    ('latest page', TicketHistoryQuery()),
+    ('page 200', TicketHistoryQuery(page=200)),
+    ('domain (popular)', None),
+    ('domain (rare)', None),
+    ('domain, 2 chars (LIKE)', TicketHistoryQuery(domain='io')),
+    ('ticket id prefix', TicketHistoryQuery(ticket_id='CHG-2025-0712')),
+    ('user + month', TicketHistoryQuery(username='admin07', date_from=date(2025, 3, 1), date_to=date(2025, 3, 31))),
+    ('firewall + category', TicketHistoryQuery(hostname='fw3.corp.example', category='Whitelist-Vendors')),
+    ('domain + user', None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ticket history query benchmark')
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        domains = write_segments(tmp, args.tickets)
+        written = time.perf_counter()
+        store = AuditStore(tmp)
+        indexed = store.rebuild_index()
+        built = time.perf_counter()
+        print(f"\n{indexed} tickets: segments {written - started:.1f}s, index build {built - written:.1f}s, "
+              f"index {os.path.getsize(store.index_path) / 2 ** 20:.1f} MiB, full text: {store.full_text}")
+
+        popular, rare = domains[0], domains[-1]
+        fills = {
+            'domain (popular)': TicketHistoryQuery(domain=popular.split('.')[0]),
+            'domain (rare)': TicketHistoryQuery(domain=rare),
+            'domain + user': TicketHistoryQuery(domain=popular.split('.')[0], username='admin03'),
+        }
+        print(f"  {'query':26} {'matches':>8} {'ms (best)':>10} {'ms (median)':>12}")
+        for name, query in QUERIES:
+            query = query or fills[name]
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                rows, total, exact = store.search(query, query.offset, query.page_size)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            matches = f"{total}{'' if exact else '+'}"
+            print(f"  {name:26} {matches:>8} {timings[0]:10.1f} {timings[len(timings) // 2]:12.1f}")
+
+        started = time.perf_counter()
+        exported = sum(1 for _ in store.iter_search(TicketHistoryQuery(username='admin01')))
+        print(f"  export of one user ({exported} rows): {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite with a regression gate
+Times the hot paths of a search and a submission on fixed inputs
+(tools/log_corpus.py with a fixed seed) and on routes served against the
+local mock firewall (tools/mock_panos.py, no latency):
+
+    xml_parse            parse_url_log_response on a type=log response
+    process_entries      SearchService._process_log_entries
+    domain_extraction    DomainExtractor.extract_many
+    query_build          SearchService._build_multi_term_query
+    category_xml         update_category_urls list XML (build + URL encoding)
+    model_serialization  TicketData / SearchResult to_dict + from_dict
+    route_*              Flask routes through the test client
+
+Usage:
+    python benchmarks/run.py run [--only xml_parse process_entries] [--out results.json]
+    python benchmarks/run.py baseline [--out benchmarks/baselines/local.json]
+    python benchmarks/run.py compare [--baseline benchmarks/baselines/local.json] [--threshold 0.2]
+
+compare exits with status 1 if a benchmark got slower than its baseline by
+more than the threshold (route benchmarks, which include the network
+stack, get a looser threshold). Timings are absolute, so a baseline only
+means something on the host that recorded it: baselines are not committed
+(benchmarks/baselines/ is ignored), and compare exits with status 2 when
+the baseline is missing or comes from another host or Python version.
+Record one from the main branch first.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import config
+from api.palo_alto_client import build_member_list_xml, parse_url_log_response
+from models.domain_stats import DomainStatsCollector
+from models.ticket import SearchResult, TicketData
+from services.search_service import SearchService
+from tools.log_corpus import CorpusSpec, iter_entries, log_response_xml
+from utils.domain_extractor import DomainExtractor
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'local.json')  # Per host, not committed
+CORPUS = CorpusSpec(entries=20000, seed=42)
+SEARCH_TERMS = 'youtube, twitch'
+DEFAULT_THRESHOLD = 0.20
+ROUTE_THRESHOLD = 0.50
+
+# name -> (setup, repeat, threshold); setup() returns (one iteration, operations per iteration)
+BENCHMARKS: Dict[str, Tuple[Callable[[], Tuple[Callable[[], Any], int]], int, float]] = {}
+
+
+def benchmark(name: str, repeat: int = 7, threshold: float = DEFAULT_THRESHOLD):
+    def register(setup):
+        BENCHMARKS[name] = (setup, repeat, threshold)
+        return setup
+    return register
+
+
+_cache: Dict[str, Any] = {}
+
+
+def corpus_xml() -> bytes:
+    if 'xml' not in _cache:
+        _cache['xml'] = log_response_xml(CORPUS)
+    return _cache['xml']
+
+
+def corpus_records():
+    if 'records' not in _cache:
+        _cache['records'] = parse_url_log_response(corpus_xml()).records
+    return _cache['records']
+
+
+# Parsing and matching
+
+@benchmark('xml_parse')
+def bench_xml_parse():
+    content = corpus_xml()
+    return lambda: parse_url_log_response(content), CORPUS.entries
+
+
+@benchmark('process_entries')
+def bench_process_entries():
+    records = corpus_records()
+    service = SearchService(None)
+
+    def run():
+        service._process_log_entries(records, SEARCH_TERMS, set(), 'bench', DomainStatsCollector())
+    return run, len(records)
+
+
+@benchmark('domain_extraction')
+def bench_domain_extraction():
+    urls = [record.url for record in corpus_records()]
+    terms = SearchService(None)._parse_search_terms(SEARCH_TERMS)
+    return lambda: DomainExtractor(terms).extract_many(urls), len(urls)
+
+
+@benchmark('query_build')
+def bench_query_build():
+    service = SearchService(None)
+    terms = [f"term{i}.example" for i in range(config.MAX_SEARCH_TERMS)]
+    time_filter = "'2025/04/01 00:00:00'"
+
+    def run():
+        for _ in range(1000):
+            service._build_multi_term_query(terms, 'block-url', time_filter)
+    return run, 1000
+
+
+# Submission payloads
+
+@benchmark('category_xml')
+def bench_category_xml():
+    members = [entry.misc.split('/')[0] + '/' for entry in iter_entries(CorpusSpec(entries=5000, seed=7))]
+    return lambda: quote(build_member_list_xml(set(members))), len(members)
+
+
+@benchmark('model_serialization')
+def bench_model_serialization():
+    ticket = TicketData(ticket_id='CHG-2025-000001', username='admin', hostname='fw1.example.com',
+                        category='Whitelist-Web (shared)', context='shared',
+                        urls_added=[f"host{i}.example.com/" for i in range(50)], success=True,
+                        commit_job_id='1234', commit_status='FIN', commit_progress='100')
+    result = SearchResult(urls=[f"host{i}.example.com" for i in range(500)], search_term=SEARCH_TERMS,
+                          action_type='both', strategy_info={'total_attempts': 2}, success=True)
+
+    def run():
+        for _ in range(100):
+            TicketData.from_dict(ticket.to_dict())
+            SearchResult.from_dict(result.to_dict())
+    return run, 100
+
+
+# Routes against the mock firewall
+
+def route_client():
+    """Logged-in test client of the app, talking to an in-process mock firewall"""
+    if 'client' in _cache:
+        return _cache['client']
+    from tools.mock_panos import MockOptions, start_in_thread
+
+    server = start_in_thread(MockOptions(latency_ms=0, jitter_ms=0, log_job_seconds=0, commit_seconds=0.5,
+                                         log_volume=CORPUS.entries, seed=CORPUS.seed))
+    workdir = tempfile.mkdtemp(prefix='bench-routes-')
+    os.chdir(workdir)  # Logs, state and secret key of the app go here
+    config.API_SCHEME = 'http'
+    config.API_PORT = server.server_address[1]
+    config.CATEGORY_CACHE_SECONDS = 0  # Every request reaches the firewall
+    config.SEARCH_TIMEOUT_ATTEMPTS = [15]
+    config.ATTEMPT_WAIT_TIME = 0
+    config.JOB_CHECK_INTERVAL = 0.01
+    config.COALESCE_IDENTICAL_SEARCHES = False
+
+    from main import create_app
+    client = create_app().test_client()
+    response = client.post('/', data={'hostname': '127.0.0.1', 'username': 'admin', 'password': 'admin'})
+    if response.status_code != 302:
+        raise RuntimeError(f"Login against the mock firewall failed ({response.status_code})")
+    _cache['client'] = client
+    return client
+
+
+def _post_json(client, path: str, payload: Dict[str, Any]):
+    response = client.post(path, json=payload)
+    data = response.get_json()
+    if not data or not data.get('success'):
+        raise RuntimeError(f"{path} failed: {data}")
+    return data
+
+
+@benchmark('route_get_categories', repeat=30, threshold=ROUTE_THRESHOLD)
+def bench_route_get_categories():
+    client = route_client()
+    return lambda: client.get('/get_categories'), 1
+
+
+@benchmark('route_search_urls', repeat=10, threshold=ROUTE_THRESHOLD)
+def bench_route_search_urls():
+    client = route_client()
+    return lambda: _post_json(client, '/search_urls', {'search_term': SEARCH_TERMS}), 1
+
+
+@benchmark('route_submit_whitelist', repeat=20, threshold=ROUTE_THRESHOLD)
+def bench_route_submit_whitelist():
+    client = route_client()
+    counter = iter(range(10 ** 9))
+
+    def run():
+        number = next(counter)
+        _post_json(client, '/submit_whitelist', {
+            'ticket_id': f"BENCH-{number:06d}", 'category': 'Whitelist-Web (shared)',
+            'urls': [f"bench{number}.example.com/"]
+        })
+    return run, 1
+
+
+@benchmark('route_commit_status', repeat=30, threshold=ROUTE_THRESHOLD)
+def bench_route_commit_status():
+    client = route_client()
+    job_id = _post_json(client, '/submit_whitelist', {
+        'ticket_id': 'BENCH-STATUS', 'category': 'Whitelist-Sales (vsys1)', 'urls': ['status.example.com/']
+    }).get('commit_job_id')
+    return lambda: _post_json(client, '/commit_status', {'job_id': job_id}), 1
+
+
+# Runner
+
+def run_benchmarks(names: List[str], repeat_override: int = None) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        setup, repeat, threshold = BENCHMARKS[name]
+        fn, ops = setup()
+        fn()  # Warm-up (caches, first connection, lazy imports)
+        timings = []
+        for _ in range(repeat_override or repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        median = statistics.median(timings)
+        results[name] = {
+            'min_s': best, 'median_s': median, 'ops': ops, 'runs': len(timings),
+            'us_per_op': median / ops * 1e6, 'ops_per_s': ops / median, 'threshold': threshold
+        }
+        print(f"  {name:24} {best * 1000:10.2f} {median * 1000:10.2f} {median / ops * 1e6:12.2f} "
+              f"{ops / median:14,.0f}", flush=True)
+    return results
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'corpus': {'entries': CORPUS.entries, 'seed': CORPUS.seed},
+    }
+
+
+def run_suite(only: List[str] = None, repeat: int = None) -> Dict[str, Any]:
+    names = only or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+    cwd = os.getcwd()
+    print(f"  {'benchmark':24} {'min ms':>10} {'median ms':>10} {'us/op':>12} {'ops/s':>14}")
+    try:
+        results = run_benchmarks(names, repeat)
+    finally:
+        os.chdir(cwd)
+    return {'meta': _meta(), 'results': results}
+
+
+def write_json(data: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"Wrote {path}")
+
+
+# A baseline from a host that differs in any of these cannot be compared with
+BASELINE_HOST_KEYS = ('host', 'python', 'machine', 'cpus')
+
+
+def host_mismatch(baseline: Dict[str, Any], current_meta: Dict[str, Any]) -> List[str]:
+    """Differences between the host that recorded a baseline and this one"""
+    base_meta = baseline.get('meta', {})
+    return [f"{key} {base_meta.get(key)} (now {current_meta.get(key)})"
+            for key in BASELINE_HOST_KEYS if base_meta.get(key) != current_meta.get(key)]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = None,
+            metric: str = 'min_s') -> List[str]:
+    """
+    Print current vs. baseline per benchmark
+
+    Returns:
+        Names of benchmarks slower than baseline by more than their threshold
+    """
+    regressions = []
+    print(f"  {'benchmark':24} {'baseline ms':>12} {'current ms':>12} {'change':>8}  limit")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"  {name:24} {'-':>12} {result[metric] * 1000:12.2f} {'new':>8}")
+            continue
+        limit = threshold if threshold is not None else result.get('threshold', DEFAULT_THRESHOLD)
+        change = result[metric] / base[metric] - 1
+        regressed = change > limit
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:24} {base[metric] * 1000:12.2f} {result[metric] * 1000:12.2f} {change:+8.1%}  "
+              f"+{limit:.0%}{'  REGRESSION' if regressed else ''}")
+    missing = set(baseline['results']) - set(current['results'])
+    if missing:
+        print(f"Not run this time: {', '.join(sorted(missing))}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite with regression gate')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command in ('run', 'baseline', 'compare'):
+        cmd = sub.add_parser(command)
+        cmd.add_argument('--only', nargs='+', help='Benchmarks to run (default: all)')
+        cmd.add_argument('--repeat', type=int, help='Timed runs per benchmark (default: per benchmark)')
+        if command == 'run':
+            cmd.add_argument('--out', help='Write results to this JSON file')
+        elif command == 'baseline':
+            cmd.add_argument('--out', default=DEFAULT_BASELINE)
+        else:
+            cmd.add_argument('--baseline', default=DEFAULT_BASELINE)
+            cmd.add_argument('--current', help='Compare this results file instead of running the suite')
+            cmd.add_argument('--threshold', type=float, help='Allowed slowdown, e.g. 0.2 = 20%% (default: per benchmark)')
+            cmd.add_argument('--metric', choices=['min_s', 'median_s'], default='min_s')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline} - record one on this host first: python benchmarks/run.py baseline")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        mismatch = host_mismatch(baseline, _meta())
+        if mismatch:
+            print(f"Baseline {args.baseline} was recorded on another host or Python: {', '.join(mismatch)}")
+            print("Timings only compare on the same host - record a new baseline here: python benchmarks/run.py baseline")
+            return 2
+        if args.current:
+            with open(args.current, encoding='utf-8') as f:
+                current = json.load(f)
+        else:
+            current = run_suite(args.only or [name for name in BENCHMARKS if name in baseline['results']],
+                                args.repeat)
+        regressions = compare(baseline, current, args.threshold, args.metric)
+        if regressions:
+            print(f"FAILED: {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("OK: no regressions")
+        return 0
+
+    results = run_suite(args.only, args.repeat)
+    if args.out:
+        write_json(results, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -15,7 +15,10 @@ class ServerConfig:
     DESCRIPTION = "Automatic Dual-Action Search with Category Display and Conditional Download"
     
     # Flask Configuration
-    SECRET_KEY = os.urandom(24)
+    # Shared by all worker processes: taken from the environment, otherwise
+    # created once in SECRET_KEY_FILE and reused across restarts
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SECRET_KEY_FILE = os.path.join('instance', 'secret_key')
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
     
     # SSL Configuration
@@ -27,13 +30,69 @@ class ServerConfig:
     PORT = 5010
     DEBUG = False
     
+    # Production WSGI server (gunicorn.conf.py) - overridable from the environment
+    WSGI_WORKERS = int(os.environ.get('WSGI_WORKERS', 2))
+    WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 8))  # Searches mostly wait on the firewall
+    WSGI_TIMEOUT = int(os.environ.get('WSGI_TIMEOUT', 120))  # Worker heartbeat, not request duration
+    WSGI_GRACEFUL_TIMEOUT = int(os.environ.get('WSGI_GRACEFUL_TIMEOUT', 600))  # Let running searches finish
+    WSGI_PRELOAD = os.environ.get('WSGI_PRELOAD', '1') == '1'
+    WSGI_MAX_REQUESTS = int(os.environ.get('WSGI_MAX_REQUESTS', 0))  # Recycle workers after N requests (0 = never)
+    PID_FILE = os.path.join('logs', 'server.pid')
+    
+    # Shared state for all worker processes (services/state_store.py)
+    STATE_BACKEND = os.environ.get('STATE_BACKEND', 'sqlite')  # memory | sqlite | redis
+    STATE_DB_FILE = os.path.join('instance', 'state.db')
+    STATE_REDIS_URL = os.environ.get('STATE_REDIS_URL', 'redis://localhost:6379/0')
+    STATE_KEY_PREFIX = 'pawl:'
+    SERVER_SIDE_SESSIONS = True  # Session data (API key) stays in the state store, the cookie only holds an id
+    CATEGORY_CACHE_SECONDS = 60  # Category list shared by all workers per firewall
+    COMMIT_STATUS_CACHE_SECONDS = 2  # Pollers of a running commit job share one firewall call
+    COMMIT_STATUS_FINAL_SECONDS = 3600  # FIN/FAIL never change
+    
+    # Metrics endpoint (/metrics, Prometheus text format)
+    METRICS_ENABLED = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # When set, scrapers must send 'Authorization: Bearer <token>'
+    METRICS_MULTIPROCESS_DIR = os.path.join('instance', 'metrics')  # Worker snapshots merged on scrape
+    METRICS_FLUSH_SECONDS = 10  # Snapshot interval of one worker (also written at exit and before a scrape)
+    
+    # On-demand profiling (/admin/profile/...) - the endpoints do not exist unless a token is set
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')  # Admins send 'Authorization: Bearer <token>'
+    PROFILING_DIR = os.path.join('instance', 'profiles')  # Results, readable by every worker
+    PROFILING_MAX_SECONDS = 120  # Longest sampling session
+    PROFILING_MIN_INTERVAL_MS = 2  # Shortest interval between stack samples
+    PROFILING_MAX_REQUESTS = 50  # Most requests one request session may profile
+    PROFILING_ARM_SECONDS = 600  # A request session not filled by then is dropped
+    PROFILING_KEEP_SESSIONS = 20  # Older session results are deleted
+    
+    # Static files (/static/...) - kept in memory with gzip/brotli variants
+    STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    STATIC_MAX_AGE = 365 * 24 * 3600  # Content-hashed URLs never change, browsers keep them this long
+    STATIC_COMPRESS_MIN_BYTES = 1024  # Smaller files are always sent uncompressed
+    
+    # Large JSON responses (search results) - orjson when installed, gzip when accepted
+    JSON_COMPRESS_MIN_BYTES = 1024  # Search results above this are gzipped for clients that accept it
+    JSON_COMPRESS_LEVEL = 6  # Responses are compressed per request - speed over the last few percent
+    
     # Enhanced Logging Configuration for Server
     LOG_DIR = 'logs'
     APP_LOG_FILE = os.path.join(LOG_DIR, 'palo_alto_whitelist.log')
     SERVER_LOG_FILE = os.path.join(LOG_DIR, 'server.log')
     ERROR_LOG_FILE = os.path.join(LOG_DIR, 'errors.log')
+    SLOW_REQUEST_LOG_FILE = os.path.join(LOG_DIR, 'slow_requests.log')  # Phase timing tree of each slow request
+    SLOW_REQUEST_SECONDS = 60  # Requests taking longer are written to SLOW_REQUEST_LOG_FILE (0 = off)
     LOG_LEVEL = 'INFO'
     LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+    LOG_MAX_BYTES = 50 * 1024 * 1024  # Rotate app/error logs at this size...
+    LOG_ROTATE_WHEN = 'midnight'  # ...or at this interval (logging.handlers.TimedRotatingFileHandler 'when')
+    LOG_BACKUP_COUNT = 30  # Rotated files kept per log
+    LOG_COMPRESS = True  # gzip rotated files
+    AUDIT_DIR = os.path.join(LOG_DIR, 'audit')  # Ticket audit records (JSONL segments)
+    AUDIT_INDEX_FILE = os.path.join(AUDIT_DIR, 'index.db')  # Rebuildable lookup index
+    AUDIT_ARCHIVE_CHECK_SECONDS = 3600  # How often a worker looks for finished months to archive
+    TICKET_LOG_ASYNC = True  # Write ticket logs on a background thread
+    TICKET_LOG_FSYNC = os.environ.get('TICKET_LOG_FSYNC', 'batch')  # always | batch | never
+    TICKET_LOG_BATCH_SIZE = 64  # Ticket log writes grouped per fsync round
+    TICKET_LOG_FLUSH_TIMEOUT = 10  # Seconds to wait for pending ticket logs (download, shutdown)
     
     # Server-specific logging
     SEPARATE_STDOUT_STDERR = True
@@ -44,6 +103,16 @@ class ServerConfig:
     LOOKBACK_MONTHS = 3
     SEARCH_TIMEOUT_ATTEMPTS = [15, 25, 35, 45]  # Longer timeouts for server
     ATTEMPT_WAIT_TIME = 5  # More wait time between attempts
+    COALESCE_IDENTICAL_SEARCHES = True  # Share one in-flight search per firewall + terms
+    SHARED_SEARCH_LEASE_SECONDS = 30  # Renewed while the search runs; a dead worker's search is taken over after this
+    SHARED_SEARCH_POLL_INTERVAL = 1.0  # How often workers waiting on another worker's search check back
+    
+    DOMAIN_STATS_MAX_SOURCES = 100  # Distinct users/sources tracked per domain
+    
+    # Registrable-domain grouping (bundled Public Suffix List, loaded on first use)
+    PUBLIC_SUFFIX_LIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'public_suffix_list.dat')
+    PUBLIC_SUFFIX_INCLUDE_PRIVATE = True  # Keep e.g. *.github.io sites apart
+    DOMAIN_GROUP_MIN_SIZE = 2  # Subdomains needed before a wildcard is suggested
     
     # Multi-URL Search Configuration
     MAX_SEARCH_TERMS = 10
@@ -55,6 +124,13 @@ class ServerConfig:
     MANUAL_URL_SEPARATORS = [',', '\n', '\r\n']
     ALLOW_WILDCARD_MANUAL = True
     
+    # Bulk Import Configuration
+    BULK_IMPORT_MAX_ROWS = 5000  # Rows per import file/request
+    BULK_IMPORT_MAX_BYTES = 2 * 1024 * 1024  # Upload size limit
+    
+    # Coverage Check Configuration
+    COVERAGE_CHECK_MAX_URLS = 5000  # URLs per /check_coverage request (search results plus manual URLs)
+    
     # Commit Configuration - Extended for server
     COMMIT_MAX_POLLS = 30  # More polling attempts
     COMMIT_POLL_INTERVAL = 8  # Longer intervals
@@ -70,6 +146,8 @@ class ServerConfig:
     API_TIMEOUT = 45  # Longer API timeout
     JOB_CHECK_INTERVAL = 3  # More conservative
     STATUS_CHECK_TIMEOUT = 15
+    API_SCHEME = os.environ.get('PANOS_API_SCHEME', 'https')  # http only for a local mock firewall (tools/mock_panos.py)
+    API_PORT = int(os.environ.get('PANOS_API_PORT', 0))  # 0 = default port of the scheme
     
     # Valid Actions - Extended to support automatic dual search
     VALID_ACTIONS = ['block-url', 'block-continue']
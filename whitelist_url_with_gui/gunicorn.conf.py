@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration for the Palo Alto Whitelist Tool
+=======================================================
+Start:            gunicorn -c gunicorn.conf.py wsgi:app
+Graceful reload:  kill -HUP $(cat logs/server.pid)
+Graceful stop:    kill -TERM $(cat logs/server.pid)
+
+Searches spend most of their time waiting on the firewall, so each worker
+runs a thread pool (gthread) and several worker processes keep one hung or
+CPU-heavy request from slowing everybody else down.
+
+With preload enabled the application is imported once in the master and
+shared copy-on-write by the workers; HUP then restarts the workers with
+the already loaded code. To pick up code changes without downtime either
+set WSGI_PRELOAD=0 (HUP re-imports the app) or do a binary upgrade with
+USR2 followed by QUIT to the old master.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import config  # noqa: E402
+from utils.metrics import clear_snapshot_dir  # noqa: E402
+from utils.secret_key import load_or_create_secret_key  # noqa: E402
+from utils.ssl_helper import get_ssl_context  # noqa: E402
+
+bind = f"{os.environ.get('HOST', config.HOST)}:{os.environ.get('PORT', config.PORT)}"
+
+worker_class = 'gthread'
+workers = config.WSGI_WORKERS
+threads = config.WSGI_THREADS
+preload_app = config.WSGI_PRELOAD
+
+timeout = config.WSGI_TIMEOUT
+graceful_timeout = config.WSGI_GRACEFUL_TIMEOUT
+keepalive = 5
+max_requests = config.WSGI_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+
+pidfile = config.PID_FILE
+accesslog = None
+errorlog = os.path.join(config.LOG_DIR, 'server_stderr.log')
+loglevel = 'warning'
+capture_output = True
+
+if os.environ.get('WSGI_NO_SSL') != '1':
+    _ssl_context = get_ssl_context()
+    if _ssl_context:
+        certfile, keyfile = _ssl_context
+
+
+def on_starting(server):
+    """Prepare state shared by all workers before any of them is forked"""
+    os.makedirs(config.LOG_DIR, exist_ok=True)
+    # Metrics of a previous run must not be added to this one
+    clear_snapshot_dir(config.METRICS_MULTIPROCESS_DIR)
+    if not config.SECRET_KEY:
+        # Create the key once in the master so workers never race for it
+        load_or_create_secret_key(config.SECRET_KEY_FILE)
+
+
+def when_ready(server):
+    server.log.warning(
+        "%s v%s ready: %d workers x %d threads (preload=%s)",
+        config.APP_NAME, config.VERSION, workers, threads, preload_app
+    )
+
+
+def worker_exit(server, worker):
+    """Write pending ticket logs, queued log records and final metrics before the worker goes away"""
+    from main import shutdown_logging
+    from utils.metrics import registry
+    shutdown_logging()
+    registry.flush()
@@ -7,54 +7,184 @@ Fixed version for server deployment with proper logging
 
 import os
 import sys
+import queue
+import atexit
 import urllib3
 import logging
 import argparse
-from flask import Flask
+from logging.handlers import QueueListener
+from flask import Flask, g, request, session
 
 # Import configuration and modules
 from config import config
+from services.logging_service import ticket_writer
+from services.profiling_service import request_profiler
+from utils.log_queue import DeferredQueueHandler
+from utils.log_rotation import SizeAndTimeRotatingFileHandler
+from utils.metrics import registry as metrics_registry
+from utils.secret_key import load_or_create_secret_key
 from utils.ssl_helper import get_ssl_context
+from utils import timing
+from web.responses import add_json_fields
 from web.routes import register_routes
+from web.templates import precompile_templates
+from web.session_interface import StateStoreSessionInterface
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Loggers of the application's own packages (module loggers use __name__)
+APP_LOGGERS = ('palo_alto_app', 'api', 'services', 'web', 'utils', 'models')
+SLOW_REQUEST_LOGGER = 'palo_alto_app.slow_requests'
+
+_log_queue_handler = None
+_log_listener = None
+
+def _start_log_listener(handlers):
+    """Run the blocking handlers on a listener thread; loggers only enqueue records"""
+    global _log_listener
+    log_queue = queue.SimpleQueue()
+    _log_queue_handler.queue = log_queue
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+
+def stop_log_listener():
+    """Write out queued records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def shutdown_logging():
+    """Finish pending ticket log writes, then drain the log queue"""
+    ticket_writer.close(config.TICKET_LOG_FLUSH_TIMEOUT)
+    stop_log_listener()
+
+def _rotating_handler(path):
+    """Log file that rotates by size and time and keeps compressed backups"""
+    return SizeAndTimeRotatingFileHandler(
+        path,
+        max_bytes=config.LOG_MAX_BYTES,
+        when=config.LOG_ROTATE_WHEN,
+        backup_count=config.LOG_BACKUP_COUNT,
+        compress=config.LOG_COMPRESS
+    )
+
 def setup_server_logging():
     """Setup proper logging for server environment"""
+    global _log_queue_handler
+    app_logger = logging.getLogger('palo_alto_app')
+    if _log_queue_handler is not None:
+        return app_logger
+    
     # Ensure logs directory exists
     os.makedirs(config.LOG_DIR, exist_ok=True)
-    
-    # Configure root logger to prevent debug output mixing with responses
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.WARNING)  # Only warnings and errors to console
-    
-    # Configure application logger to file
-    app_logger = logging.getLogger('palo_alto_app')
-    app_logger.setLevel(getattr(logging, config.LOG_LEVEL))
+    level = getattr(logging, config.LOG_LEVEL)
     
     # File handler for application logs
-    file_handler = logging.FileHandler(config.APP_LOG_FILE)
-    file_handler.setLevel(getattr(logging, config.LOG_LEVEL))
+    file_handler = _rotating_handler(config.APP_LOG_FILE)
+    file_handler.setLevel(level)
     file_formatter = logging.Formatter(config.LOG_FORMAT)
     file_handler.setFormatter(file_formatter)
-    app_logger.addHandler(file_handler)
     
     # Separate handler for server errors
-    error_handler = logging.FileHandler(os.path.join(config.LOG_DIR, 'server_errors.log'))
+    error_handler = _rotating_handler(os.path.join(config.LOG_DIR, 'server_errors.log'))
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(file_formatter)
-    root_logger.addHandler(error_handler)
+    
+    # Slow requests with their phase timing go to a file of their own
+    slow_handler = _rotating_handler(config.SLOW_REQUEST_LOG_FILE)
+    slow_handler.setLevel(logging.WARNING)
+    slow_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_handler.addFilter(logging.Filter(SLOW_REQUEST_LOGGER))
+    file_handler.addFilter(lambda record: record.name != SLOW_REQUEST_LOGGER)
+    
+    handlers = [file_handler, error_handler, slow_handler]
+    if config.DEBUG:
+        # Debug output on the console as well
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(logging.DEBUG)
+        console_handler.setFormatter(file_formatter)
+        handlers.append(console_handler)
+    
+    # Request threads never wait for disk - records go through a queue and
+    # are formatted on the listener thread where that is safe
+    _log_queue_handler = DeferredQueueHandler(queue.SimpleQueue())
+    _start_log_listener(handlers)
+    atexit.register(shutdown_logging)
+    # A preloaded app is forked into workers; the listener thread does not survive the fork
+    os.register_at_fork(after_in_child=lambda: _start_log_listener(handlers))
+    
+    # Configure root logger to prevent debug output mixing with responses
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.WARNING)  # Only warnings and errors from libraries
+    root_logger.addHandler(_log_queue_handler)
+    
+    # Application loggers at the configured level
+    for name in APP_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.addHandler(_log_queue_handler)
+        logger.propagate = False
     
     return app_logger
 
+def register_request_timing(app):
+    """Time every request (utils/timing.py); report it in debug mode and log slow ones"""
+    slow_logger = logging.getLogger(SLOW_REQUEST_LOGGER)
+    
+    @app.before_request
+    def start_timing():
+        g.timing = timing.start_request(request.endpoint or request.path)
+    
+    @app.after_request
+    def finish_timing(response):
+        root = g.pop('timing', None)
+        if root is None:
+            return response
+        root.finish()
+        slow = config.SLOW_REQUEST_SECONDS and root.seconds >= config.SLOW_REQUEST_SECONDS
+        if not (slow or config.DEBUG):
+            return response
+        
+        tree = root.to_dict()
+        if config.DEBUG and response.mimetype == 'application/json' and not response.direct_passthrough:
+            add_json_fields(response, timing=tree)
+        if slow:
+            slow_logger.warning(
+                "%s %s -> %s in %.1fs (user=%s firewall=%s)\n%s",
+                request.method, request.path, response.status_code, root.seconds,
+                session.get('username', '-'), session.get('hostname', '-'), timing.format_tree(tree)
+            )
+        return response
+    
+    @app.teardown_request
+    def end_timing(exc):
+        timing.end_request()
+
+def register_request_profiling(app):
+    """Run requests under cProfile while an admin has armed a session (services/profiling_service.py)"""
+    
+    @app.before_request
+    def start_profiling():
+        if config.PROFILING_TOKEN:
+            g.profile = request_profiler.start(request.endpoint)
+    
+    @app.teardown_request
+    def finish_profiling(exc):
+        started = g.pop('profile', None)
+        if started is not None:
+            request_profiler.finish(started)
+
 def create_app():
     """Create and configure Flask application"""
-    app = Flask(__name__)
+    app = Flask(__name__, static_folder=None)  # /static is served by web/static_assets.py
     
-    # Configure Flask app
-    app.secret_key = config.SECRET_KEY
+    # Configure Flask app - the key must be identical in every worker process
+    app.secret_key = config.SECRET_KEY or load_or_create_secret_key(config.SECRET_KEY_FILE)
     app.permanent_session_lifetime = config.PERMANENT_SESSION_LIFETIME
+    if config.SERVER_SIDE_SESSIONS:
+        app.session_interface = StateStoreSessionInterface()
     
     # Disable Flask's default request logging in production
     if not config.DEBUG:
@@ -63,6 +193,15 @@ def create_app():
     
     # Register routes
     register_routes(app)
+    precompile_templates(app.jinja_env)
+    register_request_timing(app)
+    register_request_profiling(app)
+    
+    # Let other workers see this worker's metrics (a time check unless a snapshot is due)
+    @app.after_request
+    def flush_metrics(response):
+        metrics_registry.maybe_flush()
+        return response
     
     return app
 
@@ -70,6 +209,7 @@ def setup_directories():
     """Create necessary directories"""
     directories = [
         config.LOG_DIR,
+        os.path.dirname(config.SECRET_KEY_FILE),
         'static/css',
         'static/js',
         'templates'
@@ -0,0 +1,135 @@
+"""
+Per-domain hit statistics
+Aggregated while log entries are processed so results can be ranked by how
+often a domain was actually blocked
+"""
+from typing import Any, Dict, List, Optional
+
+from config import config
+from models.log_record import UrlLogRecord
+
+
+class DomainHitStats:
+    """Hit counters for one domain"""
+
+    __slots__ = ('domain', 'hits', 'first_seen', 'last_seen', 'sources', 'sources_truncated', 'actions')
+
+    def __init__(self, domain: str):
+        self.domain = domain
+        self.hits = 0
+        self.first_seen: Optional[str] = None
+        self.last_seen: Optional[str] = None
+        self.sources = set()
+        self.sources_truncated = False
+        self.actions: Dict[str, int] = {}
+
+    def add(self, record: UrlLogRecord):
+        """Count one log entry for this domain"""
+        self.hits += 1
+
+        action = record.action or 'unknown'
+        self.actions[action] = self.actions.get(action, 0) + 1
+
+        # PAN-OS receive_time (YYYY/MM/DD HH:MM:SS) orders correctly as a string
+        seen = record.receive_time
+        if seen:
+            if self.first_seen is None or seen < self.first_seen:
+                self.first_seen = seen
+            if self.last_seen is None or seen > self.last_seen:
+                self.last_seen = seen
+
+        source = record.source
+        if source and source not in self.sources:
+            if len(self.sources) < config.DOMAIN_STATS_MAX_SOURCES:
+                self.sources.add(source)
+            else:
+                self.sources_truncated = True
+
+    def merge(self, other: 'DomainHitStats'):
+        """Add the counters of other (covering different log entries) to this one"""
+        self.hits += other.hits
+        for action, count in other.actions.items():
+            self.actions[action] = self.actions.get(action, 0) + count
+        if other.first_seen and (self.first_seen is None or other.first_seen < self.first_seen):
+            self.first_seen = other.first_seen
+        if other.last_seen and (self.last_seen is None or other.last_seen > self.last_seen):
+            self.last_seen = other.last_seen
+        for source in other.sources:
+            if len(self.sources) >= config.DOMAIN_STATS_MAX_SOURCES:
+                self.sources_truncated = True
+                break
+            self.sources.add(source)
+        self.sources_truncated = self.sources_truncated or other.sources_truncated
+
+    def copy(self) -> 'DomainHitStats':
+        """Independent copy of these counters"""
+        clone = DomainHitStats(self.domain)
+        clone.merge(self)
+        return clone
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'hits': self.hits,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'distinct_sources': len(self.sources),
+            'sources_truncated': self.sources_truncated,
+            'actions': dict(self.actions)
+        }
+
+
+class DomainStatsCollector:
+    """
+    Streaming aggregation of DomainHitStats
+
+    Memory grows with the number of unique domains, not with the number of
+    log entries fed in.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, DomainHitStats] = {}
+        self.entries_seen = 0
+
+    def add(self, domain: str, record: UrlLogRecord):
+        """Count a matching log entry"""
+        stats = self.stats.get(domain)
+        if stats is None:
+            stats = self.stats[domain] = DomainHitStats(domain)
+        stats.add(record)
+
+    def merge_max(self, other: 'DomainStatsCollector'):
+        """
+        Merge results of a repeated query over the same logs
+
+        Timeout attempts re-run the same query, so counts are not summed -
+        each domain keeps the counters from the attempt that saw it most.
+        """
+        self.entries_seen = max(self.entries_seen, other.entries_seen)
+        for domain, stats in other.stats.items():
+            current = self.stats.get(domain)
+            if current is None or stats.hits > current.hits:
+                self.stats[domain] = stats.copy()
+
+    def merge_sum(self, other: 'DomainStatsCollector'):
+        """Merge results covering different log entries (e.g. another action)"""
+        self.entries_seen += other.entries_seen
+        for domain, stats in other.stats.items():
+            current = self.stats.get(domain)
+            if current is None:
+                self.stats[domain] = stats.copy()
+            else:
+                current.merge(stats)
+
+    def hits(self, domain: str) -> int:
+        """Hit count for a domain (0 if never seen)"""
+        stats = self.stats.get(domain)
+        return stats.hits if stats is not None else 0
+
+    def rank(self, domains) -> List[str]:
+        """Order domains by hit count, most frequent first, then by name"""
+        return sorted(domains, key=lambda domain: (-self.hits(domain), domain))
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Convert to {domain: stats} for JSON serialization, ranked by hits"""
+        return {domain: self.stats[domain].to_dict() for domain in self.rank(self.stats)}
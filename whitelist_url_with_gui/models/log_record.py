@@ -0,0 +1,26 @@
+"""
+Compact URL log record
+Holds only the columns the search pipeline reads from a PAN-OS URL log entry
+"""
+from typing import NamedTuple, Optional
+
+
+class UrlLogRecord(NamedTuple):
+    """
+    One URL filtering log entry
+
+    url is the resolved URL text - the first non-empty column listed in
+    config.URL_SOURCES - so consumers never have to probe columns again.
+    misc and host keep the raw columns for diagnostics. source is the
+    user (srcuser) behind the request, falling back to the source address.
+    """
+    url: Optional[str]
+    misc: Optional[str]
+    host: Optional[str]
+    action: Optional[str]
+    receive_time: Optional[str]
+    source: Optional[str] = None
+
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return self._asdict()
@@ -3,8 +3,8 @@ Data models for tickets and logging
 Enhanced with better validation and error handling
 Updated to support 'both' action type for automatic dual search
 """
-from datetime import datetime
-from dataclasses import dataclass
+from datetime import date, datetime
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 
 @dataclass
@@ -62,6 +62,28 @@ class TicketData:
             'search_strategy': self.search_strategy,
             'action_type': self.action_type
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TicketData':
+        """Rebuild a TicketData from to_dict() output"""
+        return cls(
+            ticket_id=data.get('ticket_id', ''),
+            username=data.get('username', ''),
+            hostname=data.get('hostname', ''),
+            category=data.get('category', ''),
+            context=data.get('context', ''),
+            urls_added=data.get('urls_added', []),
+            success=data.get('success', False),
+            timestamp=data.get('timestamp'),
+            commit_job_id=data.get('commit_job_id'),
+            commit_status=data.get('commit_status'),
+            commit_progress=data.get('commit_progress'),
+            search_strategy=data.get('search_strategy', 'automatic_dual_action_search'),
+            action_type=data.get('action_type', 'both')
+        )
+
+# Columns of the per-domain rows in SearchResult.to_compact_dict() (DomainHitStats.to_dict keys)
+COMPACT_STATS_FIELDS = ('hits', 'first_seen', 'last_seen', 'distinct_sources', 'sources_truncated', 'actions')
 
 @dataclass
 class SearchResult:
@@ -72,6 +94,8 @@ class SearchResult:
     strategy_info: Dict[str, Any]
     success: bool
     error: Optional[str] = None
+    domain_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # Per-domain hits, ranked
+    domain_groups: List[Dict[str, Any]] = field(default_factory=list)  # Subdomains per registrable domain
     
     def __post_init__(self):
         """Clean data after initialization"""
@@ -98,8 +122,73 @@ class SearchResult:
             'strategy_info': self.strategy_info,
             'success': self.success,
             'error': self.error,
+            'count': len(self.urls),
+            'domain_stats': self.domain_stats,
+            'domain_groups': self.domain_groups
+        }
+    
+    def to_compact_dict(self) -> Dict[str, Any]:
+        """
+        Slim form of to_dict() for large results - every domain is sent once
+
+        'domains' holds the ranked URLs; everything else refers to them by
+        index: the URLs of each action in strategy_info.action_results, the
+        members of each domain group and the rows of 'stats' (one per domain,
+        columns as in 'stats_fields', per-action hits in the order of 'actions').
+        """
+        index = {domain: position for position, domain in enumerate(self.urls)}
+        action_results = self.strategy_info.get('action_results', {})
+        actions = list(action_results)
+        for stats in self.domain_stats.values():
+            actions.extend(action for action in stats.get('actions', {}) if action not in actions)
+        
+        stats_rows = []
+        for domain in self.urls:
+            stats = self.domain_stats.get(domain)
+            if stats is None:
+                stats_rows.append(None)
+                continue
+            row = [stats.get(name) for name in COMPACT_STATS_FIELDS[:-1]]
+            row.append([stats.get('actions', {}).get(action, 0) for action in actions])
+            stats_rows.append(row)
+        
+        strategy_info = {key: value for key, value in self.strategy_info.items()
+                         if key not in ('action_results', 'combined_results')}
+        if action_results:
+            strategy_info['action_results'] = {
+                action: dict(result, urls=[index[url] for url in result.get('urls', []) if url in index])
+                for action, result in action_results.items()
+            }
+        
+        return {
+            'format': 'compact',
+            'domains': self.urls,
+            'actions': actions,
+            'stats_fields': list(COMPACT_STATS_FIELDS),
+            'stats': stats_rows,
+            'domain_groups': [dict(group, domains=[index[domain] for domain in group['domains'] if domain in index])
+                              for group in self.domain_groups],
+            'search_term': self.search_term,
+            'action_type': self.action_type,
+            'strategy_info': strategy_info,
+            'success': self.success,
+            'error': self.error,
             'count': len(self.urls)
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchResult':
+        """Rebuild a SearchResult from to_dict() output"""
+        return cls(
+            urls=data.get('urls', []),
+            search_term=data.get('search_term', ''),
+            action_type=data.get('action_type', 'both'),
+            strategy_info=data.get('strategy_info', {}),
+            success=data.get('success', False),
+            error=data.get('error'),
+            domain_stats=data.get('domain_stats', {}),
+            domain_groups=data.get('domain_groups', [])
+        )
 
 @dataclass
 class CommitStatus:
@@ -198,6 +287,92 @@ class WhitelistRequest:
         except Exception as e:
             return False, f"Validation error: {str(e)}"
 
+@dataclass
+class BulkImportRow:
+    """One (ticket, category, url) row of a bulk whitelist import and its outcome"""
+    line: int
+    ticket_id: str
+    category: str
+    url: str
+    status: str = 'pending'  # pending | invalid | duplicate | covered | added | failed
+    message: Optional[str] = None
+    
+    def __post_init__(self):
+        """Clean string data"""
+        self.ticket_id = str(self.ticket_id or '').strip()
+        self.category = str(self.category or '').strip()
+        self.url = str(self.url or '').strip()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'line': self.line,
+            'ticket_id': self.ticket_id,
+            'category': self.category,
+            'url': self.url,
+            'status': self.status,
+            'message': self.message
+        }
+
+@dataclass
+class TicketHistoryQuery:
+    """Filters for the whitelist audit history (empty fields match everything)"""
+    domain: str = ''
+    ticket_id: str = ''
+    username: str = ''
+    hostname: str = ''
+    category: str = ''
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    page: int = 1
+    page_size: int = 50
+    
+    MAX_PAGE_SIZE = 500
+    
+    def __post_init__(self):
+        """Clean string filters"""
+        for name in ('domain', 'ticket_id', 'username', 'hostname', 'category'):
+            setattr(self, name, str(getattr(self, name) or '').strip())
+        self.domain = self.domain.lower()
+    
+    @classmethod
+    def from_args(cls, args) -> 'TicketHistoryQuery':
+        """
+        Build a query from request arguments
+        
+        Raises:
+            ValueError: If a date or number is malformed
+        """
+        def parse_date(name):
+            value = (args.get(name) or '').strip()
+            return date.fromisoformat(value) if value else None
+        
+        return cls(
+            domain=args.get('domain', ''),
+            ticket_id=args.get('ticket_id', ''),
+            username=args.get('username', ''),
+            hostname=args.get('hostname', ''),
+            category=args.get('category', ''),
+            date_from=parse_date('date_from'),
+            date_to=parse_date('date_to'),
+            page=int(args.get('page') or 1),
+            page_size=int(args.get('page_size') or 50)
+        )
+    
+    def validate(self) -> tuple[bool, Optional[str]]:
+        """Validate paging and date range"""
+        if self.page < 1:
+            return False, "Page must be 1 or higher"
+        if not 1 <= self.page_size <= self.MAX_PAGE_SIZE:
+            return False, f"Page size must be between 1 and {self.MAX_PAGE_SIZE}"
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            return False, "Start date is after end date"
+        return True, None
+    
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.page_size
+
 @dataclass
 class SearchAttempt:
     """Data model for individual search attempts"""
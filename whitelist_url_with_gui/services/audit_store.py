@@ -0,0 +1,672 @@
+"""
+Ticket Audit Store
+Structured, append-only record of every whitelist ticket
+
+Records are JSON lines in one segment file per day
+(audit/tickets-YYYY-MM-DD.jsonl). Segments are only ever appended to, so
+they double as the tamper-evident audit trail. A SQLite index maps ticket
+id, user, firewall, category and date to the segment and byte offset of
+each record, so a lookup is a B-tree search plus one read instead of a
+scan of the log directory. The index holds nothing that is not in the
+segments and can be rebuilt from them at any time.
+
+Line types:
+    ticket         - the full ticket as submitted (TicketData.to_dict())
+    commit_status  - a later change of the ticket's commit status
+
+Segments of finished months are packed into audit/archive/tickets-YYYY-MM.zip
+together with the plain ticket_*.log files from before the audit store.
+Zip members can be read individually, so a download still reads a single
+record without unpacking the archive.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import re
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows - single process development server only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'tickets-'
+SEGMENT_SUFFIX = '.jsonl'
+ARCHIVE_DIR = 'archive'
+LEGACY_MEMBER_PREFIX = 'legacy/'
+
+# ticket_{id}_{YYYYmmdd}_{HHMMSS}[_{n}].log as written before the audit store
+_LEGACY_LOG = re.compile(r'^ticket_(?P<ticket_id>.+)_(?P<stamp>\d{8}_\d{6})(?:_\d+)?\.log$')
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS tickets ("
+    "record_id TEXT PRIMARY KEY, ticket_id TEXT NOT NULL, username TEXT, hostname TEXT, "
+    "category TEXT, created_at TEXT NOT NULL, url_count INTEGER, "
+    "commit_status TEXT, commit_progress TEXT, updated_at TEXT, "
+    "segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, archive TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_ticket ON tickets (ticket_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_user ON tickets (username, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_host ON tickets (hostname, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_category ON tickets (category, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets (created_at)",
+    "CREATE TABLE IF NOT EXISTS legacy_logs ("
+    "member TEXT PRIMARY KEY, archive TEXT NOT NULL, ticket_id TEXT NOT NULL, created_at TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_legacy_ticket ON legacy_logs (ticket_id, created_at)",
+    # Distinct URLs, and which tickets added them - substring search only scans the distinct ones
+    "CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS ticket_urls ("
+    "url_id INTEGER NOT NULL, record_id TEXT NOT NULL, PRIMARY KEY (url_id, record_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_ticket_urls_record ON ticket_urls (record_id)",
+    # Status updates that arrived before their ticket (still queued in another worker's writer)
+    "CREATE TABLE IF NOT EXISTS pending_status ("
+    "record_id TEXT PRIMARY KEY, commit_status TEXT, commit_progress TEXT, updated_at TEXT)",
+)
+
+# Trigram full-text index over urls for domain substring search (SQLite 3.34+)
+_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts USING fts5("
+    "url, content='urls', content_rowid='id', tokenize='trigram')"
+)
+
+# Bumped when new index tables have to be filled from the segments (PRAGMA user_version)
+INDEX_VERSION = 1
+
+HISTORY_COLUMNS = (
+    'created_at', 'ticket_id', 'username', 'hostname', 'category',
+    'url_count', 'commit_status', 'commit_progress', 'record_id'
+)
+
+
+class AuditStore:
+    """Append-only JSONL ticket segments with a SQLite index"""
+
+    LOCK_STRIPES = 64  # Per-ticket status update locks (by hash of the record id)
+    COUNT_LIMIT = 10000  # History totals above this are reported as "more than"
+    SPARSE_DOMAIN_MATCHES = 5000  # Domain matches up to this are resolved before sorting
+
+    def __init__(self, directory: str, index_path: str = None):
+        self.directory = directory
+        self.index_path = index_path or os.path.join(directory, 'index.db')
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        conn = self._connection()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        if 'archive' not in {column['name'] for column in conn.execute("PRAGMA table_info(tickets)")}:
+            conn.execute("ALTER TABLE tickets ADD COLUMN archive TEXT")  # Index created before archiving
+        try:
+            conn.execute(_FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite %s has no FTS5 trigram tokenizer - domain search falls back to LIKE",
+                           sqlite3.sqlite_version)
+            self.full_text = False
+        if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+            self._upgrade_index()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # The segments are the durable copy
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def new_record_id() -> str:
+        return uuid.uuid4().hex
+
+    # Writing
+
+    def append_ticket(self, record_id: str, ticket: Dict[str, Any]) -> str:
+        """
+        Append a ticket record and index it
+
+        Args:
+            record_id: Unique id from new_record_id()
+            ticket: TicketData.to_dict() output
+
+        Returns:
+            Path of the segment that was written
+        """
+        line = {'type': 'ticket', 'record_id': record_id, **ticket}
+        segment, offset, length = self._append(line, ticket.get('timestamp'))
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._index_ticket(line, segment, offset, length)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return os.path.join(self.directory, segment)
+
+    def append_status(self, record_id: str, commit_status: str, commit_progress: str) -> Optional[str]:
+        """
+        Record a commit status change of an existing ticket
+
+        Idempotent: repeating the current status writes nothing. The check
+        and the write happen under the ticket's lock and inside one
+        IMMEDIATE transaction, which also serializes concurrent updates
+        from other worker processes.
+
+        The ticket itself may not be indexed yet - its append can still be
+        queued in another worker's writer. The status is then kept as
+        pending and applied when the ticket arrives.
+
+        Returns:
+            Path of the segment that was written, or None if the ticket
+            already has this status
+        """
+        with self._ticket_lock(record_id):
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT commit_status, commit_progress FROM tickets WHERE record_id = ?", (record_id,)
+                ).fetchone()
+                if row is None:
+                    row = conn.execute(
+                        "SELECT commit_status, commit_progress FROM pending_status WHERE record_id = ?", (record_id,)
+                    ).fetchone()
+                if row is not None and (row['commit_status'], row['commit_progress']) == (commit_status, commit_progress):
+                    logger.debug("Audit record %s already has status %s (%s)", record_id, commit_status, commit_progress)
+                    segment = None
+                else:
+                    line = {
+                        'type': 'commit_status',
+                        'record_id': record_id,
+                        'commit_status': commit_status,
+                        'commit_progress': commit_progress,
+                        'timestamp': datetime.now().isoformat()
+                    }
+                    segment, _, _ = self._append(line, line['timestamp'])
+                    self._apply_status(line)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return None if segment is None else os.path.join(self.directory, segment)
+
+    def _ticket_lock(self, record_id: str) -> threading.Lock:
+        # Striped locks: bounded memory, and updates of different tickets rarely contend
+        return self._locks[hash(record_id) % len(self._locks)]
+
+    def _append(self, line: Dict[str, Any], timestamp: Optional[str]):
+        """Append one JSON line to the segment of its day; returns (segment, offset, length)"""
+        segment = _segment_name(timestamp)
+        data = (json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        fd = os.open(os.path.join(self.directory, segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # One O_APPEND write per line - writers in other workers never interleave with it
+            os.write(fd, data)
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+        return segment, end - len(data), len(data)
+
+    def _index_ticket(self, line: Dict[str, Any], segment: str, offset: int, length: int, archive: str = None):
+        """Index a ticket line (call inside a transaction)"""
+        conn = self._connection()
+        urls = line.get('urls_added') or []
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO tickets (record_id, ticket_id, username, hostname, category, created_at, "
+            "url_count, commit_status, commit_progress, updated_at, segment, offset, length, archive) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                line['record_id'], line.get('ticket_id', ''), line.get('username'), line.get('hostname'),
+                line.get('category'), line.get('timestamp') or '', len(urls),
+                line.get('commit_status'), line.get('commit_progress'), line.get('timestamp'),
+                segment, offset, length, archive
+            )
+        )
+        if cursor.rowcount == 0:
+            # Same record in an archive and a live segment (archiving was interrupted) - keep one copy
+            conn.execute(
+                "UPDATE tickets SET segment = ?, offset = ?, length = ?, archive = ? WHERE record_id = ?",
+                (segment, offset, length, archive, line['record_id'])
+            )
+            return
+        pending = conn.execute("SELECT * FROM pending_status WHERE record_id = ?", (line['record_id'],)).fetchone()
+        if pending is not None:
+            conn.execute(
+                "UPDATE tickets SET commit_status = ?, commit_progress = ?, updated_at = ? WHERE record_id = ?",
+                (pending['commit_status'], pending['commit_progress'], pending['updated_at'], line['record_id'])
+            )
+            conn.execute("DELETE FROM pending_status WHERE record_id = ?", (line['record_id'],))
+        for url in urls:
+            cursor = conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+            if cursor.rowcount == 1:
+                url_id = cursor.lastrowid
+                if self.full_text:
+                    conn.execute("INSERT INTO urls_fts (rowid, url) VALUES (?, ?)", (url_id, url))
+            else:
+                url_id = conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()[0]
+            conn.execute(
+                "INSERT OR IGNORE INTO ticket_urls (url_id, record_id) VALUES (?, ?)", (url_id, line['record_id'])
+            )
+
+    def _apply_status(self, line: Dict[str, Any]):
+        """Set a ticket's status, or keep it as pending until the ticket is indexed (call inside a transaction)"""
+        conn = self._connection()
+        cursor = conn.execute(
+            "UPDATE tickets SET commit_status = ?, commit_progress = ?, updated_at = ? WHERE record_id = ?",
+            (line['commit_status'], line['commit_progress'], line['timestamp'], line['record_id'])
+        )
+        if cursor.rowcount == 0:
+            conn.execute(
+                "INSERT INTO pending_status (record_id, commit_status, commit_progress, updated_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(record_id) DO UPDATE SET "
+                "commit_status = excluded.commit_status, commit_progress = excluded.commit_progress, "
+                "updated_at = excluded.updated_at WHERE excluded.updated_at >= pending_status.updated_at",
+                (line['record_id'], line['commit_status'], line['commit_progress'], line['timestamp'])
+            )
+
+    # Reading
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """Ticket record with its current commit status, or None"""
+        row = self._connection().execute(
+            "SELECT * FROM tickets WHERE record_id = ?", (record_id,)
+        ).fetchone()
+        return None if row is None else self._load(row)
+
+    def latest_for_ticket(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Most recent record of a ticket id, or None"""
+        row = self._connection().execute(
+            "SELECT * FROM tickets WHERE ticket_id = ? ORDER BY created_at DESC LIMIT 1", (ticket_id,)
+        ).fetchone()
+        return None if row is None else self._load(row)
+
+    def _load(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Read the record a row points to and overlay the indexed status"""
+        try:
+            return self._read(row)
+        except FileNotFoundError:
+            # The segment was archived between the index lookup and the read
+            row = self._connection().execute(
+                "SELECT * FROM tickets WHERE record_id = ?", (row['record_id'],)
+            ).fetchone()
+            return self._read(row)
+
+    def _read(self, row: sqlite3.Row) -> Dict[str, Any]:
+        if row['archive']:
+            with zipfile.ZipFile(os.path.join(self.directory, row['archive'])) as archive:
+                with archive.open(row['segment']) as f:
+                    f.seek(row['offset'])
+                    record = json.loads(f.read(row['length']))
+        else:
+            with open(os.path.join(self.directory, row['segment']), 'rb') as f:
+                f.seek(row['offset'])
+                record = json.loads(f.read(row['length']))
+        record.pop('type', None)
+        record['commit_status'] = row['commit_status']
+        record['commit_progress'] = row['commit_progress']
+        record['updated_at'] = row['updated_at']
+        return record
+
+    def legacy_ticket_log(self, ticket_id: str) -> Optional[bytes]:
+        """Latest archived pre-audit-store ticket_*.log of a ticket, or None"""
+        row = self._connection().execute(
+            "SELECT archive, member FROM legacy_logs WHERE ticket_id = ? ORDER BY created_at DESC LIMIT 1",
+            (ticket_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        with zipfile.ZipFile(os.path.join(self.directory, row['archive'])) as archive:
+            return archive.read(row['member'])
+
+    # History queries
+
+    def search(self, query, offset: int = 0, limit: int = 50) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Tickets matching a TicketHistoryQuery, newest first
+
+        Only the index is read - no segment or archive is opened. Counting
+        stops at COUNT_LIMIT so a very broad filter costs no more than a
+        narrow one.
+
+        Returns:
+            Tuple of (rows for this page, number of matches, whether that number is exact)
+        """
+        where, params = self._history_filter(query)
+        conn = self._connection()
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM tickets t{where} LIMIT {self.COUNT_LIMIT + 1})", params
+        ).fetchone()[0]
+        exact = total <= self.COUNT_LIMIT
+        rows = conn.execute(
+            f"SELECT {', '.join('t.' + column for column in HISTORY_COLUMNS)}, "
+            "(SELECT group_concat(u.url, char(10)) FROM ticket_urls tu JOIN urls u ON u.id = tu.url_id "
+            "WHERE tu.record_id = t.record_id) AS urls "
+            f"FROM tickets t{where} ORDER BY t.created_at DESC, t.record_id LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [_history_row(row) for row in rows], min(total, self.COUNT_LIMIT), exact
+
+    def iter_search(self, query, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """All tickets matching query, newest first, fetched in batches (for exports)"""
+        offset = 0
+        while True:
+            rows, _, _ = self.search(query, offset, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            offset += batch_size
+
+    def _history_filter(self, query):
+        """WHERE clause and parameters for a TicketHistoryQuery"""
+        clauses = []
+        params: List[Any] = []
+        if query.ticket_id:
+            # Prefix match as a range so idx_tickets_ticket is used
+            clauses.append("t.ticket_id >= ? AND t.ticket_id < ?")
+            params += [query.ticket_id, query.ticket_id + '\U0010ffff']
+        for column in ('username', 'hostname', 'category'):
+            value = getattr(query, column)
+            if value:
+                clauses.append(f"t.{column} = ?")
+                params.append(value)
+        if query.date_from:
+            clauses.append("t.created_at >= ?")
+            params.append(query.date_from.isoformat())
+        if query.date_to:
+            clauses.append("t.created_at < ?")
+            params.append((query.date_to + timedelta(days=1)).isoformat())
+        if query.domain:
+            links = self._collect_matching_urls(query.domain)
+            if links <= self.SPARSE_DOMAIN_MATCHES:
+                # Few tickets: collect them, then sort
+                clauses.append(
+                    "t.record_id IN (SELECT tu.record_id FROM temp.matching_urls m "
+                    "CROSS JOIN ticket_urls tu ON tu.url_id = m.id)"
+                )
+            else:
+                # Many tickets: walk by date (or another filter's index) and stop after the page
+                clauses.append(
+                    "EXISTS (SELECT 1 FROM ticket_urls tu JOIN temp.matching_urls m ON m.id = tu.url_id "
+                    "WHERE tu.record_id = t.record_id)"
+                )
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        return where, params
+
+    def _collect_matching_urls(self, term: str) -> int:
+        """
+        Fill the connection's temp.matching_urls with the ids of URLs containing term
+
+        Returns:
+            Number of ticket/URL links for those URLs (an upper bound of matching tickets)
+        """
+        conn = self._connection()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS matching_urls (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.matching_urls")
+        if self.full_text and len(term) >= 3:
+            conn.execute(
+                "INSERT INTO temp.matching_urls SELECT rowid FROM urls_fts WHERE urls_fts MATCH ?",
+                ('"' + term.replace('"', '""') + '"',)
+            )
+        else:
+            # Trigrams need three characters; shorter terms scan the distinct URLs
+            conn.execute(
+                "INSERT INTO temp.matching_urls SELECT id FROM urls WHERE url LIKE ? ESCAPE '\\'",
+                ('%' + re.sub(r'([%_\\])', r'\\\1', term) + '%',)
+            )
+        # CROSS JOIN keeps the small, unanalyzed temp table as the outer loop
+        return conn.execute(
+            "SELECT COUNT(*) FROM temp.matching_urls m CROSS JOIN ticket_urls tu ON tu.url_id = m.id"
+        ).fetchone()[0]
+
+    # Maintenance
+
+    def segments(self) -> List[str]:
+        """Segment file names, oldest first"""
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def rebuild_index(self) -> int:
+        """
+        Recreate the index from the archives and segments
+
+        Returns:
+            Number of ticket records indexed
+        """
+        conn = self._connection()
+        count = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM tickets")
+            conn.execute("DELETE FROM legacy_logs")
+            conn.execute("DELETE FROM ticket_urls")
+            conn.execute("DELETE FROM urls")
+            conn.execute("DELETE FROM pending_status")
+            if self.full_text:
+                conn.execute("INSERT INTO urls_fts (urls_fts) VALUES ('delete-all')")
+            for archive_name in self._archives():
+                with zipfile.ZipFile(os.path.join(self.directory, archive_name)) as archive:
+                    for member in sorted(archive.namelist()):
+                        if member.startswith(LEGACY_MEMBER_PREFIX):
+                            self._index_legacy(archive_name, member)
+                        else:
+                            with archive.open(member) as f:
+                                count += self._index_lines(f, member, archive_name)
+            for segment in self.segments():
+                with open(os.path.join(self.directory, segment), 'rb') as f:
+                    count += self._index_lines(f, segment)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def _upgrade_index(self):
+        """Fill index tables added since the index was created"""
+        conn = self._connection()
+        with _FileLock(self.index_path + '.lock'):
+            # Another worker may have done it while we waited
+            if conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+                if conn.execute("SELECT 1 FROM tickets LIMIT 1").fetchone() is not None:
+                    logger.info("Upgrading the ticket audit index to version %d", INDEX_VERSION)
+                    self.rebuild_index()
+                conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def _index_lines(self, f, segment: str, archive: str = None) -> int:
+        count = 0
+        offset = 0
+        for raw in f:
+            try:
+                line = json.loads(raw)
+            except ValueError:
+                logger.warning("Skipping damaged line in %s at byte %d", segment, offset)
+            else:
+                if line.get('type') == 'ticket':
+                    self._index_ticket(line, segment, offset, len(raw), archive)
+                    count += 1
+                elif line.get('type') == 'commit_status':
+                    self._apply_status(line)
+            offset += len(raw)
+        return count
+
+    def _index_legacy(self, archive: str, member: str):
+        match = _LEGACY_LOG.match(os.path.basename(member))
+        if match is None:
+            return
+        created_at = datetime.strptime(match.group('stamp'), '%Y%m%d_%H%M%S').isoformat()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO legacy_logs (member, archive, ticket_id, created_at) VALUES (?, ?, ?, ?)",
+            (member, archive, match.group('ticket_id'), created_at)
+        )
+
+    def _archives(self) -> List[str]:
+        directory = os.path.join(self.directory, ARCHIVE_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            os.path.join(ARCHIVE_DIR, name) for name in os.listdir(directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith('.zip')
+        )
+
+    def archive_old_logs(self, legacy_dir: str = None, now: datetime = None) -> int:
+        """
+        Pack segments (and legacy ticket_*.log files in legacy_dir) of
+        finished months into one compressed archive per month
+
+        A month is archived once it has been over for a day, so late
+        writes around midnight have landed. Safe to run from several
+        workers at once: they take turns on a lock file, and whatever one
+        of them already archived is skipped by the next.
+
+        Returns:
+            Number of files archived
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=1)).strftime('%Y-%m')
+        by_month: Dict[str, List[str]] = {}
+        for segment in self.segments():
+            month = segment[len(SEGMENT_PREFIX):len(SEGMENT_PREFIX) + 7]
+            if month < cutoff:
+                by_month.setdefault(month, []).append(segment)
+        legacy_by_month: Dict[str, List[str]] = {}
+        if legacy_dir and os.path.isdir(legacy_dir):
+            for name in os.listdir(legacy_dir):
+                match = _LEGACY_LOG.match(name)
+                if match:
+                    stamp = match.group('stamp')
+                    month = f"{stamp[:4]}-{stamp[4:6]}"
+                    if month < cutoff:
+                        legacy_by_month.setdefault(month, []).append(name)
+        if not by_month and not legacy_by_month:
+            return 0
+
+        os.makedirs(os.path.join(self.directory, ARCHIVE_DIR), exist_ok=True)
+        archived = 0
+        with _FileLock(os.path.join(self.directory, ARCHIVE_DIR, '.lock')):
+            for month in sorted(set(by_month) | set(legacy_by_month)):
+                archived += self._archive_month(
+                    month, by_month.get(month, []), legacy_dir, legacy_by_month.get(month, [])
+                )
+        return archived
+
+    def _archive_month(self, month: str, segments: List[str], legacy_dir: str, legacy_logs: List[str]) -> int:
+        archive_name = os.path.join(ARCHIVE_DIR, f"{SEGMENT_PREFIX}{month}.zip")
+        path = os.path.join(self.directory, archive_name)
+        sources = [(os.path.join(self.directory, name), name) for name in segments]
+        sources += [(os.path.join(legacy_dir, name), LEGACY_MEMBER_PREFIX + name) for name in legacy_logs]
+
+        # 1. Copy into the archive (members already there came from an interrupted run)
+        packed = []
+        with zipfile.ZipFile(path, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            existing = set(archive.namelist())
+            for source, member in sources:
+                if not os.path.exists(source):
+                    continue  # Archived by another worker before we took the lock
+                if member not in existing:
+                    archive.write(source, member)
+                packed.append((source, member))
+        _fsync_file(path)
+
+        # 2. Point the index at the archive
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for source, member in packed:
+                if member.startswith(LEGACY_MEMBER_PREFIX):
+                    self._index_legacy(archive_name, member)
+                else:
+                    conn.execute(
+                        "UPDATE tickets SET archive = ? WHERE segment = ? AND archive IS NULL",
+                        (archive_name, member)
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        # 3. Only now remove the originals
+        for source, _ in packed:
+            os.remove(source)
+        if packed:
+            logger.info("Archived %d ticket log files of %s into %s", len(packed), month, archive_name)
+        return len(packed)
+
+
+class _FileLock:
+    """Exclusive flock for the duration of a with block (no-op where flock is unavailable)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def _fsync_file(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _history_row(row: sqlite3.Row) -> Dict[str, Any]:
+    item = {column: row[column] for column in HISTORY_COLUMNS}
+    item['urls'] = row['urls'].split('\n') if row['urls'] else []
+    return item
+
+
+def _segment_name(timestamp: Optional[str]) -> str:
+    try:
+        day = datetime.fromisoformat(timestamp).strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        day = datetime.now().strftime('%Y-%m-%d')
+    return f"{SEGMENT_PREFIX}{day}{SEGMENT_SUFFIX}"
+
+
+_store: Optional[AuditStore] = None
+_store_lock = threading.Lock()
+
+
+def get_audit_store() -> AuditStore:
+    """Process-wide audit store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AuditStore(config.AUDIT_DIR, config.AUDIT_INDEX_FILE)
+    return _store
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Ticket audit store maintenance')
+    parser.add_argument('command', nargs='?', default='reindex', choices=['reindex', 'archive'],
+                        help='reindex: rebuild the index (e.g. after restoring a backup); '
+                             'archive: pack finished months now')
+    command = parser.parse_args().command
+    if command == 'archive':
+        print(f"Archived {get_audit_store().archive_old_logs(config.LOG_DIR)} files")
+    else:
+        print(f"Indexed {get_audit_store().rebuild_index()} ticket records")
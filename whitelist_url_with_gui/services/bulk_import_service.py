@@ -0,0 +1,368 @@
+"""
+Bulk Import Service
+Applies many (ticket, category, url) rows at once - for migrations that
+would otherwise take dozens of single-category submissions and commits.
+
+All rows are validated first. Valid rows are grouped by category; each
+category gets one config edit (URLs it already covers are skipped) and the
+whole batch gets a single commit. Every row comes back with its own status.
+"""
+import csv
+import io
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+from models.ticket import BulkImportRow, TicketData
+from api.palo_alto_client import PaloAltoAPIError
+from utils.coverage_index import CategoryCoverageIndex, NEW
+from utils.validators import normalize_whitelist_url, validate_category_name, validate_single_url, validate_ticket_id
+
+logger = logging.getLogger(__name__)
+
+# Accepted column/key names for each field
+FIELD_NAMES = {
+    'ticket_id': ('ticket_id', 'ticket'),
+    'category': ('category',),
+    'url': ('url', 'domain'),
+}
+
+ROW_STATUSES = ('invalid', 'duplicate', 'covered', 'new', 'added', 'failed')
+
+
+def parse_import(content: str, fmt: str = None) -> List[BulkImportRow]:
+    """
+    Parse import rows from CSV (with a header line) or JSON
+
+    JSON is a list of objects, or an object with such a list under 'rows'.
+
+    Args:
+        content: File content
+        fmt: 'csv' or 'json'; guessed from the content if omitted
+
+    Returns:
+        Rows in file order
+
+    Raises:
+        ValueError: If the content cannot be parsed or has too many rows
+    """
+    content = content.lstrip('\ufeff')
+    if fmt is None:
+        fmt = 'json' if content.lstrip()[:1] in ('[', '{') else 'csv'
+    if fmt == 'json':
+        try:
+            return parse_records(json.loads(content))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+    if fmt == 'csv':
+        return _checked(_parse_csv(content))
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _field(record: Dict[str, Any], name: str) -> str:
+    for key in FIELD_NAMES[name]:
+        if record.get(key) is not None:
+            return record[key]
+    return ''
+
+
+def parse_records(records) -> List[BulkImportRow]:
+    """
+    Import rows from already decoded JSON (a list of objects, or {'rows': [...]})
+
+    Raises:
+        ValueError: If the data has the wrong shape or too many rows
+    """
+    if isinstance(records, dict):
+        records = records.get('rows')
+    if not isinstance(records, list):
+        raise ValueError("JSON import must be a list of rows (or an object with a 'rows' list)")
+    rows = []
+    for number, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            raise ValueError(f"Row {number} is not an object")
+        record = {str(key).strip().lower(): value for key, value in record.items()}
+        rows.append(BulkImportRow(number, _field(record, 'ticket_id'), _field(record, 'category'),
+                                  _field(record, 'url')))
+    return _checked(rows)
+
+
+def _checked(rows: List[BulkImportRow]) -> List[BulkImportRow]:
+    if not rows:
+        raise ValueError("No rows to import")
+    if len(rows) > config.BULK_IMPORT_MAX_ROWS:
+        raise ValueError(f"Too many rows: {len(rows)} (maximum: {config.BULK_IMPORT_MAX_ROWS})")
+    return rows
+
+
+def _parse_csv(content: str) -> List[BulkImportRow]:
+    reader = csv.DictReader(io.StringIO(content))
+    header = {(name or '').strip().lower() for name in reader.fieldnames or []}
+    missing = [name for name, keys in FIELD_NAMES.items() if not header.intersection(keys)]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+    rows = []
+    for record in reader:
+        record = {(key or '').strip().lower(): value for key, value in record.items()}
+        rows.append(BulkImportRow(reader.line_num, _field(record, 'ticket_id'), _field(record, 'category'),
+                                  _field(record, 'url')))
+    return rows
+
+
+class BulkImportService:
+    """Validate and apply a bulk whitelist import"""
+
+    def __init__(self, whitelist_service, logging_service=None):
+        self.whitelist_service = whitelist_service
+        self.api_client = whitelist_service.api_client
+        self.logging_service = logging_service
+
+    def run(self, rows: List[BulkImportRow], username: str, hostname: str,
+            dry_run: bool = False) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Import rows: one config edit per category, one commit for the batch
+
+        Args:
+            rows: Parsed import rows (statuses are filled in place)
+            username: User the audit records are written for
+            hostname: Firewall the import goes to
+            dry_run: Only validate and check coverage - no edit, no commit
+
+        Returns:
+            Tuple of (success, message, report)
+        """
+        try:
+            categories = self.whitelist_service.get_categories()
+        except Exception as e:
+            logger.warning("Bulk import could not load categories: %s", e)
+            return False, f"Bulk import failed: {str(e)}", {}
+
+        groups = self._validate(rows, categories)
+        category_results = [
+            self._apply_category(category, categories[category], group, dry_run)
+            for category, group in groups.items()
+        ]
+
+        added = [row for row in rows if row.status == 'added']
+        commit_job_id = None
+        commit_error = None
+        if added:
+            try:
+                commit_job_id = self.whitelist_service.start_commit()
+            except Exception as e:
+                logger.warning("Bulk import commit start failed: %s", e)
+                commit_error = str(e)
+
+        record_ids = self._log_tickets(added, categories, username, hostname, commit_job_id)
+
+        summary = {status: 0 for status in ROW_STATUSES}
+        for row in rows:
+            summary[row.status] = summary.get(row.status, 0) + 1
+        summary['total'] = len(rows)
+
+        report = {
+            'dry_run': dry_run,
+            'summary': summary,
+            'categories': category_results,
+            'rows': [row.to_dict() for row in rows],
+            'commit_job_id': commit_job_id,
+            'ticket_record_ids': record_ids
+        }
+        if commit_error:
+            report['commit_error'] = commit_error
+
+        message = self._summary_message(summary, len(category_results), dry_run, commit_job_id, commit_error)
+        if self.logging_service:
+            self.logging_service.log_info(message, {
+                'username': username, 'hostname': hostname, 'dry_run': dry_run,
+                'commit_job_id': commit_job_id, **summary
+            })
+        # Invalid and duplicate rows are only reported; a failed category edit fails the batch
+        success = summary['failed'] == 0 and summary['invalid'] + summary['duplicate'] < len(rows)
+        return success, message, report
+
+    def _validate(self, rows: List[BulkImportRow], categories: Dict[str, Any]) -> 'OrderedDict[str, List[BulkImportRow]]':
+        """Check every row and group the valid ones by category display name"""
+        groups: 'OrderedDict[str, List[BulkImportRow]]' = OrderedDict()
+        by_name: Dict[str, List[str]] = {}
+        for display_name, info in categories.items():
+            by_name.setdefault(info['name'], []).append(display_name)
+        seen: Dict[Tuple[str, str], int] = {}
+
+        for row in rows:
+            if not validate_ticket_id(row.ticket_id):
+                row.status, row.message = 'invalid', "Invalid ticket ID"
+                continue
+            if not validate_category_name(row.category):
+                row.status, row.message = 'invalid', "Invalid category name"
+                continue
+            category, error = _resolve_category(row.category, categories, by_name)
+            if error:
+                row.status, row.message = 'invalid', error
+                continue
+            # The form manual submissions use, so spelling variants of one URL are one row
+            url = normalize_whitelist_url(row.url)
+            if not validate_single_url(url):
+                row.status, row.message = 'invalid', "Invalid URL"
+                continue
+
+            row.url = url
+            key = (category, url)
+            if key in seen:
+                row.status, row.message = 'duplicate', f"Same URL and category as line {seen[key]}"
+                continue
+            seen[key] = row.line
+            row.category = category
+            groups.setdefault(category, []).append(row)
+        return groups
+
+    def _apply_category(self, category: str, category_info: Dict[str, Any], group: List[BulkImportRow],
+                        dry_run: bool) -> Dict[str, Any]:
+        """Skip URLs the category already covers and add the rest in one edit"""
+        result = {'category': category, 'rows': len(group), 'added': 0, 'covered': 0}
+        try:
+            members = self.api_client.get_category_urls(category_info)
+        except PaloAltoAPIError as e:
+            _fail(group, str(e))
+            result['error'] = str(e)
+            return result
+
+        index = CategoryCoverageIndex(members)
+        new_rows = []
+        for row in group:
+            coverage = index.classify(row.url)
+            if coverage['status'] == NEW:
+                row.status = 'new'
+                new_rows.append(row)
+            else:
+                row.status, row.message = 'covered', f"Already covered by {coverage['covered_by']}"
+        result['covered'] = len(group) - len(new_rows)
+
+        if not new_rows or dry_run:
+            return result
+        try:
+            updated, message = self.api_client.update_category_urls(
+                category_info, [row.url for row in new_rows], existing_urls=members
+            )
+        except PaloAltoAPIError as e:
+            logger.warning("Bulk import edit of %s failed: %s", category, e)
+            _fail(new_rows, str(e))
+            result['error'] = str(e)
+            return result
+        if not updated:
+            _fail(new_rows, message)
+            result['error'] = message
+            return result
+
+        for row in new_rows:
+            row.status, row.message = 'added', None
+        result['added'] = len(new_rows)
+        return result
+
+    def _log_tickets(self, added: List[BulkImportRow], categories: Dict[str, Any], username: str,
+                     hostname: str, commit_job_id: Optional[str]) -> List[str]:
+        """One audit record per ticket and category"""
+        if not self.logging_service or not added:
+            return []
+        tickets: 'OrderedDict[Tuple[str, str], List[str]]' = OrderedDict()
+        for row in added:
+            tickets.setdefault((row.ticket_id, row.category), []).append(row.url)
+
+        record_ids = []
+        for (ticket_id, category), urls in tickets.items():
+            ticket_data = TicketData(
+                ticket_id=ticket_id,
+                username=username,
+                hostname=hostname,
+                category=category,
+                context=categories[category].get('context', 'unknown'),
+                urls_added=urls,
+                success=True,
+                commit_job_id=commit_job_id,
+                commit_status='SUBMITTED' if commit_job_id else None,
+                commit_progress='0' if commit_job_id else None,
+                search_strategy='bulk_import'
+            )
+            record_id = self.logging_service.create_ticket_log(ticket_data)
+            if record_id:
+                record_ids.append(record_id)
+            self.logging_service.log_whitelist_operation(ticket_data)
+        return record_ids
+
+    @staticmethod
+    def _summary_message(summary: Dict[str, int], category_count: int, dry_run: bool,
+                         commit_job_id: Optional[str], commit_error: Optional[str]) -> str:
+        rejected = summary['invalid'] + summary['duplicate'] + summary['failed']
+        if dry_run:
+            return (f"Dry run: {summary['new']} of {summary['total']} URLs would be added to "
+                    f"{category_count} categories; {summary['covered']} already covered, {rejected} rejected.")
+        message = (f"{summary['added']} of {summary['total']} URLs added to {category_count} categories; "
+                   f"{summary['covered']} already covered, {rejected} rejected.")
+        if commit_job_id:
+            message += f" Commit job {commit_job_id} started."
+        elif commit_error:
+            message += " Warning: Commit could not be started automatically."
+        return message
+
+
+def _resolve_category(name: str, categories: Dict[str, Any],
+                      by_name: Dict[str, List[str]]) -> Tuple[Optional[str], Optional[str]]:
+    """Category display name for 'Name (context)' or an unambiguous bare 'Name'"""
+    if name in categories:
+        return name, None
+    matches = by_name.get(name, [])
+    if len(matches) == 1:
+        return matches[0], None
+    if matches:
+        return None, f"Category exists in several contexts: {', '.join(sorted(matches))}"
+    return None, "Unknown category"
+
+
+def _fail(rows: List[BulkImportRow], message: str):
+    for row in rows:
+        row.status, row.message = 'failed', message
+
+
+if __name__ == '__main__':
+    import argparse
+    import getpass
+    import sys
+
+    import urllib3
+
+    from api.palo_alto_client import PaloAltoAPI
+    from services.logging_service import LoggingService
+    from services.whitelist_service import WhitelistService
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    parser = argparse.ArgumentParser(description='Bulk whitelist import from CSV (ticket,category,url) or JSON')
+    parser.add_argument('file', help='CSV with a header line, or JSON list of {ticket, category, url}')
+    parser.add_argument('--host', required=True, help='Firewall hostname or IP')
+    parser.add_argument('--user', required=True, help='Firewall admin user')
+    parser.add_argument('--format', choices=['csv', 'json'], help='File format (default: guessed)')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and check coverage only')
+    parser.add_argument('--report', help='Write the per-row report to this JSON file')
+    args = parser.parse_args()
+
+    with open(args.file, encoding='utf-8') as f:
+        import_rows = parse_import(f.read(), args.format)
+
+    client = PaloAltoAPI(args.host, args.user, getpass.getpass(f"Password for {args.user}@{args.host}: "))
+    client.get_api_key()
+    logging_service = LoggingService()
+    ok, summary_message, import_report = BulkImportService(WhitelistService(client), logging_service).run(
+        import_rows, args.user, args.host, dry_run=args.dry_run
+    )
+    logging_service.flush_ticket_logs(config.TICKET_LOG_FLUSH_TIMEOUT)
+
+    for import_row in import_rows:
+        if import_row.status not in ('added', 'new'):
+            print(f"  line {import_row.line}: {import_row.status:9} {import_row.url} - {import_row.message}")
+    print(summary_message)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(import_report, f, indent=2)
+    sys.exit(0 if ok else 1)
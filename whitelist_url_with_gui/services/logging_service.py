@@ -3,14 +3,28 @@ Logging Service
 Handles ticket logging and audit trail creation
 Enhanced to update ticket logs with final commit status
 """
+import csv
+import io
 import os
-import json
 import logging
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional
 
 from config import config
-from models.ticket import TicketData
+from models.ticket import TicketData, TicketHistoryQuery
+from services.audit_store import HISTORY_COLUMNS, AuditStore, get_audit_store
+from utils.async_writer import AsyncFileWriter
+from utils.log_queue import LogData
+
+logger = logging.getLogger(__name__)
+
+_next_archive_check = 0.0
+
+# One writer thread per process, shared by every LoggingService instance
+ticket_writer = AsyncFileWriter(
+    fsync=config.TICKET_LOG_FSYNC, batch_size=config.TICKET_LOG_BATCH_SIZE, name='ticket-log-writer'
+)
 
 class LoggingService:
     """Service for handling application and ticket logging"""
@@ -23,134 +37,199 @@ class LoggingService:
         # Create logs directory if it doesn't exist
         os.makedirs(config.LOG_DIR, exist_ok=True)
         
-        # Configure logging
-        logging.basicConfig(
-            filename=config.APP_LOG_FILE,
-            level=getattr(logging, config.LOG_LEVEL),
-            format=config.LOG_FORMAT,
-            filemode='a'
-        )
-        
-        self.logger = logging.getLogger(__name__)
+        # Handlers are configured once by setup_server_logging() (main.py)
+        self.logger = logger
     
     def log_info(self, message: str, extra_data: dict = None):
         """Log info message"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if extra_data:
-            message = f"{message} | Data: {json.dumps(extra_data)}"
-        self.logger.info(message)
+            # JSON encoding happens on the log listener thread
+            self.logger.info("%s | Data: %s", message, LogData(extra_data))
+        else:
+            self.logger.info(message)
     
     def log_error(self, message: str, error: Exception = None, extra_data: dict = None):
         """Log error message"""
         if error:
             message = f"{message} | Error: {str(error)}"
         if extra_data:
-            message = f"{message} | Data: {json.dumps(extra_data)}"
-        self.logger.error(message)
+            self.logger.error("%s | Data: %s", message, LogData(extra_data))
+        else:
+            self.logger.error(message)
     
     def log_debug(self, message: str, extra_data: dict = None):
         """Log debug message"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         if extra_data:
-            message = f"{message} | Data: {json.dumps(extra_data)}"
-        self.logger.debug(message)
+            self.logger.debug("%s | Data: %s", message, LogData(extra_data))
+        else:
+            self.logger.debug(message)
     
     def create_ticket_log(self, ticket_data: TicketData) -> Optional[str]:
         """
-        Create a human-readable individual ticket log file
+        Record a ticket in the audit store
+        
+        The record is written on the background ticket writer; the returned
+        id can be used right away (reads flush pending writes first).
         
         Args:
             ticket_data: TicketData object containing ticket information
             
         Returns:
-            Filename of created log file or None if failed
+            Audit record id of the ticket or None if failed
         """
         try:
-            # Generate timestamp for filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_ticket_id = ticket_data.ticket_id.replace('/', '_').replace('\\', '_')
-            
-            # Create filename
-            filename = os.path.join(config.LOG_DIR, f"ticket_{safe_ticket_id}_{timestamp}.log")
-            
-            # Create human-readable content
-            log_content = self._generate_ticket_log_content(ticket_data)
-            
-            # Write to file
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(log_content)
+            record_id = AuditStore.new_record_id()
+            ticket = ticket_data.to_dict()
+            self._submit(lambda: get_audit_store().append_ticket(record_id, ticket))
+            self._maybe_archive()
             
-            print(f"[LOG] Human-readable ticket log created: {filename}")
+            logger.debug("Ticket audit record queued: %s (%s)", record_id, ticket_data.ticket_id)
             
             # Also log to application log
-            self.log_info(f"Ticket log created: {filename}", ticket_data.to_dict())
+            self.log_info(f"Ticket log created: {ticket_data.ticket_id} (record {record_id})", ticket)
             
-            return filename
+            return record_id
             
         except Exception as e:
-            print(f"[ERROR] Failed to create individual ticket log: {e}")
+            logger.debug("Failed to create ticket audit record: %s", e)
             self.log_error("Failed to create ticket log", e, ticket_data.to_dict())
             return None
     
-    def update_ticket_log_commit_status(self, ticket_log_file: str, commit_status: str, commit_progress: str):
+    def _maybe_archive(self):
+        """Pack finished months into archives, checked at most every AUDIT_ARCHIVE_CHECK_SECONDS"""
+        global _next_archive_check
+        now = time.monotonic()
+        if now < _next_archive_check:
+            return
+        _next_archive_check = now + config.AUDIT_ARCHIVE_CHECK_SECONDS
+        
+        def job():
+            get_audit_store().archive_old_logs(config.LOG_DIR)
+        
+        self._submit(job)
+    
+    def _submit(self, job):
+        """Run a write job on the ticket writer thread (inline if disabled)"""
+        if config.TICKET_LOG_ASYNC:
+            ticket_writer.submit(job)
+        else:
+            job()
+    
+    def flush_ticket_logs(self, timeout: float = None) -> bool:
+        """
+        Wait until queued ticket log writes from this process are on disk
+        
+        Returns:
+            False if the timeout expired first
+        """
+        if timeout is None:
+            timeout = config.TICKET_LOG_FLUSH_TIMEOUT
+        return ticket_writer.flush(timeout)
+    
+    def update_ticket_log_commit_status(self, record_id: str, commit_status: str, commit_progress: str):
         """
-        Update existing ticket log file with final commit status
+        Record the final commit status of a ticket
+        
+        Safe to call on every status poll: a status the ticket already has
+        is not written again.
         
         Args:
-            ticket_log_file: Path to the ticket log file
+            record_id: Audit record id returned by create_ticket_log
             commit_status: Final commit status (e.g., 'FIN', 'FAIL')
             commit_progress: Final commit progress (e.g., '100%')
         """
-        try:
-            if not ticket_log_file or not os.path.exists(ticket_log_file):
-                print(f"[DEBUG] Ticket log file not found for update: {ticket_log_file}")
-                return
-            
-            # Read current content
-            with open(ticket_log_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find and update the commit status section
-            lines = content.split('\n')
-            updated_lines = []
-            in_operation_status = False
-            status_updated = False
-            progress_updated = False
-            
-            for line in lines:
-                if 'OPERATION STATUS:' in line:
-                    in_operation_status = True
-                    updated_lines.append(line)
-                elif in_operation_status and 'Commit Status:' in line:
-                    updated_lines.append(f"Commit Status:  {commit_status}")
-                    status_updated = True
-                elif in_operation_status and 'Commit Progress:' in line:
-                    updated_lines.append(f"Commit Progress: {commit_progress}")
-                    progress_updated = True
-                elif in_operation_status and line.startswith('SEARCH DETAILS:'):
-                    # End of operation status section
-                    in_operation_status = False
-                    updated_lines.append(line)
-                else:
-                    updated_lines.append(line)
-            
-            # Write updated content back to file
-            updated_content = '\n'.join(updated_lines)
-            with open(ticket_log_file, 'w', encoding='utf-8') as f:
-                f.write(updated_content)
+        if not record_id:
+            return
+        
+        # Behind this worker's ticket append; a ticket still queued in another worker gets it when it lands
+        def job():
+            try:
+                segment = get_audit_store().append_status(record_id, commit_status, commit_progress)
+            except Exception as e:
+                logger.debug("Failed to update ticket log commit status: %s", e)
+                self.log_error("Failed to update ticket log commit status", e)
+                return None
             
-            print(f"[LOG] Updated ticket log with final commit status: {commit_status}, progress: {commit_progress}")
+            if segment:
+                logger.debug("Updated ticket log with final commit status: %s, progress: %s", commit_status, commit_progress)
+                self.log_info("Ticket log updated with commit status", {
+                    'record_id': record_id,
+                    'status': commit_status,
+                    'progress': commit_progress
+                })
+            return segment
+        
+        self._submit(job)
+    
+    def get_ticket_log(self, ticket_id: str, record_id: str = None) -> Optional[str]:
+        """
+        Render the human-readable ticket log from the audit record
+        
+        Args:
+            ticket_id: Ticket ID (latest record is used if record_id is not given or does not match)
+            record_id: Specific audit record
             
-            # Log the update
-            self.log_info(f"Ticket log updated with commit status", {
-                'file': ticket_log_file,
-                'status': commit_status,
-                'progress': commit_progress
-            })
+        Returns:
+            Ticket log text (or the archived pre-audit-store log file) or
+            None if the ticket is not in the audit store
+        """
+        self.flush_ticket_logs()
+        store = get_audit_store()
+        record = store.get(record_id) if record_id else None
+        if record is None or record.get('ticket_id') != ticket_id:
+            record = store.latest_for_ticket(ticket_id)
+        if record is None:
+            legacy = store.legacy_ticket_log(ticket_id)
+            return None if legacy is None else legacy.decode('utf-8')
+        return self._generate_ticket_log_content(TicketData.from_dict(record), record.get('updated_at'))
+    
+    def search_ticket_history(self, query: TicketHistoryQuery) -> Dict[str, Any]:
+        """
+        One page of the whitelist audit history
+        
+        Args:
+            query: Filters and paging
             
-        except Exception as e:
-            print(f"[ERROR] Failed to update ticket log commit status: {e}")
-            self.log_error("Failed to update ticket log commit status", e)
+        Returns:
+            Dictionary with the page's tickets and paging totals
+        """
+        self.flush_ticket_logs()
+        tickets, total, exact = get_audit_store().search(query, query.offset, query.page_size)
+        return {
+            'tickets': tickets,
+            'total': total,
+            'total_exact': exact,
+            'page': query.page,
+            'page_size': query.page_size,
+            'pages': (total + query.page_size - 1) // query.page_size
+        }
     
-    def _generate_ticket_log_content(self, ticket_data: TicketData) -> str:
+    def export_ticket_history_csv(self, query: TicketHistoryQuery) -> Iterator[str]:
+        """
+        All tickets matching query as CSV, one chunk per ticket batch
+        
+        Args:
+            query: Filters (paging is ignored)
+        """
+        self.flush_ticket_logs()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(HISTORY_COLUMNS + ('urls',))
+        count = 0
+        for ticket in get_audit_store().iter_search(query):
+            writer.writerow([_csv_cell(ticket[column]) for column in HISTORY_COLUMNS] + [_csv_cell(' '.join(ticket['urls']))])
+            count += 1
+            if count % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    def _generate_ticket_log_content(self, ticket_data: TicketData, updated_at: str = None) -> str:
         """Generate human-readable ticket log content"""
         
         # Parse timestamp for display
@@ -215,10 +294,10 @@ TECHNICAL DETAILS:
 ------------------
 Log Version:    {config.VERSION}
 Search Method:  Targeted with Multiple Timeouts
-Log Format:     Human Readable Text
+Log Format:     Human Readable Text (rendered from the audit record)
 Created for:    Audit Trail & Compliance
 Tool Version:   {config.APP_NAME} v{config.VERSION}
-Log Updated:    {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Log Updated:    {self._format_updated(updated_at)}
 
 NOTES:
 ------
@@ -234,6 +313,12 @@ NOTES:
         
         return log_content
     
+    def _format_updated(self, updated_at: Optional[str]) -> str:
+        try:
+            return datetime.fromisoformat(updated_at).strftime('%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError):
+            return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
     def log_search_operation(self, search_term: str, action_type: str, username: str, 
                            hostname: str, results_count: int, success: bool, error: str = None):
         """Log search operation"""
@@ -284,4 +369,11 @@ NOTES:
             login_data['error'] = error
             self.log_error(f"Login failed for {username}@{hostname}", extra_data=login_data)
         else:
-            self.log_info(f"Login successful for {username}@{hostname}", extra_data=login_data)
\ No newline at end of file
+            self.log_info(f"Login successful for {username}@{hostname}", extra_data=login_data)
+
+
+def _csv_cell(value):
+    """Keep spreadsheet programs from running cell text as a formula"""
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
@@ -0,0 +1,305 @@
+"""
+On-demand profiling of a live server
+Two kinds of profiling sessions, started through the admin endpoints
+(/admin/profile/...) and never running unless someone asked for one:
+
+    sample    A thread in the worker that received the request samples the
+              stacks of all its threads every few milliseconds for N seconds
+              (wall clock - waits on the firewall show up too) and writes
+              them as collapsed stacks (flamegraph.pl / speedscope input).
+    requests  The next K requests to one endpoint, in whichever worker they
+              land, each run under cProfile; the results are merged into
+              one pstats file.
+
+Results are written to config.PROFILING_DIR, so any worker can serve them.
+While no session is armed the per-request cost is a time comparison; an
+armed session is looked up in the state store at most once a second.
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+from services.state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+ARMED_KEY = 'profile:armed'
+ARM_CHECK_SECONDS = 1.0
+META_FILE = 'meta.json'
+SAMPLES_FILE = 'samples.collapsed'
+PSTATS_FILE = 'profile.pstats'
+
+
+class ProfilingError(Exception):
+    """Invalid profiling request or a session that cannot be started"""
+    pass
+
+
+def _session_dir(profile_id: str) -> str:
+    if not profile_id or not all(ch.isalnum() for ch in profile_id):
+        raise ProfilingError("Invalid profile id")
+    return os.path.join(config.PROFILING_DIR, profile_id)
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _prune_sessions():
+    """Keep only the newest config.PROFILING_KEEP_SESSIONS session directories"""
+    try:
+        entries = [os.path.join(config.PROFILING_DIR, name) for name in os.listdir(config.PROFILING_DIR)]
+    except OSError:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[config.PROFILING_KEEP_SESSIONS:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _new_session(kind: str, **details) -> Dict[str, Any]:
+    _prune_sessions()
+    meta = {'id': uuid.uuid4().hex[:16], 'kind': kind, 'status': 'running', 'pid': os.getpid(),
+            'started': time.time(), **details}
+    os.makedirs(_session_dir(meta['id']), exist_ok=True)
+    _write_json(os.path.join(_session_dir(meta['id']), META_FILE), meta)
+    return meta
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """Wall-clock stack sampling of this process, one session at a time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running: Optional[str] = None
+
+    def start(self, seconds: float, interval_ms: float) -> Dict[str, Any]:
+        """
+        Start sampling in the background
+
+        Returns:
+            Session metadata (id, kind, status, ...)
+
+        Raises:
+            ProfilingError: Invalid limits or a sampling session already running
+        """
+        if not 0 < seconds <= config.PROFILING_MAX_SECONDS:
+            raise ProfilingError(f"seconds must be between 0 and {config.PROFILING_MAX_SECONDS}")
+        if interval_ms < config.PROFILING_MIN_INTERVAL_MS:
+            raise ProfilingError(f"interval_ms must be at least {config.PROFILING_MIN_INTERVAL_MS}")
+        with self._lock:
+            if self._running:
+                raise ProfilingError(f"Sampling session {self._running} is still running in this worker")
+            meta = _new_session('sample', seconds=seconds, interval_ms=interval_ms)
+            self._running = meta['id']
+        threading.Thread(target=self._run, args=(meta, seconds, interval_ms / 1000),
+                         name=f"profiler-{meta['id']}", daemon=True).start()
+        return meta
+
+    def _run(self, meta: Dict[str, Any], seconds: float, interval: float):
+        stacks = Counter()
+        samples = 0
+        own_id = threading.get_ident()
+        try:
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    calls = []
+                    while frame is not None:
+                        calls.append(_frame_name(frame.f_code))
+                        frame = frame.f_back
+                    calls.append(names.get(thread_id, str(thread_id)))
+                    stacks[';'.join(reversed(calls))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            directory = _session_dir(meta['id'])
+            with open(os.path.join(directory, SAMPLES_FILE), 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            meta.update(status='done', finished=time.time(), samples=samples, stacks=len(stacks))
+        except Exception as e:
+            logger.warning("Sampling session %s failed: %s", meta['id'], e)
+            meta.update(status='failed', error=str(e))
+        finally:
+            _write_json(os.path.join(_session_dir(meta['id']), META_FILE), meta)
+            with self._lock:
+                self._running = None
+
+
+class RequestProfiler:
+    """cProfile for the next K requests to an endpoint, across all workers"""
+
+    def __init__(self):
+        self._armed: Optional[Dict[str, Any]] = None
+        self._next_check = 0.0
+
+    def arm(self, endpoint: str, count: int) -> Dict[str, Any]:
+        """
+        Profile the next count requests to endpoint
+
+        Raises:
+            ProfilingError: Invalid count or another request session armed
+        """
+        if not 0 < count <= config.PROFILING_MAX_REQUESTS:
+            raise ProfilingError(f"count must be between 1 and {config.PROFILING_MAX_REQUESTS}")
+        store = get_state_store()
+        meta = _new_session('requests', endpoint=endpoint, count=count)
+        armed = {'id': meta['id'], 'endpoint': endpoint, 'count': count}
+        if not store.add(ARMED_KEY, armed, ttl=config.PROFILING_ARM_SECONDS):
+            _write_json(os.path.join(_session_dir(meta['id']), META_FILE), dict(meta, status='rejected'))
+            raise ProfilingError(f"Request profiling session {(store.get(ARMED_KEY) or {}).get('id')} is still armed")
+        self._armed, self._next_check = armed, time.monotonic() + ARM_CHECK_SECONDS
+        return meta
+
+    def start(self, endpoint: Optional[str]) -> Optional[Tuple[cProfile.Profile, Dict[str, Any], int, float]]:
+        """Begin profiling this request if a session wants it (cheap otherwise)"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + ARM_CHECK_SECONDS
+            try:
+                self._armed = get_state_store().get(ARMED_KEY)
+            except Exception as e:
+                logger.warning("Could not check for request profiling: %s", e)
+                self._armed = None
+        armed = self._armed
+        if armed is None or armed['endpoint'] != endpoint:
+            return None
+
+        slot = self._claim_slot(armed)
+        if slot is None:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiler is active on this thread
+            return None
+        return profile, armed, slot, time.perf_counter()
+
+    def _claim_slot(self, armed: Dict[str, Any]) -> Optional[int]:
+        store = get_state_store()
+        for slot in range(armed['count']):
+            if store.add(f"profile:{armed['id']}:{slot}", os.getpid(), ttl=config.PROFILING_ARM_SECONDS):
+                if slot == armed['count'] - 1:
+                    store.delete_if_equals(ARMED_KEY, armed)
+                    self._armed = None
+                return slot
+        self._armed = None
+        return None
+
+    def finish(self, started: Tuple[cProfile.Profile, Dict[str, Any], int, float]):
+        """Stop profiling the request and store its stats"""
+        profile, armed, slot, started_at = started
+        profile.disable()
+        seconds = time.perf_counter() - started_at
+        try:
+            directory = _session_dir(armed['id'])
+            profile.dump_stats(os.path.join(directory, f"request-{slot}.pstats"))
+            _write_json(os.path.join(directory, f"request-{slot}.json"), {'slot': slot, 'seconds': seconds,
+                                                                         'pid': os.getpid()})
+        except OSError as e:
+            logger.warning("Could not store request profile %s/%s: %s", armed['id'], slot, e)
+
+
+def session_status(profile_id: str) -> Dict[str, Any]:
+    """
+    Metadata of a profiling session, with progress for request sessions
+
+    Raises:
+        ProfilingError: Unknown session
+    """
+    directory = _session_dir(profile_id)
+    try:
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise ProfilingError("Unknown profile id")
+    if meta['kind'] == 'requests':
+        requests = _request_results(directory)
+        meta['profiled'] = len(requests)
+        meta['request_seconds'] = [request['seconds'] for request in requests]
+        if meta['status'] == 'running' and len(requests) >= meta['count']:
+            meta['status'] = 'done'
+        elif meta['status'] == 'running' and time.time() > meta['started'] + config.PROFILING_ARM_SECONDS:
+            meta['status'] = 'expired'
+    elif meta['status'] == 'running' and time.time() > meta['started'] + meta['seconds'] + 60:
+        meta['status'] = 'lost'  # The worker running it went away
+    return meta
+
+
+def _request_results(directory: str) -> List[Dict[str, Any]]:
+    results = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.startswith('request-') and filename.endswith('.json'):
+            try:
+                with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                    results.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return results
+
+
+def collapsed_stacks(profile_id: str) -> str:
+    """Collapsed stacks of a finished sampling session"""
+    path = os.path.join(_session_dir(profile_id), SAMPLES_FILE)
+    if not os.path.exists(path):
+        raise ProfilingError("No samples yet - the session is still running or failed")
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def merged_pstats(profile_id: str) -> str:
+    """
+    Path of the merged pstats file of a request session (so far)
+
+    Raises:
+        ProfilingError: Nothing profiled yet
+    """
+    directory = _session_dir(profile_id)
+    files = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+             if name.startswith('request-') and name.endswith('.pstats')]
+    if not files:
+        raise ProfilingError("No request has been profiled yet")
+    stats = pstats.Stats(files[0])
+    for path in files[1:]:
+        stats.add(path)
+    merged = os.path.join(directory, PSTATS_FILE)
+    stats.dump_stats(merged)
+    return merged
+
+
+def pstats_text(profile_id: str, sort: str = 'cumulative', limit: int = 40) -> str:
+    """Top functions of a request session as text"""
+    out = io.StringIO()
+    stats = pstats.Stats(merged_pstats(profile_id), stream=out)
+    try:
+        stats.sort_stats(sort)
+    except KeyError:
+        raise ProfilingError(f"Unknown sort key: {sort}")
+    stats.print_stats(limit)
+    return out.getvalue()
+
+
+# Process-wide profilers
+stack_sampler = StackSampler()
+request_profiler = RequestProfiler()
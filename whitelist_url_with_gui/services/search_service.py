@@ -3,14 +3,48 @@ URL Search Service
 Handles targeted URL searching with automatic search for both block-url and block-continue
 Improved to search both action types automatically
 """
+from dataclasses import replace
 from datetime import datetime, timedelta
-from typing import List, Set, Dict
+from typing import List, Set, Dict, Tuple
+import logging
+import threading
 import time
 import re
 
 from config import config
+from models.domain_stats import DomainStatsCollector
+from models.log_record import UrlLogRecord
 from models.ticket import SearchResult, SearchAttempt
-from utils.validators import validate_search_term
+from services.state_store import client_scope, get_state_store
+from utils.domain_extractor import DomainExtractor
+from utils.metrics import SEARCH_PHASE_SECONDS, SEARCH_SECONDS, SEARCHES_COALESCED
+from utils.timing import span
+from utils.public_suffix import group_by_registrable_domain
+from utils.single_flight import SharedSingleFlight
+from utils.validators import normalize_whitelist_url, validate_search_term
+
+logger = logging.getLogger(__name__)
+
+# Shared by every SearchService instance (and through the state store by every
+# worker process) so that operators searching the same terms on the same
+# firewall at the same time attach to one set of log jobs
+_search_flight = None
+_search_flight_lock = threading.Lock()
+
+def _get_search_flight() -> SharedSingleFlight:
+    global _search_flight
+    if _search_flight is None:
+        with _search_flight_lock:
+            if _search_flight is None:
+                _search_flight = SharedSingleFlight(
+                    get_state_store(),
+                    'search',
+                    lease_seconds=config.SHARED_SEARCH_LEASE_SECONDS,
+                    poll_interval=config.SHARED_SEARCH_POLL_INTERVAL,
+                    encode=lambda result: result.to_dict(),
+                    decode=SearchResult.from_dict
+                )
+    return _search_flight
 
 class SearchService:
     """Service for searching blocked URLs in Palo Alto logs"""
@@ -43,47 +77,104 @@ class SearchService:
                     error="No valid search terms provided"
                 )
             
-            print(f"[DEBUG] Starting AUTOMATIC DUAL-ACTION search for: {parsed_terms}")
-            print(f"[DEBUG] Strategy: Search BOTH block-url AND block-continue automatically")
+            if not config.COALESCE_IDENTICAL_SEARCHES:
+                return self._run_dual_action_search(search_terms, parsed_terms)
+            
+            search_key = self._search_key(parsed_terms)
+            with span('shared_search') as phase:
+                result, shared = _get_search_flight().do(
+                    search_key,
+                    lambda: self._run_dual_action_search(search_terms, parsed_terms)
+                )
+                phase.set('attached', shared)
+            
+            if not shared:
+                return result
+            
+            logger.debug("Attached to in-flight search for %s - no new log jobs started", search_key)
+            SEARCHES_COALESCED.inc()
+            return replace(
+                result,
+                search_term=search_terms,
+                strategy_info={**result.strategy_info, 'coalesced': True}
+            )
+            
+        except Exception as e:
+            logger.exception("Exception in search_blocked_urls: %s", e)
+            
+            return SearchResult(
+                urls=[],
+                search_term=search_terms,
+                action_type='both',
+                strategy_info={},
+                success=False,
+                error=str(e)
+            )
+    
+    def _search_key(self, parsed_terms: List[str]) -> Tuple[str, Tuple[str, ...]]:
+        """Normalized key for coalescing - same firewall and login, same set of terms"""
+        terms = tuple(sorted({term.lower() for term in parsed_terms}))
+        return client_scope(self.api_client), terms
+    
+    def _run_dual_action_search(self, search_terms: str, parsed_terms: List[str]) -> SearchResult:
+        """Run the block-url and block-continue searches against the firewall"""
+        started = time.perf_counter()
+        result = self._dual_action_search(search_terms, parsed_terms)
+        SEARCH_SECONDS.labels('success' if result.success else 'failure').observe(time.perf_counter() - started)
+        return result
+    
+    def _dual_action_search(self, search_terms: str, parsed_terms: List[str]) -> SearchResult:
+        try:
+            logger.debug("Starting AUTOMATIC DUAL-ACTION search for: %s", parsed_terms)
+            logger.debug("Strategy: Search BOTH block-url AND block-continue automatically")
             
             all_blocked_urls = set()
             all_attempts = []
             action_results = {}
+            all_domain_stats = DomainStatsCollector()
             
             # Calculate 3-month lookback date
             three_months_ago = datetime.now() - timedelta(days=config.LOOKBACK_MONTHS * 30)
             time_filter = three_months_ago.strftime("'%Y/%m/%d %H:%M:%S'")
             
-            print(f"[DEBUG] Time filter: >= {time_filter}")
+            logger.debug("Time filter: >= %s", time_filter)
             
             # Search BOTH action types automatically
             for action in ['block-url', 'block-continue']:
-                print(f"\n[DEBUG] === SEARCHING ACTION TYPE: {action} ===")
+                logger.debug("=== SEARCHING ACTION TYPE: %s ===", action)
                 
                 blocked_urls = set()
                 attempts = []
+                domain_stats = DomainStatsCollector()
                 
                 # Build the multi-term OR query for this action
                 base_query = self._build_multi_term_query(parsed_terms, action, time_filter)
                 
                 # Execute multiple timeout attempts for this action
-                attempts = self._execute_timeout_attempts_improved(base_query, search_terms, blocked_urls, action)
+                with span(f"search.{action}") as phase:
+                    attempts = self._execute_timeout_attempts_improved(base_query, search_terms, blocked_urls, action, domain_stats)
+                    phase.set('urls', len(blocked_urls))
                 
-                # Store results for this action
+                # Store results for this action, most frequently blocked first
                 action_results[action] = {
-                    'urls': list(blocked_urls),
+                    'urls': domain_stats.rank(blocked_urls),
                     'count': len(blocked_urls),
-                    'attempts': attempts
+                    'entries_processed': domain_stats.entries_seen,
+                    'attempts': [attempt.to_dict() for attempt in attempts]  # Plain dicts - results are shared as JSON
                 }
                 
-                # Add to combined results
+                # Add to combined results - each action covers different log entries
                 all_blocked_urls.update(blocked_urls)
                 all_attempts.extend(attempts)
+                all_domain_stats.merge_sum(domain_stats)
                 
-                print(f"[DEBUG] Action {action} found {len(blocked_urls)} URLs: {sorted(list(blocked_urls))}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Action %s found %s URLs: %s", action, len(blocked_urls), sorted(blocked_urls))
             
-            # Prepare results
-            final_urls = sorted(list(all_blocked_urls))
+            # Prepare results, ranked by hit count
+            with SEARCH_PHASE_SECONDS.labels('rank_group').time(), span('rank_group'):
+                final_urls = all_domain_stats.rank(all_blocked_urls)
+                domain_groups = self._group_domains(final_urls, all_domain_stats)
             successful_attempts = sum(1 for attempt in all_attempts if attempt.success)
             
             strategy_info = {
@@ -98,14 +189,15 @@ class SearchService:
                 'max_entries': config.DEFAULT_MAX_RESULTS,
                 'successful_attempts': f'{successful_attempts}/{len(all_attempts)}',
                 'action_results': action_results,
-                'combined_results': final_urls
+                'combined_results': final_urls,
+                'ranking': 'hits_desc'
             }
             
-            print(f"\n[DEBUG] === DUAL-ACTION SEARCH COMPLETE ===")
-            print(f"[DEBUG] block-url found: {len(action_results['block-url']['urls'])} URLs")
-            print(f"[DEBUG] block-continue found: {len(action_results['block-continue']['urls'])} URLs") 
-            print(f"[DEBUG] Total unique URLs: {len(final_urls)}")
-            print(f"[DEBUG] Combined results: {final_urls}")
+            logger.debug("=== DUAL-ACTION SEARCH COMPLETE ===")
+            logger.debug("block-url found: %s URLs", len(action_results['block-url']['urls']))
+            logger.debug("block-continue found: %s URLs", len(action_results['block-continue']['urls'])) 
+            logger.debug("Total unique URLs: %s", len(final_urls))
+            logger.debug("Combined results: %s", final_urls)
             
             # Determine success
             successful_attempts = sum(1 for attempt in all_attempts if attempt.success)
@@ -135,7 +227,7 @@ class SearchService:
                 is_success = True
                 error_message = None
             
-            print(f"[DEBUG] Final determination: is_success={is_success}, successful_attempts={successful_attempts}")
+            logger.debug("Final determination: is_success=%s, successful_attempts=%s", is_success, successful_attempts)
             
             return SearchResult(
                 urls=final_urls,
@@ -143,13 +235,13 @@ class SearchService:
                 action_type='both',
                 strategy_info=strategy_info,
                 success=is_success,
-                error=error_message
+                error=error_message,
+                domain_stats=all_domain_stats.to_dict(),
+                domain_groups=domain_groups
             )
             
         except Exception as e:
-            print(f"[DEBUG] Exception in search_blocked_urls: {e}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            logger.exception("Exception in search_blocked_urls: %s", e)
             
             return SearchResult(
                 urls=[],
@@ -160,6 +252,19 @@ class SearchService:
                 error=str(e)
             )
     
+    def _group_domains(self, domains: List[str], domain_stats: DomainStatsCollector) -> List[Dict]:
+        """Group found domains under their registrable domain with a wildcard suggestion"""
+        try:
+            groups = group_by_registrable_domain(domains)
+        except Exception as e:
+            # Grouping is advisory - never fail a search because of it
+            logger.debug("Registrable-domain grouping skipped: %s", e)
+            return []
+        
+        for group in groups:
+            group['hits'] = sum(domain_stats.hits(domain) for domain in group['domains'])
+        return groups
+    
     def _parse_search_terms(self, search_terms: str) -> List[str]:
         """Parse and validate multiple search terms"""
         if not search_terms:
@@ -174,7 +279,7 @@ class SearchService:
             if cleaned_term and validate_search_term(cleaned_term):
                 terms.append(cleaned_term)
             elif cleaned_term:
-                print(f"[DEBUG] Skipping invalid search term: '{cleaned_term}'")
+                logger.debug("Skipping invalid search term: '%s'", cleaned_term)
         
         return terms
     
@@ -190,32 +295,41 @@ class SearchService:
         
         query = f"( {url_condition} ) and ( action eq '{action_type}' ) and ( receive_time geq {time_filter} )"
         
-        print(f"[DEBUG] Built query for {action_type}: {query}")
+        logger.debug("Built query for %s: %s", action_type, query)
         return query
     
-    def _execute_timeout_attempts_improved(self, base_query: str, search_terms: str, blocked_urls: Set[str], action_type: str) -> List[SearchAttempt]:
+    def _execute_timeout_attempts_improved(self, base_query: str, search_terms: str, blocked_urls: Set[str], action_type: str,
+                                           domain_stats: DomainStatsCollector = None) -> List[SearchAttempt]:
         """Execute multiple timeout attempts with improved error handling"""
         attempts = []
         
-        print(f"[DEBUG] Starting {len(config.SEARCH_TIMEOUT_ATTEMPTS)} timeout attempts for action {action_type}")
+        logger.debug("Starting %s timeout attempts for action %s", len(config.SEARCH_TIMEOUT_ATTEMPTS), action_type)
         
         for attempt_num, timeout in enumerate(config.SEARCH_TIMEOUT_ATTEMPTS, 1):
-            print(f"[DEBUG] === {action_type} ATTEMPT {attempt_num}/{len(config.SEARCH_TIMEOUT_ATTEMPTS)}: Timeout {timeout}s ===")
+            logger.debug("=== %s ATTEMPT %s/%s: Timeout %ss ===", action_type, attempt_num, len(config.SEARCH_TIMEOUT_ATTEMPTS), timeout)
             
             # Wait between attempts to avoid conflicts (except first attempt)
             if attempt_num > 1:
-                print(f"[DEBUG] Waiting {config.ATTEMPT_WAIT_TIME} seconds before attempt {attempt_num}...")
-                time.sleep(config.ATTEMPT_WAIT_TIME)
+                logger.debug("Waiting %s seconds before attempt %s...", config.ATTEMPT_WAIT_TIME, attempt_num)
+                with SEARCH_PHASE_SECONDS.labels('retry_wait').time(), span('retry_wait'):
+                    time.sleep(config.ATTEMPT_WAIT_TIME)
             
             urls_before = len(blocked_urls)
-            attempt = self._execute_single_attempt_improved(
-                base_query, 
-                search_terms, 
-                blocked_urls, 
-                timeout, 
-                config.DEFAULT_MAX_RESULTS, 
-                f"{action_type}-Attempt{attempt_num}"
-            )
+            attempt_stats = DomainStatsCollector()
+            with span('attempt'):
+                attempt = self._execute_single_attempt_improved(
+                    base_query, 
+                    search_terms, 
+                    blocked_urls, 
+                    timeout, 
+                    config.DEFAULT_MAX_RESULTS, 
+                    f"{action_type}-Attempt{attempt_num}",
+                    attempt_stats
+                )
+            
+            # Attempts repeat the same query - keep the best counts, don't add them up
+            if domain_stats is not None:
+                domain_stats.merge_max(attempt_stats)
             
             urls_after = len(blocked_urls)
             urls_added = urls_after - urls_before
@@ -224,17 +338,18 @@ class SearchService:
             attempts.append(attempt)
             
             if attempt.success:
-                print(f"[DEBUG] ✅ {action_type} Attempt {attempt_num} SUCCESS: Added {urls_added} URLs (Total: {len(blocked_urls)})")
+                logger.debug("✅ %s Attempt %s SUCCESS: Added %s URLs (Total: %s)", action_type, attempt_num, urls_added, len(blocked_urls))
             else:
-                print(f"[DEBUG] ❌ {action_type} Attempt {attempt_num} FAILED: Added {urls_added} URLs (Total: {len(blocked_urls)})")
-                print(f"[DEBUG] Error: {attempt.error}")
+                logger.debug("❌ %s Attempt %s FAILED: Added %s URLs (Total: %s)", action_type, attempt_num, urls_added, len(blocked_urls))
+                logger.debug("Error: %s", attempt.error)
         
         return attempts
     
     def _execute_single_attempt_improved(self, query: str, search_terms: str, blocked_urls: Set[str], 
-                                       timeout: int, nlogs: int, attempt_name: str) -> SearchAttempt:
+                                       timeout: int, nlogs: int, attempt_name: str,
+                                       domain_stats: DomainStatsCollector = None) -> SearchAttempt:
         """Execute a single search attempt with improved error handling"""
-        print(f"[DEBUG] {attempt_name}: Executing query with {timeout}s timeout, {nlogs} max logs")
+        logger.debug("%s: Executing query with %ss timeout, %s max logs", attempt_name, timeout, nlogs)
         
         attempt = SearchAttempt(
             attempt_number=int(attempt_name.split('Attempt')[-1]),
@@ -247,47 +362,50 @@ class SearchService:
             # Execute the log query with extended timeout for API calls
             extended_timeout = timeout + 10  # Give API client more time
             
-            result = self.api_client.execute_log_query(query, nlogs, extended_timeout)
+            with SEARCH_PHASE_SECONDS.labels('log_query').time(), span('log_query'):
+                result = self.api_client.execute_log_query(query, nlogs, extended_timeout)
             
             if result['type'] == 'direct':
-                print(f"[DEBUG] {attempt_name}: DIRECT results - {len(result['entries'])} entries")
-                matches_found = self._process_log_entries(result['entries'], search_terms, blocked_urls, attempt_name)
+                logger.debug("%s: DIRECT results - %s entries", attempt_name, len(result['entries']))
+                with SEARCH_PHASE_SECONDS.labels('process').time(), span('process'):
+                    matches_found = self._process_log_entries(result['entries'], search_terms, blocked_urls, attempt_name, domain_stats)
                 attempt.success = True
                 if matches_found > 0:
-                    print(f"[DEBUG] {attempt_name}: Direct query successful - {matches_found} matches")
+                    logger.debug("%s: Direct query successful - %s matches", attempt_name, matches_found)
                 else:
-                    print(f"[DEBUG] {attempt_name}: Direct query successful - no matching URLs found")
+                    logger.debug("%s: Direct query successful - no matching URLs found", attempt_name)
                     attempt.error = None
             
             elif result['type'] == 'job':
                 job_id = result['job_id']
-                print(f"[DEBUG] {attempt_name}: Job {job_id} queued (will wait {timeout}s)")
+                logger.debug("%s: Job %s queued (will wait %ss)", attempt_name, job_id, timeout)
                 
-                job_results = self.api_client.wait_for_job(job_id, extended_timeout, attempt_name)
-                if job_results:
-                    logs = job_results.findall('.//entry')
-                    print(f"[DEBUG] {attempt_name}: Job successful - {len(logs)} entries")
+                with SEARCH_PHASE_SECONDS.labels('job_wait').time(), span('job_wait'):
+                    logs = self.api_client.wait_for_job(job_id, extended_timeout, attempt_name)
+                if logs is not None:
+                    logger.debug("%s: Job successful - %s entries", attempt_name, len(logs))
                     
                     attempt.success = True
-                    matches_found = self._process_log_entries(logs, search_terms, blocked_urls, f"{attempt_name} Job")
+                    with SEARCH_PHASE_SECONDS.labels('process').time(), span('process'):
+                        matches_found = self._process_log_entries(logs, search_terms, blocked_urls, f"{attempt_name} Job", domain_stats)
                     if matches_found > 0:
-                        print(f"[DEBUG] {attempt_name}: Job successful - {matches_found} matches")
+                        logger.debug("%s: Job successful - %s matches", attempt_name, matches_found)
                     else:
-                        print(f"[DEBUG] {attempt_name}: Job successful - no matching URLs found")
+                        logger.debug("%s: Job successful - no matching URLs found", attempt_name)
                         attempt.error = None
                 else:
-                    print(f"[DEBUG] {attempt_name}: Job failed or timed out")
+                    logger.debug("%s: Job failed or timed out", attempt_name)
                     attempt.error = "Job timeout or failure"
             
             elif result['type'] == 'empty':
-                print(f"[DEBUG] {attempt_name}: Empty result - no log entries returned")
+                logger.debug("%s: Empty result - no log entries returned", attempt_name)
                 attempt.success = True
                 attempt.error = None
             else:
                 attempt.error = f"Unknown result type: {result.get('type', 'unknown')}"
         
         except Exception as e:
-            print(f"[DEBUG] {attempt_name}: Exception - {e}")
+            logger.debug("%s: Exception - %s", attempt_name, e)
             error_str = str(e).lower()
             if "timeout" in error_str:
                 attempt.error = f"Request timeout after {timeout}s"
@@ -300,62 +418,65 @@ class SearchService:
         
         return attempt
     
-    def _process_log_entries(self, logs, search_terms: str, blocked_urls: Set[str], test_name: str) -> int:
-        """Process log entries and extract matching URLs"""
+    def _process_log_entries(self, logs: List[UrlLogRecord], search_terms: str, blocked_urls: Set[str], test_name: str,
+                             domain_stats: DomainStatsCollector = None) -> int:
+        """
+        Process UrlLogRecord entries and extract matching URLs
+        
+        Per-domain hit statistics are collected into domain_stats in the
+        same pass, if a collector is given.
+        """
         matches_found = 0
         
-        print(f"[DEBUG] {test_name}: Processing {len(logs)} entries for search terms")
+        logger.debug("%s: Processing %s entries for search terms", test_name, len(logs))
         
         # Parse search terms for matching
         parsed_terms = self._parse_search_terms(search_terms)
         
-        # Track what we find for debugging
+        # Extract domains for the whole batch up front - repeated URLs are resolved once
+        found_domains = DomainExtractor(parsed_terms).extract_many([log_entry.url for log_entry in logs])
+        
+        # Track what we find for debugging - only when debug output is on
+        debug = logger.isEnabledFor(logging.DEBUG)
         action_counts = {}
         
         # Process logs
-        for j, log_entry in enumerate(logs):
+        for j, (log_entry, found_domain) in enumerate(zip(logs, found_domains)):
             try:
-                # Check ALL possible URL fields
-                url_text = None
-                for field_name in config.URL_SOURCES:
-                    url_elem = log_entry.find(field_name)
-                    if url_elem is not None and url_elem.text:
-                        url_text = url_elem.text
-                        break
-                
-                # Get action for tracking
-                action_elem = log_entry.find('action')
-                action_text = action_elem.text if action_elem is not None else 'unknown'
-                
-                # Count actions for debugging
-                action_counts[action_text] = action_counts.get(action_text, 0) + 1
-                
-                # Debug first entry of each attempt
-                if j == 0:
-                    print(f"[DEBUG] {test_name} sample entry: url={url_text[:50] if url_text else 'None'}..., action={action_text}")
-                
-                # MULTI-TERM MATCHING: Check if URL contains any of the search terms
-                if url_text and self._url_contains_any_term(url_text, parsed_terms):
-                    found_domain = self._extract_exact_domain(url_text, parsed_terms)
+                if debug:
+                    # URL already resolved from config.URL_SOURCES by the parser
+                    url_text = log_entry.url
+                    action_text = log_entry.action or 'unknown'
+                    action_counts[action_text] = action_counts.get(action_text, 0) + 1
                     
-                    if found_domain and len(found_domain) > config.MIN_DOMAIN_LENGTH:
-                        if matches_found < 10:  # Limit debug output
-                            matching_term = self._get_matching_term(url_text, parsed_terms)
-                            print(f"[DEBUG] {test_name} MATCH: {found_domain} (from: {url_text[:40]}..., matched: '{matching_term}', action: {action_text})")
-                        blocked_urls.add(found_domain)
-                        matches_found += 1
+                    # Debug first entry of each attempt
+                    if j == 0:
+                        logger.debug("%s sample entry: url=%s..., action=%s", test_name, url_text[:50] if url_text else 'None', action_text)
+                
+                # MULTI-TERM MATCHING: found_domain is only set when the URL contains a search term
+                if found_domain and len(found_domain) > config.MIN_DOMAIN_LENGTH:
+                    if debug and matches_found < 10:  # Limit debug output
+                        matching_term = self._get_matching_term(url_text, parsed_terms)
+                        logger.debug("%s MATCH: %s (from: %s..., matched: '%s', action: %s)", test_name, found_domain, url_text[:40], matching_term, action_text)
+                    blocked_urls.add(found_domain)
+                    matches_found += 1
+                    if domain_stats is not None:
+                        domain_stats.add(found_domain, log_entry)
                         
             except Exception as e:
                 if j < 3:  # Only debug first few errors
-                    print(f"[DEBUG] {test_name} error processing entry {j}: {e}")
+                    logger.debug("%s error processing entry %s: %s", test_name, j, e)
                 continue
         
+        if domain_stats is not None:
+            domain_stats.entries_seen += len(logs)
+        
         # Show action distribution for debugging
-        if action_counts and matches_found > 0:
+        if debug and action_counts and matches_found > 0:
             action_summary = ", ".join([f"{action}:{count}" for action, count in sorted(action_counts.items())])
-            print(f"[DEBUG] {test_name} action distribution: {action_summary}")
+            logger.debug("%s action distribution: %s", test_name, action_summary)
         
-        print(f"[DEBUG] {test_name} RESULT: {matches_found} matches found from {len(logs)} entries")
+        logger.debug("%s RESULT: %s matches found from %s entries", test_name, matches_found, len(logs))
         return matches_found
     
     def _url_contains_any_term(self, url_text: str, search_terms: List[str]) -> bool:
@@ -372,7 +493,12 @@ class SearchService:
         return "unknown"
     
     def _extract_exact_domain(self, url_text: str, search_terms: List[str]) -> str:
-        """Extract exact domain from URL text - no artificial variations"""
+        """
+        Extract exact domain from URL text - no artificial variations
+        
+        Reference implementation for a single URL; batches go through
+        utils.domain_extractor, which must return the same result.
+        """
         try:
             # Method 1: Direct URL processing - extract EXACT domain from URL
             if '://' in url_text:
@@ -403,7 +529,7 @@ class SearchService:
             return None
             
         except Exception as e:
-            print(f"[DEBUG] Error extracting domain from {url_text[:50]}...: {e}")
+            logger.debug("Error extracting domain from %s...: %s", url_text[:50], e)
             return None
     
     def validate_manual_urls(self, manual_urls: str) -> tuple[List[str], List[str]]:
@@ -460,17 +586,5 @@ class SearchService:
         return re.match(domain_pattern, clean_url) is not None
     
     def _normalize_manual_url(self, url: str) -> str:
-        """Normalize manually entered URL"""
-        # Remove protocol
-        if url.startswith(('http://', 'https://')):
-            url = url.split('://', 1)[1]
-        
-        # Handle wildcards
-        if url.startswith('*.'):
-            return url.lower()
-        
-        # Ensure non-wildcard domains end with /
-        if not url.endswith('/') and '/' not in url:
-            url += '/'
-        
-        return url.lower()
\ No newline at end of file
+        """Normalize manually entered URL (remove protocol, ensure it ends with /)"""
+        return normalize_whitelist_url(url)
\ No newline at end of file
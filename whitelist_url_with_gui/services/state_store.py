@@ -0,0 +1,303 @@
+"""
+Shared State Store
+Key/value storage for state that every worker process must see: sessions,
+API keys, in-flight search leases and results, commit status and caches
+
+Backends (config.STATE_BACKEND):
+    memory - per process, for the development server and tests
+    sqlite - one file shared by all workers on one host (default)
+    redis  - any Redis-compatible server or client object
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import config
+
+
+class StateStore:
+    """
+    Interface of a shared state backend
+
+    Values must be JSON serializable. ttl is in seconds; None keeps the
+    value until it is deleted.
+    """
+
+    def get(self, key: str) -> Any:
+        """Value for key, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value under key, replacing any previous value"""
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """
+        Store value only if key is missing or expired
+
+        Returns:
+            True if the value was stored - usable as a cross-process lock
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove key if present"""
+        raise NotImplementedError
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        """Remove key only while it still holds value (releasing a lock you own)"""
+        if self.get(key) == value:
+            self.delete(key)
+            return True
+        return False
+
+    def renew_if_equals(self, key: str, value: Any, ttl: float) -> bool:
+        """Restart the ttl of key only while it still holds value (extending a lock you own)"""
+        if self.get(key) == value:
+            self.set(key, value, ttl=ttl)
+            return True
+        return False
+
+
+class MemoryStateStore(StateStore):
+    """Dictionary backend - shared by threads, not by processes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _live(self, key: str, now: float) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        encoded, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return encoded
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            encoded = self._live(key, time.time())
+        return None if encoded is None else json.loads(encoded)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        # Stored encoded so callers never share mutable objects with the store
+        item = (json.dumps(value), _expires_at(ttl))
+        with self._lock:
+            self._data[key] = item
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        item = (json.dumps(value), _expires_at(ttl))
+        with self._lock:
+            if self._live(key, time.time()) is not None:
+                return False
+            self._data[key] = item
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        encoded = json.dumps(value)
+        with self._lock:
+            if self._live(key, time.time()) != encoded:
+                return False
+            del self._data[key]
+            return True
+
+    def renew_if_equals(self, key: str, value: Any, ttl: float) -> bool:
+        encoded = json.dumps(value)
+        with self._lock:
+            if self._live(key, time.time()) != encoded:
+                return False
+            self._data[key] = (encoded, _expires_at(ttl))
+            return True
+
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite backend for several worker processes on one host
+
+    Runs in WAL mode so readers never block the writer. Every thread (and
+    every forked worker) opens its own connection.
+    """
+
+    PURGE_EVERY = 500  # Writes between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), _expires_at(ttl))
+        )
+        self._after_write()
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        # The upsert only overwrites an expired row, so exactly one caller wins
+        cursor = self._connection().execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.expires_at IS NOT NULL AND state.expires_at <= ?",
+            (key, json.dumps(value), _expires_at(ttl), time.time())
+        )
+        self._after_write()
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM state WHERE key = ? AND value = ?", (key, json.dumps(value))
+        )
+        return cursor.rowcount == 1
+
+    def renew_if_equals(self, key: str, value: Any, ttl: float) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE state SET expires_at = ? WHERE key = ? AND value = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (_expires_at(ttl), key, json.dumps(value), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._connection().execute(
+                "DELETE FROM state WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+
+
+class RedisStateStore(StateStore):
+    """
+    Redis backend for workers spread over several hosts
+
+    Only uses GET, SET (EX/NX), DELETE and EVAL, so any client object with
+    the redis-py call signatures works - a real server, a compatible server
+    (Valkey, KeyDB) or an in-process stand-in such as fakeredis. The
+    compare-and-delete/renew of a lease runs as one server-side script:
+    a GET followed by a separate write could hit a lease another worker
+    took over in between.
+    """
+
+    def __init__(self, client, prefix: str = None):
+        self.client = client
+        self.prefix = config.STATE_KEY_PREFIX if prefix is None else prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = None) -> 'RedisStateStore':
+        """Connect with redis-py (optional dependency)"""
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("STATE_BACKEND 'redis' requires the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=_redis_ttl(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, json.dumps(value), ex=_redis_ttl(ttl), nx=True))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def delete_if_equals(self, key: str, value: Any) -> bool:
+        return bool(self.client.eval(_REDIS_DELETE_IF_EQUALS, 1, self.prefix + key, json.dumps(value)))
+
+    def renew_if_equals(self, key: str, value: Any, ttl: float) -> bool:
+        return bool(self.client.eval(_REDIS_RENEW_IF_EQUALS, 1, self.prefix + key, json.dumps(value),
+                                     max(1, int(ttl * 1000))))
+
+
+# KEYS[1] = key, ARGV[1] = expected value (, ARGV[2] = new ttl in milliseconds)
+_REDIS_DELETE_IF_EQUALS = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+)
+_REDIS_RENEW_IF_EQUALS = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end return 0"
+)
+
+
+def _expires_at(ttl: Optional[float]) -> Optional[float]:
+    return None if ttl is None else time.time() + ttl
+
+
+def _redis_ttl(ttl: Optional[float]) -> Optional[int]:
+    return None if ttl is None else max(1, int(round(ttl)))
+
+
+_store: Optional[StateStore] = None
+_store_lock = threading.Lock()
+
+
+def create_state_store(backend: str = None) -> StateStore:
+    """Build the backend named by config.STATE_BACKEND"""
+    backend = (backend or config.STATE_BACKEND).lower()
+    if backend == 'memory':
+        return MemoryStateStore()
+    if backend == 'redis':
+        return RedisStateStore.from_url(config.STATE_REDIS_URL)
+    if backend == 'sqlite':
+        return SQLiteStateStore(config.STATE_DB_FILE)
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+def get_state_store() -> StateStore:
+    """Process-wide state store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_state_store()
+    return _store
+
+
+def client_scope(api_client) -> str:
+    """
+    Key prefix for state derived from what one firewall login may see
+
+    Admin accounts can be limited to a vsys or an admin role, so category
+    lists and search results fetched with one API key must not be served
+    to another. The key itself is never stored, only a digest of it.
+    """
+    hostname = (getattr(api_client, 'hostname', '') or '').strip().lower()
+    api_key = getattr(api_client, 'api_key', None) or ''
+    return f"{hostname}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
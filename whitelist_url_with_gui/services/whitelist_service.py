@@ -3,25 +3,118 @@ Whitelist Service
 Handles URL category management and commit operations
 Fixed error handling and commit status reporting
 """
+import logging
 import time
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 
 from config import config
 from models.ticket import CommitStatus, WhitelistRequest
 from api.palo_alto_client import PaloAltoAPIError
+from services.state_store import client_scope, get_state_store
+from utils.coverage_index import CategoryCoverageIndex, NEW
+from utils.metrics import CACHE_REQUESTS, COMMIT_SECONDS
+from utils.timing import span
+
+logger = logging.getLogger(__name__)
+
+FINAL_COMMIT_STATUSES = ('FIN', 'FAIL')
 
 class WhitelistService:
     """Service for managing URL whitelisting operations"""
     
-    def __init__(self, api_client):
+    def __init__(self, api_client, state_store=None):
         self.api_client = api_client
+        self.state_store = state_store or get_state_store()
+        self.hostname = (getattr(api_client, 'hostname', '') or '').strip().lower()
+    
+    def _remember_commit_start(self, job_id: str):
+        """Note when a commit job started - whichever worker sees it finish records the duration"""
+        self.state_store.set(f"commit_started:{self.hostname}:{job_id}", time.time(),
+                             ttl=config.COMMIT_STATUS_FINAL_SECONDS)
+    
+    def _record_commit_duration(self, job_id: str, final_status: str):
+        start_key = f"commit_started:{self.hostname}:{job_id}"
+        started = self.state_store.get(start_key)
+        # Only the caller that removes the start marker records the commit
+        if started is not None and self.state_store.delete_if_equals(start_key, started):
+            COMMIT_SECONDS.labels(final_status).observe(max(0.0, time.time() - started))
     
     def get_categories(self) -> Dict[str, Any]:
-        """Get all available custom URL categories"""
+        """Get all available custom URL categories (shared briefly between workers)"""
+        cache_key = f"categories:{client_scope(self.api_client)}"  # Per login - vsys/role-scoped admins see different lists
+        categories = self.state_store.get(cache_key)
+        if categories is not None:
+            CACHE_REQUESTS.labels('categories', 'hit').inc()
+            return categories
+        CACHE_REQUESTS.labels('categories', 'miss').inc()
+        
         try:
-            return self.api_client.get_custom_url_categories()
+            with span('fetch_categories'):
+                categories = self.api_client.get_custom_url_categories()
         except PaloAltoAPIError as e:
             raise Exception(f"Failed to retrieve categories: {str(e)}")
+        
+        if categories:
+            self.state_store.set(cache_key, categories, ttl=config.CATEGORY_CACHE_SECONDS)
+        return categories
+    
+    def _fetch_commit_status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Commit job status, shared by every poller of the same job
+        
+        The submitting request, the browser's status checks and other workers
+        all watch the same job - a recent answer is reused instead of asking
+        the firewall again, and final statuses are kept for good.
+        """
+        cache_key = f"commit:{self.hostname}:{job_id}"
+        status_result = self.state_store.get(cache_key)
+        if status_result is not None:
+            CACHE_REQUESTS.labels('commit_status', 'hit').inc()
+            return status_result
+        CACHE_REQUESTS.labels('commit_status', 'miss').inc()
+        
+        with span('fetch_commit_status'):
+            status_result = self.api_client.get_commit_status(job_id)
+        if status_result.get('status') in FINAL_COMMIT_STATUSES:
+            ttl = config.COMMIT_STATUS_FINAL_SECONDS
+            self._record_commit_duration(job_id, status_result['status'])
+        else:
+            ttl = config.COMMIT_STATUS_CACHE_SECONDS
+        self.state_store.set(cache_key, status_result, ttl=ttl)
+        return status_result
+    
+    def check_coverage(self, category: str, urls: List[str]) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Check which URLs the selected category already covers
+        
+        Args:
+            category: Category display name as returned by get_categories
+            urls: Domains or whitelist entries about to be submitted
+            
+        Returns:
+            Tuple of (success, message, coverage_data)
+        """
+        try:
+            categories = self.get_categories()
+            if category not in categories:
+                return False, "Invalid category selected", {}
+            
+            members = self.api_client.get_category_urls(categories[category])
+            index = CategoryCoverageIndex(members)
+            results = index.classify_many(urls)
+            new_urls = [url for url in urls if results[url]['status'] == NEW]
+            
+            return True, f"{len(urls) - len(new_urls)} of {len(urls)} URLs already covered", {
+                'results': results,
+                'new_urls': new_urls,
+                'covered_count': len(urls) - len(new_urls),
+                'member_count': len(members),
+                'wildcard_count': index.wildcard_count
+            }
+            
+        except Exception as e:
+            logger.warning("Coverage check exception: %s", e)
+            return False, f"Coverage check failed: {str(e)}", {}
     
     def submit_whitelist_request(self, request: WhitelistRequest) -> Tuple[bool, str, Dict[str, Any]]:
         """
@@ -47,17 +140,20 @@ class WhitelistService:
             category_info = categories[request.category]
             
             # Update category with new URLs
-            update_success, update_message = self.api_client.update_category_urls(category_info, request.urls)
+            with span('update_category', urls=len(request.urls)):
+                update_success, update_message = self.api_client.update_category_urls(category_info, request.urls)
             
             if not update_success:
                 return False, update_message, {}
             
             # Start commit but don't wait for completion on server
-            print("[DEBUG] Starting commit operation...")
+            logger.debug("Starting commit operation...")
             try:
-                commit_success, job_id = self.api_client.commit_changes()
+                with span('start_commit'):
+                    commit_success, job_id = self.api_client.commit_changes()
                 if commit_success:
-                    print(f"[DEBUG] Commit job {job_id} started successfully")
+                    logger.debug("Commit job %s started successfully", job_id)
+                    self._remember_commit_start(job_id)
                     # Return immediately with job info, don't wait for polling
                     commit_data = {
                         'commit_job_id': job_id,
@@ -77,7 +173,7 @@ class WhitelistService:
                     return False, "URLs updated but commit failed to start", {'commit_job_id': None}
                     
             except Exception as commit_error:
-                print(f"[DEBUG] Commit start failed: {commit_error}")
+                logger.warning("Commit start failed: %s", commit_error)
                 # URLs were updated successfully, but commit failed
                 return True, f"{update_message} Warning: Commit could not be started automatically.", {
                     'commit_job_id': None,
@@ -85,9 +181,27 @@ class WhitelistService:
                 }
             
         except Exception as e:
-            print(f"[DEBUG] Whitelist request exception: {e}")
+            logger.warning("Whitelist request exception: %s", e)
             return False, f"Whitelist request failed: {str(e)}", {}
     
+    def start_commit(self) -> str:
+        """
+        Start a commit of the candidate configuration without waiting for it
+        
+        Returns:
+            Commit job id
+            
+        Raises:
+            PaloAltoAPIError: If the firewall does not accept the commit
+        """
+        with span('start_commit'):
+            commit_success, job_id = self.api_client.commit_changes()
+        if not commit_success:
+            raise PaloAltoAPIError("Commit failed to start")
+        self._remember_commit_start(job_id)
+        logger.debug("Commit job %s started successfully", job_id)
+        return job_id
+    
     def _handle_commit_improved(self) -> Dict[str, Any]:
         """Handle commit operation with improved error handling"""
         commit_data = {
@@ -103,26 +217,27 @@ class WhitelistService:
         }
         
         try:
-            print("[DEBUG] Starting commit operation...")
+            logger.debug("Starting commit operation...")
             
             # Start commit
             commit_success, job_id = self.api_client.commit_changes()
             if not commit_success:
                 commit_data['auto_commit_status']['status'] = 'FAILED'
                 commit_data['auto_commit_status']['error'] = 'Failed to start commit'
-                print("[DEBUG] Failed to start commit")
+                logger.debug("Failed to start commit")
                 return commit_data
             
             commit_data['commit_job_id'] = job_id
             commit_data['auto_commit_status']['status'] = 'SUBMITTED'
-            print(f"[DEBUG] Commit job {job_id} started successfully")
+            self._remember_commit_start(job_id)
+            logger.debug("Commit job %s started successfully", job_id)
             
             # Auto-poll commit status with better error handling
             try:
                 status_result = self._poll_commit_status_improved(job_id)
                 commit_data.update(status_result)
             except Exception as poll_error:
-                print(f"[DEBUG] Polling failed but commit was submitted: {poll_error}")
+                logger.warning("Polling failed but commit was submitted: %s", poll_error)
                 # Don't fail the whole operation if polling fails
                 commit_data['auto_commit_status'] = {
                     'status': 'SUBMITTED',
@@ -133,7 +248,7 @@ class WhitelistService:
                 }
             
         except Exception as e:
-            print(f"[DEBUG] Commit handling error: {e}")
+            logger.warning("Commit handling error: %s", e)
             commit_data['auto_commit_status']['status'] = 'ERROR'
             commit_data['auto_commit_status']['error'] = str(e)
         
@@ -141,7 +256,7 @@ class WhitelistService:
     
     def _poll_commit_status_improved(self, job_id: str) -> Dict[str, Any]:
         """Poll commit status with improved error handling"""
-        print(f"[DEBUG] Starting improved commit status polling for job {job_id}")
+        logger.debug("Starting improved commit status polling for job %s", job_id)
         
         commit_status = None
         commit_progress = None
@@ -149,56 +264,56 @@ class WhitelistService:
         last_error = None
         
         # Wait a bit before first poll to let the job initialize
-        print(f"[DEBUG] Waiting 3 seconds for job {job_id} to initialize...")
+        logger.debug("Waiting 3 seconds for job %s to initialize...", job_id)
         time.sleep(3)
         
         for poll_count in range(config.COMMIT_MAX_POLLS):
             polling_attempts += 1
             
             try:
-                print(f"[DEBUG] Polling attempt {polling_attempts}: Getting status for job {job_id}")
-                status_result = self.api_client.get_commit_status(job_id)
+                logger.debug("Polling attempt %s: Getting status for job %s", polling_attempts, job_id)
+                status_result = self._fetch_commit_status(job_id)
                 
                 commit_status = status_result.get('status', 'Unknown')
                 commit_progress = status_result.get('progress', '0')
                 last_error = status_result.get('error')
                 
-                print(f"[DEBUG] Auto-poll {poll_count + 1}/{config.COMMIT_MAX_POLLS}: Job={job_id}, Status={commit_status}, Progress={commit_progress}%")
+                logger.debug("Auto-poll %s/%s: Job=%s, Status=%s, Progress=%s%%", poll_count + 1, config.COMMIT_MAX_POLLS, job_id, commit_status, commit_progress)
                 
                 # Handle different status values
                 if commit_status == 'FIN':
-                    print(f"[DEBUG] ✅ Commit job {job_id} COMPLETED successfully!")
+                    logger.debug("✅ Commit job %s COMPLETED successfully!", job_id)
                     break
                 elif commit_status == 'FAIL':
-                    print(f"[DEBUG] ❌ Commit job {job_id} FAILED")
+                    logger.debug("❌ Commit job %s FAILED", job_id)
                     break
                 elif commit_status in ['ACT', 'PEND', 'QUEUED']:
-                    print(f"[DEBUG] ⏳ Commit job {job_id} is {commit_status} - continuing to poll")
+                    logger.debug("⏳ Commit job %s is %s - continuing to poll", job_id, commit_status)
                 elif commit_status == 'Unknown':
-                    print(f"[DEBUG] ⚠️ Commit job {job_id} status unknown - may still be processing")
+                    logger.debug("⚠️ Commit job %s status unknown - may still be processing", job_id)
                 elif commit_status == 'Error':
-                    print(f"[DEBUG] ❌ Commit job {job_id} has error status")
+                    logger.debug("❌ Commit job %s has error status", job_id)
                     if last_error:
-                        print(f"[DEBUG] Error details: {last_error}")
+                        logger.debug("Error details: %s", last_error)
                     break
                 else:
-                    print(f"[DEBUG] ℹ️ Commit job {job_id} has status: {commit_status}")
+                    logger.debug("ℹ️ Commit job %s has status: %s", job_id, commit_status)
                 
                 # Check if progress indicates completion
                 if commit_progress == '100' and commit_status not in ['FIN', 'FAIL']:
-                    print(f"[DEBUG] Progress is 100% but status is {commit_status} - waiting for final status...")
+                    logger.debug("Progress is 100%% but status is %s - waiting for final status...", commit_status)
                     time.sleep(3)
                     
                     # One more check
                     try:
-                        final_check = self.api_client.get_commit_status(job_id)
+                        final_check = self._fetch_commit_status(job_id)
                         final_status = final_check.get('status', commit_status)
-                        print(f"[DEBUG] Final status check: {final_status}")
+                        logger.debug("Final status check: %s", final_status)
                         if final_status == 'FIN':
                             commit_status = final_status
                             break
                     except Exception as final_error:
-                        print(f"[DEBUG] Final status check failed: {final_error}")
+                        logger.debug("Final status check failed: %s", final_error)
                 
                 # Progressive wait times - start fast, then slow down
                 if poll_count < 3:
@@ -208,31 +323,31 @@ class WhitelistService:
                 else:
                     wait_time = config.COMMIT_POLL_INTERVAL + 4  # 10 seconds
                 
-                print(f"[DEBUG] Waiting {wait_time} seconds before next poll...")
+                logger.debug("Waiting %s seconds before next poll...", wait_time)
                 time.sleep(wait_time)
                     
             except Exception as e:
-                print(f"[DEBUG] Error during auto-polling attempt {polling_attempts}: {e}")
+                logger.debug("Error during auto-polling attempt %s: %s", polling_attempts, e)
                 last_error = str(e)
                 
                 # Don't give up immediately on errors, try a few more times
                 if poll_count < config.COMMIT_MAX_POLLS - 3:
-                    print(f"[DEBUG] Will retry polling in {config.COMMIT_POLL_INTERVAL} seconds...")
+                    logger.debug("Will retry polling in %s seconds...", config.COMMIT_POLL_INTERVAL)
                     time.sleep(config.COMMIT_POLL_INTERVAL)
                     continue
                 else:
-                    print(f"[DEBUG] Too many polling errors, stopping polling")
+                    logger.debug("Too many polling errors, stopping polling")
                     break
         
         # Final status determination
         if commit_status is None:
-            print(f"[DEBUG] ⚠️ Auto-polling completed but no status received")
+            logger.debug("⚠️ Auto-polling completed but no status received")
             commit_status = 'UNKNOWN'
             commit_progress = '0'
             if last_error:
                 commit_status = 'ERROR'
         
-        print(f"[DEBUG] ✅ Auto-polling finished. Final status: {commit_status}, Progress: {commit_progress}%")
+        logger.debug("✅ Auto-polling finished. Final status: %s, Progress: %s%%", commit_status, commit_progress)
         
         # Determine if polling was truly completed
         polling_completed = commit_status in ['FIN', 'FAIL', 'ERROR']
@@ -257,14 +372,14 @@ class WhitelistService:
     def get_commit_status(self, job_id: str) -> CommitStatus:
         """Get current commit status with better error handling"""
         try:
-            print(f"[DEBUG] Manual status check for job {job_id}")
-            status_result = self.api_client.get_commit_status(job_id)
+            logger.debug("Manual status check for job %s", job_id)
+            status_result = self._fetch_commit_status(job_id)
             
             status = status_result.get('status', 'Unknown')
             progress = status_result.get('progress', '0')
             error = status_result.get('error')
             
-            print(f"[DEBUG] Manual status check result: Status={status}, Progress={progress}%")
+            logger.debug("Manual status check result: Status=%s, Progress=%s%%", status, progress)
             
             return CommitStatus(
                 job_id=job_id,
@@ -274,7 +389,7 @@ class WhitelistService:
             )
             
         except Exception as e:
-            print(f"[DEBUG] Manual status check failed for job {job_id}: {e}")
+            logger.warning("Manual status check failed for job %s: %s", job_id, e)
             return CommitStatus(
                 job_id=job_id,
                 status='Error',
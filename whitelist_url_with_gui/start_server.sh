@@ -2,14 +2,30 @@
 
 # Palo Alto Whitelist Tool - Server Startup Script
 # Für Ubuntu Server mit nohup
+#
+# Uses gunicorn (multiple workers, graceful reload) when it is installed and
+# falls back to the built-in development server otherwise.
+# Force the development server with: SERVER_MODE=dev ./start_server.sh
 
 echo "Starting Palo Alto Whitelist Tool on Ubuntu Server..."
 
 # Set environment variables
-export PYTHONUNBUFFERED=1
+# (stdout stays buffered - application output goes through the logging queue)
 export FLASK_ENV=production
 
-# Kill any existing process
+SERVER_MODE=${SERVER_MODE:-auto}
+if [ "$SERVER_MODE" = "auto" ]; then
+    if python3 -c "import gunicorn" 2>/dev/null; then
+        SERVER_MODE=gunicorn
+    else
+        SERVER_MODE=dev
+    fi
+fi
+
+# Kill any existing process (graceful stop for gunicorn, finishes running searches)
+if [ -f logs/server.pid ] && ps -p "$(cat logs/server.pid)" > /dev/null 2>&1; then
+    kill -TERM "$(cat logs/server.pid)" 2>/dev/null || true
+fi
 pkill -f "python.*main.py" 2>/dev/null || true
 
 # Wait a moment
@@ -18,25 +34,45 @@ sleep 2
 # Create logs directory if it doesn't exist
 mkdir -p logs
 
+# Keep the previous run's console output compressed (the app and error logs rotate themselves)
+for f in logs/server_stdout.log logs/server_stderr.log; do
+    if [ -s "$f" ]; then
+        gzip -c "$f" > "$f.$(date +%Y-%m-%d_%H-%M-%S).gz" && : > "$f"
+    fi
+done
+find logs -maxdepth 1 -name 'server_std*.log.*.gz' -mtime +30 -delete 2>/dev/null || true
+
 # Start the application with proper output handling
-nohup python3 main.py \
-    --host=0.0.0.0 \
-    --port=5010 \
-    > logs/server_stdout.log 2> logs/server_stderr.log &
+if [ "$SERVER_MODE" = "gunicorn" ]; then
+    echo "Using gunicorn (production WSGI server)"
+    nohup python3 -m gunicorn -c gunicorn.conf.py wsgi:app \
+        > logs/server_stdout.log 2>> logs/server_stderr.log &
+    # gunicorn writes the master PID itself
+    sleep 3
+    PID=$(cat logs/server.pid 2>/dev/null)
+else
+    echo "Using the development server (install gunicorn for production)"
+    nohup python3 main.py \
+        --host=0.0.0.0 \
+        --port=5010 \
+        > logs/server_stdout.log 2> logs/server_stderr.log &
+    PID=$!
+    echo $PID > logs/server.pid
+    sleep 3
+fi
 
 # Get the process ID
-PID=$!
 echo "Started with PID: $PID"
-echo $PID > logs/server.pid
-
-# Wait a moment and check if it's running
-sleep 3
 
-if ps -p $PID > /dev/null; then
+# Check if it's running
+if [ -n "$PID" ] && ps -p $PID > /dev/null; then
     echo "✅ Server started successfully!"
     echo "📊 Check status: tail -f logs/server_stdout.log"
     echo "❌ Check errors: tail -f logs/server_stderr.log"
     echo "🌐 Access URL: http://YOUR_SERVER_IP:5010"
+    if [ "$SERVER_MODE" = "gunicorn" ]; then
+        echo "🔄 Graceful reload: kill -HUP $PID"
+    fi
     echo "🛑 Stop server: kill $PID"
 else
     echo "❌ Server failed to start. Check logs:"
@@ -44,4 +80,4 @@ else
     cat logs/server_stdout.log
     echo "STDERR:"
     cat logs/server_stderr.log
-fi
\ No newline at end of file
+fi
@@ -0,0 +1,5 @@
+"""Tests run from any directory; the application imports its modules top-level (from config import config)"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,188 @@
+import json
+import os
+import zipfile
+from datetime import date, datetime
+
+import pytest
+
+from models.ticket import TicketData, TicketHistoryQuery
+from services.audit_store import INDEX_VERSION, AuditStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AuditStore(str(tmp_path / 'audit'))
+
+
+def _ticket(ticket_id: str = 'CHG-1', urls=('a.example.com/', 'b.example.com/'), timestamp: str = None,
+            username: str = 'admin') -> dict:
+    return TicketData(ticket_id=ticket_id, username=username, hostname='fw1.example.com',
+                      category='Whitelist-Web (shared)', context='shared', urls_added=list(urls), success=True,
+                      timestamp=timestamp or datetime.now().isoformat(), commit_job_id='42',
+                      commit_status='PENDING', commit_progress='0').to_dict()
+
+
+def _lines(store: AuditStore) -> list:
+    lines = []
+    for segment in store.segments():
+        with open(f"{store.directory}/{segment}", encoding='utf-8') as f:
+            lines += [json.loads(line) for line in f]
+    return lines
+
+
+def test_status_arriving_before_its_ticket_is_applied(store):
+    record_id = store.new_record_id()
+    # The ticket is still queued in another worker's writer when the commit finishes
+    assert store.append_status(record_id, 'FIN', '100') is not None
+    assert store.append_status(record_id, 'FIN', '100') is None  # Repeated poll
+    store.append_ticket(record_id, _ticket())
+
+    record = store.get(record_id)
+    assert (record['commit_status'], record['commit_progress']) == ('FIN', '100')
+    assert store.append_status(record_id, 'FIN', '100') is None
+    assert [line['type'] for line in _lines(store)] == ['commit_status', 'ticket']
+
+
+def test_rebuild_applies_a_status_written_before_its_ticket(store):
+    record_id = store.new_record_id()
+    store.append_status(record_id, 'FAIL', '100')
+    store.append_ticket(record_id, _ticket())
+
+    assert store.rebuild_index() == 1
+    assert store.get(record_id)['commit_status'] == 'FAIL'
+
+
+def _add(store: AuditStore, *args, **kwargs) -> str:
+    record_id = store.new_record_id()
+    store.append_ticket(record_id, _ticket(*args, **kwargs))
+    return record_id
+
+
+def _search(store: AuditStore, **filters) -> list:
+    rows, total, exact = store.search(TicketHistoryQuery(**filters))
+    assert exact and total == len(rows)
+    return [row['ticket_id'] for row in rows]
+
+
+def test_append_then_search(store):
+    first = _add(store, 'CHG-100', ['www.youtube.com/', 'cdn.example.net/'], '2025-03-01T10:00:00')
+    _add(store, 'CHG-101', ['twitch.tv/'], '2025-03-02T10:00:00', username='operator')
+    _add(store, 'INC-7', ['youtube.com/'], '2025-03-03T10:00:00')
+
+    record = store.get(first)
+    assert record['ticket_id'] == 'CHG-100'
+    assert record['urls_added'] == ['www.youtube.com/', 'cdn.example.net/']
+    assert store.latest_for_ticket('INC-7')['urls_added'] == ['youtube.com/']
+    assert store.get('no-such-record') is None
+
+    assert _search(store) == ['INC-7', 'CHG-101', 'CHG-100']
+    assert _search(store, ticket_id='CHG-10') == ['CHG-101', 'CHG-100']
+    assert _search(store, username='operator') == ['CHG-101']
+    assert _search(store, domain='youtube') == ['INC-7', 'CHG-100']
+    assert _search(store, domain='tv') == ['CHG-101']  # Shorter than a trigram
+    assert _search(store, date_from=date(2025, 3, 2), date_to=date(2025, 3, 2)) == ['CHG-101']
+    rows, _, _ = store.search(TicketHistoryQuery(ticket_id='CHG-100'))
+    assert rows[0]['urls'] == ['www.youtube.com/', 'cdn.example.net/']
+    assert rows[0]['url_count'] == 2
+
+
+def test_search_pages_and_limits_the_count(store, monkeypatch):
+    for number in range(5):
+        _add(store, f"CHG-{number}", timestamp=f"2025-03-0{number + 1}T10:00:00")
+    monkeypatch.setattr(AuditStore, 'COUNT_LIMIT', 3)
+
+    rows, total, exact = store.search(TicketHistoryQuery(), offset=1, limit=2)
+    assert [row['ticket_id'] for row in rows] == ['CHG-3', 'CHG-2']
+    assert (total, exact) == (3, False)
+    assert [row['ticket_id'] for row in store.iter_search(TicketHistoryQuery(), batch_size=2)] == [
+        'CHG-4', 'CHG-3', 'CHG-2', 'CHG-1', 'CHG-0']
+
+
+def test_repeated_status_is_written_once(store):
+    record_id = _add(store)
+    assert store.append_status(record_id, 'ACT', '50') is not None
+    assert store.append_status(record_id, 'ACT', '50') is None
+    assert store.append_status(record_id, 'FIN', '100') is not None
+    assert store.append_status(record_id, 'FIN', '100') is None
+
+    assert [(line['type'], line.get('commit_progress')) for line in _lines(store)] == [
+        ('ticket', '0'), ('commit_status', '50'), ('commit_status', '100')]
+    record = store.get(record_id)
+    assert (record['commit_status'], record['commit_progress']) == ('FIN', '100')
+    assert store.search(TicketHistoryQuery())[0][0]['commit_status'] == 'FIN'
+
+
+def test_archive_then_search(store, tmp_path):
+    old = _add(store, 'CHG-OLD', ['old.example.com/'], '2025-01-15T10:00:00')
+    store.append_status(old, 'FIN', '100')
+    current = _add(store, 'CHG-NEW', ['new.example.com/'], '2025-03-01T10:00:00')
+    legacy_dir = tmp_path / 'legacy'
+    legacy_dir.mkdir()
+    (legacy_dir / 'ticket_CHG-LEGACY_20250110_093000.log').write_text('legacy ticket log')
+
+    assert store.archive_old_logs(str(legacy_dir), now=datetime(2025, 3, 2)) == 2
+    assert store.segments() == ['tickets-2025-03-01.jsonl', f"tickets-{datetime.now():%Y-%m-%d}.jsonl"]
+    assert not os.listdir(legacy_dir)
+    with zipfile.ZipFile(os.path.join(store.directory, 'archive', 'tickets-2025-01.zip')) as archive:
+        assert sorted(archive.namelist()) == ['legacy/ticket_CHG-LEGACY_20250110_093000.log',
+                                              'tickets-2025-01-15.jsonl']
+
+    # Read through the archive, with the status written after archiving
+    store.append_status(old, 'FIN', '100')
+    record = store.get(old)
+    assert record['urls_added'] == ['old.example.com/']
+    assert record['commit_status'] == 'FIN'
+    assert store.get(current)['ticket_id'] == 'CHG-NEW'
+    assert _search(store, domain='old.example') == ['CHG-OLD']
+    assert _search(store) == ['CHG-NEW', 'CHG-OLD']
+    assert store.legacy_ticket_log('CHG-LEGACY') == b'legacy ticket log'
+
+    # Nothing left to archive; the archive survives a rebuild
+    assert store.archive_old_logs(str(legacy_dir), now=datetime(2025, 3, 2)) == 0
+    assert store.rebuild_index() == 2
+    assert store.get(old)['commit_status'] == 'FIN'
+    assert store.legacy_ticket_log('CHG-LEGACY') == b'legacy ticket log'
+
+
+def test_current_month_is_not_archived(store):
+    _add(store, timestamp='2025-02-28T23:59:00')
+    assert store.archive_old_logs(now=datetime(2025, 3, 1, 12)) == 0
+    assert store.archive_old_logs(now=datetime(2025, 3, 2)) == 1
+
+
+def test_rebuild_index_from_segments(store, tmp_path):
+    first = _add(store, 'CHG-1', ['a.example.com/'], '2025-03-01T10:00:00')
+    _add(store, 'CHG-2', ['b.example.com/'], '2025-03-02T10:00:00')
+    store.append_status(first, 'FIN', '100')
+    with open(os.path.join(store.directory, 'tickets-2025-03-02.jsonl'), 'ab') as f:
+        f.write(b'{"type": "ticket", "record_id"\n')  # Torn line
+
+    rebuilt = AuditStore(store.directory, str(tmp_path / 'rebuilt.db'))
+    assert rebuilt.get(first) is None
+    assert rebuilt.rebuild_index() == 2
+    assert rebuilt.get(first)['commit_status'] == 'FIN'
+    assert _search(rebuilt, domain='b.example') == ['CHG-2']
+    assert rebuilt.rebuild_index() == 2  # Repeatable
+
+
+def test_old_index_is_upgraded_on_open(store):
+    record_id = _add(store, 'CHG-1', ['a.example.com/'])
+    store.append_status(record_id, 'FIN', '100')
+    # An index from before the URL tables: tickets only, user_version 0
+    conn = store._connection()
+    for table in ('ticket_urls', 'urls'):
+        conn.execute(f"DELETE FROM {table}")
+    if store.full_text:
+        conn.execute("INSERT INTO urls_fts (urls_fts) VALUES ('delete-all')")
+    conn.execute("PRAGMA user_version = 0")
+    assert _search(store, domain='a.example') == []
+
+    upgraded = AuditStore(store.directory)
+    assert upgraded._connection().execute("PRAGMA user_version").fetchone()[0] == INDEX_VERSION
+    assert _search(upgraded, domain='a.example') == ['CHG-1']
+    assert upgraded.get(record_id)['commit_status'] == 'FIN'
+
+
+def test_new_index_starts_at_the_current_version(tmp_path):
+    store = AuditStore(str(tmp_path / 'audit'))
+    assert store._connection().execute("PRAGMA user_version").fetchone()[0] == INDEX_VERSION
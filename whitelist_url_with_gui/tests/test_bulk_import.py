@@ -0,0 +1,201 @@
+import io
+import json
+
+import pytest
+
+from api.palo_alto_client import PaloAltoAPI
+from config import config
+from services.bulk_import_service import BulkImportService, parse_import, parse_records
+from services.state_store import MemoryStateStore
+from services.whitelist_service import WhitelistService
+from tools.mock_panos import MockOptions, start_in_thread
+from utils.validators import normalize_whitelist_url
+
+WEB = ('shared', 'Whitelist-Web')
+SALES = ('vsys1', 'Whitelist-Sales')
+
+
+@pytest.fixture(scope='module')
+def firewall():
+    server = start_in_thread(MockOptions(latency_ms=0, jitter_ms=0, log_volume=10, domains=10,
+                                         category_members=0, commit_seconds=0.1))
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def service(firewall, monkeypatch):
+    monkeypatch.setattr(config, 'API_SCHEME', 'http')
+    monkeypatch.setattr(config, 'API_PORT', firewall.server_address[1])
+    for key in firewall.firewall.categories:
+        firewall.firewall.categories[key] = []
+    firewall.firewall.categories[WEB] = ['covered.example.com/', '*.wild.example.org/']
+    client = PaloAltoAPI('127.0.0.1', 'admin', 'admin')
+    assert client.get_api_key()
+    return BulkImportService(WhitelistService(client, MemoryStateStore()))
+
+
+def _rows(*rows):
+    return parse_records([{'ticket': ticket, 'category': category, 'url': url} for ticket, category, url in rows])
+
+
+# Parsing
+
+def test_parse_csv_with_aliases_and_bom():
+    rows = parse_import('\ufeffTicket, Category ,Domain\nCHG-1,Whitelist-Web,a.example.com/\n\nCHG-2,Whitelist-Web, b.example.com/ \n')
+    assert [(row.line, row.ticket_id, row.category, row.url) for row in rows] == [
+        (2, 'CHG-1', 'Whitelist-Web', 'a.example.com/'), (4, 'CHG-2', 'Whitelist-Web', 'b.example.com/')]
+
+
+def test_parse_json_list_and_rows_object():
+    records = [{'ticket_id': 'CHG-1', 'category': 'Whitelist-Web', 'URL': 'a.example.com/'}]
+    assert parse_import(json.dumps(records))[0].url == 'a.example.com/'
+    assert parse_import(json.dumps({'rows': records}), 'json')[0].ticket_id == 'CHG-1'
+
+
+@pytest.mark.parametrize('content, fmt, error', [
+    ('ticket,url\nCHG-1,a.example.com/\n', None, 'missing column(s): category'),
+    ('[{"ticket": "CHG-1"', None, 'Invalid JSON'),
+    ('{"urls": []}', None, "must be a list of rows"),
+    ('[["CHG-1", "Whitelist-Web", "a.example.com/"]]', None, 'Row 1 is not an object'),
+    ('[]', None, 'No rows to import'),
+    ('ticket,category,url\n', None, 'No rows to import'),
+    ('ticket,category,url\n', 'xml', 'Unknown import format'),
+])
+def test_parse_rejects_malformed_input(content, fmt, error):
+    with pytest.raises(ValueError, match=error.replace('(', r'\(').replace(')', r'\)')):
+        parse_import(content, fmt)
+
+
+def test_parse_row_limit(monkeypatch):
+    monkeypatch.setattr(config, 'BULK_IMPORT_MAX_ROWS', 2)
+    content = 'ticket,category,url\n' + ''.join(f"CHG-{i},Whitelist-Web,u{i}.example.com/\n" for i in range(3))
+    with pytest.raises(ValueError, match=r'Too many rows: 3 \(maximum: 2\)'):
+        parse_import(content)
+    assert len(parse_import(content.rsplit('CHG-2', 1)[0])) == 2
+
+
+def test_upload_size_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, 'BULK_IMPORT_MAX_BYTES', 64)
+    from main import create_app
+    client = create_app().test_client()
+    with client.session_transaction() as session:
+        session.update(api_key='key', hostname='127.0.0.1', username='admin')
+
+    content = b'ticket,category,url\n' + b'CHG-1,Whitelist-Web,a.example.com/\n' * 2
+    response = client.post('/bulk_import', data={'file': (io.BytesIO(content), 'import.csv')})
+    assert response.get_json() == {'success': False, 'error': 'File too large (maximum: 0 KiB)'}
+
+
+# Validation and import
+
+def test_validate_rows(service):
+    rows = _rows(('CHG-1', 'Whitelist-Web', 'a.example.com/'),
+                 ('x', 'Whitelist-Web', 'b.example.com/'),
+                 ('CHG-2', 'No-Such-Category', 'b.example.com/'),
+                 ('CHG-3', 'Whitelist-Web;', 'b.example.com/'),
+                 ('CHG-4', 'Whitelist-Web (shared)', ''),
+                 ('CHG-5', 'Whitelist-Web (shared)', 'A.example.com/'),
+                 ('CHG-6', 'Whitelist-Sales', 'a.example.com/'))
+    groups = service._validate(rows, service.whitelist_service.get_categories())
+
+    assert [(row.status, row.message) for row in rows] == [
+        ('pending', None),
+        ('invalid', 'Invalid ticket ID'),
+        ('invalid', 'Unknown category'),
+        ('invalid', 'Invalid category name'),
+        ('invalid', 'Invalid URL'),
+        ('duplicate', 'Same URL and category as line 1'),
+        ('pending', None)]
+    assert {category: [row.line for row in group] for category, group in groups.items()} == {
+        'Whitelist-Web (shared)': [1], 'Whitelist-Sales (vsys1)': [7]}
+
+
+@pytest.mark.parametrize('url, normalized', [
+    ('example.com', 'example.com/'),
+    ('  Example.COM/ ', 'example.com/'),
+    ('https://example.com/', 'example.com/'),
+    ('HTTP://example.com', 'example.com/'),
+    ('https://example.com:443/', 'example.com/'),
+    ('http://example.com:80', 'example.com/'),
+    ('https://example.com:8443/', 'example.com:8443/'),
+    ('http://example.com/Path', 'example.com/path'),
+    ('*.Example.com', '*.example.com'),
+    ('https://*.example.com/', '*.example.com/'),
+])
+def test_urls_are_normalized_like_manual_submissions(url, normalized):
+    assert normalize_whitelist_url(url) == normalized
+
+
+def test_spelling_variants_of_one_url_are_one_row(service, firewall):
+    rows = _rows(('CHG-1', 'Whitelist-Web', 'https://example.com/'),
+                 ('CHG-1', 'Whitelist-Web', 'example.com'),
+                 ('CHG-1', 'Whitelist-Web', 'HTTP://Example.com:80/'),
+                 ('CHG-1', 'Whitelist-Web', 'https://COVERED.example.com'))
+    success, _, report = service.run(rows, 'admin', '127.0.0.1')
+
+    assert success
+    assert [(row['status'], row['url']) for row in report['rows']] == [
+        ('added', 'example.com/'), ('duplicate', 'example.com/'), ('duplicate', 'example.com/'),
+        ('covered', 'covered.example.com/')]
+    assert report['rows'][1]['message'] == 'Same URL and category as line 1'
+    members = firewall.firewall.categories[WEB]
+    assert members.count('example.com/') == 1
+    assert not any('://' in member or member == 'example.com' for member in members)
+
+
+def test_category_name_in_several_contexts_is_ambiguous(service, firewall):
+    firewall.firewall.categories[('vsys1', 'Whitelist-Web')] = []
+    try:
+        rows = _rows(('CHG-1', 'Whitelist-Web', 'a.example.com/'), ('CHG-2', 'Whitelist-Web (vsys1)', 'a.example.com/'))
+        service._validate(rows, service.whitelist_service.get_categories())
+    finally:
+        del firewall.firewall.categories[('vsys1', 'Whitelist-Web')]
+    assert rows[0].status == 'invalid'
+    assert rows[0].message.startswith('Category exists in several contexts')
+    assert rows[1].category == 'Whitelist-Web (vsys1)'
+
+
+def test_run_adds_new_urls_with_one_edit_per_category_and_one_commit(service, firewall):
+    rows = _rows(('CHG-1', 'Whitelist-Web', 'new.example.com/'),
+                 ('CHG-1', 'Whitelist-Web', 'covered.example.com/'),
+                 ('CHG-1', 'Whitelist-Web', 'a.wild.example.org/'),
+                 ('CHG-1', 'Whitelist-Web', 'new.example.com/'),
+                 ('CHG-2', 'Whitelist-Sales', 'sales.example.com/'),
+                 ('CHG-3', 'Whitelist-Bogus', 'x.example.com/'))
+    firewall.firewall.reset_stats()
+
+    success, message, report = service.run(rows, 'admin', '127.0.0.1')
+
+    assert success
+    assert [row['status'] for row in report['rows']] == ['added', 'covered', 'covered', 'duplicate', 'added', 'invalid']
+    assert report['rows'][2]['message'] == 'Already covered by *.wild.example.org/'
+    assert report['summary'] == {'invalid': 1, 'duplicate': 1, 'covered': 2, 'new': 0, 'added': 2, 'failed': 0, 'total': 6}
+    assert report['commit_job_id']
+    assert message == f"2 of 6 URLs added to 2 categories; 2 already covered, 2 rejected. Commit job {report['commit_job_id']} started."
+    assert 'new.example.com/' in firewall.firewall.categories[WEB]
+    assert 'sales.example.com/' in firewall.firewall.categories[SALES]
+    stats = firewall.firewall.snapshot()['requests']
+    assert stats.get('commit') == 1
+    assert stats.get('config_edit', 0) + stats.get('config_set', 0) == 2
+
+
+def test_dry_run_changes_nothing(service, firewall):
+    rows = _rows(('CHG-1', 'Whitelist-Web', 'new.example.com/'), ('CHG-1', 'Whitelist-Web', 'covered.example.com/'))
+    success, message, report = service.run(rows, 'admin', '127.0.0.1', dry_run=True)
+
+    assert success
+    assert [row.status for row in rows] == ['new', 'covered']
+    assert report['commit_job_id'] is None
+    assert message == 'Dry run: 1 of 2 URLs would be added to 1 categories; 1 already covered, 0 rejected.'
+    assert firewall.firewall.categories[WEB] == ['covered.example.com/', '*.wild.example.org/']
+
+
+def test_only_rejected_rows_fail_the_import(service):
+    rows = _rows(('x', 'Whitelist-Web', 'a.example.com/'), ('CHG-1', 'Whitelist-Bogus', 'a.example.com/'))
+    success, _, report = service.run(rows, 'admin', '127.0.0.1')
+
+    assert not success
+    assert report['summary']['invalid'] == 2
+    assert report['categories'] == [] and report['commit_job_id'] is None
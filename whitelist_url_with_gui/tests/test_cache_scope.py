@@ -0,0 +1,44 @@
+from services.search_service import SearchService
+from services.state_store import MemoryStateStore, client_scope
+from services.whitelist_service import WhitelistService
+
+
+class FakeClient:
+    """Firewall client of one login, counting category fetches"""
+
+    def __init__(self, api_key: str, categories: dict, hostname: str = 'FW1.example.com'):
+        self.hostname = hostname
+        self.api_key = api_key
+        self.categories = categories
+        self.fetches = 0
+
+    def get_custom_url_categories(self):
+        self.fetches += 1
+        return self.categories
+
+
+def test_category_cache_is_per_login():
+    store = MemoryStateStore()
+    admin = FakeClient('key-admin', {'All (shared)': {}, 'Vsys2-Only (vsys2)': {}})
+    scoped = FakeClient('key-vsys1', {'All (shared)': {}})
+
+    assert WhitelistService(admin, store).get_categories() == admin.categories
+    assert WhitelistService(scoped, store).get_categories() == scoped.categories
+    # The same login is still served from the cache
+    assert WhitelistService(FakeClient('key-admin', {}), store).get_categories() == admin.categories
+    assert admin.fetches == scoped.fetches == 1
+
+
+def test_search_key_separates_logins_but_not_term_order():
+    first = SearchService(FakeClient('key-a', {}))
+    same_login = SearchService(FakeClient('key-a', {}, hostname='fw1.example.com '))
+    other_login = SearchService(FakeClient('key-b', {}))
+
+    assert first._search_key(['YouTube', 'vimeo']) == same_login._search_key(['vimeo', 'youtube'])
+    assert first._search_key(['youtube']) != other_login._search_key(['youtube'])
+
+
+def test_client_scope_does_not_contain_the_key():
+    scope = client_scope(FakeClient('secret-api-key', {}))
+    assert scope.startswith('fw1.example.com:')
+    assert 'secret-api-key' not in scope
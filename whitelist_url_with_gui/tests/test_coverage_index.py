@@ -0,0 +1,152 @@
+import pytest
+
+from api.palo_alto_client import PaloAltoAPI
+from config import config
+from main import create_app
+from tools.mock_panos import MockOptions, start_in_thread
+from utils.coverage_index import COVERED, COVERED_BY_WILDCARD, NEW, CategoryCoverageIndex
+
+MEMBERS = ['example.com/', '*.example.com/', '*.open.com', 'exact.net', 'https://Mixed.org/', 'deep.example.org/path/']
+
+
+@pytest.fixture(scope='module')
+def index():
+    return CategoryCoverageIndex(MEMBERS)
+
+
+@pytest.mark.parametrize('url, status, covered_by', [
+    # Exact members, compared normalized
+    ('example.com/', COVERED, 'example.com/'),
+    ('EXAMPLE.COM/', COVERED, 'example.com/'),
+    ('https://example.com/', COVERED, 'example.com/'),
+    ('mixed.org/', COVERED, 'mixed.org/'),
+    ('*.example.com/', COVERED, '*.example.com/'),
+    ('deep.example.org/path/', COVERED, 'deep.example.org/path/'),
+    # Below a '*.' member
+    ('a.example.com', COVERED_BY_WILDCARD, '*.example.com/'),
+    ('a.example.com/', COVERED_BY_WILDCARD, '*.example.com/'),
+    ('a.b.example.com/path/x', COVERED_BY_WILDCARD, '*.example.com/'),
+    ('*.a.example.com/', COVERED_BY_WILDCARD, '*.example.com/'),
+    # Not covered
+    ('other.com/', NEW, None),
+    ('notexample.com/', NEW, None),
+    ('example.org/', NEW, None),
+    ('deep.example.org/', NEW, None),
+    ('', NEW, None),
+    ('   ', NEW, None),
+    ('https://', NEW, None),
+])
+def test_classify(index, url, status, covered_by):
+    assert index.classify(url) == {'status': status, 'covered_by': covered_by}
+
+
+def test_wildcard_does_not_cover_its_base_domain():
+    index = CategoryCoverageIndex(['*.example.com/'])
+    assert index.classify('example.com/')['status'] == NEW
+    assert index.classify('example.com')['status'] == NEW
+    assert index.classify('www.example.com/')['status'] == COVERED_BY_WILDCARD
+
+
+def test_open_ended_wildcard():
+    index = CategoryCoverageIndex(['*.open.com'])
+    assert index.classify('a.open.com/x') == {'status': COVERED_BY_WILDCARD, 'covered_by': '*.open.com'}
+    assert index.classify('*.x.open.com')['status'] == COVERED_BY_WILDCARD
+    assert index.classify('*.x.open.com/')['status'] == COVERED_BY_WILDCARD
+    assert index.classify('open.com/')['status'] == NEW
+
+
+def test_closed_wildcard_does_not_cover_an_open_one():
+    index = CategoryCoverageIndex(['*.example.com/'])
+    # '*.a.example.com' also matches 'x.a.example.com.evil.net' - more than '*.example.com/' allows
+    assert index.classify('*.a.example.com')['status'] == NEW
+    assert index.classify('*.a.example.com/')['status'] == COVERED_BY_WILDCARD
+
+
+def test_open_ended_wins_over_closed_wildcard_on_the_same_domain():
+    index = CategoryCoverageIndex(['*.example.com/', '*.example.com'])
+    assert index.classify('*.a.example.com') == {'status': COVERED_BY_WILDCARD, 'covered_by': '*.example.com'}
+
+
+def test_open_ended_exact_member_covers_paths_and_ports():
+    index = CategoryCoverageIndex(['exact.net'])
+    for url in ('exact.net', 'exact.net/', 'exact.net/path', 'exact.net:8080/', 'https://exact.net/a?b=c'):
+        assert index.classify(url) == {'status': COVERED, 'covered_by': 'exact.net'}, url
+    assert index.classify('a.exact.net/')['status'] == NEW
+
+
+def test_closed_member_does_not_cover_other_paths():
+    index = CategoryCoverageIndex(['example.com/'])
+    assert index.classify('example.com/path')['status'] == NEW
+    assert index.classify('example.com:8080/')['status'] == NEW
+
+
+def test_ports():
+    index = CategoryCoverageIndex(['*.example.com/', '*.open.com'])
+    # 'a.example.com:8080/' does not start with 'a.example.com/'
+    assert index.classify('a.example.com:8080/')['status'] == NEW
+    assert index.classify('a.open.com:8080/') == {'status': COVERED_BY_WILDCARD, 'covered_by': '*.open.com'}
+    assert index.classify('open.com:443/')['status'] == NEW
+
+
+def test_wildcards_limited_to_a_path_cover_nothing_else():
+    index = CategoryCoverageIndex(['*.example.com/path/'])
+    assert index.wildcard_count == 0
+    assert index.classify('a.example.com/path/')['status'] == NEW
+
+
+def test_classify_many_and_uncovered(index):
+    urls = ['a.example.com/', 'other.com/', 'exact.net/', 'new.org']
+    assert {url: result['status'] for url, result in index.classify_many(urls).items()} == {
+        'a.example.com/': COVERED_BY_WILDCARD, 'other.com/': NEW, 'exact.net/': COVERED, 'new.org': NEW}
+    assert index.uncovered(urls) == ['other.com/', 'new.org']
+
+
+# /check_coverage
+
+@pytest.fixture
+def app_client(tmp_path, monkeypatch):
+    server = start_in_thread(MockOptions(latency_ms=0, jitter_ms=0, log_volume=10, domains=10, category_members=0))
+    server.firewall.categories[('shared', 'Whitelist-Web')] = ['*.example.com/']
+    monkeypatch.setattr(config, 'API_SCHEME', 'http')
+    monkeypatch.setattr(config, 'API_PORT', server.server_address[1])
+    monkeypatch.setattr(config, 'COVERAGE_CHECK_MAX_URLS', 3)
+    monkeypatch.chdir(tmp_path)
+    api_client = PaloAltoAPI('127.0.0.1', 'admin', 'admin')
+    api_client.get_api_key()
+    client = create_app().test_client()
+    with client.session_transaction() as session:
+        session.update(api_key=api_client.api_key, hostname='127.0.0.1', username='admin')
+    yield client
+    server.shutdown()
+
+
+def test_check_coverage(app_client):
+    response = app_client.post('/check_coverage', json={
+        'category': 'Whitelist-Web (shared)', 'urls': ['a.example.com/', ' other.org/ ', '']})
+    data = response.get_json()
+    assert response.status_code == 200 and data['success']
+    assert {url: result['status'] for url, result in data['results'].items()} == {
+        'a.example.com/': COVERED_BY_WILDCARD, 'other.org/': NEW}
+
+
+@pytest.mark.parametrize('payload', [
+    {'category': 'Whitelist-Web (shared)', 'urls': 'example.com'},
+    {'category': 'Whitelist-Web (shared)', 'urls': 42},
+    {'category': 'Whitelist-Web (shared)', 'urls': {'example.com': True}},
+    {'category': 'Whitelist-Web (shared)', 'urls': ['example.com', 7]},
+    {'category': 'Whitelist-Web (shared)', 'urls': [['example.com']]},
+    {'category': ['Whitelist-Web (shared)'], 'urls': ['example.com']},
+    ['example.com'],
+    'example.com',
+], ids=['string', 'number', 'object', 'number item', 'list item', 'category list', 'list body', 'string body'])
+def test_check_coverage_rejects_anything_but_a_list_of_strings(app_client, payload):
+    response = app_client.post('/check_coverage', json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Expected a category name and a list of URLs'}
+
+
+def test_check_coverage_limits_the_list(app_client):
+    response = app_client.post('/check_coverage', json={
+        'category': 'Whitelist-Web (shared)', 'urls': [f"u{i}.example.com/" for i in range(4)]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Too many URLs: 4 (maximum: 3)'
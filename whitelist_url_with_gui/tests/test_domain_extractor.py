@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from services.search_service import SearchService
+from utils.domain_extractor import DomainExtractor, extract_domains
+
+TERM_SETS = [
+    ['youtube'],
+    ['youtube', 'twitch'],
+    ['YouTube', 'cdn'],
+    ['ab'],
+    ['.com'],
+    ['gdpr'],
+]
+
+EDGE_CASES = [
+    '', ' ', 'youtube', 'youtube.com', 'YOUTUBE.COM/watch', 'www.youtube.com/',
+    'https://www.youtube.com/watch?v=1', 'http://youtube.com:8080/path', 'youtube.com:443',
+    'youtube.com?x=1', 'youtube.com&x=1', '  www.youtube.com  /x', '\twww.youtube.com',
+    'https://', '://youtube.com', 'a://b://youtube.com/', 'https://https://youtube.com',
+    'ads.example.com/click?r=https://www.youtube.com/x', 'ads.example.com/click&r=www.youtube.com/x',
+    'consent.example.com/?gdpr_consent=1&gdpr_consent=youtube.com',
+    'tracker.net/p&gdpr_consent=youtube.com/&r=twitch.tv/', 'x.com/a b.youtube.com/c',
+    'x.com\nwww.youtube.com/\nm.youtube.com', 'x.com\twww.twitch.tv/', 'yt.be/ youtube',
+    'youtube youtube.com', 'you tube.com youtube', 'cdn.youtube.com/a?r=cdn.twitch.tv',
+    'ab.c', 'abc', 'ab.cd', 'a.ab', 'b.ab/x', 'http://ab', 'ab ab.c abc.d',
+    'İstanbul.youtube.com', 'ÄB.example.com', 'straße.youtube.de', 'youtube.com\u00a0x',
+    'youtube.com\u2003/', '?r=youtube.com', '&r=youtube.com/', 'youtube.com&r=', '&r=',
+    'www.youtube.com/&r=&r=twitch.tv', 'https://www.youtube.com:8443/?r=1&r=2',
+    'user@www.youtube.com/x', 'www.youtube.com#frag', '[::1]:8080/youtube', 'youtube..com',
+    '.youtube.com', 'youtube.com.', '*.youtube.com/', 'gdpr.example.com/&gdpr_consent=x',
+]
+
+TOKENS = ['youtube', 'twitch', 'cdn', 'ab', 'www.', '.com', '.tv', '.de', '/', '//', '://',
+          'https://', ':', ':8080', '?', '?r=', '&', '&r=', '&gdpr_consent=', ' ', '\t', '\n',
+          'x', 'Y', 'a.b', '.', '-', '=', '#', 'İ', 'ß', '\u00a0', 'gdpr', 'YouTube', 'e']
+
+
+def fuzz_corpus(count: int, seed: int):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(TOKENS) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+
+def reference(url_text: str, terms):
+    """SearchService's per-entry extraction, which the batch extractor replaces"""
+    return SearchService(api_client=None)._extract_exact_domain(url_text, terms) if url_text else None
+
+
+@pytest.mark.parametrize('terms', TERM_SETS, ids=' '.join)
+def test_batch_matches_reference_on_edge_cases(terms):
+    expected = [reference(url_text, terms) for url_text in EDGE_CASES]
+    assert extract_domains(EDGE_CASES, terms) == expected
+
+
+@pytest.mark.parametrize('terms', TERM_SETS, ids=' '.join)
+def test_batch_matches_reference_on_random_urls(terms):
+    corpus = fuzz_corpus(2000, seed=1234)
+    expected = [reference(url_text, terms) for url_text in corpus]
+    assert extract_domains(corpus, terms) == expected
+
+
+def test_extract_matches_extract_many_on_repeated_urls():
+    extractor = DomainExtractor(['youtube', 'twitch'])
+    urls = EDGE_CASES * 3
+    assert extractor.extract_many(urls) == [extractor.extract(url_text) for url_text in urls]
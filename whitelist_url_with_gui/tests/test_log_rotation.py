@@ -0,0 +1,50 @@
+import logging
+import os
+import time
+
+from utils.log_rotation import SizeAndTimeRotatingFileHandler
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None)
+
+
+def _backups(path) -> list:
+    directory, base = os.path.split(str(path))
+    return sorted(name for name in os.listdir(directory) if name.startswith(base + '.') and not name.endswith('.lock'))
+
+
+def test_one_backup_per_interval_with_several_workers(tmp_path):
+    path = tmp_path / 'app.log'
+    workers = [SizeAndTimeRotatingFileHandler(str(path), when='H', backup_count=10, compress=False)
+               for _ in range(3)]
+    boundary = time.time() + 0.3
+    for handler in workers:
+        handler.rolloverAt = boundary
+    first, second, late = workers
+
+    # Two workers have the file open before the boundary, the third never wrote to it
+    first.emit(_record('before boundary 1'))
+    second.emit(_record('before boundary 2'))
+    time.sleep(max(0.0, boundary - time.time()) + 0.05)
+
+    first.emit(_record('first after boundary'))  # Rotates
+    second.emit(_record('second after boundary'))  # Sees the new file and reopens it
+    second.emit(_record('second again'))
+    late.emit(_record('late worker'))
+    first.emit(_record('first again'))
+
+    for handler in workers:
+        handler.close()
+    assert len(_backups(path)) == 1
+    assert path.read_text().splitlines() == ['first after boundary', 'second after boundary', 'second again',
+                                             'late worker', 'first again']
+
+
+def test_size_rollover_still_rotates_within_interval(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = SizeAndTimeRotatingFileHandler(str(path), max_bytes=100, when='H', compress=False)
+    for number in range(10):
+        handler.emit(_record(f'message {number:02d} ' + 'x' * 20))
+    handler.close()
+    assert len(_backups(path)) >= 2
@@ -0,0 +1,58 @@
+import os
+import re
+
+from utils.metrics import MetricsRegistry
+
+
+def _total(text: str, name: str) -> float:
+    match = re.search(rf'^{name} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def _workers(tmp_path):
+    """Two registries like two gunicorn workers (filed under two live pids)"""
+    first = MetricsRegistry(str(tmp_path), flush_interval=3600, pid=os.getpid())
+    second = MetricsRegistry(str(tmp_path), flush_interval=3600, pid=os.getppid())
+    return [(registry, registry.counter('requests_total', 'Requests')) for registry in (first, second)]
+
+
+def test_totals_never_decrease_across_workers(tmp_path):
+    (first, first_requests), (second, second_requests) = _workers(tmp_path)
+    totals = []
+    for step in range(6):
+        first_requests.inc(5)
+        second_requests.inc(1)
+        # Scrapes land on alternating workers; nobody flushed after a request
+        totals.append(_total((first if step % 2 else second).render(), 'requests_total'))
+        totals.append(_total((second if step % 2 else first).render(), 'requests_total'))
+    assert totals == sorted(totals)
+    assert totals[-1] == 36
+
+
+def test_scrapes_of_different_workers_agree(tmp_path):
+    (first, first_requests), (second, second_requests) = _workers(tmp_path)
+    first_requests.inc(3)
+    second_requests.inc(4)
+    first.flush()
+    second.flush()
+    assert first.render() == second.render()
+    assert _total(first.render(), 'requests_total') == 7
+
+
+def test_histograms_and_gauges_merge(tmp_path):
+    first = MetricsRegistry(str(tmp_path), flush_interval=3600, pid=os.getpid())
+    second = MetricsRegistry(str(tmp_path), flush_interval=3600, pid=os.getppid())
+    for registry, value in ((first, 0.2), (second, 3)):
+        registry.histogram('latency_seconds', 'Latency', buckets=(1, 5)).observe(value)
+        registry.gauge('busy', 'Busy threads').set(2)
+    second.flush()
+    text = first.render()
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_count 2' in text
+    assert _total(text, 'busy') == 4
+
+
+def test_without_snapshot_dir_renders_own_values():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests').inc(2)
+    assert _total(registry.render(), 'requests_total') == 2
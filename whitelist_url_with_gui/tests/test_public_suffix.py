@@ -0,0 +1,82 @@
+import pytest
+
+from config import config
+from utils.public_suffix import PublicSuffixTrie, get_public_suffix_trie, group_by_registrable_domain
+
+RULES = ['com', 'uk', 'co.uk', 'ck', '*.ck', '!www.ck', 'jp', '*.kawasaki.jp', '!city.kawasaki.jp', '公司.cn', 'cn']
+
+
+@pytest.fixture(scope='module')
+def trie():
+    return PublicSuffixTrie(RULES)
+
+
+@pytest.mark.parametrize('host, suffix, registrable', [
+    ('example.com', 'com', 'example.com'),
+    ('a.b.example.co.uk', 'co.uk', 'example.co.uk'),
+    ('co.uk', 'co.uk', None),
+    # Wildcard rules: '*.ck' makes every second-level label a public suffix
+    ('b.ck', 'b.ck', None),
+    ('a.b.ck', 'b.ck', 'a.b.ck'),
+    ('x.a.b.ck', 'b.ck', 'a.b.ck'),
+    ('a.b.kawasaki.jp', 'b.kawasaki.jp', 'a.b.kawasaki.jp'),
+    ('kawasaki.jp', 'jp', 'kawasaki.jp'),
+    # Exception rules: '!www.ck' takes www.ck back out of '*.ck'
+    ('www.ck', 'ck', 'www.ck'),
+    ('a.www.ck', 'ck', 'www.ck'),
+    ('city.kawasaki.jp', 'kawasaki.jp', 'city.kawasaki.jp'),
+    ('www.city.kawasaki.jp', 'kawasaki.jp', 'city.kawasaki.jp'),
+    # Unknown TLD: the implicit '*' rule
+    ('www.example.unknowntld', 'unknowntld', 'example.unknowntld'),
+    ('unknowntld', 'unknowntld', None),
+    ('a.b.notlisted.uk', 'uk', 'notlisted.uk'),
+])
+def test_lookups(trie, host, suffix, registrable):
+    assert trie.public_suffix(host) == suffix
+    assert trie.registrable_domain(host) == registrable
+
+
+@pytest.mark.parametrize('host, registrable', [
+    ('WWW.Example.COM', 'example.com'),
+    ('*.cdn.example.com/', 'example.com'),
+    ('a.example.com/path?x=1', 'example.com'),
+    ('example.com.', 'example.com'),
+    ('', None),
+    ('a..example.com', None),
+])
+def test_host_forms(trie, host, registrable):
+    assert trie.registrable_domain(host) == registrable
+
+
+def test_unicode_rules_also_match_punycode(trie):
+    assert trie.registrable_domain('shop.example.公司.cn') == 'example.公司.cn'
+    assert trie.registrable_domain('shop.example.xn--55qx5d.cn') == 'example.xn--55qx5d.cn'
+
+
+def test_bundled_list():
+    trie = get_public_suffix_trie()
+    assert trie.registrable_domain('a.b.ck') == 'a.b.ck'
+    assert trie.registrable_domain('www.ck') == 'www.ck'
+    assert trie.registrable_domain('www.city.kawasaki.jp') == 'city.kawasaki.jp'
+    assert trie.registrable_domain('static.example.co.uk') == 'example.co.uk'
+    assert trie.registrable_domain('host.example.unknowntld') == 'example.unknowntld'
+
+
+def test_private_rules_are_optional():
+    public = PublicSuffixTrie.from_file(config.PUBLIC_SUFFIX_LIST_FILE, include_private=False)
+    everything = PublicSuffixTrie.from_file(config.PUBLIC_SUFFIX_LIST_FILE, include_private=True)
+    assert public.registrable_domain('user.github.io') == 'github.io'
+    assert everything.registrable_domain('user.github.io') == 'user.github.io'
+    assert everything.rule_count > public.rule_count
+
+
+def test_group_by_registrable_domain():
+    groups = group_by_registrable_domain(
+        ['a.example.com', 'b.example.co.uk', 'b.example.com', 'c.example.co.uk', 'co.uk', 'd.example.co.uk'],
+        min_group_size=2)
+    assert groups == [
+        {'registrable_domain': 'example.co.uk', 'domains': ['b.example.co.uk', 'c.example.co.uk', 'd.example.co.uk'],
+         'suggested_wildcard': '*.example.co.uk/'},
+        {'registrable_domain': 'example.com', 'domains': ['a.example.com', 'b.example.com'],
+         'suggested_wildcard': '*.example.com/'},
+    ]
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+
+import pytest
+
+from services import state_store
+from services.state_store import MemoryStateStore, RedisStateStore, SQLiteStateStore
+from utils.single_flight import SharedSingleFlight
+
+
+class FakeRedis:
+    """
+    The redis-py calls RedisStateStore makes, on a dictionary
+
+    EVAL knows the store's two scripts and, like the server, runs each
+    without letting another command in between.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self.scripts = {
+            state_store._REDIS_DELETE_IF_EQUALS: self._delete_if_equals,
+            state_store._REDIS_RENEW_IF_EQUALS: self._renew_if_equals,
+        }
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+        return None if item is None else item[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._live(key) is not None:
+                return None
+            self._data[key] = (value.encode('utf-8'), None if ex is None else time.time() + ex)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def eval(self, script, numkeys, *keys_and_args):
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        with self._lock:
+            return self.scripts[script](keys, args)
+
+    def _delete_if_equals(self, keys, args):
+        item = self._live(keys[0])
+        if item is None or item[0] != args[0].encode('utf-8'):
+            return 0
+        del self._data[keys[0]]
+        return 1
+
+    def _renew_if_equals(self, keys, args):
+        item = self._live(keys[0])
+        if item is None or item[0] != args[0].encode('utf-8'):
+            return 0
+        self._data[keys[0]] = (item[0], time.time() + int(args[1]) / 1000)
+        return 1
+
+
+@pytest.fixture(params=['fake', 'fakeredis'])
+def redis_store(request):
+    if request.param == 'fakeredis':
+        fakeredis = pytest.importorskip('fakeredis')
+        pytest.importorskip('lupa')  # EVAL support
+        return RedisStateStore(fakeredis.FakeRedis(), prefix='test:')
+    return RedisStateStore(FakeRedis(), prefix='test:')
+
+
+def _worker(store, lease_seconds=0.3):
+    """One worker process' flight (each has its own in-process coalescing)"""
+    return SharedSingleFlight(store, 'search', lease_seconds=lease_seconds, poll_interval=0.02)
+
+
+def test_leader_keeps_its_lease_while_working_longer_than_it():
+    store = MemoryStateStore()
+    calls = []
+
+    def slow_search():
+        calls.append(threading.current_thread().name)
+        time.sleep(1.0)  # Three times the lease
+        return 'result'
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=_worker(store).do('key', slow_search)))
+    leader.start()
+    time.sleep(0.1)
+    results['follower'] = _worker(store).do('key', slow_search)
+    leader.join()
+
+    assert len(calls) == 1
+    assert results['leader'] == ('result', False)
+    assert results['follower'] == ('result', True)
+
+
+def test_waiter_takes_over_after_the_leader_died():
+    store = MemoryStateStore()
+    flight = _worker(store)
+    # A leader whose process died: its lease is no longer renewed
+    store.add(flight._lease_key('key'), 'dead-leader', ttl=flight.lease_seconds)
+
+    started = time.monotonic()
+    assert flight.do('key', lambda: 'fresh') == ('fresh', False)
+    assert time.monotonic() - started < flight.lease_seconds + 0.5
+
+
+def test_renew_only_extends_a_lease_still_held(tmp_path):
+    for store in (MemoryStateStore(), SQLiteStateStore(str(tmp_path / 'state.db'))):
+        store.add('lease', 'mine', ttl=0.2)
+        assert store.renew_if_equals('lease', 'mine', ttl=5)
+        assert not store.renew_if_equals('lease', 'theirs', ttl=5)
+        time.sleep(0.3)
+        assert store.get('lease') == 'mine'
+        store.delete('lease')
+        assert not store.renew_if_equals('lease', 'mine', ttl=5)
+
+
+def test_redis_lease_release_and_renewal_only_touch_a_lease_still_held(redis_store):
+    assert redis_store.add('lease', 'mine', ttl=1)
+    assert redis_store.renew_if_equals('lease', 'mine', ttl=5)
+    assert not redis_store.renew_if_equals('lease', 'theirs', ttl=5)
+    assert not redis_store.delete_if_equals('lease', 'theirs')
+    assert redis_store.get('lease') == 'mine'
+    assert redis_store.delete_if_equals('lease', 'mine')
+    assert redis_store.get('lease') is None
+    assert not redis_store.renew_if_equals('lease', 'mine', ttl=5)
+
+
+def test_redis_expired_leader_does_not_touch_the_new_leaders_lease(redis_store):
+    redis_store.add('lease', 'old-leader', ttl=1)
+    time.sleep(1.1)
+    # Another worker took the lease over after it ran out
+    assert redis_store.add('lease', 'new-leader', ttl=30)
+    assert not redis_store.renew_if_equals('lease', 'old-leader', ttl=30)
+    assert not redis_store.delete_if_equals('lease', 'old-leader')
+    assert redis_store.get('lease') == 'new-leader'
+
+
+class TakeoverAfterGet(FakeRedis):
+    """Another worker takes the lease over right after the next GET - between a check and a write"""
+
+    def __init__(self):
+        super().__init__()
+        self.armed = False
+        self.taken_over = False
+
+    def get(self, key):
+        value = super().get(key)
+        if self.armed:
+            self.armed = False
+            self.taken_over = True
+            self.set(key, json.dumps('new-leader'), ex=30)
+        return value
+
+
+@pytest.mark.parametrize('release', [
+    lambda store: store.delete_if_equals('lease', 'old-leader'),
+    lambda store: store.renew_if_equals('lease', 'old-leader', ttl=30),
+], ids=['delete', 'renew'])
+def test_redis_lease_check_and_write_are_one_step(release):
+    client = TakeoverAfterGet()
+    store = RedisStateStore(client, prefix='')
+    store.add('lease', 'old-leader', ttl=30)
+    client.armed = True
+
+    release(store)
+    if client.taken_over:
+        assert json.loads(client.get('lease')) == 'new-leader'
+
+
+def test_shared_single_flight_over_redis(redis_store):
+    calls = []
+
+    def slow_search():
+        calls.append(threading.current_thread().name)
+        time.sleep(2.5)  # Longer than the lease
+        return 'result'
+
+    results = {}
+    leader = threading.Thread(
+        target=lambda: results.update(leader=_worker(redis_store, lease_seconds=1).do('key', slow_search)))
+    leader.start()
+    time.sleep(0.2)
+    results['follower'] = _worker(redis_store, lease_seconds=1).do('key', slow_search)
+    leader.join()
+
+    assert len(calls) == 1
+    assert results == {'leader': ('result', False), 'follower': ('result', True)}
+    assert redis_store.get(_worker(redis_store)._lease_key('key')) is None
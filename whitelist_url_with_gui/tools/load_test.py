@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the Flask routes
+Simulates operators working the dashboard against a mock firewall
+(tools/mock_panos.py). Every virtual user logs in once and then repeats:
+
+    search      POST /search_urls with one of --terms
+    categories  GET /get_categories
+    submit      POST /submit_whitelist (found URLs + one new URL per ticket)
+    commit      POST /commit_status every --commit-poll seconds until FIN/FAIL
+
+with a think time between the steps. By default the app runs in this
+process behind a WSGI server with a fixed pool of --threads request threads
+(the gunicorn workers x threads of a single box), so requests queue exactly
+when every thread is busy. --target drives an app that is already running
+instead (e.g. under gunicorn, started with PANOS_API_SCHEME=http and
+PANOS_API_PORT=<--mock-port>).
+
+Reported: throughput, p50/p95/p99 latency and errors per route, firewall
+API calls per user action (measured one action at a time before the run,
+plus the totals under load) and worker saturation (busy threads and queue
+wait of the in-process server, or outstanding requests vs. --capacity for
+an external app).
+
+Usage:
+    python tools/load_test.py --users 20 --duration 120 --think-time 3 --latency-ms 40 --log-job-seconds 2
+    python tools/load_test.py --users 50 --threads 16 --set ATTEMPT_WAIT_TIME=1 --out load.json
+    python tools/load_test.py --target http://127.0.0.1:5000 --mock-port 8443 --capacity 16
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from tools.mock_panos import ERROR_KINDS, add_arguments, options_from_args, start_in_thread
+
+ROUTES = ('login', 'search_urls', 'get_categories', 'submit_whitelist', 'commit_status')
+ACTIONS = ('login', 'search', 'categories', 'submit', 'commit_poll')
+FINAL_COMMIT_STATES = ('FIN', 'FAIL')
+SAMPLE_INTERVAL = 0.1
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(share * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latencies and errors per route, plus outstanding requests over time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {route: [] for route in ROUTES}
+        self.errors: Dict[str, Dict[str, int]] = {route: {} for route in ROUTES}
+        self.actions: Dict[str, int] = {action: 0 for action in ACTIONS}
+        self.outstanding = 0
+        self.max_outstanding = 0
+        self._outstanding_area = 0.0
+        self._busy_area = 0.0  # Time with at least --capacity requests outstanding
+        self._last_change = time.monotonic()
+        self.capacity = 0
+
+    def _advance(self, now: float):
+        elapsed = now - self._last_change
+        self._outstanding_area += self.outstanding * elapsed
+        if self.capacity and self.outstanding >= self.capacity:
+            self._busy_area += elapsed
+        self._last_change = now
+
+    def start(self):
+        with self._lock:
+            self._advance(time.monotonic())
+            self.outstanding += 1
+            self.max_outstanding = max(self.max_outstanding, self.outstanding)
+
+    def finish(self, route: str, seconds: float, error: Optional[str]):
+        with self._lock:
+            self._advance(time.monotonic())
+            self.outstanding -= 1
+            self.latencies[route].append(seconds)
+            if error:
+                self.errors[route][error] = self.errors[route].get(error, 0) + 1
+
+    def action(self, name: str):
+        with self._lock:
+            self.actions[name] += 1
+
+    def reset_window(self):
+        with self._lock:
+            self._last_change = time.monotonic()
+            self._outstanding_area = self._busy_area = 0.0
+
+    def window(self, seconds: float) -> Dict[str, float]:
+        with self._lock:
+            self._advance(time.monotonic())
+            return {
+                'mean_outstanding': self._outstanding_area / seconds if seconds else 0.0,
+                'max_outstanding': self.max_outstanding,
+                'share_at_capacity': self._busy_area / seconds if seconds and self.capacity else None,
+            }
+
+
+class _CloseAfterResponseHandler(WSGIRequestHandler):
+    # One request per connection: an idle keep-alive connection must not pin a pool thread
+    protocol_version = 'HTTP/1.0'
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server with a fixed pool of request threads; connections wait when all are busy"""
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int):
+        super().__init__(host, port, app, handler=_CloseAfterResponseHandler)
+        self.threads = threads
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='app')
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.queued = 0
+        self.queue_waits: List[float] = []
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.queued += 1
+        self._pool.submit(self._handle, request, client_address, time.monotonic())
+
+    def _handle(self, request, client_address, accepted: float):
+        with self._lock:
+            self.queued -= 1
+            self.busy += 1
+            self.queue_waits.append(time.monotonic() - accepted)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._lock:
+                self.busy -= 1
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class SaturationSampler(threading.Thread):
+    """Samples busy threads and queued connections of a PooledWSGIServer"""
+
+    def __init__(self, server: PooledWSGIServer):
+        super().__init__(name='saturation-sampler', daemon=True)
+        self.server = server
+        self.samples: List[tuple] = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            self.samples.append((self.server.busy, self.server.queued))
+
+    def summary(self) -> Dict[str, Any]:
+        server = self.server
+        waits = sorted(server.queue_waits)
+        busy = [sample[0] for sample in self.samples] or [0]
+        queued = [sample[1] for sample in self.samples] or [0]
+        return {
+            'threads': server.threads,
+            'mean_busy': sum(busy) / len(busy),
+            'max_busy': max(busy),
+            'utilization': sum(busy) / len(busy) / server.threads,
+            'share_all_busy': sum(1 for value in busy if value >= server.threads) / len(busy),
+            'mean_queued': sum(queued) / len(queued),
+            'max_queued': max(queued),
+            'queue_wait_p50_s': percentile(waits, 0.50),
+            'queue_wait_p95_s': percentile(waits, 0.95),
+            'queue_wait_max_s': waits[-1] if waits else 0.0,
+        }
+
+
+class Firewall:
+    """Request counters of the mock firewall (in-process or over /mock/stats)"""
+
+    def __init__(self, server=None, stats_url: str = None):
+        self.server = server
+        self.stats_url = stats_url
+
+    @property
+    def available(self) -> bool:
+        return bool(self.server or self.stats_url)
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self.server:
+            return self.server.firewall.snapshot()
+        if self.stats_url:
+            return requests.get(self.stats_url, timeout=10).json()
+        return {}
+
+    def reset(self):
+        if self.server:
+            self.server.firewall.reset_stats()
+        elif self.stats_url:
+            requests.post(self.stats_url.replace('/mock/stats', '/mock/reset'), timeout=10)
+
+
+class VirtualUser(threading.Thread):
+    """One operator: log in, then search / categories / submit / commit until the deadline"""
+
+    def __init__(self, number: int, args, base_url: str, recorder: Recorder, start_at: float, deadline: float):
+        super().__init__(name=f"user-{number}", daemon=True)
+        self.number = number
+        self.args = args
+        self.base_url = base_url
+        self.recorder = recorder
+        self.start_at = start_at
+        self.deadline = deadline
+        self.rng = random.Random(args.seed * 1000 + number)
+        self.http = requests.Session()
+        self.iterations = 0
+
+    def request(self, route: str, method: str, path: str, **kwargs) -> Optional[dict]:
+        """Timed request; returns the JSON body of a successful call, None otherwise"""
+        self.recorder.start()
+        started = time.perf_counter()
+        error = None
+        data = None
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=self.args.request_timeout,
+                                         allow_redirects=False, **kwargs)
+            if route == 'login':
+                if response.status_code != 302:
+                    error = f"login HTTP {response.status_code}"
+            elif response.status_code != 200:
+                error = f"HTTP {response.status_code}"
+            else:
+                data = response.json()
+                if not data.get('success'):
+                    error = str(data.get('error') or 'success=false')[:80]
+                    data = None
+        except requests.RequestException as e:
+            error = type(e).__name__
+        except ValueError:
+            error = 'invalid JSON'
+        self.recorder.finish(route, time.perf_counter() - started, error)
+        return data if route != 'login' else ({} if error is None else None)
+
+    def think(self):
+        pause = self.args.think_time * self.rng.uniform(0.5, 1.5)
+        time.sleep(max(0.0, min(pause, self.deadline - time.monotonic())))
+
+    def run(self):
+        time.sleep(max(0.0, self.start_at - time.monotonic()))
+        self.recorder.action('login')
+        if self.request('login', 'POST', '/', data={'hostname': self.args.firewall_host,
+                                                     'username': self.args.username,
+                                                     'password': self.args.password}) is None:
+            return
+        while time.monotonic() < self.deadline:
+            self.iteration()
+            self.iterations += 1
+
+    def iteration(self):
+        args = self.args
+        self.recorder.action('search')
+        result = self.request('search_urls', 'POST', '/search_urls',
+                              json={'search_term': self.rng.choice(args.terms), 'format': 'compact'})
+        found = (result or {}).get('domains') or []
+        self.think()
+
+        self.recorder.action('categories')
+        result = self.request('get_categories', 'GET', '/get_categories')
+        categories = list((result or {}).get('categories') or {})
+        if not categories:
+            self.think()
+            return
+        self.think()
+
+        ticket_id = f"LOAD-{self.number:03d}-{self.iterations:05d}"
+        urls = self.rng.sample(found, min(len(found), args.urls_per_submit - 1))
+        urls.append(f"load{self.number}-{self.iterations}.example.com/")
+        self.recorder.action('submit')
+        result = self.request('submit_whitelist', 'POST', '/submit_whitelist', json={
+            'ticket_id': ticket_id, 'category': self.rng.choice(categories), 'urls': urls
+        })
+        job_id = (result or {}).get('commit_job_id')
+        # 'Unknown': nothing left to commit, another user's commit already took these changes along
+        if job_id and job_id != 'Unknown':
+            self.poll_commit(job_id)
+        self.think()
+
+    def poll_commit(self, job_id: str):
+        give_up = time.monotonic() + self.args.commit_timeout
+        while time.monotonic() < give_up:
+            time.sleep(self.args.commit_poll)
+            self.recorder.action('commit_poll')
+            result = self.request('commit_status', 'POST', '/commit_status', json={'job_id': job_id})
+            if result and result.get('status', {}).get('status') in FINAL_COMMIT_STATES:
+                return
+
+
+def calibrate(args, base_url: str, firewall: Firewall) -> Dict[str, Dict[str, int]]:
+    """Firewall requests caused by each user action, one action at a time"""
+    recorder = Recorder()
+    user = VirtualUser(0, args, base_url, recorder, 0, time.monotonic() + args.commit_timeout)
+    calls = {}
+
+    def measure(action, route, method, path, **kwargs):
+        firewall.reset()
+        result = user.request(route, method, path, **kwargs)
+        calls[action] = firewall.snapshot().get('requests', {})
+        return result
+
+    if measure('login', 'login', 'POST', '/', data={'hostname': args.firewall_host, 'username': args.username,
+                                                   'password': args.password}) is None:
+        raise SystemExit(f"Calibration login failed: {recorder.errors['login']}")
+    measure('search', 'search_urls', 'POST', '/search_urls', json={'search_term': args.terms[0], 'format': 'compact'})
+    categories = list((measure('categories', 'get_categories', 'GET', '/get_categories') or {})
+                      .get('categories') or {})
+    if categories:
+        result = measure('submit', 'submit_whitelist', 'POST', '/submit_whitelist', json={
+            'ticket_id': 'LOAD-CALIBRATION', 'category': categories[0], 'urls': ['load-calibration.example.com/']
+        })
+        if result and result.get('commit_job_id'):
+            measure('commit_poll', 'commit_status', 'POST', '/commit_status', json={'job_id': result['commit_job_id']})
+    return calls
+
+
+def start_app(args, mock_port: int):
+    """The app in this process behind a PooledWSGIServer; returns (server, base URL)"""
+    os.chdir(tempfile.mkdtemp(prefix='load-test-'))  # Logs, state and the secret key go here
+    config.API_SCHEME = 'http'
+    config.API_PORT = mock_port
+    for name, value in args.set:
+        setattr(config, name, value)
+
+    from main import create_app
+    server = PooledWSGIServer('127.0.0.1', 0, create_app(), args.threads)
+    threading.Thread(target=server.serve_forever, name='app-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _setting(text: str):
+    name, _, value = text.partition('=')
+    if not name.isupper() or not hasattr(config, name):
+        raise argparse.ArgumentTypeError(f"Unknown config setting: {name}")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value
+
+
+def route_report(recorder: Recorder, seconds: float) -> Dict[str, Any]:
+    routes = {}
+    for route in ROUTES:
+        values = sorted(recorder.latencies[route])
+        errors = sum(recorder.errors[route].values())
+        routes[route] = {
+            'requests': len(values),
+            'errors': errors,
+            'rps': len(values) / seconds,
+            'p50_s': percentile(values, 0.50),
+            'p95_s': percentile(values, 0.95),
+            'p99_s': percentile(values, 0.99),
+            'max_s': values[-1] if values else 0.0,
+            'top_errors': dict(sorted(recorder.errors[route].items(), key=lambda item: -item[1])[:3]),
+        }
+    return routes
+
+
+def print_report(report: Dict[str, Any]):
+    run = report['run']
+    print(f"\n{run['users']} users for {run['seconds']:.0f}s: {run['requests']} requests "
+          f"({run['requests_per_s']:.1f}/s), {run['iterations']} iterations, {run['errors']} errors")
+    print(f"\n  {'route':18} {'requests':>9} {'errors':>7} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}")
+    for route, stats in report['routes'].items():
+        if not stats['requests']:
+            continue
+        print(f"  {route:18} {stats['requests']:9} {stats['errors']:7} {stats['rps']:7.2f} "
+              f"{stats['p50_s'] * 1000:9.0f} {stats['p95_s'] * 1000:9.0f} {stats['p99_s'] * 1000:9.0f} "
+              f"{stats['max_s'] * 1000:9.0f}")
+        for error, count in stats['top_errors'].items():
+            print(f"      {count:6} x {error}")
+
+    firewall = report.get('firewall')
+    if firewall:
+        print("\n  Firewall calls per user action (one action at a time):")
+        for action, calls in firewall['per_action'].items():
+            detail = ', '.join(f"{kind} {count}" for kind, count in sorted(calls.items()))
+            print(f"    {action:12} {sum(calls.values()):4}  ({detail})")
+        print(f"  Under load: {firewall['total_requests']} calls for {firewall['user_actions']} user actions "
+              f"({firewall['calls_per_action']:.2f} per action)")
+        print(f"    {', '.join(f'{kind} {count}' for kind, count in sorted(firewall['requests'].items()))}")
+
+    saturation = report['saturation']
+    if 'threads' in saturation:
+        print(f"\n  Worker saturation ({saturation['threads']} threads): utilization "
+              f"{saturation['utilization']:.0%}, all busy {saturation['share_all_busy']:.0%} of the time, "
+              f"max busy {saturation['max_busy']}")
+        print(f"  Queue: mean {saturation['mean_queued']:.1f}, max {saturation['max_queued']}, wait p50 "
+              f"{saturation['queue_wait_p50_s'] * 1000:.0f} ms, p95 {saturation['queue_wait_p95_s'] * 1000:.0f} ms, "
+              f"max {saturation['queue_wait_max_s'] * 1000:.0f} ms")
+    else:
+        at_capacity = saturation['share_at_capacity']
+        print(f"\n  Outstanding requests: mean {saturation['mean_outstanding']:.1f}, max "
+              f"{saturation['max_outstanding']}"
+              + (f", >= capacity {saturation['capacity']} for {at_capacity:.0%} of the time"
+                 if at_capacity is not None else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end load test against a mock firewall')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual operators')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run after ramp-up started')
+    parser.add_argument('--ramp-up', type=float, default=10, help='Seconds until all users are running')
+    parser.add_argument('--think-time', type=float, default=3, help='Mean pause between steps (+-50%%)')
+    parser.add_argument('--terms', nargs='+', default=['youtube', 'twitch', 'youtube, twitch', 'dropbox',
+                                                       'facebook, whatsapp', 'service.io'])
+    parser.add_argument('--urls-per-submit', type=int, default=3)
+    parser.add_argument('--commit-poll', type=float, default=2, help='Seconds between commit status checks')
+    parser.add_argument('--commit-timeout', type=float, default=300)
+    parser.add_argument('--request-timeout', type=float, default=600)
+    parser.add_argument('--threads', type=int, default=config.WSGI_WORKERS * config.WSGI_THREADS,
+                        help='Request threads of the in-process app (default: workers x threads)')
+    parser.add_argument('--set', type=_setting, action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a config setting of the in-process app, e.g. ATTEMPT_WAIT_TIME=1')
+    parser.add_argument('--target', help='Base URL of a running app instead of the in-process one')
+    parser.add_argument('--capacity', type=int, help='Request threads of the --target app (saturation estimate)')
+    parser.add_argument('--mock-port', type=int, default=0, help='Port of the mock firewall (0 = any free port)')
+    parser.add_argument('--firewall-host', default='127.0.0.1', help='Hostname the users log in to')
+    parser.add_argument('--no-mock', action='store_true', help='Do not start a mock; use --firewall-host as is')
+    parser.add_argument('--mock-stats', help='/mock/stats URL of a mock started elsewhere (with --no-mock)')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--skip-calibration', action='store_true')
+    parser.add_argument('--out', help='Write the report as JSON')
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.out:
+        args.out = os.path.abspath(args.out)  # The in-process app changes the working directory
+
+    unknown = set(args.error_kinds.split(',')) - set(ERROR_KINDS) if args.error_kinds else set()
+    if unknown:
+        parser.error(f"Unknown error kind(s): {', '.join(sorted(unknown))}")
+
+    mock_server = None
+    if not args.no_mock:
+        mock_server = start_in_thread(options_from_args(args), port=args.mock_port)
+        print(f"Mock firewall on http://127.0.0.1:{mock_server.server_address[1]}/api "
+              f"({len(mock_server.firewall.logs)} log entries)")
+    firewall = Firewall(mock_server, args.mock_stats)
+
+    app_server = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+        if mock_server:
+            print(f"The target app must use PANOS_API_SCHEME=http PANOS_API_PORT={mock_server.server_address[1]}")
+    else:
+        if not mock_server:
+            parser.error('--no-mock needs --target (the in-process app talks to the in-process mock)')
+        app_server, base_url = start_app(args, mock_server.server_address[1])
+        print(f"App on {base_url} with {args.threads} request threads")
+
+    calls = {}
+    if firewall.available and not args.skip_calibration:
+        print("Calibrating firewall calls per action...")
+        calls = calibrate(args, base_url, firewall)
+
+    recorder = Recorder()
+    recorder.capacity = args.threads if app_server else (args.capacity or 0)
+    sampler = SaturationSampler(app_server) if app_server else None
+    if app_server:
+        app_server.queue_waits.clear()
+    if firewall.available:
+        firewall.reset()
+
+    print(f"Running {args.users} users for {args.duration:.0f}s (ramp-up {args.ramp_up:.0f}s, "
+          f"think time {args.think_time}s)...")
+    started = time.monotonic()
+    deadline = started + args.duration
+    users = [VirtualUser(number, args, base_url, recorder, started + args.ramp_up * number / max(args.users, 1),
+                         deadline) for number in range(1, args.users + 1)]
+    recorder.reset_window()
+    if sampler:
+        sampler.start()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join(max(0.0, deadline - time.monotonic()) + args.request_timeout + args.commit_timeout)
+    seconds = time.monotonic() - started
+    if sampler:
+        sampler.stopped.set()
+        sampler.join()
+
+    routes = route_report(recorder, seconds)
+    total_requests = sum(route['requests'] for route in routes.values())
+    report = {
+        'run': {
+            'users': args.users, 'seconds': seconds, 'think_time': args.think_time, 'threads': recorder.capacity,
+            'requests': total_requests, 'requests_per_s': total_requests / seconds,
+            'iterations': sum(user.iterations for user in users),
+            'errors': sum(route['errors'] for route in routes.values()),
+            'settings': {name: value for name, value in args.set},
+        },
+        'routes': routes,
+        'saturation': sampler.summary() if sampler else dict(recorder.window(seconds), capacity=args.capacity),
+    }
+    if firewall.available:
+        after = firewall.snapshot()
+        requests_made = after.get('requests', {})
+        user_actions = sum(recorder.actions.values())
+        report['firewall'] = {
+            'per_action': calls,
+            'requests': requests_made,
+            'total_requests': sum(requests_made.values()),
+            'user_actions': user_actions,
+            'actions': dict(recorder.actions),
+            'calls_per_action': sum(requests_made.values()) / user_actions if user_actions else 0.0,
+            'errors_injected': after.get('errors_injected', {}),
+        }
+
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if app_server:
+        app_server.shutdown()
+        app_server.server_close()
+    if mock_server:
+        mock_server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Synthetic PAN-OS URL log corpus
+Deterministic (seeded) URL filtering log entries with the URL shapes the
+search pipeline has to deal with:
+
+    host/path                      plain entries, some with a scheme
+    host:8443/path                 explicit ports
+    host/path?a=1&b=2              query strings
+    ads.net/click?r=https://host/  redirects (?r= and &r=), consent links (&gdpr_consent=)
+    host/a host2/b                 several URLs in one misc field (space, tab, newline)
+
+Domains are Zipf-distributed (a few very popular, a long tail) and the
+block-url / block-continue mix is configurable. Entries are generated and
+written one at a time, so 10M entries need no more memory than 1k.
+
+Usage:
+    python tools/log_corpus.py --entries 1000000 --format xml --out corpus.xml.gz
+    python tools/log_corpus.py --entries 1000 --format csv          # to stdout
+"""
+import argparse
+import bisect
+import csv
+import gzip
+import io
+import itertools
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import IO, Iterator, List, NamedTuple
+
+POPULAR_DOMAINS = ['youtube.com', 'ytimg.com', 'twitch.tv', 'twitchcdn.net', 'facebook.com', 'google.com',
+                   'whatsapp.com', 'dropbox.com', 'example.net', 'service.io']
+HOST_PREFIXES = ['www.', 'www.', 'www.', '', 'cdn.', 'api.', 'm.', 'i.', 'static.', 'img.', 'login.']
+WORDS = ['cloud', 'cdn', 'data', 'shop', 'news', 'mail', 'api', 'portal', 'media', 'static',
+         'secure', 'login', 'video', 'files', 'docs', 'app', 'stream', 'support', 'blog', 'maps']
+TLDS = ['com', 'com', 'com', 'net', 'org', 'de', 'io', 'co.uk', 'ch', 'at', 'tv']
+PATHS = ['/', '/', '/index.html', '/watch', '/api/v1/items', '/static/app.js', '/img/logo.png',
+         '/login', '/search', '/en-us/products/item']
+TRACKERS = ['ads.trackerhub.net/click', 'r.mailstat.com/track', 'consent.adnetwork.io/cmp', 'go.shortlnk.io/x']
+MULTI_SEPARATORS = [' ', ' ', '\t', '\n']
+CATEGORIES = ['streaming-media', 'social-networking', 'online-storage-and-backup', 'computer-and-internet-info',
+              'business-and-economy', 'unknown']
+
+CSV_COLUMNS = ['Receive Time', 'Serial #', 'Type', 'Threat/Content Type', 'Source address', 'Destination address',
+               'Rule', 'Source User', 'Application', 'Source Zone', 'Destination Zone', 'Source Port',
+               'Destination Port', 'Action', 'URL/Filename', 'Category', 'Severity', 'Direction']
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of a generated corpus; the same spec always yields the same entries"""
+    entries: int = 10000
+    seed: int = 42
+    domains: int = 20000  # Distinct registrable domains
+    zipf_s: float = 1.1  # Zipf exponent of domain popularity
+    block_continue_share: float = 0.35  # Rest is block-url
+    query_share: float = 0.25  # URLs with a query string
+    port_share: float = 0.05  # URLs with an explicit port
+    scheme_share: float = 0.05  # URLs with http(s)://
+    redirect_share: float = 0.08  # Tracker URLs pointing at the real host (?r= / &r= / &gdpr_consent=)
+    multi_url_share: float = 0.05  # misc fields holding several URLs
+    users: int = 500
+    days: int = 90  # Time span, ending at 'end'
+    end: datetime = datetime(2025, 7, 1, 12, 0, 0)
+
+
+class LogEntry(NamedTuple):
+    """One URL log entry (the columns the benchmarks and the mock firewall use)"""
+    seqno: int
+    receive_time: str
+    action: str
+    misc: str
+    src: str
+    dst: str
+    srcuser: str
+    category: str
+
+
+def make_domains(spec: CorpusSpec) -> List[str]:
+    """Domains in popularity order - the first ones are the common search terms"""
+    rng = random.Random(spec.seed)
+    domains = list(POPULAR_DOMAINS[:spec.domains])
+    seen = set(domains)
+    while len(domains) < spec.domains:
+        domain = f"{rng.choice(WORDS)}{rng.choice(WORDS)}{rng.randint(1, 99999)}.{rng.choice(TLDS)}"
+        if domain not in seen:
+            seen.add(domain)
+            domains.append(domain)
+    return domains
+
+
+def iter_entries(spec: CorpusSpec) -> Iterator[LogEntry]:
+    """Entries newest first, as the firewall returns them"""
+    rng = random.Random(spec.seed)
+    domains = make_domains(spec)
+    # Zipf weights as a cumulative table - one bisect per sample
+    cumulative = list(itertools.accumulate(1.0 / rank ** spec.zipf_s for rank in range(1, len(domains) + 1)))
+    total = cumulative[-1]
+    step = spec.days * 86400 / max(spec.entries, 1)
+    random_value = rng.random
+
+    def host():
+        domain = domains[bisect.bisect(cumulative, random_value() * total)]
+        return rng.choice(HOST_PREFIXES) + domain
+
+    def url(hostname):
+        text = hostname
+        if random_value() < spec.port_share:
+            text += rng.choice((':443', ':8080', ':8443'))
+        text += rng.choice(PATHS)
+        if random_value() < spec.query_share:
+            text += f"?id={rng.randrange(10 ** 6)}&ref={rng.choice(WORDS)}"
+        if random_value() < spec.scheme_share:
+            text = rng.choice(('https://', 'http://')) + text
+        return text
+
+    for number in range(spec.entries):
+        roll = random_value()
+        if roll < spec.redirect_share:
+            separator = rng.choice(('?r=', '&r=', '&gdpr_consent='))
+            prefix = rng.choice(TRACKERS) + ('?u=1' if separator[0] == '&' else '')
+            misc = f"{prefix}{separator}{rng.choice(('https://', ''))}{url(host())}"
+        elif roll < spec.redirect_share + spec.multi_url_share:
+            misc = rng.choice(MULTI_SEPARATORS).join(url(host()) for _ in range(rng.randint(2, 4)))
+        else:
+            misc = url(host())
+
+        stamp = spec.end - timedelta(seconds=(number + random_value()) * step)
+        user = rng.randrange(spec.users)
+        yield LogEntry(
+            seqno=number + 1,
+            receive_time=stamp.strftime('%Y/%m/%d %H:%M:%S'),
+            action='block-continue' if random_value() < spec.block_continue_share else 'block-url',
+            misc=misc,
+            src=f"10.{user // 250}.{user % 250}.{rng.randint(1, 254)}",
+            dst=f"203.0.113.{rng.randint(1, 254)}",
+            srcuser=f"corp\\user{user:04d}",
+            category=rng.choice(CATEGORIES)
+        )
+
+
+def _xml_text(value: str) -> str:
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def entry_xml(entry: LogEntry) -> str:
+    """One <entry> with the column set of a type=log URL log response"""
+    return (
+        f'<entry logid="{entry.seqno}"><domain>1</domain><receive_time>{entry.receive_time}</receive_time>'
+        f'<serial>012345678901</serial><seqno>{entry.seqno}</seqno><type>THREAT</type><subtype>url</subtype>'
+        f'<src>{entry.src}</src><dst>{entry.dst}</dst><rule>allow-web</rule>'
+        f'<srcuser>{_xml_text(entry.srcuser)}</srcuser><app>web-browsing</app><from>trust</from><to>untrust</to>'
+        f'<sport>{40000 + entry.seqno % 20000}</sport><dport>443</dport><action>{entry.action}</action>'
+        f'<misc>{_xml_text(entry.misc)}</misc><category>{entry.category}</category>'
+        f'<severity>informational</severity><direction>client-to-server</direction>'
+        f'<src-location>10.0.0.0-10.255.255.255</src-location><dst-location>United States</dst-location>'
+        f'<url_idx>1</url_idx><contenttype>text/html</contenttype></entry>'
+    )
+
+
+def iter_xml(entries: Iterator[LogEntry], count: int, job_id: str = '1', chunk_entries: int = 1000) -> Iterator[str]:
+    """type=log&action=get response for count entries, in chunks of chunk_entries"""
+    yield (f'<response status="success"><result><job><id>{job_id}</id><status>FIN</status></job>'
+           f'<log><logs count="{count}" progress="100">')
+    chunk = []
+    for entry in entries:
+        chunk.append(entry_xml(entry))
+        if len(chunk) >= chunk_entries:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    yield '</logs></log></result></response>'
+
+
+def log_response_xml(spec: CorpusSpec) -> bytes:
+    """Whole type=log response in memory (benchmark inputs up to a few 100k entries)"""
+    return ''.join(iter_xml(iter_entries(spec), spec.entries)).encode('utf-8')
+
+
+def write_xml(spec: CorpusSpec, out: IO[str]):
+    for chunk in iter_xml(iter_entries(spec), spec.entries):
+        out.write(chunk)
+
+
+def write_csv(spec: CorpusSpec, out: IO[str]):
+    """PAN-OS style URL log CSV export"""
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for entry in iter_entries(spec):
+        writer.writerow([
+            entry.receive_time, '012345678901', 'THREAT', 'url', entry.src, entry.dst, 'allow-web', entry.srcuser,
+            'web-browsing', 'trust', 'untrust', 40000 + entry.seqno % 20000, 443, entry.action, entry.misc,
+            entry.category, 'informational', 'client-to-server'
+        ])
+
+
+def _open_output(path: str) -> IO[str]:
+    if path == '-':
+        return io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='', write_through=False)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    return open(path, 'w', encoding='utf-8', newline='', buffering=1024 * 1024)
+
+
+def main():
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description='Synthetic PAN-OS URL log corpus')
+    parser.add_argument('--entries', type=int, default=defaults.entries)
+    parser.add_argument('--format', choices=['xml', 'csv'], default='xml')
+    parser.add_argument('--out', default='-', help='Output file (.gz compresses), - for stdout')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--domains', type=int, default=defaults.domains)
+    parser.add_argument('--zipf', type=float, default=defaults.zipf_s, help='Zipf exponent of domain popularity')
+    parser.add_argument('--block-continue-share', type=float, default=defaults.block_continue_share)
+    parser.add_argument('--redirect-share', type=float, default=defaults.redirect_share)
+    parser.add_argument('--multi-url-share', type=float, default=defaults.multi_url_share)
+    parser.add_argument('--days', type=int, default=defaults.days)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(
+        entries=args.entries, seed=args.seed, domains=args.domains, zipf_s=args.zipf,
+        block_continue_share=args.block_continue_share, redirect_share=args.redirect_share,
+        multi_url_share=args.multi_url_share, days=args.days
+    )
+    started = time.perf_counter()
+    out = _open_output(args.out)
+    try:
+        (write_xml if args.format == 'xml' else write_csv)(spec, out)
+    finally:
+        if args.out == '-':
+            out.flush()
+            out.detach()
+        else:
+            out.close()
+    if args.out != '-':
+        print(f"{spec.entries} entries -> {args.out} ({os.path.getsize(args.out) / 2 ** 20:.1f} MiB) "
+              f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Mock PAN-OS XML API server
+Implements the part of the XML API that PaloAltoAPI uses, so searches,
+whitelist submissions, benchmarks and load tests run on localhost without
+a firewall:
+
+    type=keygen                         API key for a configured user
+    type=version, type=op (system info) connectivity checks
+    type=log&log-type=url&query=...     log query -> async job
+    type=op <show><jobs><id>N           job status (log and commit jobs)
+    type=log&action=get&job-id=N        log job results
+    type=config action=get|edit|set     custom-url-category xpaths (shared and vsys)
+    type=commit                         commit job; one commit runs at a time
+
+Latency, job durations, injected errors and the synthetic log volume are
+configurable. GET /mock/stats returns request counters as JSON
+(POST /mock/reset clears them).
+
+Usage:
+    python tools/mock_panos.py [--port 8443] [--latency-ms 40] [--log-job-seconds 2] [--error-rate 0.01]
+    PANOS_API_SCHEME=http PANOS_API_PORT=8443 python main.py   # log in to 127.0.0.1 as admin/admin
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import ssl
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape, quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.log_corpus import TLDS, WORDS, CorpusSpec, LogEntry, entry_xml, iter_entries
+
+SHARED_CATEGORIES = "/config/shared/profiles/custom-url-category"
+VSYS_LIST = "/config/devices/entry[@name='localhost.localdomain']/vsys"
+_VSYS_CATEGORIES = re.compile(re.escape(VSYS_LIST) + r"/entry\[@name='([^']+)'\]/profiles/custom-url-category$")
+_CATEGORY = re.compile(
+    r"^(?:" + re.escape(SHARED_CATEGORIES) + "|" + re.escape(VSYS_LIST) +
+    r"/entry\[@name='(?P<vsys>[^']+)'\]/profiles/custom-url-category)/entry\[@name='(?P<name>[^']+)'\](?P<list>/list)?$"
+)
+_JOB_ID = re.compile(r"<id>\s*(\w+)\s*</id>")
+_URL_CONTAINS = re.compile(r"url contains '([^']*)'")
+_ACTION_EQ = re.compile(r"action eq '([^']*)'")
+_RECEIVE_TIME_GEQ = re.compile(r"receive_time geq '([^']*)'")
+
+ERROR_KINDS = ('http', 'api', 'slow', 'drop')
+REQUEST_TYPES = ('keygen', 'version', 'op', 'job_status', 'log_query', 'log_get',
+                 'config_get', 'config_edit', 'config_set', 'commit')
+
+DEFAULT_CATEGORIES = (('shared', 'Whitelist-Web'), ('shared', 'Whitelist-Vendors'),
+                      ('vsys1', 'Whitelist-Research'), ('vsys1', 'Whitelist-Sales'))
+
+
+@dataclass
+class MockOptions:
+    """Behaviour of the mock firewall"""
+    latency_ms: float = 20.0  # Added to every request...
+    jitter_ms: float = 10.0  # ...plus up to this much at random
+    log_job_seconds: float = 1.0  # Time until a log query job is FIN
+    commit_seconds: float = 5.0  # Duration of one commit (commits queue behind each other)
+    commit_fail_rate: float = 0.0  # Share of commits that end in FAIL
+    log_volume: int = 50000  # Synthetic URL log entries on the "firewall" (tools/log_corpus.py)
+    log_days: int = 90  # ...spread over the days up to now
+    domains: int = 2000  # Distinct domains (Zipf-distributed in the logs)
+    category_members: int = 200  # Initial members per custom URL category
+    seed: int = 1
+    error_rate: float = 0.0  # Share of requests that get an injected error
+    error_kinds: Tuple[str, ...] = ('http', 'api')  # Which errors to inject (see ERROR_KINDS)
+    error_requests: Tuple[str, ...] = ()  # Restrict injection to these request types (empty = all)
+    slow_seconds: float = 60.0  # Delay of a 'slow' error
+    users: Dict[str, str] = field(default_factory=lambda: {'admin': 'admin'})
+    accept_any_login: bool = False  # keygen succeeds for any user/password (load tests)
+
+
+class MockFirewall:
+    """State and request handling of the mock firewall (no HTTP involved)"""
+
+    def __init__(self, options: MockOptions = None):
+        self.options = options or MockOptions()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.options.seed)
+        self._keys: Dict[str, str] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._next_job = 1
+        self._commit_free_at = 0.0
+        self._dirty = False
+        self.categories: Dict[Tuple[str, str], List[str]] = {}
+        self.stats: Dict[str, int] = {}
+        self.errors_injected: Dict[str, int] = {}
+        self.logs = self._build_logs()
+        self._build_categories()
+
+    # Synthetic data
+
+    def _build_logs(self) -> List[LogEntry]:
+        """Synthetic URL log ending now, newest first"""
+        spec = CorpusSpec(entries=self.options.log_volume, seed=self.options.seed, domains=self.options.domains,
+                          days=self.options.log_days, end=datetime.now())
+        return list(iter_entries(spec))
+
+    def _build_categories(self):
+        rng = random.Random(self.options.seed + 1)
+        for context, name in DEFAULT_CATEGORIES:
+            members = {f"{rng.choice(WORDS)}{rng.randint(1, 9999)}.{rng.choice(TLDS)}/"
+                       for _ in range(self.options.category_members)}
+            self.categories[(context, name)] = sorted(members)
+
+    # Dispatch
+
+    @staticmethod
+    def request_type(params: Dict[str, str]) -> str:
+        kind = params.get('type', '')
+        if kind == 'op':
+            return 'job_status' if '<jobs>' in params.get('cmd', '') else 'op'
+        if kind == 'log':
+            return 'log_get' if params.get('action') == 'get' else 'log_query'
+        if kind == 'config':
+            return f"config_{params.get('action', 'get')}"
+        return kind
+
+    def handle(self, params: Dict[str, str]) -> Tuple[int, str]:
+        """
+        Answer one API request
+
+        Args:
+            params: Query/form parameters (first value of each)
+
+        Returns:
+            Tuple of (HTTP status, XML body)
+        """
+        request_type = self.request_type(params)
+        with self._lock:
+            self.stats[request_type] = self.stats.get(request_type, 0) + 1
+        if request_type == 'keygen':
+            return self._keygen(params)
+        if params.get('key') not in self._keys:
+            return 403, _error('Invalid credentials.', code=403)
+
+        handler = getattr(self, '_' + request_type, None)
+        if handler is None:
+            return 200, _error(f"Unsupported request type: {params.get('type', '')}", code=12)
+        return handler(params)
+
+    def injected_error(self, request_type: str) -> Optional[str]:
+        """Error kind to inject for this request, if any"""
+        options = self.options
+        if options.error_rate <= 0 or not options.error_kinds:
+            return None
+        if options.error_requests and request_type not in options.error_requests:
+            return None
+        with self._lock:
+            if self._rng.random() >= options.error_rate:
+                return None
+            kind = self._rng.choice(options.error_kinds)
+            self.errors_injected[kind] = self.errors_injected.get(kind, 0) + 1
+        return kind
+
+    def latency(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(0, self.options.jitter_ms)
+        return (self.options.latency_ms + jitter) / 1000
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': dict(self.stats),
+                'total_requests': sum(self.stats.values()),
+                'errors_injected': dict(self.errors_injected),
+                'jobs': len(self._jobs),
+                'pending_changes': self._dirty,
+                'categories': {f"{name} ({context})": len(members)
+                               for (context, name), members in self.categories.items()},
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+            self.errors_injected.clear()
+
+    # Requests
+
+    def _keygen(self, params):
+        user, password = params.get('user', ''), params.get('password', '')
+        if not self.options.accept_any_login and self.options.users.get(user) != password:
+            return 403, _error('Invalid Credential', code=403)
+        key = 'MOCK' + hashlib.sha256(f"{user}:{password}".encode()).hexdigest()[:40]
+        with self._lock:
+            self._keys[key] = user
+        return 200, f'<response status="success"><result><key>{key}</key></result></response>'
+
+    def _version(self, params):
+        return 200, ('<response status="success"><result><sw-version>10.2.4</sw-version>'
+                     '<multi-vsys>off</multi-vsys><model>PA-VM</model><serial>MOCK0001</serial></result></response>')
+
+    def _op(self, params):
+        if '<system><info>' not in params.get('cmd', '').replace(' ', ''):
+            return 200, _error('Unsupported op command', code=17)
+        return 200, ('<response status="success"><result><system><hostname>mock-fw</hostname>'
+                     '<model>PA-VM</model><sw-version>10.2.4</sw-version><serial>MOCK0001</serial>'
+                     '</system></result></response>')
+
+    def _job_status(self, params):
+        match = _JOB_ID.search(params.get('cmd', ''))
+        job = self._job(match.group(1)) if match else None
+        if job is None:
+            return 200, _error(f"job {match.group(1) if match else ''} not found", code=17)
+        status, progress, result = self._job_state(job)
+        return 200, (f'<response status="success"><result><job><id>{job["id"]}</id><type>{job["type"]}</type>'
+                     f'<status>{status}</status><result>{result}</result><progress>{progress}</progress>'
+                     f'</job></result></response>')
+
+    def _log_query(self, params):
+        if params.get('log-type') != 'url':
+            return 200, _error('Mock firewall only has URL logs', code=17)
+        try:
+            nlogs = max(1, min(int(params.get('nlogs') or 20), 5000))
+        except ValueError:
+            return 200, _error('Invalid nlogs', code=17)
+        entries = self._query_logs(params.get('query', ''), nlogs)
+        job = self._new_job('Log', self.options.log_job_seconds, entries=entries)
+        return 200, (f'<response status="success"><result><msg><line>query job enqueued with jobid {job["id"]}'
+                     f'</line></msg><job>{job["id"]}</job></result></response>')
+
+    def _log_get(self, params):
+        job = self._job(params.get('job-id', ''))
+        if job is None or job['type'] != 'Log':
+            return 200, _error(f"job {params.get('job-id', '')} not found", code=17)
+        status, progress, _ = self._job_state(job)
+        entries = job['entries'] if status == 'FIN' else []
+        parts = [f'<response status="success"><result><job><id>{job["id"]}</id><status>{status}</status></job>'
+                 f'<log><logs count="{len(entries)}" progress="{progress}">']
+        parts.extend(entry_xml(entry) for entry in entries)
+        parts.append('</logs></log></result></response>')
+        return 200, ''.join(parts)
+
+    def _config_get(self, params):
+        xpath = params.get('xpath', '')
+        with self._lock:
+            if xpath == SHARED_CATEGORIES:
+                return 200, _ok(self._category_entries('shared', 'custom-url-category'))
+            if xpath == VSYS_LIST:
+                vsys = sorted({context for context, _ in self.categories if context != 'shared'} or {'vsys1'})
+                return 200, _ok('<vsys>' + ''.join(f'<entry name={quoteattr(name)}/>' for name in vsys) + '</vsys>')
+            match = _VSYS_CATEGORIES.match(xpath)
+            if match:
+                return 200, _ok(self._category_entries(match.group(1), 'custom-url-category'))
+            match = _CATEGORY.match(xpath)
+            if match:
+                key = (match.group('vsys') or 'shared', match.group('name'))
+                members = self.categories.get(key)
+                if members is None:
+                    return 200, '<response status="success" code="7"><result/></response>'
+                body = _member_list(members)
+                return 200, _ok(body if match.group('list') else
+                                f'<entry name={quoteattr(key[1])}>{body}<type>URL List</type></entry>')
+        return 200, '<response status="success" code="7"><result/></response>'
+
+    def _config_edit(self, params):
+        return self._change_members(params, replace=True)
+
+    def _config_set(self, params):
+        return self._change_members(params, replace=False)
+
+    def _change_members(self, params, replace: bool):
+        match = _CATEGORY.match(params.get('xpath', ''))
+        if not match or not match.group('list'):
+            return 200, _error('Mock firewall only edits custom-url-category lists', code=12)
+        try:
+            element = ET.fromstring(params.get('element', ''))
+        except ET.ParseError as e:
+            return 200, _error(f"Malformed element: {e}", code=12)
+        members = [member.text.strip() for member in element.iter('member') if member.text and member.text.strip()]
+        key = (match.group('vsys') or 'shared', match.group('name'))
+        with self._lock:
+            if key not in self.categories:
+                return 200, _error('Object does not exist', code=7)
+            current = [] if replace else self.categories[key]
+            self.categories[key] = sorted(set(current) | set(members))
+            self._dirty = True
+        return 200, '<response status="success" code="20"><msg>command succeeded</msg></response>'
+
+    def _commit(self, params):
+        with self._lock:
+            if not self._dirty:
+                return 200, '<response status="success" code="19"><msg>There are no changes to commit.</msg></response>'
+            self._dirty = False
+            # One commit at a time - a new one waits for the previous to finish
+            start = max(time.monotonic(), self._commit_free_at)
+            self._commit_free_at = start + self.options.commit_seconds
+            failed = self._rng.random() < self.options.commit_fail_rate
+        job = self._new_job('Commit', self.options.commit_seconds, start=start, failed=failed)
+        return 200, (f'<response status="success" code="19"><result><msg><line>Commit job enqueued with jobid '
+                     f'{job["id"]}</line></msg><job>{job["id"]}</job></result></response>')
+
+    # Jobs and logs
+
+    def _new_job(self, job_type: str, duration: float, start: float = None, **data) -> Dict[str, Any]:
+        with self._lock:
+            job = {'id': str(self._next_job), 'type': job_type, 'start': start or time.monotonic(),
+                   'duration': duration, **data}
+            self._next_job += 1
+            self._jobs[job['id']] = job
+            self._prune_jobs()
+        return job
+
+    def _job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune_jobs(self):
+        """Forget jobs that finished more than ten minutes ago (caller holds the lock)"""
+        cutoff = time.monotonic() - 600
+        for job_id in [job_id for job_id, job in self._jobs.items() if job['start'] + job['duration'] < cutoff]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _job_state(job: Dict[str, Any]) -> Tuple[str, int, str]:
+        """(status, progress, result) of a job right now"""
+        elapsed = time.monotonic() - job['start']
+        if elapsed < 0:
+            return 'PEND', 0, 'PEND'
+        if elapsed < job['duration']:
+            return 'ACT', min(99, int(elapsed / job['duration'] * 100)), 'PEND'
+        if job.get('failed'):
+            return 'FAIL', 100, 'FAIL'
+        return 'FIN', 100, 'OK'
+
+    def _query_logs(self, query: str, nlogs: int) -> List[LogEntry]:
+        """Newest entries matching the url contains / action eq / receive_time geq parts of a query"""
+        terms = [term.lower() for term in _URL_CONTAINS.findall(query)]
+        action = _ACTION_EQ.search(query)
+        action = action.group(1) if action else None
+        since = _RECEIVE_TIME_GEQ.search(query)
+        since = since.group(1) if since else ''
+        matches = []
+        for entry in self.logs:
+            if entry.receive_time < since:
+                break  # Newest first - everything after is older
+            if action and entry.action != action:
+                continue
+            if terms:
+                misc = entry.misc.lower()
+                if not any(term in misc for term in terms):
+                    continue
+            matches.append(entry)
+            if len(matches) >= nlogs:
+                break
+        return matches
+
+    def _category_entries(self, context: str, tag: str) -> str:
+        """Category entries of one context (caller holds the lock)"""
+        entries = ''.join(
+            f'<entry name={quoteattr(name)}>{_member_list(members)}<type>URL List</type></entry>'
+            for (entry_context, name), members in sorted(self.categories.items()) if entry_context == context
+        )
+        return f'<{tag}>{entries}</{tag}>'
+
+
+def _ok(result: str) -> str:
+    return f'<response status="success"><result>{result}</result></response>'
+
+
+def _error(message: str, code: int = 13) -> str:
+    return f'<response status="error" code="{code}"><msg><line>{escape(message)}</line></msg></response>'
+
+
+def _member_list(members: List[str]) -> str:
+    return '<list>' + ''.join(f'<member>{escape(member)}</member>' for member in members) + '</list>'
+
+
+class MockPanosHandler(BaseHTTPRequestHandler):
+    """HTTP front end: latency, error injection, then MockFirewall.handle"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockPanOS/1.0'
+    firewall: MockFirewall = None  # Set on the subclass made by make_server()
+    verbose = False
+
+    def do_GET(self):
+        self._dispatch(self._query_params())
+
+    def do_POST(self):
+        params = self._query_params()
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length).decode('utf-8', 'replace')
+            params.update({key: values[0] for key, values in parse_qs(body, keep_blank_values=True).items()})
+        self._dispatch(params)
+
+    def _query_params(self) -> Dict[str, str]:
+        query = urlsplit(self.path).query
+        return {key: values[0] for key, values in parse_qs(query, keep_blank_values=True).items()}
+
+    def _dispatch(self, params: Dict[str, str]):
+        path = urlsplit(self.path).path
+        if path.startswith('/mock/'):
+            self._mock_control(path)
+            return
+        if path.rstrip('/') != '/api':
+            self._send(404, 'text/plain', 'Not found')
+            return
+
+        request_type = self.firewall.request_type(params)
+        time.sleep(self.firewall.latency())
+        error = self.firewall.injected_error(request_type)
+        if error == 'drop':
+            self.close_connection = True
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        if error == 'http':
+            self._send(503, 'text/html', '<html><body>503 Service Unavailable (mock)</body></html>')
+            return
+        if error == 'api':
+            self._send(200, 'application/xml', _error('Mock firewall: injected error', code=13))
+            return
+        if error == 'slow':
+            time.sleep(self.firewall.options.slow_seconds)
+
+        status, body = self.firewall.handle(params)
+        self._send(status, 'application/xml', body)
+
+    def _mock_control(self, path: str):
+        if path == '/mock/reset' and self.command == 'POST':
+            self.firewall.reset_stats()
+        if path in ('/mock/stats', '/mock/reset'):
+            self._send(200, 'application/json', json.dumps(self.firewall.snapshot()))
+        else:
+            self._send(404, 'text/plain', 'Not found')
+
+    def _send(self, status: int, content_type: str, body: str):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(options: MockOptions = None, host: str = '127.0.0.1', port: int = 0,
+                certfile: str = None, keyfile: str = None, verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    HTTP(S) server for a new MockFirewall; port 0 picks a free port
+
+    The firewall is available as server.firewall, the port as server.server_address[1].
+    """
+    firewall = MockFirewall(options)
+    handler = type('BoundMockPanosHandler', (MockPanosHandler,), {'firewall': firewall, 'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.firewall = firewall
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    return server
+
+
+def start_in_thread(options: MockOptions = None, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Run a mock server in a daemon thread (benchmarks, load tests); stop it with server.shutdown()"""
+    server = make_server(options, host, port)
+    threading.Thread(target=server.serve_forever, name='mock-panos', daemon=True).start()
+    return server
+
+
+def options_from_args(args) -> MockOptions:
+    users = dict(user.split(':', 1) for user in args.user) if args.user else {'admin': 'admin'}
+    return MockOptions(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, log_job_seconds=args.log_job_seconds,
+        commit_seconds=args.commit_seconds, commit_fail_rate=args.commit_fail_rate, log_volume=args.log_volume,
+        log_days=args.log_days, domains=args.domains, category_members=args.category_members, seed=args.seed,
+        error_rate=args.error_rate, error_kinds=tuple(args.error_kinds.split(',')) if args.error_kinds else (),
+        error_requests=tuple(args.error_requests.split(',')) if args.error_requests else (),
+        slow_seconds=args.slow_seconds, users=users, accept_any_login=args.any_login
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Mock firewall options (shared with the load test)"""
+    defaults = MockOptions()
+    group = parser.add_argument_group('mock firewall')
+    group.add_argument('--latency-ms', type=float, default=defaults.latency_ms)
+    group.add_argument('--jitter-ms', type=float, default=defaults.jitter_ms)
+    group.add_argument('--log-job-seconds', type=float, default=defaults.log_job_seconds)
+    group.add_argument('--commit-seconds', type=float, default=defaults.commit_seconds)
+    group.add_argument('--commit-fail-rate', type=float, default=defaults.commit_fail_rate)
+    group.add_argument('--log-volume', type=int, default=defaults.log_volume, help='Synthetic URL log entries')
+    group.add_argument('--log-days', type=int, default=defaults.log_days)
+    group.add_argument('--domains', type=int, default=defaults.domains)
+    group.add_argument('--category-members', type=int, default=defaults.category_members)
+    group.add_argument('--seed', type=int, default=defaults.seed)
+    group.add_argument('--error-rate', type=float, default=defaults.error_rate, help='Share of requests failing')
+    group.add_argument('--error-kinds', default=','.join(defaults.error_kinds),
+                       help=f"Comma separated: {', '.join(ERROR_KINDS)}")
+    group.add_argument('--error-requests', default='',
+                       help=f"Only inject into these request types: {', '.join(REQUEST_TYPES)}")
+    group.add_argument('--slow-seconds', type=float, default=defaults.slow_seconds)
+    group.add_argument('--user', action='append', help='user:password (repeatable, default admin:admin)')
+    group.add_argument('--any-login', action='store_true', help='Accept any user and password')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock PAN-OS XML API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--cert', help='Serve HTTPS with this certificate (PEM)')
+    parser.add_argument('--key', help='Private key for --cert')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    unknown = set(args.error_kinds.split(',')) - set(ERROR_KINDS) if args.error_kinds else set()
+    if unknown:
+        parser.error(f"Unknown error kind(s): {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    server = make_server(options_from_args(args), args.host, args.port, args.cert, args.key, args.verbose)
+    scheme = 'https' if args.cert else 'http'
+    print(f"Mock PAN-OS on {scheme}://{args.host}:{server.server_address[1]}/api "
+          f"({len(server.firewall.logs)} log entries, {len(server.firewall.categories)} categories, "
+          f"ready in {time.perf_counter() - started:.1f}s)")
+    print(f"Run the app with PANOS_API_SCHEME={scheme} PANOS_API_PORT={server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
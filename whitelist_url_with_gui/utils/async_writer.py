@@ -0,0 +1,162 @@
+"""
+Background file writer
+Request threads hand finished file contents to a queue and return; one
+writer thread per process drains the queue in batches, so a burst of
+submissions neither waits for the disk nor serializes on a file handle.
+
+Durability (fsync policy):
+    always - fsync every file as soon as it is written
+    batch  - write the whole batch, then fsync its files and directories
+    never  - leave write-back to the operating system
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+
+class _Flush:
+    """Queue marker: set once every job queued before it has been written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class AsyncFileWriter:
+    """
+    Queue of file jobs written by a single background thread
+
+    A job is a callable taking no arguments that writes one file and
+    returns its path (or None). Jobs run in the order they were submitted.
+    The thread starts on first use and again after a fork, since threads
+    do not survive into gunicorn workers.
+    """
+
+    def __init__(self, fsync: str = 'batch', batch_size: int = 64, name: str = 'async-file-writer'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync} (expected one of {', '.join(FSYNC_POLICIES)})")
+        self.fsync = fsync
+        self.batch_size = max(1, batch_size)
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def submit(self, job: Callable[[], Optional[str]]):
+        """Queue a write job and return immediately"""
+        self._ensure_started().put(job)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until everything submitted so far is written (and synced per policy)
+
+        Returns:
+            False if the timeout expired first
+        """
+        if not self._running():
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float = None):
+        """Write out the queue and stop the thread"""
+        with self._lock:
+            if not self._running():
+                return
+            self._queue.put(_STOP)
+            thread = self._thread
+            self._thread = None
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning("%s did not finish writing within %ss", self.name, timeout)
+
+    def _running(self) -> bool:
+        return self._thread is not None and self._pid == os.getpid()
+
+    def _ensure_started(self) -> queue.SimpleQueue:
+        if self._running():
+            return self._queue
+        with self._lock:
+            if not self._running():
+                # After a fork the parent's thread is gone - start over with an empty queue
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True)
+                self._thread.start()
+        return self._queue
+
+    def _run(self, jobs: queue.SimpleQueue):
+        while True:
+            batch = [jobs.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if self._write_batch(batch):
+                return
+
+    def _write_batch(self, batch) -> bool:
+        """Run one batch of jobs; True if the stop marker was part of it"""
+        written = []
+        markers = []
+        stop = False
+        for job in batch:
+            if job is _STOP:
+                stop = True
+            elif isinstance(job, _Flush):
+                markers.append(job)
+            else:
+                try:
+                    path = job()
+                except Exception as e:
+                    logger.error("Background file write failed: %s", e, exc_info=True)
+                    continue
+                if path:
+                    if self.fsync == 'always':
+                        _fsync_paths([path])
+                    else:
+                        written.append(path)
+
+        if self.fsync == 'batch' and written:
+            _fsync_paths(written)
+        # Flush markers are released only after the jobs ahead of them are on disk
+        for marker in markers:
+            marker.done.set()
+        return stop
+
+
+def _fsync_paths(paths):
+    """fsync each file, then each containing directory once (new directory entries)"""
+    directories = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            directories.add(os.path.dirname(os.path.abspath(path)))
+        except OSError as e:
+            logger.warning("fsync of %s failed: %s", path, e)
+    for directory in directories:
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass  # Not supported on every platform/filesystem
@@ -0,0 +1,120 @@
+"""
+Category coverage index
+Tells which URLs are already covered by the current members of a custom URL
+category - exactly or through a '*.domain' wildcard entry
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+COVERED = 'covered'
+COVERED_BY_WILDCARD = 'covered_by_wildcard'
+NEW = 'new'
+
+# Marks a trie node where a '*.x' wildcard entry ends; value is (member, open_ended)
+# where open_ended means the member has no trailing '/' and so also matches
+# anything that merely starts with the host
+_WILDCARD = None
+
+# Where the host of an entry ends: path or port
+_HOST_END = re.compile(r'[/:]')
+
+
+def _normalize(entry: str) -> str:
+    entry = (entry or '').strip().lower()
+    if entry.startswith(('http://', 'https://')):
+        entry = entry.split('://', 1)[1]
+    return entry
+
+
+class CategoryCoverageIndex:
+    """
+    Coverage lookups against one category's member list
+
+    Exact members live in a set. Wildcard members ('*.foo.com' or
+    '*.foo.com/') live in a trie keyed by reversed labels, so a lookup
+    costs O(labels) no matter how many members the category has.
+    """
+
+    def __init__(self, members: Iterable[str]):
+        self.members = set()
+        self.wildcards: Dict[Any, Any] = {}
+        self.wildcard_count = 0
+        for member in members:
+            self.add(member)
+
+    def add(self, member: str):
+        """Index one category member"""
+        entry = _normalize(member)
+        if not entry:
+            return
+        self.members.add(entry)
+
+        if entry.startswith('*.'):
+            base = entry[2:]
+            open_ended = not base.endswith('/')
+            if not open_ended:
+                base = base[:-1]
+            # Only host-wide wildcards cover other hosts
+            if base and '/' not in base and '*' not in base:
+                node = self.wildcards
+                for label in reversed(base.split('.')):
+                    node = node.setdefault(label, {})
+                current = node.get(_WILDCARD)
+                if current is None or (open_ended and not current[1]):
+                    node[_WILDCARD] = (member, open_ended)
+                self.wildcard_count += 1
+
+    def classify(self, url: str) -> Dict[str, Optional[str]]:
+        """
+        Classify a domain or whitelist entry
+
+        Args:
+            url: Found domain ('a.foo.com') or entry ('a.foo.com/', '*.foo.com/')
+
+        Returns:
+            {'status': covered | covered_by_wildcard | new, 'covered_by': member or None}
+        """
+        entry = _normalize(url)
+        if not entry:
+            return {'status': NEW, 'covered_by': None}
+
+        if entry in self.members:
+            return {'status': COVERED, 'covered_by': entry}
+
+        # 'foo.com' (no slash) already matches everything starting with it - 'foo.com/', 'foo.com/x', 'foo.com:8080/'
+        prefix = _HOST_END.split(entry, 1)[0]
+        if prefix != entry and prefix in self.members:
+            return {'status': COVERED, 'covered_by': prefix}
+
+        is_wildcard = entry.startswith('*.')
+        host = entry[2:] if is_wildcard else entry
+        # A wildcard without '/' reaches beyond host boundaries - only an equally open wildcard covers it
+        needs_open_ended = is_wildcard and '/' not in host
+        host, _, port = host.split('/')[0].partition(':')
+        # 'a.foo.com:8080/' starts with 'a.foo.com' but not with 'a.foo.com/'
+        needs_open_ended = needs_open_ended or bool(port)
+        if not host:
+            return {'status': NEW, 'covered_by': None}
+
+        labels = host.split('.')
+        node = self.wildcards
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.get(label)
+            if node is None:
+                break
+            wildcard = node.get(_WILDCARD)
+            # '*.foo.com' covers hosts below foo.com and narrower wildcards, not foo.com itself
+            if wildcard is not None and (depth < len(labels) or is_wildcard):
+                wildcard_member, open_ended = wildcard
+                if open_ended or not needs_open_ended:
+                    return {'status': COVERED_BY_WILDCARD, 'covered_by': wildcard_member}
+
+        return {'status': NEW, 'covered_by': None}
+
+    def classify_many(self, urls: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        """Classify several URLs, keyed by the URL as given"""
+        return {url: self.classify(url) for url in urls}
+
+    def uncovered(self, urls: Iterable[str]) -> List[str]:
+        """URLs that are not covered by any member, in input order"""
+        return [url for url in urls if self.classify(url)['status'] == NEW]
@@ -0,0 +1,109 @@
+"""
+Batch domain extraction
+Extracts exact domains from many log URLs in one pass, producing the same
+output as SearchService._extract_exact_domain for every input
+"""
+import re
+from typing import Dict, Iterable, List, Optional
+
+from config import config
+
+# Everything after the first '://' (if any), up to the first '/', ':', '?' or '&'
+_HOST_PREFIX = re.compile(r'(?:.*?://)?([^/:?&]*)', re.DOTALL)
+_PART_HOST_PREFIX = re.compile(r'[^/:?&]*')
+
+
+class DomainExtractor:
+    """
+    Domain extractor bound to one set of search terms
+
+    Log results repeat the same URLs many times, so every distinct URL is
+    resolved once and remembered for the lifetime of the extractor.
+    """
+
+    def __init__(self, search_terms: List[str]):
+        self.terms = [term.lower() for term in search_terms]
+        self.separators = list(config.URL_SEPARATORS)
+        self.min_domain_length = config.MIN_DOMAIN_LENGTH
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def extract(self, url_text: str) -> Optional[str]:
+        """Extract the domain for a single URL (memoized)"""
+        try:
+            return self._cache[url_text]
+        except KeyError:
+            domain = self._extract_uncached(url_text)
+            self._cache[url_text] = domain
+            return domain
+
+    def extract_many(self, url_texts: Iterable[str]) -> List[Optional[str]]:
+        """
+        Extract domains for a batch of URLs
+
+        Args:
+            url_texts: URL strings (None/empty entries yield None)
+
+        Returns:
+            List of domains aligned with the input, None where nothing matched
+        """
+        cache = self._cache
+        compute = self._extract_uncached
+        domains = []
+        append = domains.append
+        for url_text in url_texts:
+            if not url_text:
+                append(None)
+                continue
+            domain = cache.get(url_text, cache)
+            if domain is cache:
+                domain = compute(url_text)
+                cache[url_text] = domain
+            append(domain)
+        return domains
+
+    def _contains_any_term(self, text_lower: str) -> bool:
+        for term in self.terms:
+            if term in text_lower:
+                return True
+        return False
+
+    def _extract_uncached(self, url_text: str) -> Optional[str]:
+        url_lower = url_text.lower()
+
+        # Neither the host nor any separated part can match without a term in the URL
+        if not self._contains_any_term(url_lower):
+            return None
+
+        # Method 1: host of the whole field
+        exact_domain = _HOST_PREFIX.match(url_text).group(1).strip().lower()
+        if exact_domain and '.' in exact_domain and self._contains_any_term(exact_domain):
+            return exact_domain
+
+        # Method 2: several URLs in one field - only the first separator present is tried
+        for separator in self.separators:
+            if separator in url_text:
+                for part in url_text.split(separator):
+                    part = part.strip()
+                    if part and self._contains_any_term(part.lower()):
+                        if '://' in part:
+                            part = part.split('://', 1)[1]
+                        domain = _PART_HOST_PREFIX.match(part).group(0).strip().lower()
+                        if domain and '.' in domain and len(domain) > self.min_domain_length:
+                            return domain
+                break
+
+        return None
+
+
+def extract_domains(url_texts: Iterable[str], search_terms: List[str]) -> List[Optional[str]]:
+    """
+    Extract exact domains for a batch of URLs
+
+    Args:
+        url_texts: URL strings from log entries
+        search_terms: Parsed search terms
+
+    Returns:
+        List of domains aligned with url_texts, None where nothing matched
+    """
+    return DomainExtractor(search_terms).extract_many(url_texts)
@@ -0,0 +1,47 @@
+"""
+Queue logging helpers
+The stock QueueHandler formats every record on the calling thread so that
+mutable arguments cannot change before the listener writes them. Records
+whose arguments cannot change are handed over unformatted instead, which
+moves the message formatting (and JSON encoding of LogData) to the
+listener thread.
+"""
+import json
+import logging
+from logging.handlers import QueueHandler
+
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+class LogData:
+    """
+    Structured log payload, JSON encoded only when the record is written
+
+    The dict must not be modified after it is logged - callers build a
+    fresh one for each message.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting of safe records to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info or record.stack_info or not isinstance(record.msg, str) or not _is_safe(record.args):
+            return super().prepare(record)
+        return record
+
+
+def _is_safe(args) -> bool:
+    if not args:
+        return True
+    if isinstance(args, dict):
+        args = args.values()
+    return all(isinstance(arg, _IMMUTABLE_TYPES) or isinstance(arg, LogData) for arg in args)
@@ -0,0 +1,148 @@
+"""
+Log file rotation
+Rotates a log file when it reaches a size limit or when the rotation
+interval ends, whichever comes first, and gzips the rotated files
+(app.log -> app.log.2025-07-27_00-00-01.gz; the newest rotated file is
+compressed at the following rotation).
+
+Every gunicorn worker has its own handler on the same file. Rotation is
+done under an flock by whichever worker gets there first; the others
+notice that the file was replaced (different inode) and reopen it instead
+of rotating it a second time.
+"""
+import gzip
+import os
+import shutil
+import time
+from logging.handlers import TimedRotatingFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows - single process development server only
+    fcntl = None
+
+
+class SizeAndTimeRotatingFileHandler(TimedRotatingFileHandler):
+    """Rotate at max_bytes or at the end of each 'when' interval; keep backup_count files"""
+
+    def __init__(self, filename: str, max_bytes: int = 0, when: str = 'midnight',
+                 backup_count: int = 0, compress: bool = True, encoding: str = 'utf-8'):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.lock_file = self.baseFilename + '.lock'
+
+    def shouldRollover(self, record) -> bool:
+        if self._replaced_elsewhere():
+            self._close_stream()  # emit() reopens the new file
+            if time.time() >= self.rolloverAt:
+                # The other worker rotated for this interval - the reopened file must not be rotated again
+                self.rolloverAt = self.computeRollover(int(time.time()))
+            return False
+        if time.time() >= self.rolloverAt:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            # Cheap check first; the formatted record only matters near the limit
+            position = self.stream.tell()
+            if position >= self.max_bytes:
+                return True
+            return position + len(self.format(record)) + 1 >= self.max_bytes
+        return False
+
+    def doRollover(self):
+        self._close_stream()
+        if fcntl is None:
+            self._rotate()
+            return
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not self._rotated_since_open() and not self._rotated_for_interval():
+                    self._rotate()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.rolloverAt = self.computeRollover(int(time.time()))
+
+    def _rotate(self):
+        if not os.path.exists(self.baseFilename) or os.path.getsize(self.baseFilename) == 0:
+            return
+        dest = f"{self.baseFilename}.{time.strftime('%Y-%m-%d_%H-%M-%S')}"
+        counter = 0
+        while os.path.exists(dest) or os.path.exists(dest + '.gz'):
+            counter += 1
+            dest = f"{dest.rsplit('~', 1)[0]}~{counter}"
+        # Move first so writers in other workers switch to a fresh file at once
+        os.replace(self.baseFilename, dest)
+        if self.compress:
+            # A worker that checked the inode just before the move may still
+            # append to dest, so it is compressed at the next rotation instead
+            for path in self._rotated_files():
+                if path != dest and not path.endswith('.gz'):
+                    _gzip_file(path)
+        self._delete_old_files()
+
+    def _rotated_files(self):
+        """Rotated files of this log, oldest first"""
+        directory, base = os.path.split(self.baseFilename)
+        return sorted(
+            os.path.join(directory, name) for name in os.listdir(directory or '.')
+            if name.startswith(base + '.') and name[len(base) + 1:len(base) + 2].isdigit()
+        )
+
+    def _delete_old_files(self):
+        if self.backupCount <= 0:
+            return
+        for path in self._rotated_files()[:-self.backupCount]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Removed by another worker
+
+    def _rotated_since_open(self) -> bool:
+        """True if another worker rotated the file after our size/time check"""
+        opened_ino = getattr(self, '_opened_ino', None)
+        try:
+            return opened_ino is not None and os.stat(self.baseFilename).st_ino != opened_ino
+        except FileNotFoundError:
+            return True
+
+    def _rotated_for_interval(self) -> bool:
+        """
+        True if the due interval rotation was already done by another worker
+
+        Covers handlers that had not opened the file yet (no inode to compare):
+        a file created after the interval boundary belongs to the new interval.
+        """
+        if time.time() < self.rolloverAt:
+            return False  # Size-based rollover
+        try:
+            stat = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        if self.max_bytes > 0 and stat.st_size >= self.max_bytes:
+            return False
+        return stat.st_ctime >= self.rolloverAt
+
+    def _open(self):
+        stream = super()._open()
+        self._opened_ino = os.fstat(stream.fileno()).st_ino
+        return stream
+
+    def _replaced_elsewhere(self) -> bool:
+        if self.stream is None:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_ino != self._opened_ino
+        except FileNotFoundError:
+            return True
+
+    def _close_stream(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def _gzip_file(path: str):
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as out:
+        shutil.copyfileobj(src, out)
+    os.remove(path)
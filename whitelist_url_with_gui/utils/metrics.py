@@ -0,0 +1,415 @@
+"""
+Metrics registry
+Counters, gauges and histograms exported in the Prometheus text exposition
+format at /metrics
+
+Recording a value is one lock and an addition; everything else (sorting,
+cumulative buckets, formatting) happens only when /metrics is scraped.
+Under gunicorn every worker has its own registry and drops a snapshot into
+config.METRICS_MULTIPROCESS_DIR - from a timer thread, at exit, and before
+it answers a scrape. A scrape is rendered from the snapshot files only, so
+whichever worker gets it reports the same (never decreasing) totals.
+"""
+import bisect
+import json
+import logging
+import atexit
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import config
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_upper_bounds', 'counts', 'sum')
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self._lock = threading.Lock()
+        self._upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> '_Timer':
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return {'counts': list(self.counts), 'sum': self.sum}
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Metric:
+    """A named metric family with optional labels"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> object:
+        """Child for one combination of label values"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def snapshot(self) -> List[Tuple[Tuple[str, ...], object]]:
+        return [(key, child.snapshot()) for key, child in list(self._children.items())]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self, snapshot_dir: Optional[str] = None, flush_interval: float = 10, pid: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self.snapshot_dir = snapshot_dir
+        self.flush_interval = flush_interval
+        self.pid = pid  # Process the snapshot is filed under (default: this one)
+        self._last_flush = 0.0
+        self._flusher_pid = None
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Plain-data copy of all values (JSON serializable)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                'kind': metric.kind,
+                'help': metric.documentation,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': [[list(key), value] for key, value in metric.snapshot()]
+            }
+            for metric in metrics
+        }
+
+    def _snapshot_pid(self) -> int:
+        return self.pid or os.getpid()
+
+    def flush(self):
+        """Write this process' snapshot for the other workers"""
+        if not self.snapshot_dir:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            path = os.path.join(self.snapshot_dir, f"{self._snapshot_pid()}.json")
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning("Metrics snapshot failed: %s", e)
+
+    def maybe_flush(self):
+        """Write this process' snapshot if it is due (cheap otherwise); starts the flush timer"""
+        if not self.snapshot_dir:
+            return
+        if self._flusher_pid != os.getpid():
+            self.start_flusher()
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def start_flusher(self):
+        """
+        Flush every flush_interval from a daemon thread and once more at exit
+
+        An idle worker's last increments still reach the other workers.
+        Started per process - threads do not survive a fork.
+        """
+        with self._lock:
+            if not self.snapshot_dir or self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='metrics-flusher', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _snapshots(self) -> List[Tuple[Dict[str, dict], bool]]:
+        """Snapshots of all processes, with whether that process is still alive"""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        snapshots = []
+        for filename in os.listdir(self.snapshot_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.snapshot_dir, filename), 'r', encoding='utf-8') as f:
+                    snapshots.append((json.load(f), _pid_alive(int(filename[:-5]))))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        if self.snapshot_dir:
+            # Own values through the file too - every worker computes the totals the same way
+            self.flush()
+            merged = {}
+            for snapshot, alive in self._snapshots():
+                _merge_snapshot(merged, snapshot, include_gauges=alive)
+        else:
+            merged = self.snapshot()
+
+        lines = []
+        for name in sorted(merged):
+            family = merged[name]
+            lines.append(f"# HELP {name} {_escape_help(family['help'])}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            labelnames = family['labelnames']
+            for key, value in sorted(family['samples'], key=lambda sample: sample[0]):
+                labels = list(zip(labelnames, key))
+                if family['kind'] == 'histogram':
+                    cumulative = 0
+                    bounds = [_format_value(bound) for bound in family['buckets']] + ['+Inf']
+                    for bound, count in zip(bounds, value['counts']):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_snapshot(target: Dict[str, dict], snapshot: Dict[str, dict], include_gauges: bool):
+    for name, family in snapshot.items():
+        # Gauges of workers that exited describe nothing anymore; their counters still count
+        if family['kind'] == 'gauge' and not include_gauges:
+            continue
+        current = target.setdefault(name, {**family, 'samples': []})
+        if current['kind'] != family['kind']:
+            continue
+        samples = {tuple(key): value for key, value in current['samples']}
+        for key, value in family['samples']:
+            key = tuple(key)
+            existing = samples.get(key)
+            if existing is None:
+                samples[key] = value
+            elif family['kind'] == 'histogram':
+                samples[key] = {
+                    'counts': [a + b for a, b in zip(existing['counts'], value['counts'])],
+                    'sum': existing['sum'] + value['sum']
+                }
+            else:
+                samples[key] = existing + value
+        current['samples'] = [[list(key), value] for key, value in samples.items()]
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(str(value))}"' for name, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def clear_snapshot_dir(path: str):
+    """Remove snapshots of a previous server run (call once in the master before forking)"""
+    if not path or not os.path.isdir(path):
+        return
+    for filename in os.listdir(path):
+        if filename.endswith(('.json', '.tmp')):
+            try:
+                os.remove(os.path.join(path, filename))
+            except OSError:
+                pass
+
+
+# Process-wide registry and the application's metrics
+registry = MetricsRegistry(config.METRICS_MULTIPROCESS_DIR, config.METRICS_FLUSH_SECONDS)
+
+API_REQUEST_SECONDS = registry.histogram(
+    'palo_alto_api_request_seconds', 'Latency of firewall XML API calls', ['api_type'])
+API_ERRORS = registry.counter(
+    'palo_alto_api_errors_total', 'Failed firewall XML API calls', ['api_type', 'reason'])
+
+LOG_JOB_SECONDS = registry.histogram(
+    'log_job_duration_seconds', 'Time from first status check until a log job ended', ['outcome'])
+LOG_JOB_POLLS = registry.histogram(
+    'log_job_polls', 'Status checks needed per log job', ['outcome'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34))
+LOG_ENTRIES_PARSED = registry.counter(
+    'log_entries_parsed_total', 'URL log entries parsed from firewall responses')
+LOG_PARSE_SECONDS = registry.counter(
+    'log_parse_seconds_total', 'Time spent parsing log responses (entries/s = rate of entries / rate of this)')
+
+SEARCH_SECONDS = registry.histogram(
+    'search_duration_seconds', 'Duration of dual-action searches', ['outcome'])
+SEARCH_PHASE_SECONDS = registry.histogram(
+    'search_phase_seconds', 'Time spent per search phase', ['phase'])
+SEARCHES_COALESCED = registry.counter(
+    'searches_coalesced_total', 'Searches answered by attaching to an identical in-flight search')
+
+COMMIT_SECONDS = registry.histogram(
+    'commit_duration_seconds', 'Time from commit request until the final job status', ['status'])
+
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Shared cache lookups', ['cache', 'result'])
@@ -0,0 +1,218 @@
+"""
+Public suffix lookups
+Finds the registrable domain (eTLD+1) of a host using the Public Suffix List
+bundled in data/public_suffix_list.dat - no network access needed
+"""
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import config
+
+# Node keys: child labels map to child nodes, _RULE marks the end of a rule
+_RULE = None
+_NORMAL = 1
+_EXCEPTION = 2
+
+# Most rules end in a leaf, so leaves are shared instead of one dict per rule
+_NORMAL_LEAF = {_RULE: _NORMAL}
+_EXCEPTION_LEAF = {_RULE: _EXCEPTION}
+
+
+def _punycode_label(label: str) -> Optional[str]:
+    """ASCII form of a unicode rule label as it appears in log hostnames"""
+    try:
+        return 'xn--' + label.encode('punycode').decode('ascii')
+    except UnicodeError:
+        return None
+
+
+class PublicSuffixTrie:
+    """
+    Reversed-label trie of Public Suffix List rules
+
+    Lookups walk one node per label of the host, so they cost O(labels)
+    regardless of the number of rules.
+    """
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self.root: Dict[Any, Any] = {}
+        self.rule_count = 0
+        for rule in rules:
+            self.add_rule(rule)
+
+    @classmethod
+    def from_file(cls, path: str, include_private: bool = True) -> 'PublicSuffixTrie':
+        """Load rules from a public_suffix_list.dat file"""
+        trie = cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('//'):
+                    if not include_private and 'BEGIN PRIVATE DOMAINS' in line:
+                        break
+                    continue
+                # Rules end at the first whitespace
+                trie.add_rule(line.split()[0])
+        return trie
+
+    def add_rule(self, rule: str):
+        """Insert one rule (e.g. 'co.uk', '*.ck', '!www.ck')"""
+        rule = rule.strip().lower()
+        kind = _NORMAL
+        if rule.startswith('!'):
+            kind = _EXCEPTION
+            rule = rule[1:]
+        if not rule:
+            return
+
+        labels = rule.split('.')
+        self._insert(list(reversed(labels)), kind)
+        if not rule.isascii():
+            ascii_labels = [label if label.isascii() else _punycode_label(label) for label in labels]
+            if all(ascii_labels):
+                self._insert(list(reversed(ascii_labels)), kind)
+        self.rule_count += 1
+
+    def _insert(self, reversed_labels: List[str], kind: int):
+        node = self.root
+        last = len(reversed_labels) - 1
+        for i, label in enumerate(reversed_labels):
+            label = sys.intern(label)
+            child = node.get(label)
+            if i == last:
+                if child is None:
+                    node[label] = _EXCEPTION_LEAF if kind == _EXCEPTION else _NORMAL_LEAF
+                else:
+                    if child is _NORMAL_LEAF or child is _EXCEPTION_LEAF:
+                        child = node[label] = dict(child)
+                    child[_RULE] = kind
+            else:
+                if child is None:
+                    child = node[label] = {}
+                elif child is _NORMAL_LEAF or child is _EXCEPTION_LEAF:
+                    child = node[label] = dict(child)
+                node = child
+
+    def public_suffix_length(self, labels: List[str]) -> int:
+        """
+        Number of trailing labels forming the public suffix
+
+        Args:
+            labels: Host labels in normal order (lowercase)
+
+        Returns:
+            Label count of the public suffix (the implicit '*' rule gives 1)
+        """
+        node = self.root
+        length = 1
+        depth = 0
+        for label in reversed(labels):
+            depth += 1
+            child = node.get(label)
+            wildcard = node.get('*')
+            if child is not None:
+                kind = child.get(_RULE)
+                if kind == _EXCEPTION:
+                    return depth - 1
+                if kind == _NORMAL or wildcard is not None:
+                    length = depth
+                node = child
+            elif wildcard is not None:
+                length = depth
+                node = wildcard
+            else:
+                break
+        return length
+
+    def public_suffix(self, domain: str) -> Optional[str]:
+        """Public suffix of a host, e.g. 'co.uk' for 'a.b.co.uk'"""
+        labels = _split_host(domain)
+        if not labels:
+            return None
+        return '.'.join(labels[-self.public_suffix_length(labels):])
+
+    def registrable_domain(self, domain: str) -> Optional[str]:
+        """
+        Registrable domain of a host, e.g. 'b.co.uk' for 'a.b.co.uk'
+
+        Returns:
+            The registrable domain, or None if the host is itself a public suffix
+        """
+        labels = _split_host(domain)
+        if not labels:
+            return None
+        suffix_length = self.public_suffix_length(labels)
+        if len(labels) <= suffix_length:
+            return None
+        return '.'.join(labels[-(suffix_length + 1):])
+
+
+def _split_host(domain: str) -> List[str]:
+    host = (domain or '').strip().lower()
+    if host.startswith('*.'):
+        host = host[2:]
+    host = host.split('/')[0].rstrip('.')
+    if not host:
+        return []
+    labels = host.split('.')
+    return [] if '' in labels else labels
+
+
+_trie: Optional[PublicSuffixTrie] = None
+_trie_lock = threading.Lock()
+
+
+def get_public_suffix_trie() -> PublicSuffixTrie:
+    """Shared trie, loaded from the bundled list on first use"""
+    global _trie
+    if _trie is None:
+        with _trie_lock:
+            if _trie is None:
+                _trie = PublicSuffixTrie.from_file(
+                    config.PUBLIC_SUFFIX_LIST_FILE,
+                    include_private=config.PUBLIC_SUFFIX_INCLUDE_PRIVATE
+                )
+    return _trie
+
+
+def get_registrable_domain(domain: str) -> Optional[str]:
+    """Registrable domain of a host using the bundled Public Suffix List"""
+    return get_public_suffix_trie().registrable_domain(domain)
+
+
+def group_by_registrable_domain(domains: Iterable[str], min_group_size: int = None) -> List[Dict[str, Any]]:
+    """
+    Group hosts under their registrable domain and suggest one wildcard each
+
+    Args:
+        domains: Hosts in display order (e.g. ranked by hits)
+        min_group_size: Smallest number of hosts worth a suggestion
+
+    Returns:
+        List of {'registrable_domain', 'domains', 'suggested_wildcard'} dicts,
+        largest groups first; hosts keep their input order within a group
+    """
+    if min_group_size is None:
+        min_group_size = config.DOMAIN_GROUP_MIN_SIZE
+
+    trie = get_public_suffix_trie()
+    groups: Dict[str, List[str]] = {}
+    for domain in domains:
+        registrable = trie.registrable_domain(domain)
+        if registrable:
+            groups.setdefault(registrable, []).append(domain)
+
+    result = [
+        {
+            'registrable_domain': registrable,
+            'domains': members,
+            'suggested_wildcard': f"*.{registrable}/"
+        }
+        for registrable, members in groups.items()
+        if len(members) >= min_group_size
+    ]
+    result.sort(key=lambda group: (-len(group['domains']), group['registrable_domain']))
+    return result
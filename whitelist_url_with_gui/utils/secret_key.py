@@ -0,0 +1,49 @@
+"""
+Persistent Flask secret key
+Every worker process must sign sessions with the same key, so the key is
+created once on disk and shared instead of generated per process
+"""
+import os
+import secrets
+import time
+
+
+def load_or_create_secret_key(path: str) -> bytes:
+    """
+    Read the secret key from path, creating it on first use
+
+    Creation uses O_EXCL, so when several workers start at the same time
+    exactly one of them writes the key and the others read it.
+
+    Args:
+        path: Key file location
+
+    Returns:
+        Secret key bytes
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _read_key(path)
+
+    key = secrets.token_hex(32).encode('ascii')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+        f.flush()
+        os.fsync(f.fileno())
+    return key
+
+
+def _read_key(path: str) -> bytes:
+    # Another worker may have created the file but not written it yet
+    for _ in range(50):
+        with open(path, 'rb') as f:
+            key = f.read().strip()
+        if key:
+            return key
+        time.sleep(0.1)
+    raise RuntimeError(f"Secret key file {path} is empty")
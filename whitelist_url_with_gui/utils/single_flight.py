@@ -0,0 +1,184 @@
+"""
+Single-flight call coalescing
+Concurrent callers asking for the same key share one execution and its result
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """An in-flight call that later callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent executions of the same work.
+
+    While a call for a key is running, any further call with the same key
+    blocks until it finishes and receives the same result (or exception)
+    instead of running the function again. Nothing is cached once the
+    call has completed - the next call for that key starts fresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key across concurrent callers
+
+        Args:
+            key: Normalized key identifying the work
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            Tuple of (result, shared) - shared is True if this caller
+            attached to a call started by someone else
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+
+class SharedCallError(Exception):
+    """The call another process was running for this key failed"""
+    pass
+
+
+class SharedSingleFlight:
+    """
+    Single-flight across worker processes through a shared StateStore
+
+    Inside a process callers are coalesced by a plain SingleFlight. Between
+    processes the first caller takes a lease on the key (StateStore.add)
+    and runs the work; callers in other processes wait for the lease to go
+    away and read the result the leader published under its lease token.
+    The result is kept only briefly for those waiters - it is not a cache,
+    a caller arriving after the leader finished starts a new call.
+
+    The lease is short and the leader renews it every third of
+    lease_seconds while the work runs, so a long search keeps its lease,
+    and if the leader process dies the heartbeat stops, the lease expires
+    within lease_seconds and one of the waiters takes over.
+    """
+
+    def __init__(self, store, namespace: str, lease_seconds: float, result_seconds: float = 60,
+                 poll_interval: float = 0.5,
+                 encode: Callable[[Any], Any] = None, decode: Callable[[Any], Any] = None):
+        self.store = store
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = lease_seconds / 3
+        self.result_seconds = result_seconds
+        self.poll_interval = poll_interval
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        self._local = SingleFlight()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key across threads and worker processes
+
+        Args:
+            key: JSON serializable key identifying the work
+            fn: Zero-argument callable doing the work
+
+        Returns:
+            Tuple of (result, shared) as for SingleFlight.do
+        """
+        (result, shared_remote), shared_local = self._local.do(key, lambda: self._do_shared(key, fn))
+        return result, shared_local or shared_remote
+
+    def _do_shared(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        lease_key = self._lease_key(key)
+        token = uuid.uuid4().hex
+
+        while True:
+            if self.store.add(lease_key, token, ttl=self.lease_seconds):
+                return self._lead(lease_key, token, fn), False
+
+            leader_token = self.store.get(lease_key)
+            if leader_token is None:
+                continue  # Lease released between add() and get() - try again
+
+            while self.store.get(lease_key) == leader_token:
+                time.sleep(self.poll_interval)
+
+            outcome = self.store.get(self._result_key(leader_token))
+            if outcome is None:
+                continue  # Leader died or its lease expired - take over
+            if 'error' in outcome:
+                raise SharedCallError(outcome['error'])
+            return self.decode(outcome['value']), True
+
+    def _lead(self, lease_key: str, token: str, fn: Callable[[], Any]) -> Any:
+        stop = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(lease_key, token, stop),
+                         name=f"lease-{token[:8]}", daemon=True).start()
+        try:
+            result = fn()
+        except Exception as e:
+            self.store.set(self._result_key(token), {'error': str(e)}, ttl=self.result_seconds)
+            raise
+        else:
+            self.store.set(self._result_key(token), {'value': self.encode(result)}, ttl=self.result_seconds)
+        finally:
+            stop.set()
+            self.store.delete_if_equals(lease_key, token)
+        return result
+
+    def _heartbeat(self, lease_key: str, token: str, stop: threading.Event):
+        """Keep the lease alive while the leader works"""
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                if not self.store.renew_if_equals(lease_key, token, self.lease_seconds):
+                    return  # Lease lost - a waiter has taken over
+            except Exception:
+                continue  # Store briefly unavailable - retry at the next beat
+
+    def _lease_key(self, key: Hashable) -> str:
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"{self.namespace}:lease:{digest}"
+
+    def _result_key(self, token: str) -> str:
+        return f"{self.namespace}:result:{token}"
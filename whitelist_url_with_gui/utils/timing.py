@@ -0,0 +1,154 @@
+"""
+Per-request phase timing
+A request opens a root span; code on the request's path wraps its phases
+in span() blocks, which nest into a timing tree:
+
+    search_urls 182034 ms
+      test_connectivity 41 ms
+        api.op 40 ms
+      search.block-url 90512 ms
+        attempt 22010 ms (x4)
+          log_query 35 ms
+          job_wait 21870 ms
+            api.log_job_status 310 ms (x8)
+            job_check_sleep 21000 ms (x7)
+        ...
+
+The current span lives in a context variable, so concurrent requests
+never see each other's spans. Outside a request (background threads,
+scripts, benchmarks) span() does nothing beyond one lookup.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """One timed phase with its sub-phases"""
+
+    __slots__ = ('name', 'started', 'ended', 'children', 'attrs')
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.started = time.perf_counter()
+        self.ended = None
+        self.children: List['Span'] = []
+        self.attrs = attrs
+
+    def set(self, key: str, value: Any):
+        """Attach a detail (entry count, cache hit, ...) to the span"""
+        if self.attrs is None:
+            self.attrs = {}
+        self.attrs[key] = value
+
+    def finish(self):
+        if self.ended is None:
+            self.ended = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        return (self.ended if self.ended is not None else time.perf_counter()) - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Timing tree as plain data
+
+        Siblings with the same name (polls, attempts, retries) are merged
+        into one node with their total time and a count, so a search with
+        dozens of status checks still gives a short tree.
+        """
+        return _merged_node([self], self.started)
+
+
+class _NoSpan:
+    """Stand-in yielded by span() outside a timed request"""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+_current: ContextVar[Optional[Span]] = ContextVar('timing_span', default=None)
+
+
+def _merged_node(spans: List[Span], origin: float) -> Dict[str, Any]:
+    node = {
+        'name': spans[0].name,
+        'start_ms': round((spans[0].started - origin) * 1000, 1),
+        'ms': round(sum(item.seconds for item in spans) * 1000, 1),
+    }
+    if len(spans) > 1:
+        node['count'] = len(spans)
+    attrs = {}
+    for item in spans:
+        for key, value in (item.attrs or {}).items():
+            # Counts add up over merged siblings, other details keep the last value
+            if key in attrs and isinstance(value, (int, float)) and not isinstance(value, bool):
+                attrs[key] += value
+            else:
+                attrs[key] = value
+    if attrs:
+        node['attrs'] = attrs
+
+    groups: Dict[str, List[Span]] = {}
+    for item in spans:
+        for child in item.children:
+            groups.setdefault(child.name, []).append(child)
+    if groups:
+        node['children'] = [_merged_node(group, origin) for group in groups.values()]
+    return node
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Any]:
+    """
+    Time a phase of the current request
+
+    Args:
+        name: Phase name; siblings with the same name are merged in the tree
+        **attrs: Details shown with the phase
+
+    Yields:
+        The Span (call .set() to add details), or a no-op stand-in
+        when no request is being timed
+    """
+    parent = _current.get()
+    if parent is None:
+        yield _NO_SPAN
+        return
+    child = Span(name, attrs or None)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def start_request(name: str) -> Span:
+    """Open the root span of a request on this thread/context"""
+    root = Span(name)
+    _current.set(root)
+    return root
+
+
+def end_request():
+    """Stop timing on this thread/context (request threads are reused)"""
+    _current.set(None)
+
+
+def format_tree(node: Dict[str, Any], indent: int = 0) -> str:
+    """Indented text of a to_dict() tree (one phase per line)"""
+    line = f"{'  ' * indent}{node['name']} {node['ms']:.0f} ms"
+    if node.get('count'):
+        line += f" (x{node['count']})"
+    if node.get('attrs'):
+        line += ' ' + ' '.join(f"{key}={value}" for key, value in node['attrs'].items())
+    lines = [line]
+    for child in node.get('children', ()):
+        lines.append(format_tree(child, indent + 1))
+    return '\n'.join(lines)
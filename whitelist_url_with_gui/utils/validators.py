@@ -141,6 +141,42 @@ def validate_single_url(url: str) -> bool:
     
     return True
 
+# Ports a scheme implies - 'https://example.com:443/' is 'example.com/'
+_DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+def normalize_whitelist_url(url: str) -> str:
+    """
+    Normalize a URL/domain to the form it is stored in a category
+    
+    Drops the scheme and its default port, lowercases, and gives a bare
+    domain the trailing '/' (wildcard entries keep their form), so
+    'https://Example.com:443' and 'example.com/' are the same entry.
+    
+    Args:
+        url: The URL/domain as entered
+        
+    Returns:
+        Normalized URL
+    """
+    url = (url or '').strip()
+    scheme, separator, rest = url.partition('://')
+    if separator and scheme.lower() in _DEFAULT_PORTS:
+        host, slash, path = rest.partition('/')
+        default_port = _DEFAULT_PORTS[scheme.lower()]
+        if host.endswith(default_port):
+            host = host[:-len(default_port)]
+        url = host + slash + path
+    
+    # Handle wildcards
+    if url.startswith('*.'):
+        return url.lower()
+    
+    # Ensure non-wildcard domains end with /
+    if '/' not in url:
+        url += '/'
+    
+    return url.lower()
+
 def validate_hostname(hostname: str) -> bool:
     """
     Validate firewall hostname/IP - More flexible
@@ -2,21 +2,32 @@
 Enhanced Flask routes for the web interface
 Updated to support automatic dual-action search and conditional download
 """
-from flask import Flask, render_template_string, request, session, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, Response, current_app, render_template, request, session, redirect, url_for, flash, jsonify, send_file, stream_with_context
 from datetime import datetime
-import traceback
+import hmac
+import io
 import json
+import logging
 import os
 import tempfile
 
 from config import config
 from api.palo_alto_client import PaloAltoAPI, PaloAltoAPIError
+from services.bulk_import_service import BulkImportService, parse_import, parse_records
 from services.search_service import SearchService
 from services.whitelist_service import WhitelistService
 from services.logging_service import LoggingService
-from models.ticket import TicketData, WhitelistRequest
+from services import profiling_service
+from services.profiling_service import ProfilingError
+from models.ticket import TicketData, TicketHistoryQuery, WhitelistRequest
+from utils import metrics
+from utils.timing import span
 from utils.validators import validate_credentials, validate_hostname, validate_ticket_id
-from web.templates import get_login_template, get_dashboard_template
+from web.responses import json_response
+from web.static_assets import static_assets
+from web.templates import get_compiled_template
+
+logger = logging.getLogger(__name__)
 
 # Initialize services
 logging_service = LoggingService()
@@ -31,8 +42,13 @@ def generate_automatic_ticket_id():
     time_part = now.strftime("%H-%M-%S")
     return f"Ticket-{date_part}-{time_part}"
 
+def render_page(name: str, **context) -> str:
+    """Render a page from its cached, precompiled template"""
+    return render_template(get_compiled_template(current_app.jinja_env, name), config=config, **context)
+
 def register_routes(app: Flask):
     """Register all Flask routes"""
+    app.jinja_env.globals['static_url'] = static_assets.url
     
     @app.route('/', methods=['GET', 'POST'])
     def login():
@@ -43,21 +59,21 @@ def register_routes(app: Flask):
             
             # Validate inputs
             if not validate_hostname(hostname):
-                return render_template_string(get_login_template(), 
-                                            error='Invalid hostname or IP address', 
-                                            config=config)
+                return render_page('login', error='Invalid hostname or IP address')
             
             is_valid, error_msg = validate_credentials(username, password)
             if not is_valid:
-                return render_template_string(get_login_template(), 
-                                            error=error_msg, 
-                                            config=config)
+                return render_page('login', error=error_msg)
             
             try:
                 # Initialize API client and authenticate
                 api_client = PaloAltoAPI(hostname, username, password)
                 api_client.get_api_key()
                 
+                # New session id on login; server-side sessions support rotating it
+                if hasattr(session, 'regenerate'):
+                    session.regenerate()
+                
                 # Store only necessary data in session (no passwords)
                 session['hostname'] = hostname
                 session['username'] = username
@@ -72,41 +88,25 @@ def register_routes(app: Flask):
             except PaloAltoAPIError as e:
                 error_msg = "Authentication failed. Please check your credentials and firewall connectivity."
                 logging_service.log_login_attempt(username, hostname, False, str(e))
-                return render_template_string(get_login_template(), 
-                                            error=error_msg, 
-                                            config=config)
+                return render_page('login', error=error_msg)
             except Exception as e:
                 error_msg = "Connection error. Please check your firewall connectivity."
                 logging_service.log_login_attempt(username, hostname, False, str(e))
-                return render_template_string(get_login_template(), 
-                                            error=error_msg, 
-                                            config=config)
+                return render_page('login', error=error_msg)
         
-        return render_template_string(get_login_template(), config=config)
+        return render_page('login')
 
     @app.route('/dashboard')
     def dashboard():
         if 'api_key' not in session:
             return redirect(url_for('login'))
         
-        return render_template_string(get_dashboard_template(), 
-                                    config=config, 
-                                    session=session)
+        return render_page('dashboard')
 
-    @app.route('/static/js/dashboard.js')
-    def dashboard_js():
-        """Serve dashboard JavaScript file"""
-        from flask import Response
-        try:
-            with open('static/js/dashboard.js', 'r') as f:
-                js_content = f.read()
-            return Response(js_content, mimetype='application/javascript')
-        except FileNotFoundError:
-            js_content = """
-            // Embedded dashboard JavaScript
-            console.log('[DEBUG] Using embedded dashboard.js');
-            """
-            return Response(js_content, mimetype='application/javascript')
+    @app.route('/static/<path:filename>', endpoint='static')
+    def static_file(filename):
+        """Static files from memory, precompressed, with cache validators"""
+        return static_assets.response(filename, request)
 
     @app.route('/search_urls', methods=['POST'])
     def search_urls():
@@ -124,9 +124,10 @@ def register_routes(app: Flask):
                 return jsonify({'success': False, 'error': 'No JSON data received'})
                 
             search_terms = data.get('search_term', '').strip()
+            compact = data.get('format') == 'compact'  # Each domain once, referenced by index (SearchResult.to_compact_dict)
             # Note: action_type is now ignored as we automatically search both
             
-            print(f"[DEBUG] Automatic dual-action search request: terms='{search_terms}'")
+            logger.debug("Automatic dual-action search request: terms='%s'", search_terms)
             
             if not search_terms:
                 return jsonify({'success': False, 'error': 'Search terms are required'})
@@ -137,15 +138,16 @@ def register_routes(app: Flask):
             search_service = SearchService(api_client)
             
             # Test connectivity first
-            print("[DEBUG] Testing API connectivity...")
-            connectivity = api_client.test_connectivity()
+            logger.debug("Testing API connectivity...")
+            with span('test_connectivity'):
+                connectivity = api_client.test_connectivity()
             if not connectivity['success']:
                 return jsonify({
                     'success': False, 
                     'error': f"API connectivity failed: {connectivity.get('error', 'Unknown error')}"
                 })
             
-            print("[DEBUG] API connectivity OK, starting automatic dual-action search...")
+            logger.debug("API connectivity OK, starting automatic dual-action search...")
             
             # Execute automatic dual-action search (searches both block-url and block-continue)
             search_result = search_service.search_blocked_urls(search_terms, 'both')
@@ -154,7 +156,7 @@ def register_routes(app: Flask):
             parsed_terms = [t.strip() for t in search_terms.split(',') if t.strip()]
             terms_count = len(parsed_terms)
             
-            print(f"[DEBUG] Automatic dual search completed: success={search_result.success}, urls_found={len(search_result.urls)}")
+            logger.debug("Automatic dual search completed: success=%s, urls_found=%s", search_result.success, len(search_result.urls))
             
             # Log search operation
             logging_service.log_search_operation(
@@ -175,19 +177,27 @@ def register_routes(app: Flask):
                 block_url_count = len(action_results.get('block-url', {}).get('urls', []))
                 block_continue_count = len(action_results.get('block-continue', {}).get('urls', []))
                 
-                response_data = {
-                    'success': True,
-                    'urls': search_result.urls,
-                    'count': len(search_result.urls),
-                    'search_term': search_result.search_term,
-                    'action_type': 'both',
-                    'strategy_info': strategy_info,
-                    'debug_info': debug_info,
-                    'message': f"Automatische Suche erfolgreich abgeschlossen. Gefunden: {len(search_result.urls)} URLs (block-url: {block_url_count}, block-continue: {block_continue_count})." if len(search_result.urls) > 0 else "Automatische Suche erfolgreich abgeschlossen. Keine blockierten URLs gefunden, die Ihren Kriterien entsprechen."
-                }
+                message = f"Automatische Suche erfolgreich abgeschlossen. Gefunden: {len(search_result.urls)} URLs (block-url: {block_url_count}, block-continue: {block_continue_count})." if len(search_result.urls) > 0 else "Automatische Suche erfolgreich abgeschlossen. Keine blockierten URLs gefunden, die Ihren Kriterien entsprechen."
                 
-                print(f"[DEBUG] Returning success response with {len(search_result.urls)} URLs")
-                return jsonify(response_data)
+                if compact:
+                    response_data = search_result.to_compact_dict()
+                    response_data.update(success=True, error=None, debug_info=debug_info, message=message)
+                else:
+                    response_data = {
+                        'success': True,
+                        'urls': search_result.urls,
+                        'count': len(search_result.urls),
+                        'search_term': search_result.search_term,
+                        'action_type': 'both',
+                        'strategy_info': strategy_info,
+                        'domain_stats': search_result.domain_stats,
+                        'domain_groups': search_result.domain_groups,
+                        'debug_info': debug_info,
+                        'message': message
+                    }
+                
+                logger.debug("Returning success response with %s URLs", len(search_result.urls))
+                return json_response(response_data, request)
             else:
                 # Provide helpful error messages
                 error_msg = search_result.error if search_result.error else "Search encountered technical issues"
@@ -199,15 +209,14 @@ def register_routes(app: Flask):
                 elif error_msg and "authentication" in error_msg.lower():
                     error_msg = "Authentifizierung abgelaufen. Bitte melden Sie sich erneut an."
                 
-                print(f"[DEBUG] Returning error response: {error_msg}")
+                logger.debug("Returning error response: %s", error_msg)
                 return jsonify({'success': False, 'error': error_msg})
             
         except json.JSONDecodeError as e:
-            print(f"[DEBUG] JSON decode error: {e}")
+            logger.debug("JSON decode error: %s", e)
             return jsonify({'success': False, 'error': 'Invalid JSON format in request'})
         except Exception as e:
-            print(f"[DEBUG] Unexpected error in search_urls: {e}")
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
+            logger.debug("Unexpected error in search_urls: %s", e, exc_info=True)
             logging_service.log_error(f"Automatic dual search failed for {session.get('username', 'unknown')}@{session.get('hostname', 'unknown')}", e)
             return jsonify({'success': False, 'error': f"Suche fehlgeschlagen: {str(e)}"})
 
@@ -262,7 +271,7 @@ def register_routes(app: Flask):
             })
             
         except Exception as e:
-            print(f"[DEBUG] Manual URL validation error: {e}")
+            logger.debug("Manual URL validation error: %s", e)
             logging_service.log_error("Manual URL validation failed", e)
             return jsonify({'success': False, 'error': f"Validierung fehlgeschlagen: {str(e)}"})
 
@@ -285,10 +294,54 @@ def register_routes(app: Flask):
             })
             
         except Exception as e:
-            print(f"[DEBUG] Category retrieval error: {e}")
+            logger.debug("Category retrieval error: %s", e)
             logging_service.log_error("Category retrieval failed", e)
             return jsonify({'success': False, 'error': str(e)})
 
+    @app.route('/check_coverage', methods=['POST'])
+    def check_coverage():
+        """Mark URLs already covered by the selected category (exact or wildcard)"""
+        if 'api_key' not in session:
+            return jsonify({'success': False, 'error': 'Not authenticated'})
+        
+        try:
+            if not request.is_json:
+                return jsonify({'success': False, 'error': 'Invalid request format. Expected JSON.'})
+                
+            data = request.get_json()
+            if data is None:
+                return jsonify({'success': False, 'error': 'No JSON data received'})
+            
+            # Every URL costs an index lookup - only a bounded list of strings is accepted
+            category = data.get('category', '') if isinstance(data, dict) else None
+            urls = data.get('urls', []) if isinstance(data, dict) else None
+            if not isinstance(category, str) or not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+                return jsonify({'success': False, 'error': 'Expected a category name and a list of URLs'}), 400
+            if len(urls) > config.COVERAGE_CHECK_MAX_URLS:
+                return jsonify({'success': False, 'error': f'Too many URLs: {len(urls)} (maximum: {config.COVERAGE_CHECK_MAX_URLS})'}), 400
+            
+            category = category.strip()
+            urls = [url.strip() for url in urls if url.strip()]
+            
+            if not category:
+                return jsonify({'success': False, 'error': 'Category is required'})
+            
+            # Initialize services
+            api_client = PaloAltoAPI(session['hostname'], session['username'], '')
+            api_client.api_key = session['api_key']
+            whitelist_service = WhitelistService(api_client)
+            
+            success, message, coverage = whitelist_service.check_coverage(category, urls)
+            if not success:
+                return jsonify({'success': False, 'error': message})
+            
+            return jsonify({'success': True, 'message': message, **coverage})
+            
+        except Exception as e:
+            logger.debug("Coverage check error: %s", e)
+            logging_service.log_error("Coverage check failed", e)
+            return jsonify({'success': False, 'error': str(e)})
+
     @app.route('/submit_whitelist', methods=['POST'])
     def submit_whitelist():
         if 'api_key' not in session:
@@ -311,9 +364,9 @@ def register_routes(app: Flask):
             # Generate automatic ticket ID if none provided
             if not ticket_id:
                 ticket_id = generate_automatic_ticket_id()
-                print(f"[DEBUG] Generated automatic ticket ID: {ticket_id}")
+                logger.debug("Generated automatic ticket ID: %s", ticket_id)
             
-            print(f"[DEBUG] Whitelist submission data: ticket_id='{ticket_id}', category='{category}', urls_count={len(urls)}, action_type='{action_type}'")
+            logger.debug("Whitelist submission data: ticket_id='%s', category='%s', urls_count=%s, action_type='%s'", ticket_id, category, len(urls), action_type)
             
             # Validate ticket ID
             if not validate_ticket_id(ticket_id):
@@ -346,7 +399,7 @@ def register_routes(app: Flask):
                     action_type=action_type
                 )
             except Exception as e:
-                print(f"[DEBUG] Error creating whitelist request: {e}")
+                logger.debug("Error creating whitelist request: %s", e)
                 return jsonify({'success': False, 'error': f'Invalid request data: {str(e)}'})
             
             # Initialize services
@@ -373,12 +426,12 @@ def register_routes(app: Flask):
                     action_type=whitelist_request.action_type
                 )
                 
-                # Create ticket log with initial status
-                ticket_log_file = logging_service.create_ticket_log(ticket_data)
+                # Create ticket audit record with initial status
+                ticket_record_id = logging_service.create_ticket_log(ticket_data)
                 
-                # Store ticket log file path in session for later updates
-                if ticket_log_file:
-                    session['last_ticket_log'] = ticket_log_file
+                # Store the audit record id in session for later updates
+                if ticket_record_id:
+                    session['last_ticket_record'] = ticket_record_id
                     session['last_ticket_id'] = ticket_id
                 
                 # Log operation
@@ -394,7 +447,7 @@ def register_routes(app: Flask):
                         'category': whitelist_request.category,
                         'action_type': whitelist_request.action_type,
                         'commit_job_id': commit_data.get('commit_job_id'),
-                        'ticket_log_file': ticket_log_file
+                        'ticket_record_id': ticket_record_id
                     }
                 )
                 
@@ -410,17 +463,15 @@ def register_routes(app: Flask):
                     'immediate_response': commit_data.get('immediate_response', False)
                 }
                 
-                if ticket_log_file:
-                    response_data['ticket_log_file'] = ticket_log_file
+                if ticket_record_id:
+                    response_data['ticket_record_id'] = ticket_record_id
                 
                 return jsonify(response_data)
             else:
                 return jsonify({'success': False, 'error': message})
                 
         except Exception as e:
-            print(f"[DEBUG] Whitelist submission error: {e}")
-            print(f"[DEBUG] Error type: {type(e).__name__}")
-            print(f"[DEBUG] Error details: {str(e)}")
+            logger.debug("Whitelist submission error (%s): %s", type(e).__name__, e, exc_info=True)
             
             # Check for specific error types
             error_message = str(e)
@@ -432,6 +483,54 @@ def register_routes(app: Flask):
             logging_service.log_error("Automatic dual-action whitelist submission failed", e)
             return jsonify({'success': False, 'error': error_message})
 
+    @app.route('/bulk_import', methods=['POST'])
+    def bulk_import():
+        """Import many (ticket, category, url) rows: CSV/JSON upload or JSON body"""
+        if 'api_key' not in session:
+            return jsonify({'success': False, 'error': 'Not authenticated'})
+
+        try:
+            upload = request.files.get('file')
+            if upload is not None:
+                content = upload.read(config.BULK_IMPORT_MAX_BYTES + 1)
+                if len(content) > config.BULK_IMPORT_MAX_BYTES:
+                    return jsonify({'success': False, 'error': f'File too large (maximum: {config.BULK_IMPORT_MAX_BYTES // 1024} KiB)'})
+                extension = os.path.splitext(upload.filename or '')[1].lower().lstrip('.')
+                rows = parse_import(content.decode('utf-8'), extension if extension in ('csv', 'json') else None)
+                dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes', 'on')
+            elif request.is_json:
+                data = request.get_json()
+                if data is None:
+                    return jsonify({'success': False, 'error': 'No JSON data received'})
+                if 'content' in data:
+                    rows = parse_import(str(data['content']), data.get('format'))
+                else:
+                    rows = parse_records(data.get('rows'))
+                dry_run = bool(data.get('dry_run'))
+            else:
+                return jsonify({'success': False, 'error': 'Expected a CSV/JSON file upload or JSON rows'})
+        except UnicodeDecodeError:
+            return jsonify({'success': False, 'error': 'Import file must be UTF-8 encoded'})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid import: {e}'})
+
+        try:
+            api_client = PaloAltoAPI(session['hostname'], session['username'], '')
+            api_client.api_key = session['api_key']
+            bulk_service = BulkImportService(WhitelistService(api_client), logging_service)
+
+            success, message, report = bulk_service.run(rows, session['username'], session['hostname'], dry_run=dry_run)
+
+            response_data = {'success': success, 'message': message, **report}
+            if not success:
+                response_data['error'] = message
+            return jsonify(response_data)
+
+        except Exception as e:
+            logger.debug("Bulk import error: %s", e, exc_info=True)
+            logging_service.log_error("Bulk import failed", e)
+            return jsonify({'success': False, 'error': str(e)})
+
     @app.route('/download_ticket/<ticket_id>')
     def download_ticket(ticket_id):
         """Download ticket log file"""
@@ -439,21 +538,17 @@ def register_routes(app: Flask):
             return redirect(url_for('login'))
         
         try:
-            # Find the most recent ticket log file for this ticket ID
-            log_files = []
-            
-            # Check if we have the file path in session
-            if 'last_ticket_log' in session:
-                ticket_file = session['last_ticket_log']
-                if os.path.exists(ticket_file) and ticket_id in ticket_file:
-                    return send_file(
-                        ticket_file,
-                        as_attachment=True,
-                        download_name=f"ticket_{ticket_id}.log",
-                        mimetype='text/plain'
-                    )
-            
-            # Search for ticket log files in log directory
+            # Render the log from the audit store (session record first, else the latest for this ticket)
+            content = logging_service.get_ticket_log(ticket_id, session.get('last_ticket_record'))
+            if content is not None:
+                return send_file(
+                    io.BytesIO(content.encode('utf-8')),
+                    as_attachment=True,
+                    download_name=f"ticket_{ticket_id}.log",
+                    mimetype='text/plain'
+                )
+            
+            # Tickets logged before the audit store and not archived yet are plain files
             import glob
             pattern = os.path.join(config.LOG_DIR, f"ticket_{ticket_id}_*.log")
             log_files = glob.glob(pattern)
@@ -505,7 +600,7 @@ This is a basic ticket information file.
                 )
                 
         except Exception as e:
-            print(f"[DEBUG] Download ticket error: {e}")
+            logger.debug("Download ticket error: %s", e)
             return jsonify({'success': False, 'error': f'Download fehlgeschlagen: {str(e)}'})
 
     @app.route('/commit_status', methods=['POST'])
@@ -534,13 +629,13 @@ This is a basic ticket information file.
             status = whitelist_service.get_commit_status(job_id)
             
             # Update ticket log if we have one in session and status is final
-            if status.status in ['FIN', 'FAIL'] and 'last_ticket_log' in session:
-                ticket_log_file = session['last_ticket_log']
+            if status.status in ['FIN', 'FAIL'] and 'last_ticket_record' in session:
+                ticket_record_id = session['last_ticket_record']
                 progress = status.progress if status.progress.endswith('%') else f"{status.progress}%"
                 
-                print(f"[DEBUG] Updating ticket log with final status: {status.status}, progress: {progress}")
+                logger.debug("Updating ticket log with final status: %s, progress: %s", status.status, progress)
                 logging_service.update_ticket_log_commit_status(
-                    ticket_log_file, 
+                    ticket_record_id, 
                     status.status, 
                     progress
                 )
@@ -551,7 +646,7 @@ This is a basic ticket information file.
             })
             
         except Exception as e:
-            print(f"[DEBUG] Commit status check error: {e}")
+            logger.debug("Commit status check error: %s", e)
             logging_service.log_error("Commit status check failed", e)
             return jsonify({'success': False, 'error': str(e)})
 
@@ -575,21 +670,21 @@ This is a basic ticket information file.
             if not commit_status:
                 return jsonify({'success': False, 'error': 'Commit status required'})
             
-            # Get ticket log file from session
-            if 'last_ticket_log' not in session:
+            # Get ticket audit record from session
+            if 'last_ticket_record' not in session:
                 return jsonify({'success': False, 'error': 'No ticket log file found in session'})
             
-            ticket_log_file = session['last_ticket_log']
+            ticket_record_id = session['last_ticket_record']
             
             # Ensure progress has % symbol
             if not commit_progress.endswith('%'):
                 commit_progress = f"{commit_progress}%"
             
-            print(f"[DEBUG] Manual update of ticket log: status={commit_status}, progress={commit_progress}")
+            logger.debug("Manual update of ticket log: status=%s, progress=%s", commit_status, commit_progress)
             
             # Update the ticket log
             logging_service.update_ticket_log_commit_status(
-                ticket_log_file, 
+                ticket_record_id, 
                 commit_status, 
                 commit_progress
             )
@@ -600,10 +695,42 @@ This is a basic ticket information file.
             })
             
         except Exception as e:
-            print(f"[DEBUG] Update ticket commit status error: {e}")
+            logger.debug("Update ticket commit status error: %s", e)
             logging_service.log_error("Update ticket commit status failed", e)
             return jsonify({'success': False, 'error': str(e)})
 
+    @app.route('/ticket_history')
+    def ticket_history():
+        """Search the whitelist audit history (JSON, or CSV with format=csv)"""
+        if 'api_key' not in session:
+            return jsonify({'success': False, 'error': 'Not authenticated'})
+        
+        try:
+            query = TicketHistoryQuery.from_args(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': f'Invalid filter: {e}'})
+        
+        is_valid, error_msg = query.validate()
+        if not is_valid:
+            return jsonify({'success': False, 'error': error_msg})
+        
+        try:
+            if request.args.get('format') == 'csv':
+                filename = f"whitelist_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                return Response(
+                    stream_with_context(logging_service.export_ticket_history_csv(query)),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+                )
+            
+            result = logging_service.search_ticket_history(query)
+            return jsonify({'success': True, **result})
+            
+        except Exception as e:
+            logger.debug("Ticket history error: %s", e, exc_info=True)
+            logging_service.log_error("Ticket history query failed", e)
+            return jsonify({'success': False, 'error': str(e)})
+
     @app.route('/debug_logs')
     def debug_logs():
         if 'api_key' not in session:
@@ -639,10 +766,94 @@ This is a basic ticket information file.
             })
             
         except Exception as e:
-            print(f"[DEBUG] Debug logs error: {e}")
+            logger.debug("Debug logs error: %s", e)
             logging_service.log_error("Debug logs failed", e)
             return jsonify({'success': False, 'error': str(e)})
 
+    @app.route('/metrics')
+    def metrics_endpoint():
+        """Prometheus text exposition of the application metrics - no firewall calls"""
+        if not config.METRICS_ENABLED:
+            return Response(status=404)
+        
+        if config.METRICS_TOKEN:
+            expected = f"Bearer {config.METRICS_TOKEN}"
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+                return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        
+        return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+    def _profiling_denied():
+        """None for an admin; otherwise the response to send (the endpoints only exist with a token)"""
+        if not config.PROFILING_TOKEN:
+            return Response(status=404)
+        expected = f"Bearer {config.PROFILING_TOKEN}"
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return None
+
+    @app.route('/admin/profile/sample', methods=['POST'])
+    def profile_sample():
+        """Sample the stacks of the worker that receives this request for N seconds"""
+        denied = _profiling_denied()
+        if denied:
+            return denied
+        data = request.get_json(silent=True) or {}
+        try:
+            meta = profiling_service.stack_sampler.start(float(data.get('seconds', 10)),
+                                                         float(data.get('interval_ms', 10)))
+        except (ProfilingError, TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)})
+        logger.warning("Profiling: sampling session %s started for %ss", meta['id'], meta['seconds'])
+        return jsonify({'success': True, 'profile': meta})
+
+    @app.route('/admin/profile/requests', methods=['POST'])
+    def profile_requests():
+        """Run the next K requests to an endpoint under cProfile, in any worker"""
+        denied = _profiling_denied()
+        if denied:
+            return denied
+        data = request.get_json(silent=True) or {}
+        endpoint = str(data.get('endpoint', '')).strip().lstrip('/')
+        if endpoint not in app.view_functions or endpoint.startswith('profile_'):
+            return jsonify({'success': False, 'error': f"Unknown endpoint: {endpoint or '(none)'}"})
+        try:
+            meta = profiling_service.request_profiler.arm(endpoint, int(data.get('count', 5)))
+        except (ProfilingError, TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)})
+        logger.warning("Profiling: next %s requests to %s armed (session %s)", meta['count'], endpoint, meta['id'])
+        return jsonify({'success': True, 'profile': meta})
+
+    @app.route('/admin/profile/<profile_id>')
+    def profile_status(profile_id):
+        denied = _profiling_denied()
+        if denied:
+            return denied
+        try:
+            return jsonify({'success': True, 'profile': profiling_service.session_status(profile_id)})
+        except ProfilingError as e:
+            return jsonify({'success': False, 'error': str(e)})
+
+    @app.route('/admin/profile/<profile_id>/download')
+    def profile_download(profile_id):
+        """Collapsed stacks (sample) or pstats / pstats text (requests)"""
+        denied = _profiling_denied()
+        if denied:
+            return denied
+        try:
+            meta = profiling_service.session_status(profile_id)
+            if meta['kind'] == 'sample':
+                return Response(profiling_service.collapsed_stacks(profile_id), mimetype='text/plain',
+                                headers={'Content-Disposition': f'attachment; filename=profile-{profile_id}.collapsed'})
+            if request.args.get('format') == 'text':
+                text = profiling_service.pstats_text(profile_id, request.args.get('sort', 'cumulative'),
+                                                     request.args.get('limit', 40, type=int))
+                return Response(text, mimetype='text/plain')
+            return send_file(os.path.abspath(profiling_service.merged_pstats(profile_id)), mimetype='application/octet-stream',
+                             as_attachment=True, download_name=f"profile-{profile_id}.pstats")
+        except ProfilingError as e:
+            return jsonify({'success': False, 'error': str(e)})
+
     @app.route('/favicon.ico')
     def favicon():
         from flask import Response
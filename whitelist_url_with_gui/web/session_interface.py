@@ -0,0 +1,106 @@
+"""
+Server-side sessions
+Session data (including the firewall API key) is kept in the shared state
+store; the browser only receives a signed, random session id. Every worker
+process sees the same sessions, and they survive worker restarts.
+"""
+import secrets
+from typing import Optional
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from services.state_store import get_state_store
+
+
+class StateStoreSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its id and whether it changed"""
+
+    def __init__(self, initial=None, sid: str = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid: Optional[str] = None
+
+    def regenerate(self):
+        """Move the data to a fresh id (call after login against session fixation)"""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = _new_sid()
+        self.modified = True
+
+
+class StateStoreSessionInterface(SessionInterface):
+    """Flask session interface backed by a StateStore"""
+
+    key_prefix = 'session:'
+    salt = 'state-store-session'
+
+    def __init__(self, store=None):
+        self._store = store
+
+    @property
+    def store(self):
+        # Resolved lazily so the app can be preloaded before workers fork
+        if self._store is None:
+            self._store = get_state_store()
+        return self._store
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request) -> StateStoreSession:
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('ascii')
+            except (BadSignature, UnicodeDecodeError):
+                sid = None
+            if sid:
+                data = self.store.get(self.key_prefix + sid)
+                if data is not None:
+                    return StateStoreSession(data, sid=sid)
+        return StateStoreSession(sid=_new_sid(), new=True)
+
+    def save_session(self, app, session: StateStoreSession, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self.store.delete(self.key_prefix + session.previous_sid)
+            session.previous_sid = None
+
+        if not session:
+            if session.modified:
+                self.store.delete(self.key_prefix + session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        # Non-permanent sessions end with the browser, but the stored copy
+        # still expires after the session lifetime
+        ttl = app.permanent_session_lifetime.total_seconds()
+        self.store.set(self.key_prefix + session.sid, dict(session), ttl=ttl)
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode('ascii')).decode('ascii'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def _new_sid() -> str:
+    return secrets.token_urlsafe(32)
@@ -0,0 +1,165 @@
+"""
+Static files served from memory
+Each file is read once and kept together with its gzip variant (and brotli,
+when the brotli package is installed), so a request costs a dictionary
+lookup and a few headers - no disk access, no compression.
+
+URLs from static_url() carry a content hash (js/dashboard.3f2a9c1e7b04.js).
+Browsers keep those for a year without asking again; a changed file gets a
+new hash and so a new URL. The plain name keeps working and is revalidated
+on every use (ETag / Last-Modified, answered with 304 Not Modified).
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from flask import Request, Response, abort
+from werkzeug.security import safe_join
+
+from config import config
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 12
+_HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$' % HASH_LENGTH)
+
+# Preferred first when the browser accepts several
+ENCODINGS = ('br', 'gzip')
+
+
+class StaticAsset:
+    """One file with its precompressed variants"""
+
+    __slots__ = ('name', 'mimetype', 'content_hash', 'modified', 'mtime', 'variants')
+
+    def __init__(self, name: str, content: bytes, mtime: float):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.content_hash = hashlib.sha256(content).hexdigest()
+        self.mtime = mtime
+        self.modified = datetime.fromtimestamp(int(mtime), timezone.utc)
+        self.variants: Dict[str, bytes] = {'identity': content}
+        if len(content) >= config.STATIC_COMPRESS_MIN_BYTES:
+            compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(content, quality=11)
+            for encoding, data in compressed.items():
+                if len(data) < len(content):
+                    self.variants[encoding] = data
+
+    @property
+    def hashed_name(self) -> str:
+        stem, ext = os.path.splitext(self.name)
+        return f"{stem}.{self.content_hash[:HASH_LENGTH]}{ext}"
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag of one variant (each encoding is its own representation)"""
+        tag = self.content_hash[:32]
+        return tag if encoding == 'identity' else f"{tag}-{encoding}"
+
+    def select_encoding(self, accept_encodings) -> str:
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accept_encodings.quality(encoding) > 0:
+                return encoding
+        return 'identity'
+
+
+class StaticAssets:
+    """Files of config.STATIC_DIR, loaded on first use"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        """
+        The asset for a path below the static directory
+
+        Returns:
+            The asset, or None if there is no such file
+        """
+        asset = self._assets.get(name)
+        if asset is not None and not config.DEBUG:
+            return asset
+        path = safe_join(self.directory or config.STATIC_DIR, name)
+        if path is None:
+            return None
+        try:
+            mtime = os.path.getmtime(path)
+            if asset is not None and asset.mtime == mtime:
+                return asset  # Debug mode: unchanged since loaded
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        asset = StaticAsset(name, content, mtime)
+        with self._lock:
+            self._assets[name] = asset
+        logger.debug("Loaded static file %s (%s bytes, %s)", name, len(content),
+                     ', '.join(f"{encoding} {len(data)}" for encoding, data in asset.variants.items()))
+        return asset
+
+    def resolve(self, name: str) -> Tuple[Optional[StaticAsset], bool]:
+        """
+        Asset for a requested name, plain or content-hashed
+
+        Returns:
+            (asset or None, whether the name carries the current content hash)
+        """
+        match = _HASHED_NAME.match(name)
+        current = None
+        if match is not None:
+            current = self.get(match.group('stem') + match.group('ext'))
+            if current is not None and current.content_hash.startswith(match.group('hash')):
+                return current, True
+        asset = self.get(name)
+        if asset is not None:
+            return asset, False
+        # An outdated hash (page rendered before a deploy) still gets the current file, just not cached
+        return current, False
+
+    def url(self, name: str) -> str:
+        """Content-hashed URL of a static file (the plain URL if it does not exist)"""
+        asset = self.get(name)
+        return f"/static/{asset.hashed_name if asset is not None else name}"
+
+    def response(self, name: str, request: Request) -> Response:
+        """
+        Response for a static file request, 304 when the browser's copy is current
+
+        Raises:
+            NotFound: No such file
+        """
+        asset, fingerprinted = self.resolve(name)
+        if asset is None:
+            abort(404)
+        encoding = asset.select_encoding(request.accept_encodings)
+        response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.set_etag(asset.etag(encoding))
+        response.last_modified = asset.modified
+        if fingerprinted:
+            response.cache_control.public = True
+            response.cache_control.max_age = config.STATIC_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+# Process-wide cache of config.STATIC_DIR
+static_assets = StaticAssets()
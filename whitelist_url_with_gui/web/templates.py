@@ -1,8 +1,16 @@
 """
 Enhanced HTML Templates for the web interface
-Complete file with embedded JavaScript and proper function exports
+The dashboard JavaScript is served from static/js/dashboard.js
 Added ticket download functionality and optional ticket ID
 """
+import re
+import threading
+import weakref
+from typing import Dict
+
+from jinja2 import Environment, Template
+from markupsafe import escape
+
 from config import config
 
 LOGIN_TEMPLATE = '''
@@ -77,7 +85,7 @@ DASHBOARD_TEMPLATE = '''
         .section h2 { color: #333; margin-top: 0; border-bottom: 2px solid #007cba; padding-bottom: 10px; }
         .form-group { margin-bottom: 15px; }
         label { display: block; margin-bottom: 5px; font-weight: bold; color: #555; }
-        input[type="text"], select, textarea { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; box-sizing: border-box; }
+        input[type="text"], input[type="date"], select, textarea { width: 100%; padding: 10px; border: 1px solid #ddd; border-radius: 4px; box-sizing: border-box; }
         .btn { padding: 10px 20px; background: #007cba; color: white; border: none; border-radius: 4px; cursor: pointer; margin-right: 10px; margin-bottom: 10px; }
         .btn:hover { background: #005a87; }
         .btn-secondary { background: #6c757d; }
@@ -93,6 +101,9 @@ DASHBOARD_TEMPLATE = '''
         .url-item:hover { background: #f8f9fa; }
         .url-item input[type="checkbox"] { margin-right: 10px; transform: scale(1.2); cursor: pointer; }
         .url-item label { cursor: pointer; user-select: none; flex: 1; }
+        .url-group { margin-bottom: 20px; padding: 15px; border: 1px solid #b3d7ff; border-radius: 4px; background: #f0f8ff; }
+        .url-group small { color: #666; }
+        .url-hits { margin-left: 10px; padding: 2px 8px; border-radius: 10px; background: #e9ecef; color: #495057; font-size: 12px; white-space: nowrap; }
         .selected-urls { background: #e3f2fd; padding: 15px; border-radius: 4px; margin-top: 15px; }
         .loading { text-align: center; padding: 20px; color: #666; }
         .error { color: #d32f2f; padding: 10px; background: #ffebee; border-radius: 4px; margin-bottom: 15px; }
@@ -116,6 +127,11 @@ DASHBOARD_TEMPLATE = '''
         .download-section { background: #f0f8ff; padding: 15px; border-radius: 4px; margin-top: 15px; border: 2px solid #17a2b8; }
         .download-section h3 { color: #17a2b8; margin-top: 0; }
         .hidden { display: none !important; }
+        .history-filters { display: grid; grid-template-columns: repeat(auto-fill, minmax(180px, 1fr)); gap: 10px; margin-bottom: 15px; }
+        .history-table { width: 100%; border-collapse: collapse; font-size: 14px; margin-top: 10px; }
+        .history-table th, .history-table td { border: 1px solid #ddd; padding: 6px 8px; text-align: left; vertical-align: top; }
+        .history-table th { background: #f8f9fa; }
+        .history-urls { max-height: 120px; overflow-y: auto; word-break: break-all; }
     </style>
 </head>
 <body>
@@ -240,1019 +256,25 @@ DASHBOARD_TEMPLATE = '''
         <button class="btn" onclick="startOver()">Neue Anfrage starten</button>
     </div>
 
-    <script>
-        // Global variables
-        var selectedUrls = [];
-        var searchResults = [];
-        var manualUrls = [];
-        var categories = {};
-        var currentTicketId = null;
-        var urlsByCategory = {}; // Store URLs organized by category
+    <!-- Whitelist history (audit trail search) -->
+    <div class="section" id="historySection">
+        <h2>📚 Whitelist-Verlauf</h2>
+        <p>Wer hat welche Domain wann gewhitelistet? Alle Filter sind optional.</p>
+        <div class="history-filters">
+            <div><label for="history_domain">Domain enthält</label><input type="text" id="history_domain" placeholder="z.B. example.com"></div>
+            <div><label for="history_ticket_id">Ticket ID</label><input type="text" id="history_ticket_id" placeholder="Anfang der Ticket ID"></div>
+            <div><label for="history_username">Benutzer</label><input type="text" id="history_username"></div>
+            <div><label for="history_hostname">Firewall</label><input type="text" id="history_hostname"></div>
+            <div><label for="history_category">Kategorie</label><input type="text" id="history_category"></div>
+            <div><label for="history_date_from">Von</label><input type="date" id="history_date_from"></div>
+            <div><label for="history_date_to">Bis</label><input type="date" id="history_date_to"></div>
+        </div>
+        <button class="btn" onclick="loadHistory(1)">Verlauf durchsuchen</button>
+        <button class="btn btn-secondary" onclick="exportHistoryCsv()">CSV exportieren</button>
+        <div id="historyResults"></div>
+    </div>
 
-        // Prevent form submission from reloading page
-        function handleSearchSubmit(event) {
-            event.preventDefault();
-            event.stopPropagation();
-            
-            console.log('[DEBUG] Automatische Dual-Action Suche gestartet');
-            
-            var searchTerms = document.getElementById('search_term').value.trim();
-            
-            console.log('[DEBUG] Search terms:', searchTerms);
-            
-            if (!searchTerms) {
-                alert('Bitte mindestens einen Suchbegriff eingeben');
-                return false;
-            }
-            
-            // Validate search terms
-            var terms = searchTerms.split(',').map(function(t) { return t.trim(); }).filter(function(t) { return t.length > 0; });
-            if (terms.length === 0) {
-                alert('Bitte gültige Suchbegriffe eingeben');
-                return false;
-            }
-            
-            var resultsDiv = document.getElementById('urlSelection');
-            var searchBtn = document.getElementById('searchButton');
-            
-            console.log('[DEBUG] Starting automatic dual-action search request...');
-            
-            searchBtn.disabled = true;
-            searchBtn.textContent = 'Automatische Suche läuft... (~6-8 min)';
-            
-            activateStep(2);
-            
-            // Show different message based on number of terms
-            var searchMessage = terms.length === 1 
-                ? '🎯 Automatische Suche für "' + terms[0] + '" (block-url UND block-continue)'
-                : '🎯 Automatische Multi-Begriff Suche für ' + terms.length + ' Begriffe (' + terms.join(', ') + ') mit OR-Logik (block-url UND block-continue)';
-            
-            resultsDiv.innerHTML = '<div class="loading">' + searchMessage + '...<br>' +
-                                  '<small>⏱️ Läuft bis zu 8 Versuche mit erweiterten Timeouts<br>' +
-                                  'Sucht in letzten 3 Monaten, bis zu 3.000 Einträge pro Aktion<br>' +
-                                  '<strong>Geschätzte Zeit: ~6-8 Minuten - Bitte warten...</strong></small></div>';
-            
-            console.log('[DEBUG] Making fetch request to /search_urls with automatic dual search');
-            
-            fetch('/search_urls', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify({
-                    search_term: searchTerms,
-                    action_type: 'both' // This will be automatically handled
-                })
-            })
-            .then(function(response) {
-                console.log('[DEBUG] Got response:', response.status, response.statusText);
-                
-                var contentType = response.headers.get('Content-Type');
-                if (!contentType || !contentType.includes('application/json')) {
-                    throw new Error('Server returned non-JSON response (got: ' + (contentType || 'unknown') + ')');
-                }
-                
-                if (!response.ok) {
-                    throw new Error('HTTP error! status: ' + response.status);
-                }
-                
-                return response.json();
-            })
-            .then(function(data) {
-                console.log('[DEBUG] Response data:', data);
-                
-                if (data.success) {
-                    console.log('[DEBUG] Automatic dual search successful, found URLs:', data.urls);
-                    searchResults = data.urls || [];
-                    displaySearchResultsByCategory(searchResults, searchTerms, data.strategy_info);
-                    showManualUrlInput();
-                } else {
-                    console.log('[DEBUG] Search failed:', data.error);
-                    var errorMessage = data.error || 'Unknown error occurred';
-                    
-                    if (errorMessage.includes('no URLs were found') || errorMessage.includes('no matching URLs')) {
-                        searchResults = [];
-                        displaySearchResultsByCategory([], searchTerms, data.strategy_info);
-                        showManualUrlInput();
-                    } else {
-                        resultsDiv.innerHTML = '<div class="error">Suche Fehler: ' + errorMessage + '</div>';
-                        showManualUrlInput();
-                    }
-                }
-            })
-            .catch(function(error) {
-                console.error('[DEBUG] Fetch error:', error);
-                var errorMessage = 'Netzwerk Fehler: ' + error.message;
-                
-                if (error.message.includes('non-JSON response')) {
-                    errorMessage = 'Server Fehler: Server hat unerwartete Antwort gesendet. Bitte Firewall-Verbindung prüfen.';
-                } else if (error.message.includes('Failed to fetch')) {
-                    errorMessage = 'Verbindungsfehler: Konnte nicht zum Server verbinden. Bitte Netzwerkverbindung prüfen.';
-                }
-                
-                resultsDiv.innerHTML = '<div class="error">' + errorMessage + '</div>';
-                showManualUrlInput();
-            })
-            .finally(function() {
-                console.log('[DEBUG] Search request completed');
-                searchBtn.disabled = false;
-                searchBtn.textContent = 'Automatische Suche starten (~6-8 Minuten)';
-            });
-            
-            return false;
-        }
-        
-        /**
-         * Display search results organized by action category
-         */
-        function displaySearchResultsByCategory(urls, searchTerms, strategyInfo) {
-            var resultsDiv = document.getElementById('urlSelection');
-            var terms = searchTerms.split(',').map(function(t) { return t.trim(); }).filter(function(t) { return t.length > 0; });
-            
-            var html = '';
-            
-            if (urls.length === 0) {
-                html = '<div style="text-align: center; padding: 20px; color: #666;">' +
-                    '<h4>✅ Automatische Suche abgeschlossen - Keine URLs gefunden</h4>';
-                
-                if (terms.length === 1) {
-                    html += '<p>Keine URLs mit "' + terms[0] + '" gefunden für block-url oder block-continue</p>';
-                } else {
-                    html += '<p>Keine URLs mit den Begriffen (' + terms.join(', ') + ') gefunden für block-url oder block-continue</p>';
-                }
-                
-                html += '<p><small>✅ Automatische Suche erfolgreich abgeschlossen. Sie können unten manuell URLs hinzufügen.</small></p>' +
-                    '</div>';
-            } else {
-                html = '<h3>🎯 Automatische Suche: ' + urls.length + ' URLs gefunden</h3>';
-                
-                // Show strategy info if available
-                if (strategyInfo && strategyInfo.action_results) {
-                    var blockUrlCount = strategyInfo.action_results['block-url'] ? strategyInfo.action_results['block-url'].count : 0;
-                    var blockContinueCount = strategyInfo.action_results['block-continue'] ? strategyInfo.action_results['block-continue'].count : 0;
-                    
-                    html += '<div style="margin: 10px 0; padding: 10px; background: #f0f8ff; border-radius: 4px;">' +
-                           '✅ <strong>Automatische Dual-Action Ergebnisse:</strong><br>' +
-                           '🚫 <strong>block-url:</strong> ' + blockUrlCount + ' URLs (komplett blockiert)<br>' +
-                           '⚠️ <strong>block-continue:</strong> ' + blockContinueCount + ' URLs (blockiert aber Verbindung fortgesetzt)<br>' +
-                           '📅 <strong>Zeitbereich:</strong> Letzte 3 Monate, bis zu 3.000 Einträge pro Aktion<br>' +
-                           'Wählen Sie die URLs aus, die Sie whitelisten möchten:</div>';
-                    
-                    // Organize URLs by action type for display
-                    urlsByCategory = {
-                        'block-url': strategyInfo.action_results['block-url'] ? strategyInfo.action_results['block-url'].urls : [],
-                        'block-continue': strategyInfo.action_results['block-continue'] ? strategyInfo.action_results['block-continue'].urls : []
-                    };
-                    
-                    // Display URLs by category
-                    if (urlsByCategory['block-url'].length > 0) {
-                        html += '<div class="url-category">';
-                        html += '<h4>🚫 block-url (' + urlsByCategory['block-url'].length + ' URLs)</h4>';
-                        html += '<small style="color: #666;">URLs die komplett blockiert wurden</small>';
-                        for (var i = 0; i < urlsByCategory['block-url'].length; i++) {
-                            var url = urlsByCategory['block-url'][i];
-                            var uniqueId = 'blockurl_' + i;
-                            html += '<div class="url-item">';
-                            html += '<input type="checkbox" id="' + uniqueId + '" value="' + url + '" onchange="updateSelectedUrls()">';
-                            html += '<label for="' + uniqueId + '">' + url + '</label>';
-                            html += '</div>';
-                        }
-                        html += '</div>';
-                    }
-                    
-                    if (urlsByCategory['block-continue'].length > 0) {
-                        html += '<div class="url-category">';
-                        html += '<h4>⚠️ block-continue (' + urlsByCategory['block-continue'].length + ' URLs)</h4>';
-                        html += '<small style="color: #666;">URLs die blockiert wurden aber Verbindung fortgesetzt</small>';
-                        for (var i = 0; i < urlsByCategory['block-continue'].length; i++) {
-                            var url = urlsByCategory['block-continue'][i];
-                            var uniqueId = 'blockcontinue_' + i;
-                            html += '<div class="url-item">';
-                            html += '<input type="checkbox" id="' + uniqueId + '" value="' + url + '" onchange="updateSelectedUrls()">';
-                            html += '<label for="' + uniqueId + '">' + url + '</label>';
-                            html += '</div>';
-                        }
-                        html += '</div>';
-                    }
-                } else {
-                    // Fallback for older format
-                    html += '<div style="margin: 10px 0; padding: 10px; background: #f0f8ff; border-radius: 4px;">' +
-                           '✅ <strong>Suchergebnisse:</strong> Automatische Suche für block-url und block-continue<br>' +
-                           'Wählen Sie die URLs aus, die Sie whitelisten möchten:</div>';
-                    
-                    for (var i = 0; i < urls.length; i++) {
-                        var url = urls[i];
-                        html += '<div class="url-item">';
-                        html += '<input type="checkbox" id="url_' + i + '" value="' + url + '" onchange="updateSelectedUrls()">';
-                        html += '<label for="url_' + i + '">' + url + '</label>';
-                        html += '</div>';
-                    }
-                }
-            }
-            
-            resultsDiv.innerHTML = html;
-        }
-        
-        function showManualUrlInput() {
-            console.log('[DEBUG] Showing manual URL input section');
-            var urlSelection = document.getElementById('urlSelection');
-            var existing = document.getElementById('manualUrlSection');
-            if (!existing) {
-                var manualHtml = '<div id="manualUrlSection" style="margin-top: 20px; padding: 15px; background: #f8f9fa; border-radius: 4px; border: 1px solid #dee2e6;">' +
-                                '<h4>📝 Manuelle URLs hinzufügen</h4>' +
-                                '<p>Sie können auch URLs manuell hinzufügen (eine pro Zeile oder komma-getrennt):</p>' +
-                                '<textarea id="manualUrls" placeholder="Beispiel:&#10;youtube.com&#10;facebook.com&#10;*.google.com&#10;oder: youtube.com, facebook.com, *.google.com" ' +
-                                'style="width: 100%; height: 100px; padding: 10px; border: 1px solid #ddd; border-radius: 4px; font-family: monospace;"></textarea>' +
-                                '<div id="manualUrlValidation" style="margin-top: 10px;"></div>' +
-                                '<button type="button" class="btn" onclick="addManualUrls()" style="margin-top: 10px;">Manuelle URLs hinzufügen</button>' +
-                                '</div>';
-                urlSelection.insertAdjacentHTML('afterend', manualHtml);
-                
-                var manualUrlInput = document.getElementById('manualUrls');
-                if (manualUrlInput) {
-                    manualUrlInput.addEventListener('input', validateManualUrls);
-                }
-            }
-        }
-        
-        function updateSelectedUrls() {
-            console.log('[DEBUG] Updating selected URLs');
-            selectedUrls = [];
-            
-            // Add selected URLs from both categories
-            var allCheckboxes = document.querySelectorAll('input[type="checkbox"][id^="blockurl_"], input[type="checkbox"][id^="blockcontinue_"], input[type="checkbox"][id^="url_"]');
-            allCheckboxes.forEach(function(checkbox) {
-                if (checkbox.checked) {
-                    selectedUrls.push(checkbox.value);
-                }
-            });
-            
-            // Add selected manual URLs
-            for (var i = 0; i < manualUrls.length; i++) {
-                var checkbox = document.getElementById('manual_' + i);
-                if (checkbox && checkbox.checked) {
-                    selectedUrls.push(manualUrls[i]);
-                }
-            }
-            
-            var optionsDiv = document.getElementById('whitelistOptions');
-            var previewDiv = document.getElementById('selectedUrlsPreview');
-            var proceedBtn = document.getElementById('proceedBtn');
-            
-            if (selectedUrls.length > 0) {
-                optionsDiv.style.display = 'block';
-                updateUrlPreview();
-                previewDiv.style.display = 'block';
-                proceedBtn.style.display = 'inline-block';
-            } else {
-                optionsDiv.style.display = 'none';
-                previewDiv.style.display = 'none';
-                proceedBtn.style.display = 'none';
-            }
-        }
-        
-        function updateUrlPreview() {
-            console.log('[DEBUG] Updating URL preview');
-            var exactMatch = document.getElementById('exactMatch').checked;
-            var wildcardMatch = document.getElementById('wildcardMatch').checked;
-            var previewList = document.getElementById('urlPreviewList');
-            
-            var html = '<ul>';
-            for (var i = 0; i < selectedUrls.length; i++) {
-                var url = selectedUrls[i];
-                
-                if (url.startsWith('*.')) {
-                    if (wildcardMatch) {
-                        html += '<li>' + url + '</li>';
-                    }
-                    if (exactMatch) {
-                        var exactUrl = url.substring(2);
-                        if (!exactUrl.endsWith('/')) {
-                            exactUrl += '/';
-                        }
-                        html += '<li>' + exactUrl + '</li>';
-                    }
-                } else {
-                    var domain = url.endsWith('/') ? url : url + '/';
-                    if (exactMatch) {
-                        html += '<li>' + domain + '</li>';
-                    }
-                    if (wildcardMatch) {
-                        html += '<li>*.' + domain + '</li>';
-                    }
-                }
-            }
-            html += '</ul>';
-            
-            previewList.innerHTML = html;
-        }
-        
-        function validateManualUrls() {
-            var input = document.getElementById('manualUrls').value.trim();
-            var validationDiv = document.getElementById('manualUrlValidation');
-            
-            if (!input) {
-                validationDiv.innerHTML = '';
-                return;
-            }
-            
-            fetch('/validate_manual_urls', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({manual_urls: input})
-            })
-            .then(function(response) {
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success) {
-                    var html = '';
-                    if (data.valid_urls && data.valid_urls.length > 0) {
-                        html += '<div style="color: green;">✅ Gültige URLs (' + data.valid_urls.length + '): ' + data.valid_urls.join(', ') + '</div>';
-                    }
-                    if (data.invalid_urls && data.invalid_urls.length > 0) {
-                        html += '<div style="color: red;">❌ Ungültige URLs (' + data.invalid_urls.length + '): ' + data.invalid_urls.join(', ') + '</div>';
-                    }
-                    validationDiv.innerHTML = html;
-                }
-            })
-            .catch(function(error) {
-                validationDiv.innerHTML = '<div style="color: orange;">⚠️ Validierung vorübergehend nicht verfügbar</div>';
-            });
-        }
-        
-        function addManualUrls() {
-            var input = document.getElementById('manualUrls').value.trim();
-            if (!input) {
-                alert('Bitte URLs eingeben');
-                return;
-            }
-            
-            fetch('/validate_manual_urls', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({manual_urls: input})
-            })
-            .then(function(response) {
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success && data.valid_urls && data.valid_urls.length > 0) {
-                    data.valid_urls.forEach(function(url) {
-                        if (manualUrls.indexOf(url) === -1) {
-                            manualUrls.push(url);
-                        }
-                    });
-                    
-                    document.getElementById('manualUrls').value = '';
-                    document.getElementById('manualUrlValidation').innerHTML = '';
-                    
-                    displayManualUrls();
-                    updateSelectedUrls();
-                    
-                    alert(data.valid_urls.length + ' gültige URLs zur Auswahl hinzugefügt');
-                    
-                    if (data.invalid_urls && data.invalid_urls.length > 0) {
-                        alert('Hinweis: ' + data.invalid_urls.length + ' ungültige URLs ignoriert: ' + data.invalid_urls.join(', '));
-                    }
-                } else {
-                    alert('Keine gültigen URLs gefunden. Bitte Eingabe prüfen.');
-                }
-            })
-            .catch(function(error) {
-                alert('Fehler bei URL-Validierung: ' + error.message);
-            });
-        }
-        
-        function displayManualUrls() {
-            var manualSection = document.getElementById('manualUrlSection');
-            var existingDisplay = document.getElementById('manualUrlDisplay');
-            
-            if (existingDisplay) {
-                existingDisplay.remove();
-            }
-            
-            if (manualUrls.length > 0) {
-                var html = '<div id="manualUrlDisplay" style="margin-top: 15px; padding: 10px; background: #e8f5e8; border-radius: 4px;">' +
-                          '<h5>📋 Manuelle URLs (' + manualUrls.length + '):</h5>';
-                
-                for (var i = 0; i < manualUrls.length; i++) {
-                    html += '<div style="margin: 5px 0; padding: 5px; background: white; border-radius: 3px; display: flex; align-items: center;">' +
-                           '<input type="checkbox" id="manual_' + i + '" checked style="margin-right: 10px;" onchange="updateSelectedUrls()">' +
-                           '<span style="flex: 1;">' + manualUrls[i] + '</span>' +
-                           '<button onclick="removeManualUrl(' + i + ')" style="padding: 2px 8px; background: #dc3545; color: white; border: none; border-radius: 3px; cursor: pointer;">Entfernen</button>' +
-                           '</div>';
-                }
-                
-                html += '</div>';
-                manualSection.insertAdjacentHTML('afterend', html);
-            }
-        }
-        
-        function removeManualUrl(index) {
-            manualUrls.splice(index, 1);
-            displayManualUrls();
-            updateSelectedUrls();
-        }
-        
-        function activateStep(stepNumber) {
-            console.log('[DEBUG] Activating step:', stepNumber);
-            for (var i = 1; i <= 5; i++) {
-                var step = document.getElementById('step' + i);
-                if (step) {
-                    step.classList.remove('active');
-                }
-            }
-            
-            var targetStep = document.getElementById('step' + stepNumber);
-            if (targetStep) {
-                targetStep.classList.add('active');
-            }
-        }
-        
-        function debugLogs() {
-            console.log('[DEBUG] Debug button clicked');
-            
-            var resultsDiv = document.getElementById('debugResults');
-            resultsDiv.style.display = 'block';
-            resultsDiv.innerHTML = '<div class="loading">🔍 Teste Firewall-Verbindung...</div>';
-            
-            fetch('/debug_logs')
-            .then(function(response) {
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success) {
-                    var html = '<div><h3>🔧 Debug Information</h3>';
-                    
-                    html += '<h4>API Konnektivität:</h4>';
-                    if (data.connectivity.success) {
-                        html += '<div style="color: green;">✅ ' + data.connectivity.message + '</div>';
-                    } else {
-                        html += '<div style="color: red;">❌ ' + data.connectivity.error + '</div>';
-                    }
-                    
-                    html += '<h4>Verfügbare Log-Typen:</h4>';
-                    html += '<table style="width: 100%; border-collapse: collapse;">';
-                    html += '<tr><th style="border: 1px solid #ddd; padding: 8px;">Log Typ</th><th style="border: 1px solid #ddd; padding: 8px;">Status</th></tr>';
-                    
-                    Object.keys(data.log_types).forEach(function(logType) {
-                        var status = data.log_types[logType];
-                        var statusText = '';
-                        var statusColor = 'black';
-                        
-                        if (typeof status === 'number') {
-                            statusColor = status > 0 ? 'green' : 'orange';
-                            statusText = status > 0 ? '✅ ' + status + ' Einträge' : '⚠️ 0 Einträge';
-                        } else if (typeof status === 'string') {
-                            if (status.includes('Error') || status.includes('Exception')) {
-                                statusColor = 'red';
-                                statusText = '❌ ' + status;
-                            } else if (status.includes('Found')) {
-                                statusColor = 'green';
-                                statusText = '✅ ' + status;
-                            } else {
-                                statusColor = 'orange';
-                                statusText = '⚠️ ' + status;
-                            }
-                        } else {
-                            statusText = String(status);
-                        }
-                        
-                        html += '<tr><td style="border: 1px solid #ddd; padding: 8px;">' + logType + '</td>';
-                        html += '<td style="border: 1px solid #ddd; padding: 8px; color: ' + statusColor + ';">' + statusText + '</td></tr>';
-                    });
-                    html += '</table>';
-                    
-                    if (data.enhanced_features) {
-                        html += '<h4>Erweiterte Features:</h4>';
-                        html += '<ul>';
-                        if (data.enhanced_features.multi_term_search) {
-                            html += '<li>✅ Multi-Begriff OR-Logik Suche</li>';
-                        }
-                        if (data.enhanced_features.manual_url_input) {
-                            html += '<li>✅ Manuelle URL Eingabe</li>';
-                        }
-                        if (data.enhanced_features.automatic_ticket_generation) {
-                            html += '<li>✅ Automatische Ticket-ID Generierung</li>';
-                        }
-                        if (data.enhanced_features.ticket_download) {
-                            html += '<li>✅ Ticket-Log Download</li>';
-                        }
-                        html += '</ul>';
-                    }
-                    
-                    html += '</div>';
-                    
-                    resultsDiv.innerHTML = html;
-                } else {
-                    resultsDiv.innerHTML = '<div class="error">Debug fehlgeschlagen: ' + data.error + '</div>';
-                }
-            })
-            .catch(function(error) {
-                resultsDiv.innerHTML = '<div class="error">Debug-Anfrage fehlgeschlagen: ' + error.message + '</div>';
-            });
-        }
-        
-        function proceedToCategories() {
-            if (selectedUrls.length === 0) {
-                alert('Bitte mindestens eine URL auswählen');
-                return;
-            }
-            activateStep(3);
-            loadCategories();
-        }
-        
-        function loadCategories() {
-            var categorySelect = document.getElementById('urlCategory');
-            categorySelect.innerHTML = '<option value="">Kategorien werden geladen...</option>';
-            
-            fetch('/get_categories')
-            .then(function(response) {
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success) {
-                    categories = data.categories;
-                    categorySelect.innerHTML = '<option value="">Kategorie auswählen...</option>';
-                    
-                    Object.keys(categories).forEach(function(displayName) {
-                        var option = document.createElement('option');
-                        option.value = displayName;
-                        option.textContent = displayName;
-                        categorySelect.appendChild(option);
-                    });
-                    
-                    categorySelect.addEventListener('change', function() {
-                        var proceedBtn = document.getElementById('categoryProceedBtn');
-                        proceedBtn.style.display = this.value ? 'inline-block' : 'none';
-                    });
-                } else {
-                    categorySelect.innerHTML = '<option value="">Fehler: ' + data.error + '</option>';
-                }
-            })
-            .catch(function(error) {
-                categorySelect.innerHTML = '<option value="">Fehler: ' + error.message + '</option>';
-            });
-        }
-        
-        function proceedToTicket() {
-            var categorySelect = document.getElementById('urlCategory');
-            if (!categorySelect.value) {
-                alert('Bitte eine URL-Kategorie auswählen');
-                return;
-            }
-            activateStep(4);
-            updateFinalSummary();
-        }
-        
-        function updateFinalSummary() {
-            var categorySelect = document.getElementById('urlCategory');
-            var exactMatch = document.getElementById('exactMatch').checked;
-            var wildcardMatch = document.getElementById('wildcardMatch').checked;
-            
-            var urlsToAdd = [];
-            for (var i = 0; i < selectedUrls.length; i++) {
-                var url = selectedUrls[i];
-                
-                if (url.startsWith('*.')) {
-                    if (wildcardMatch) {
-                        urlsToAdd.push(url);
-                    }
-                    if (exactMatch) {
-                        var exactUrl = url.substring(2);
-                        if (!exactUrl.endsWith('/')) {
-                            exactUrl += '/';
-                        }
-                        urlsToAdd.push(exactUrl);
-                    }
-                } else {
-                    var domain = url.endsWith('/') ? url : url + '/';
-                    if (exactMatch) urlsToAdd.push(domain);
-                    if (wildcardMatch) urlsToAdd.push('*.' + domain);
-                }
-            }
-            
-            var summaryDiv = document.getElementById('finalSummary');
-            var urlsList = '';
-            for (var i = 0; i < urlsToAdd.length; i++) {
-                urlsList += '<li>' + urlsToAdd[i] + '</li>';
-            }
-            
-            var searchInfo = searchResults.length > 0 ? ' (' + searchResults.length + ' aus Suche' : '';
-            var manualInfo = manualUrls.length > 0 ? ', ' + manualUrls.length + ' manuell' : '';
-            var sourceInfo = searchInfo + manualInfo + (searchInfo ? ')' : '');
-            
-            summaryDiv.innerHTML = '<div><h3>Zusammenfassung:</h3>' +
-                                  '<p><strong>Kategorie:</strong> ' + categorySelect.value + '</p>' +
-                                  '<p><strong>URLs ausgewählt:</strong> ' + selectedUrls.length + sourceInfo + '</p>' +
-                                  '<p><strong>URLs hinzuzufügen:</strong></p><ul>' + urlsList + '</ul></div>';
-        }
-        
-        function submitWhitelist() {
-            var ticketId = document.getElementById('ticketId').value.trim();
-            var categorySelect = document.getElementById('urlCategory');
-            var exactMatch = document.getElementById('exactMatch').checked;
-            var wildcardMatch = document.getElementById('wildcardMatch').checked;
-            
-            if (!exactMatch && !wildcardMatch) {
-                alert('Bitte mindestens eine Whitelisting-Option auswählen');
-                return;
-            }
-            
-            if (!categorySelect.value) {
-                alert('Bitte eine URL-Kategorie auswählen');
-                return;
-            }
-            
-            var urlsToAdd = [];
-            for (var i = 0; i < selectedUrls.length; i++) {
-                var url = selectedUrls[i];
-                
-                if (url.startsWith('*.')) {
-                    if (wildcardMatch) {
-                        urlsToAdd.push(url);
-                    }
-                    if (exactMatch) {
-                        var exactUrl = url.substring(2);
-                        if (!exactUrl.endsWith('/')) {
-                            exactUrl += '/';
-                        }
-                        urlsToAdd.push(exactUrl);
-                    }
-                } else {
-                    var domain = url.endsWith('/') ? url : url + '/';
-                    if (exactMatch) urlsToAdd.push(domain);
-                    if (wildcardMatch) urlsToAdd.push('*.' + domain);
-                }
-            }
-            
-            if (urlsToAdd.length === 0) {
-                alert('Keine URLs zum Hinzufügen. Bitte erst URLs auswählen.');
-                return;
-            }
-            
-            var submitBtn = document.getElementById('submitBtn');
-            submitBtn.disabled = true;
-            submitBtn.textContent = '⏳ Wird abgesendet...';
-            
-            var payload = {
-                category: categorySelect.value,
-                urls: urlsToAdd,
-                ticket_id: ticketId,
-                action_type: 'both'
-            };
-            
-            console.log('[DEBUG] Submitting whitelist request:', payload);
-            
-            var submissionTimeout = setTimeout(function() {
-                console.log('[DEBUG] Submission taking longer than expected');
-            }, 30000);
-            
-            fetch('/submit_whitelist', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify(payload)
-            })
-            .then(function(response) {
-                clearTimeout(submissionTimeout);
-                console.log('[DEBUG] Submit response status:', response.status);
-                
-                var contentType = response.headers.get('Content-Type');
-                if (!contentType || !contentType.includes('application/json')) {
-                    throw new Error('Server returned non-JSON response. Expected JSON but got: ' + (contentType || 'unknown'));
-                }
-                
-                if (!response.ok) {
-                    throw new Error('HTTP error! status: ' + response.status);
-                }
-                
-                return response.json();
-            })
-            .then(function(data) {
-                clearTimeout(submissionTimeout);
-                console.log('[DEBUG] Submit response data:', data);
-                
-                if (data.ticket_id) {
-                    currentTicketId = data.ticket_id;
-                }
-                
-                activateStep(5);
-                displayResults(data);
-            })
-            .catch(function(error) {
-                clearTimeout(submissionTimeout);
-                console.error('[DEBUG] Submit error:', error);
-                
-                var errorMessage = 'Absendung fehlgeschlagen: ' + error.message;
-                
-                if (error.message.includes('non-JSON response')) {
-                    errorMessage = 'Server Fehler: Server hat unerwartete Antwort gesendet. Die Absendung könnte im Hintergrund noch laufen.';
-                } else if (error.message.includes('Failed to fetch')) {
-                    errorMessage = 'Netzwerkfehler: Konnte nicht zum Server verbinden. Bitte Verbindung prüfen.';
-                }
-                
-                activateStep(5);
-                var resultsDiv = document.getElementById('results');
-                resultsDiv.innerHTML = '<div class="error">' + errorMessage + '</div>';
-            })
-            .finally(function() {
-                clearTimeout(submissionTimeout);
-                submitBtn.disabled = false;
-                submitBtn.textContent = 'Whitelist Request absenden';
-            });
-        }
-        
-        function downloadTicket(ticketId) {
-            console.log('[DEBUG] Downloading ticket:', ticketId);
-            
-            if (!ticketId) {
-                alert('Keine Ticket-ID für Download verfügbar');
-                return;
-            }
-            
-            var downloadUrl = '/download_ticket/' + encodeURIComponent(ticketId);
-            
-            var link = document.createElement('a');
-            link.href = downloadUrl;
-            link.download = 'ticket_' + ticketId + '.log';
-            link.style.display = 'none';
-            
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            
-            console.log('[DEBUG] Download initiated for ticket:', ticketId);
-        }
-        
-        function displayResults(data) {
-            var resultsDiv = document.getElementById('results');
-            
-            if (data.success) {
-                var html = '<div class="success">' + data.message + '</div>';
-                
-                var ticketId = data.ticket_id || currentTicketId;
-                
-                // Show commit status with live updates
-                if (data.commit_job_id) {
-                    html += '<div class="commit-status" id="commitStatusDiv">';
-                    html += '<h3>🔄 Commit Status (Live Updates):</h3>';
-                    html += '<p><strong>Job ID:</strong> ' + data.commit_job_id + '</p>';
-                    html += '<div id="liveStatus">';
-                    
-                    if (data.immediate_response) {
-                        html += '<p><strong>Status:</strong> <span style="color: blue;">🔄 ÜBERMITTELT</span></p>';
-                        html += '<p><strong>Fortschritt:</strong> <span id="progressText">0%</span></p>';
-                        html += '<p id="statusMessage">⏳ Commit erfolgreich gestartet. Status wird geprüft...</p>';
-                        
-                        setTimeout(function() {
-                            startLivePolling(data.commit_job_id);
-                        }, 1000);
-                    } else if (data.auto_commit_status && data.auto_commit_status.auto_polled) {
-                        var autoStatus = data.auto_commit_status;
-                        
-                        if (autoStatus.status === 'FIN') {
-                            html += '<p><strong>Status:</strong> <span style="color: green;">✅ ABGESCHLOSSEN</span></p>';
-                            html += '<p><strong>Fortschritt:</strong> 100%</p>';
-                            html += '<p style="color: green;">🎉 Konfiguration wurde erfolgreich an die Firewall übertragen!</p>';
-                        } else if (autoStatus.status === 'FAIL' || autoStatus.status === 'ERROR') {
-                            html += '<p><strong>Status:</strong> <span style="color: red;">❌ FEHLGESCHLAGEN</span></p>';
-                            html += '<p><strong>Fortschritt:</strong> ' + (autoStatus.progress || '0') + '%</p>';
-                            html += '<p style="color: red;">⚠️ Commit fehlgeschlagen. Bitte Firewall-Logs prüfen.</p>';
-                        } else {
-                            html += '<p><strong>Status:</strong> <span style="color: orange;">⏳ ' + autoStatus.status + '</span></p>';
-                            html += '<p><strong>Fortschritt:</strong> ' + (autoStatus.progress || '0') + '%</p>';
-                            html += '<p>⏳ Wird noch verarbeitet...</p>';
-                            
-                            setTimeout(function() {
-                                startLivePolling(data.commit_job_id);
-                            }, 2000);
-                        }
-                    } else {
-                        html += '<p><strong>Status:</strong> <span style="color: blue;">🔄 WIRD GEPRÜFT...</span></p>';
-                        html += '<p><strong>Fortschritt:</strong> <span id="progressText">0%</span></p>';
-                        html += '<p id="statusMessage">⏳ Commit-Status wird geprüft...</p>';
-                        
-                        setTimeout(function() {
-                            startLivePolling(data.commit_job_id);
-                        }, 2000);
-                    }
-                    
-                    html += '</div>';
-                    html += '<button class="btn" onclick="checkCommitStatus(' + "'" + data.commit_job_id + "'" + ')" id="refreshBtn">Status aktualisieren</button>';
-                    html += '</div>';
-                } else {
-                    html += '<div style="background: #fff3cd; padding: 15px; border-radius: 4px; margin-top: 15px;">';
-                    html += '<h3>⚠️ Commit-Status unbekannt</h3>';
-                    html += '<p>URLs wurden erfolgreich aktualisiert, aber Commit-Status ist nicht verfügbar.</p>';
-                    html += '</div>';
-                }
-                
-                // Add download section - ONLY show when commit is at 100%
-                if (ticketId) {
-                    html += '<div class="download-section hidden" id="downloadSection">';
-                    html += '<h3>📥 Ticket-Log herunterladen</h3>';
-                    html += '<p><strong>Ticket ID:</strong> ' + ticketId + '</p>';
-                    html += '<p>Laden Sie die vollständige Ticket-Log-Datei für Ihre Unterlagen und Audit-Trail herunter.</p>';
-                    html += '<button class="btn btn-download" onclick="downloadTicket(' + "'" + ticketId + "'" + ')">📥 Ticket-Log herunterladen</button>';
-                    html += '</div>';
-                }
-                
-                if (data.ticket_log_file) {
-                    html += '<div style="background: #e8f5e8; padding: 15px; border-radius: 4px; margin-top: 15px;">';
-                    html += '<h3>📋 Ticket-Log erstellt:</h3>';
-                    html += '<p><strong>Log-Datei:</strong> ' + data.ticket_log_file + '</p>';
-                    html += '<p>✅ Individuelle Ticket-Log für Audit-Trail erstellt</p>';
-                    html += '</div>';
-                }
-                
-                resultsDiv.innerHTML = html;
-            } else {
-                resultsDiv.innerHTML = '<div class="error">Fehler: ' + (data.error || 'Unbekannter Fehler aufgetreten') + '</div>';
-            }
-        }
-        
-        // Live polling functionality
-        var livePollingInterval = null;
-        var livePollingAttempts = 0;
-        var maxLivePollingAttempts = 50;
-        
-        function startLivePolling(jobId) {
-            console.log('[DEBUG] Starting live polling for job:', jobId);
-            livePollingAttempts = 0;
-            
-            if (livePollingInterval) {
-                clearInterval(livePollingInterval);
-            }
-            
-            checkCommitStatusLive(jobId);
-            
-            livePollingInterval = setInterval(function() {
-                livePollingAttempts++;
-                
-                if (livePollingAttempts >= maxLivePollingAttempts) {
-                    console.log('[DEBUG] Live polling timeout');
-                    clearInterval(livePollingInterval);
-                    updateLiveStatus('TIMEOUT', 'unknown', 'Live-Polling Timeout. Bitte Status-Button verwenden.');
-                    return;
-                }
-                
-                checkCommitStatusLive(jobId);
-            }, 12000);
-        }
-        
-        function checkCommitStatusLive(jobId) {
-            console.log('[DEBUG] Live polling attempt', livePollingAttempts + 1, 'for job:', jobId);
-            
-            fetch('/commit_status', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify({job_id: jobId})
-            })
-            .then(function(response) {
-                if (!response.ok) {
-                    throw new Error('HTTP error! status: ' + response.status);
-                }
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success && data.status) {
-                    var status = data.status;
-                    console.log('[DEBUG] Live status update:', status.status, status.progress + '%');
-                    
-                    updateLiveStatus(status.status, status.progress, null, status.error);
-                    
-                    // Show download section when commit reaches 100%
-                    if (status.status === 'FIN' && status.progress === '100') {
-                        var downloadSection = document.getElementById('downloadSection');
-                        if (downloadSection) {
-                            downloadSection.classList.remove('hidden');
-                        }
-                    }
-                    
-                    if (status.status === 'FIN' || status.status === 'FAIL' || status.status === 'ERROR') {
-                        console.log('[DEBUG] Live polling completed with final status:', status.status);
-                        clearInterval(livePollingInterval);
-                        
-                        if (status.status === 'FIN') {
-                            updateLiveStatus('FIN', '100', '🎉 Konfiguration wurde erfolgreich an die Firewall übertragen!');
-                        }
-                    }
-                }
-            })
-            .catch(function(error) {
-                console.error('[DEBUG] Live polling error:', error);
-                updateLiveStatus('CHECKING', 'unknown', 'Status-Prüfung fehlgeschlagen: ' + error.message + ' (wird wiederholt...)');
-            });
-        }
-        
-        function updateLiveStatus(status, progress, message, error) {
-            console.log('[DEBUG] Updating live status:', status, progress + '%', message);
-            
-            var liveStatusDiv = document.getElementById('liveStatus');
-            if (!liveStatusDiv) {
-                return;
-            }
-            
-            var statusColor = 'orange';
-            var statusIcon = '⏳';
-            var statusText = status;
-            
-            if (status === 'FIN') {
-                statusColor = 'green';
-                statusIcon = '✅';
-                statusText = 'ABGESCHLOSSEN';
-                if (!message) message = '🎉 Konfiguration wurde erfolgreich an die Firewall übertragen!';
-            } else if (status === 'FAIL' || status === 'ERROR') {
-                statusColor = 'red';
-                statusIcon = '❌';
-                statusText = 'FEHLGESCHLAGEN';
-                if (!message) message = '⚠️ Commit fehlgeschlagen. Bitte Firewall-Logs prüfen.';
-            } else if (status === 'ACT') {
-                statusColor = 'blue';
-                statusIcon = '🔄';
-                statusText = 'AKTIV';
-                if (!message) message = '⚙️ Konfiguration wird auf Firewall angewendet...';
-            } else if (status === 'PEND') {
-                statusColor = 'orange';
-                statusIcon = '⏳';
-                statusText = 'WARTEND';
-                if (!message) message = '📋 Commit ist in der Warteschlange...';
-            }
-            
-            var newStatusHTML = '<p><strong>Status:</strong> <span style="color: ' + statusColor + ';">' + statusIcon + ' ' + statusText + '</span></p>';
-            newStatusHTML += '<p><strong>Fortschritt:</strong> ' + progress + '%</p>';
-            newStatusHTML += '<p id="statusMessage">' + message;
-            
-            if (error) {
-                newStatusHTML += '<br><small style="color: red;">Fehler: ' + error + '</small>';
-            }
-            
-            newStatusHTML += '</p>';
-            
-            liveStatusDiv.innerHTML = newStatusHTML;
-        }
-        
-        function checkCommitStatus(jobId) {
-            console.log('[DEBUG] Manual commit status check for job:', jobId);
-            
-            fetch('/commit_status', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                body: JSON.stringify({job_id: jobId})
-            })
-            .then(function(response) {
-                if (!response.ok) {
-                    throw new Error('HTTP error! status: ' + response.status);
-                }
-                return response.json();
-            })
-            .then(function(data) {
-                if (data.success && data.status) {
-                    var status = data.status;
-                    updateLiveStatus(status.status, status.progress, null, status.error);
-                    
-                    // Show download section when commit reaches 100%
-                    if (status.status === 'FIN' && status.progress === '100') {
-                        var downloadSection = document.getElementById('downloadSection');
-                        if (downloadSection) {
-                            downloadSection.classList.remove('hidden');
-                        }
-                    }
-                    
-                    if (status.status === 'FIN' || status.status === 'FAIL' || status.status === 'ERROR') {
-                        if (livePollingInterval) {
-                            clearInterval(livePollingInterval);
-                        }
-                        
-                        if (status.status === 'FIN') {
-                            updateLiveStatus('FIN', '100', '🎉 Konfiguration wurde erfolgreich an die Firewall übertragen!');
-                        }
-                    }
-                }
-            })
-            .catch(function(error) {
-                console.error('[DEBUG] Manual commit status check failed:', error);
-                updateLiveStatus('ERROR', 'unknown', 'Status-Prüfung fehlgeschlagen: ' + error.message);
-            });
-        }
-        
-        function startOver() {
-            window.location.reload();
-        }
-        
-        console.log('[DEBUG] Dashboard script loaded - Enhanced with automatic dual search, category display, and conditional download');
-    </script>
+    <script src="{{ static_url('js/dashboard.js') }}"></script>
 </body>
 </html>
 '''
@@ -1263,4 +285,55 @@ def get_login_template():
 
 def get_dashboard_template():
     """Get enhanced dashboard template with config injected"""
-    return DASHBOARD_TEMPLATE
\ No newline at end of file
+    return DASHBOARD_TEMPLATE
+
+# {{ config.NAME }} - fixed for the life of the process, so rendered into the source once
+_CONFIG_EXPRESSION = re.compile(r'\{\{\s*config\.([A-Z_]+)\s*\}\}')
+
+_TEMPLATE_SOURCES = {
+    'login': get_login_template,
+    'dashboard': get_dashboard_template,
+}
+
+_compiled: 'weakref.WeakKeyDictionary[Environment, Dict[str, Template]]' = weakref.WeakKeyDictionary()
+_compile_lock = threading.Lock()
+
+
+def prerender_static(source: str) -> str:
+    """
+    Render the config values of a template source into plain text
+
+    What is left for Jinja is only what changes per request (session,
+    form values, errors, url_for).
+    """
+    return _CONFIG_EXPRESSION.sub(lambda match: str(escape(getattr(config, match.group(1)))), source)
+
+
+def get_compiled_template(env: Environment, name: str) -> Template:
+    """
+    Compiled template for a page, built on first use and then cached
+
+    Args:
+        env: Jinja environment of the app (app.jinja_env)
+        name: 'login' or 'dashboard'
+
+    Returns:
+        Template to pass to flask.render_template
+
+    Raises:
+        KeyError: Unknown template name
+    """
+    templates = _compiled.get(env)
+    if templates is not None and name in templates:
+        return templates[name]
+    with _compile_lock:
+        templates = _compiled.setdefault(env, {})
+        if name not in templates:
+            templates[name] = env.from_string(prerender_static(_TEMPLATE_SOURCES[name]()))
+        return templates[name]
+
+
+def precompile_templates(env: Environment):
+    """Compile all page templates now instead of on their first request"""
+    for name in _TEMPLATE_SOURCES:
+        get_compiled_template(env, name)
@@ -0,0 +1,17 @@
+"""
+WSGI entry point for production servers
+=======================================
+gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import urllib3
+
+from main import create_app, setup_directories, setup_server_logging
+
+# Disable SSL warnings for self-signed certificates
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+setup_directories()
+setup_server_logging()
+
+app = create_app()